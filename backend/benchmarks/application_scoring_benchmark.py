@@ -0,0 +1,87 @@
+"""
+Application re-scoring benchmark: per-row evaluate_application vs. the vectorized bulk path.
+
+Seeds ``--applications`` applications (10000 by default) with varied answers
+in a temporary SQLite database and re-scores the course twice: once by
+loading every ``CourseApplication`` and calling ``evaluate_application`` on
+it, and once with ``ApplicationScoringService.rescore``.
+
+    python -m benchmarks.application_scoring_benchmark [--applications 10000]
+"""
+
+import argparse
+import random
+
+from benchmarks.common import make_benchmark_app, report, timed
+
+
+def seed(db, applications):
+    from src.models.user_models import Role, User
+    from src.models.course_models import Course
+    from src.models.course_application import CourseApplication
+
+    role = Role(name='admin')
+    db.session.add(role)
+    db.session.flush()
+    admin = User(username='bench', email='bench@example.com', role_id=role.id, password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+    course = Course(title='Course', description='d', instructor_id=admin.id)
+    db.session.add(course)
+    db.session.flush()
+
+    rng = random.Random(0)
+    db.session.execute(CourseApplication.__table__.insert(), [{
+        'course_id': course.id, 'full_name': f'Applicant {i}', 'email': f'a{i}@example.com',
+        'phone': '+250700000000', 'motivation': 'm' * rng.randint(0, 600),
+        'learning_outcomes': 'o' * rng.randint(0, 250), 'career_impact': 'c' * rng.randint(0, 250),
+        'has_computer': rng.random() < 0.8, 'has_internet': rng.random() < 0.9,
+        'internet_access_type': rng.choice(['stable_broadband', 'mobile_data', 'limited_access', 'public_wifi']),
+        'online_learning_experience': rng.random() < 0.5, 'committed_to_complete': rng.random() < 0.9,
+        'agrees_to_assessments': rng.random() < 0.9,
+        'tool_skill_level': rng.choice(['Beginner', 'Intermediate', 'Advanced', 'Expert', 'Never used']),
+        'tool_tasks_done': rng.choice(['[]', '["a"]', '["a", "b", "c"]']),
+        'education_level': rng.choice(['high_school', 'diploma', 'bachelors', 'masters', 'phd']),
+        'current_status': rng.choice(['student', 'employed', 'unemployed']),
+        'preferred_learning_mode': rng.choice(['self_paced', 'live_sessions', 'hybrid']),
+        'available_time': rng.choice(['["morning"]', '["morning", "evening"]']),
+        'country': rng.choice(['Rwanda', 'Kenya', 'France']), 'status': 'pending', 'is_draft': False,
+    } for i in range(applications)])
+    db.session.commit()
+    return course.id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--applications', type=int, default=10000)
+    args = parser.parse_args()
+
+    app = make_benchmark_app()
+    from src.models.user_models import db
+    from src.models.course_application import CourseApplication
+    from src.services.application_scoring_service import ApplicationScoringService
+    from src.utils.application_scoring import evaluate_application
+
+    with app.app_context():
+        db.create_all()
+        course_id = seed(db, args.applications)
+
+        def loop():
+            applications = CourseApplication.query.filter_by(course_id=course_id).all()
+            for application in applications:
+                evaluate_application(application)
+            db.session.commit()
+            return len(applications)
+
+        seconds, scored = timed(loop, repeat=1)
+        report('per-row evaluate_application', seconds, f'{scored} scored')
+
+        # Reset so the bulk path has every row to write back
+        CourseApplication.query.update({'final_rank_score': 0.0}, synchronize_session=False)
+        db.session.commit()
+        seconds, result = timed(lambda: ApplicationScoringService.rescore(course_id=course_id), repeat=1)
+        report('vectorized bulk rescore', seconds, f"{result['scored']} scored, {result['updated']} written")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Shared helpers for the benchmark scripts in this directory.
+
+Benchmarks run against a throwaway SQLite database so they never touch the
+development or production data.  Run them from the backend directory, e.g.
+
+    python -m benchmarks.forum_search_benchmark
+"""
+
+import atexit
+import importlib
+import os
+import pkgutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+
+
+def make_benchmark_app(database_uri=None):
+    """Create a bare Flask app bound to a temporary SQLite database."""
+    import src.models
+    from src.models.user_models import db
+
+    # Register every model so foreign keys resolve in create_all()
+    for module in pkgutil.iter_modules(src.models.__path__):
+        importlib.import_module(f'src.models.{module.name}')
+
+    if database_uri is None:
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='afritec_bench_')
+        os.close(fd)
+        atexit.register(lambda: os.path.exists(path) and os.remove(path))
+        database_uri = f'sqlite:///{path}'
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def timed(fn, repeat=5):
+    """Run ``fn`` ``repeat`` times and return (median_seconds, last_result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def report(label, seconds, extra=''):
+    print(f'{label:<45} {seconds * 1000:>10.2f} ms  {extra}')
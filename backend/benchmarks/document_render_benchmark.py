@@ -0,0 +1,140 @@
+"""
+Document rendering benchmark: offer letters and payment slips.
+
+Offer letters are timed three ways: the single-pass canvas drawing they
+used before, the cached background layer + per-offer overlay, and the
+same through the worker pool.  Payment slips (when WeasyPrint and its
+system libraries are available) compare a plain ``HTML().write_pdf()``
+against the cached-stylesheet renderer, serially and pooled.
+
+    python -m benchmarks.document_render_benchmark [--docs 200] [--workers 4]
+"""
+
+import argparse
+import hashlib
+from io import BytesIO
+
+from benchmarks.common import report, timed
+
+
+def offer_snapshots(count):
+    return [
+        {
+            'reference_code': f'ATB-INT-{i:05d}',
+            'offer_number': f'OFR-2026-{i:04d}',
+            'full_name': f'Candidate Number{i}',
+            'first_name': 'Candidate',
+            'track_name': 'Data Analytics',
+            'track_label': 'Data Analytics',
+            'start_date': '02 March 2026',
+            'username': f'candidate.number{i}.a1b2c3',
+            'verification_hash': hashlib.sha256(str(i).encode()).hexdigest(),
+            'issued': '18 October 2026',
+        }
+        for i in range(count)
+    ]
+
+
+def slip_kwargs(count):
+    return [
+        {
+            'student_name': f'Student {i}',
+            'student_email': f'student{i}@example.com',
+            'course_title': 'Excel for Data Analysis',
+            'cohort_label': 'Cohort 7',
+            'amount_paid': 120.0,
+            'payment_method': 'mobile_money',
+            'payment_reference': f'MM-{i:08d}',
+            'enrollment_id': i,
+            'receipt_number': f'RCP-20261018-{i:05d}',
+            'verification_hash': hashlib.sha256(str(i).encode()).hexdigest(),
+        }
+        for i in range(count)
+    ]
+
+
+def legacy_offer_pdf(snapshot):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from src.services.internship_offer_service import _draw_offer_background, _draw_offer_details
+
+    buffer = BytesIO()
+    pdf_canvas = canvas.Canvas(buffer, pagesize=A4)
+    _draw_offer_background(pdf_canvas)
+    _draw_offer_details(pdf_canvas, snapshot)
+    pdf_canvas.showPage()
+    pdf_canvas.save()
+    return buffer.getvalue()
+
+
+def docs_per_sec(count, seconds):
+    return f'{count / seconds:>8.1f} docs/sec'
+
+
+def bench_offers(count, workers, repeat):
+    from src.services.document_render_service import DocumentRenderService
+    from src.services.internship_offer_service import render_offer_pdf
+
+    snapshots = offer_snapshots(count)
+
+    seconds, _ = timed(lambda: [legacy_offer_pdf(s) for s in snapshots], repeat=repeat)
+    report(f'offers: single-pass canvas x{count}', seconds, docs_per_sec(count, seconds))
+
+    render_offer_pdf(snapshots[0])  # build the background layer outside the timing
+    seconds, _ = timed(lambda: [render_offer_pdf(s) for s in snapshots], repeat=repeat)
+    report(f'offers: cached layer x{count}', seconds, docs_per_sec(count, seconds))
+
+    DocumentRenderService.render_many(render_offer_pdf, snapshots[:workers], max_workers=workers)  # warm pool
+    seconds, rendered = timed(
+        lambda: DocumentRenderService.render_many(render_offer_pdf, snapshots, max_workers=workers),
+        repeat=repeat,
+    )
+    failed = sum(1 for pdf in rendered if pdf is None)
+    report(f'offers: cached layer, {workers} workers x{count}', seconds,
+           f'{docs_per_sec(count, seconds)}  {failed} failed')
+
+
+def bench_slips(count, workers, repeat):
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError) as e:
+        print(f'payment slips skipped: WeasyPrint unavailable ({e})')
+        return
+
+    from src.services.document_render_service import DocumentRenderService
+    from src.services.payment_slip_service import (
+        generate_payment_slip_html,
+        generate_payment_slip_pdfs,
+    )
+
+    slips = slip_kwargs(count)
+
+    seconds, _ = timed(
+        lambda: [HTML(string=generate_payment_slip_html(**s)).write_pdf() for s in slips], repeat=repeat
+    )
+    report(f'slips: uncached WeasyPrint x{count}', seconds, docs_per_sec(count, seconds))
+
+    seconds, _ = timed(
+        lambda: [DocumentRenderService.render_html_pdf(generate_payment_slip_html(**s)) for s in slips],
+        repeat=repeat,
+    )
+    report(f'slips: cached stylesheet x{count}', seconds, docs_per_sec(count, seconds))
+
+    seconds, _ = timed(lambda: generate_payment_slip_pdfs(slips, max_workers=workers), repeat=repeat)
+    report(f'slips: cached stylesheet, {workers} workers x{count}', seconds, docs_per_sec(count, seconds))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--docs', type=int, default=200)
+    parser.add_argument('--slips', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bench_offers(args.docs, args.workers, args.repeat)
+    bench_slips(args.slips, args.workers, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
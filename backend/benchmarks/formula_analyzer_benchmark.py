@@ -0,0 +1,124 @@
+"""
+FormulaAnalyzer benchmark on a large filled-down workbook.
+
+Builds ExcelAnalyzer-shaped output for a workbook of ``--formulas`` formulas
+(default 100k): a handful of column formulas filled down every row, as
+student workbooks usually are, plus a share of one-off formulas.  Times the
+per-formula regex scans the analyzer used to run against the R1C1-grouped,
+tokenized analysis, cold and with the tokenizer cache warm.
+
+    python -m benchmarks.formula_analyzer_benchmark [--formulas 100000] [--unique 0.01]
+"""
+
+import argparse
+import random
+import re
+from collections import Counter
+
+from benchmarks.common import report, timed
+
+COLUMN_TEMPLATES = [
+    'B{r}*C{r}',
+    'IFERROR(VLOOKUP(A{r},Lookup!$A$2:$D$500,3,FALSE),0)',
+    'SUMIFS(Sales!$D:$D,Sales!$A:$A,$A{r},Sales!$B:$B,">="&$H$1)',
+    'IF(AND(D{r}>100,E{r}<>""),ROUND(D{r}*$J$1,2),"N/A")',
+    'INDEX($K$2:$K$200,MATCH(A{r},$L$2:$L$200,0))',
+    'TEXT(F{r},"yyyy-mm-dd")&" - "&UPPER(LEFT(G{r},3))',
+    '_xlfn.XLOOKUP(A{r},Data!$A$2:$A$900,Data!$C$2:$C$900,"missing")',
+    'AVERAGE(B{r}:G{r})/MAX(1,COUNT(B{r}:G{r}))',
+]
+COLUMNS = 'HIJKLMNO'
+
+
+def build_analysis(formula_count, unique_share, seed=7):
+    rng = random.Random(seed)
+    rows = formula_count // len(COLUMN_TEMPLATES)
+    formulas = []
+    for r in range(2, rows + 2):
+        for col, template in zip(COLUMNS, COLUMN_TEMPLATES):
+            if rng.random() < unique_share:
+                text = f'=SUM(A{r}:A{r + rng.randint(1, 50)})*{rng.randint(2, 999)}'
+            else:
+                text = '=' + template.format(r=r)
+            formulas.append({'cell': f'{col}{r}', 'formula': text, 'sheet': 'Report'})
+    return {'sheets': [{'name': 'Report', 'formulas': formulas, 'cell_errors': []}]}
+
+
+# The per-formula regex passes FormulaAnalyzer ran before grouping
+_FUNC_RE = re.compile(r'([A-Z][A-Z0-9_.]+)\s*\(', re.IGNORECASE)
+_ABS_COL_RE = re.compile(r'\$[A-Z]+\d+')
+_ABS_ROW_RE = re.compile(r'[A-Z]+\$\d+')
+_ABS_BOTH_RE = re.compile(r'\$[A-Z]+\$\d+')
+_ERROR_FUNCS = ('IFERROR', 'IFNA', 'ISERROR', 'ISNA', 'ISERR', 'ISBLANK', 'ISNUMBER', 'ISTEXT',
+                'ISLOGICAL', 'ISNONTEXT', 'ISREF', 'ISFORMULA', 'ISEVEN', 'ISODD', 'ERROR.TYPE', 'TYPE')
+
+
+def legacy_analyze(analysis):
+    formulas = [f for sheet in analysis['sheets'] for f in sheet['formulas']]
+    functions = Counter()
+    refs = Counter()
+    error_funcs = set()
+    max_nesting = magic = 0
+    for f in formulas:
+        text = f['formula']
+        for m in _FUNC_RE.findall(text):
+            functions[m.upper()] += 1
+        both = len(_ABS_BOTH_RE.findall(text))
+        col = len(_ABS_COL_RE.findall(text)) - both
+        row = len(_ABS_ROW_RE.findall(text)) - both
+        refs['absolute'] += both
+        refs['mixed'] += col + row
+        refs['relative'] += max(0, len(re.findall(r'[A-Z]+\d+', text)) - both - col - row)
+        upper = text.upper()
+        error_funcs.update(fn for fn in _ERROR_FUNCS if fn in upper)
+        depth = deepest = 0
+        for ch in text:
+            if ch == '(':
+                depth += 1
+                deepest = max(deepest, depth)
+            elif ch == ')':
+                depth -= 1
+        max_nesting = max(max_nesting, deepest)
+        if re.findall(r'(?<![A-Z$])(\d{2,})(?!\d*[A-Z])', text):
+            magic += 1
+    return functions, refs, error_funcs, max_nesting, magic
+
+
+def formulas_per_sec(count, seconds):
+    return f'{count / seconds:>12,.0f} formulas/sec'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--formulas', type=int, default=100_000)
+    parser.add_argument('--unique', type=float, default=0.01, help='share of one-off formulas')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    from src.services.excel_grading.formula_analyzer import (
+        FormulaAnalyzer,
+        profile_formula,
+        tokenize_formula,
+    )
+
+    analysis = build_analysis(args.formulas, args.unique)
+    count = sum(len(sheet['formulas']) for sheet in analysis['sheets'])
+
+    seconds, _ = timed(lambda: legacy_analyze(analysis), repeat=args.repeat)
+    report(f'legacy regex scans x{count:,}', seconds, formulas_per_sec(count, seconds))
+
+    def cold():
+        tokenize_formula.cache_clear()
+        profile_formula.cache_clear()
+        return FormulaAnalyzer(analysis).analyze()
+
+    seconds, result = timed(cold, repeat=args.repeat)
+    report(f'grouped + tokenized, cold x{count:,}', seconds,
+           f"{formulas_per_sec(count, seconds)}  {result['unique_formula_count']:,} unique")
+
+    seconds, _ = timed(lambda: FormulaAnalyzer(analysis).analyze(), repeat=args.repeat)
+    report(f'grouped + tokenized, warm cache x{count:,}', seconds, formulas_per_sec(count, seconds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Forum search benchmark: legacy ilike scan vs. the full-text index.
+
+Builds a synthetic corpus of forum threads (100k by default) in a temporary
+SQLite database and times the old ``ilike('%q%')`` query against
+``ForumSearchService.search_threads``.
+
+    python -m benchmarks.forum_search_benchmark [--posts 100000]
+"""
+
+import argparse
+import random
+
+from sqlalchemy import or_
+
+from benchmarks.common import make_benchmark_app, report, timed
+
+WORDS = (
+    'python pandas excel formula pivot table chart loop function variable '
+    'database query index join merge lookup vlookup sum average filter sort '
+    'assignment project quiz module lesson deadline grade feedback review '
+    'error exception debug install package import class object method list '
+    'dictionary string number date format macro power query dashboard report'
+).split()
+
+QUERIES = ['pandas merge', 'vlookup', 'pivot chart', 'debug exception', 'zzznomatch']
+
+
+# Pad the topical words with synthetic filler so term frequencies follow a
+# Zipf-like curve, as in real discussion text.
+VOCABULARY = WORDS + [f'w{i:04d}' for i in range(5000)]
+_WEIGHTS = [1.0 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def _sentence(rng, n):
+    return ' '.join(rng.choices(VOCABULARY, weights=_WEIGHTS, k=n))
+
+
+def build_corpus(db, posts, seed=42):
+    from src.models.user_models import Role, User
+    from src.models.student_models import ForumPost, StudentForum
+
+    rng = random.Random(seed)
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    user = User(username='bench', email='bench@example.com', role_id=role.id, password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    forums = [StudentForum(title=f'Forum {i} {_sentence(rng, 3)}', description=_sentence(rng, 12), created_by=user.id)
+              for i in range(50)]
+    db.session.add_all(forums)
+    db.session.flush()
+
+    rows = [
+        {
+            'forum_id': forums[i % len(forums)].id,
+            'author_id': user.id,
+            'title': _sentence(rng, 6),
+            'content': _sentence(rng, rng.randint(30, 120)),
+            'is_active': True,
+            'is_approved': True,
+            'like_count': rng.randint(0, 50),
+            'view_count': 0,
+        }
+        for i in range(posts)
+    ]
+    db.session.execute(ForumPost.__table__.insert(), rows)
+    db.session.commit()
+
+
+def legacy_search(q):
+    from src.models.student_models import ForumPost
+
+    return ForumPost.query.filter(
+        ForumPost.is_active == True,
+        ForumPost.is_approved == True,
+        ForumPost.parent_post_id == None,
+        or_(ForumPost.title.ilike(f'%{q}%'), ForumPost.content.ilike(f'%{q}%'))
+    ).all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = make_benchmark_app()
+    from src.models.user_models import db
+    from src.services.forum_search_service import ForumSearchService
+
+    with app.app_context():
+        db.create_all()
+        print(f'Building corpus of {args.posts} threads...')
+        build_corpus(db, args.posts)
+
+        seconds, _ = timed(ForumSearchService.ensure_index, repeat=1)
+        report('index build', seconds, ForumSearchService.backend())
+
+        for q in QUERIES:
+            legacy_s, legacy_rows = timed(lambda: legacy_search(q), repeat=args.repeat)
+            fts_s, (hits, total) = timed(
+                lambda: ForumSearchService.search_threads(q, page=1, per_page=20), repeat=args.repeat
+            )
+            report(f'legacy ilike  "{q}"', legacy_s, f'{len(legacy_rows)} rows')
+            report(f'full-text p1  "{q}"', fts_s, f'{len(hits)}/{total} hits')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+AI JSON repair benchmark.
+
+Parses every saved AI output in ``--corpus`` (default
+tests/fixtures/ai_outputs; point it at ``AI_JSON_CORPUS_DIR`` to replay
+responses saved in production) with the regex pipeline
+``JSONResponseParser`` used to run — clean, then up to five rewrite
+strategies, each re-scanning the whole text — and with the single-pass
+``repair_json``. Then does the same for a lesson payload of ``--scale``
+copies of the corpus lesson, with raw newlines, inner quotes and a
+trailing comma, and for a response cut off inside a ``--token``-character
+unbroken string (base64, a long URL) where the bare-key regex backtracks.
+
+    python -m benchmarks.json_repair_benchmark [--corpus DIR] [--scale 20] [--token 20000] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import re
+
+from benchmarks.common import report, timed
+from src.services.ai.json_repair import parse_repaired
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), '..', 'tests', 'fixtures', 'ai_outputs')
+
+
+def legacy_clean(text):
+    cleaned = text.strip()
+    if cleaned.startswith('```json'):
+        cleaned = cleaned[7:]
+    elif cleaned.startswith('```'):
+        cleaned = cleaned[3:]
+    if cleaned.endswith('```'):
+        cleaned = cleaned[:-3]
+    cleaned = cleaned.strip()
+    out, in_string = [], False
+    for i, char in enumerate(cleaned):
+        if char == '"' and (i == 0 or cleaned[i - 1] != '\\'):
+            in_string = not in_string
+            out.append(char)
+        elif char == '\n' and in_string:
+            out.append('\\n')
+        elif char == '\r':
+            pass
+        elif char == '\t' and in_string:
+            out.append('    ')
+        else:
+            out.append(char)
+    return ''.join(out)
+
+
+def legacy_parse(text):
+    """The clean / recover / extract sequence of the old JSONResponseParser"""
+    cleaned = legacy_clean(text)
+    try:
+        return json.loads(cleaned)
+    except json.JSONDecodeError:
+        pass
+    strategies = [
+        lambda t: re.sub(r'"([^"]*?)\n([^"]*?)"', lambda m: '"' + m.group(1) + '\\n' + m.group(2) + '"', t),
+        lambda t: re.sub(r',\s*\n\s*]', ']', re.sub(r',\s*\n\s*}', '}', t.replace(',}', '}').replace(',]', ']'))),
+        lambda t: re.sub(r'(\w+):', r'"\1":', t),
+        lambda t: re.sub(r'](\s*){', r'],\1{', re.sub(r'}(\s*){', r'},\1{', re.sub(r'(\s+)(\w+)(\s*):', r'\1"\2"\3:', t))),
+    ]
+    for strategy in strategies:
+        try:
+            return json.loads(strategy(cleaned))
+        except json.JSONDecodeError:
+            pass
+    start, end = cleaned.find('{'), cleaned.rfind('}')
+    if start != -1 and end > start:
+        try:
+            return json.loads(legacy_clean(cleaned[start:end + 1]))
+        except json.JSONDecodeError:
+            pass
+    return None
+
+
+def new_parse(text):
+    try:
+        return parse_repaired(text)
+    except ValueError:
+        return None
+
+
+def load_corpus(directory):
+    texts = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.txt'):
+            with open(os.path.join(directory, name), encoding='utf-8') as f:
+                texts[name] = f.read()
+    return texts
+
+
+def large_lesson(corpus, scale):
+    lesson = json.loads(corpus.get('lesson_content_clean.txt') or json.dumps({'content_data': 'Text. ' * 500}))
+    lesson['content_data'] = '\n\n'.join([lesson['content_data']] * scale) + '\n\nAs the saying goes, "practice makes perfect".'
+    text = json.dumps(lesson, indent=2, ensure_ascii=False)
+    text = re.sub(r'(?<!\\)\\n', '\n', text).replace('\\"practice makes perfect\\"', '"practice makes perfect"')
+    return '```json\n' + text[:-1].rstrip() + ',\n}\n```'
+
+
+def run(label, parse, texts, repeat):
+    seconds, parsed = timed(lambda: [parse(text) for text in texts], repeat=repeat)
+    ok = sum(1 for value in parsed if value)
+    report(label, seconds, f'{ok}/{len(texts)} parsed, {sum(map(len, texts)) / 1024:,.0f} KiB')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='directory of saved raw AI outputs (*.txt)')
+    parser.add_argument('--scale', type=int, default=20, help='copies of the corpus lesson in the large payload')
+    parser.add_argument('--token', type=int, default=20000, help='length of the unbroken string in the cut-off response')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    print(f'{len(corpus)} saved outputs from {os.path.abspath(args.corpus)}')
+    texts = list(corpus.values())
+    run('legacy regex pipeline: corpus', legacy_parse, texts, args.repeat)
+    run('single-pass repair: corpus', new_parse, texts, args.repeat)
+
+    large = [large_lesson(corpus, args.scale)]
+    run(f'legacy regex pipeline: lesson x{args.scale}', legacy_parse, large, args.repeat)
+    run(f'single-pass repair: lesson x{args.scale}', new_parse, large, args.repeat)
+
+    cut_off = ['{"title": "Image lesson", "image_data": "' + 'A' * args.token]
+    run(f'legacy regex pipeline: cut-off {args.token}-char token', legacy_parse, cut_off, 1)
+    run(f'single-pass repair: cut-off {args.token}-char token', new_parse, cut_off, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
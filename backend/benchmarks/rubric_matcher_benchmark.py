@@ -0,0 +1,74 @@
+"""
+RubricGenerator vocabulary matching benchmark.
+
+Builds assignment instructions of ``--words`` words (default 1500) in which
+``--density`` of the words (default 0.03) are vocabulary keywords, and times the per-keyword ``keyword in text`` loop
+the generator used to run against the compiled ``KeywordMatcher`` pass, for
+concept extraction alone and for a full ``generate()`` call.
+
+    python -m benchmarks.rubric_matcher_benchmark [--words 1500] [--density 0.03] [--repeat 20]
+"""
+
+import argparse
+import random
+
+from benchmarks.common import report, timed
+
+FILLER = ('the students should use a workbook sheet then your report data sales region '
+          'quarter explain build define compute format each column row total').split()
+
+
+def build_instructions(word_count, keywords, density, seed=5):
+    rng = random.Random(seed)
+    lines = []
+    for part in range(1, 4):
+        lines.append(f'Part {part}: ' + ' '.join(rng.choice(FILLER) for _ in range(6)))
+        for task in range(1, 5):
+            words = [rng.choice(keywords) if rng.random() < density else rng.choice(FILLER)
+                     for _ in range(word_count // 12)]
+            lines.append(f'{task}. ' + ' '.join(words).capitalize() + '.')
+    return '\n'.join(lines)
+
+
+def legacy_scan(text, vocabulary):
+    text_lower = text.lower()
+    return [entry for entry in vocabulary if entry[0] in text_lower]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=1500)
+    parser.add_argument('--density', type=float, default=0.03, help='share of words that are keywords')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    from src.services.excel_grading.rubric_generator import (
+        _CONCEPT_MATCHER,
+        _CONCEPT_VOCABULARY,
+        RubricGenerator,
+    )
+
+    keywords = [entry[0] for entry in _CONCEPT_VOCABULARY]
+    text = build_instructions(args.words, keywords, args.density)
+    print(f'{len(keywords)} vocabulary keywords, {len(text):,} chars of instructions')
+
+    seconds, found = timed(lambda: legacy_scan(text, _CONCEPT_VOCABULARY), repeat=args.repeat)
+    report('legacy keyword-in loop', seconds, f'{len(found)} keywords found')
+
+    seconds, found = timed(lambda: _CONCEPT_MATCHER.found(text.lower()), repeat=args.repeat)
+    report('compiled matcher', seconds, f'{len(found)} keywords found')
+
+    seconds, mentions = timed(lambda: list(_CONCEPT_MATCHER.finditer(text.lower())), repeat=args.repeat)
+    report('compiled matcher with positions', seconds, f'{len(mentions)} occurrences')
+
+    generator = RubricGenerator()
+    seconds, rubric = timed(
+        lambda: generator.generate('Sales analysis', '', text, points_possible=100),
+        repeat=args.repeat,
+    )
+    report('full generate()', seconds,
+           f"{len(rubric['criteria'])} criteria, {rubric['concept_count']} concepts")
+
+
+if __name__ == '__main__':
+    main()
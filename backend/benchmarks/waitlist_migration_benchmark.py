@@ -0,0 +1,91 @@
+"""
+Waitlist migration benchmark: per-application loop vs. the set-based bulk path.
+
+Seeds ``--applications`` waitlisted applications (1000 by default) in a
+temporary SQLite database and migrates them to an uncapped cohort twice:
+once by calling ``migrate_application_to_cohort`` for each application (a
+transaction per application, as the bulk endpoint used to) and once with
+``bulk_migrate_waitlist_to_next_cohort``.
+
+    python -m benchmarks.waitlist_migration_benchmark [--applications 1000]
+"""
+
+import argparse
+
+from sqlalchemy import event
+
+from benchmarks.common import make_benchmark_app, report, timed
+
+
+def seed(db, applications):
+    from src.models.user_models import Role, User
+    from src.models.course_models import ApplicationWindow, Course
+    from src.models.course_application import CourseApplication
+
+    role = Role(name='admin')
+    db.session.add(role)
+    db.session.flush()
+    admin = User(username='bench', email='bench@example.com', role_id=role.id, password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+
+    windows = {}
+    for name in ('loop', 'bulk'):
+        course = Course(title=f'Course {name}', description='d', instructor_id=admin.id)
+        db.session.add(course)
+        db.session.flush()
+        source = ApplicationWindow(course_id=course.id, cohort_label=f'{name} Jan')
+        target = ApplicationWindow(course_id=course.id, cohort_label=f'{name} Mar')
+        db.session.add_all([source, target])
+        db.session.flush()
+        db.session.execute(CourseApplication.__table__.insert(), [{
+            'course_id': course.id, 'full_name': f'Applicant {i}', 'email': f'{name}{i}@example.com',
+            'phone': '+250700000000', 'motivation': 'm', 'status': 'waitlisted', 'is_draft': False,
+            'application_window_id': source.id, 'final_rank_score': float(i % 97),
+        } for i in range(applications)])
+        windows[name] = (course.id, source.id, target.id)
+    db.session.commit()
+    return admin.id, windows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--applications', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = make_benchmark_app()
+    from src.models.user_models import db
+    from src.services.waitlist_service import WaitlistService
+
+    with app.app_context():
+        db.create_all()
+        admin_id, windows = seed(db, args.applications)
+        statements = []
+
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', count_statement)
+
+        course_id, source_id, target_id = windows['loop']
+
+        def loop():
+            applications = WaitlistService.get_waitlisted_applications(course_id, source_id)
+            return sum(WaitlistService.migrate_application_to_cohort(a.id, target_id, admin_id)[0]
+                       for a in applications)
+
+        seconds, moved = timed(loop, repeat=1)
+        report('per-application loop', seconds, f'{moved} migrated, {len(statements)} statements')
+
+        statements.clear()
+        course_id, source_id, target_id = windows['bulk']
+        seconds, (_, _, result) = timed(lambda: WaitlistService.bulk_migrate_waitlist_to_next_cohort(
+            course_id, source_id, target_id, admin_id), repeat=1)
+        report('set-based bulk migration', seconds,
+               f"{result['migrated_count']} migrated, {len(statements)} statements")
+
+        event.remove(db.engine, 'before_cursor_execute', count_statement)
+
+
+if __name__ == '__main__':
+    main()
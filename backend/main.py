@@ -30,6 +30,8 @@ from src.models.file_models import FileComment, FileAnalysis # Import enhanced f
 from src.models.notification_models import Notification # Import notification model
 from src.models.excel_grading_models import ExcelGradingResult # Import Excel AI grading model
 from src.models.task_models import BackgroundTask, TaskStatus # Import background task models for multi-worker support
+from src.models.email_outbox_models import EmailOutbox # Import email outbox model for batched delivery
+from src.models.email_campaign_models import EmailCampaign, EmailCampaignRecipient # Import resumable email campaign models
 from src.models.grading_models import (
     Rubric, RubricCriterion, FeedbackTemplate, GradingHistory, GradingSession
 )  # Import grading enhancement models
@@ -77,6 +79,14 @@ from src.utils.db_health import get_pool_status, force_pool_cleanup, check_datab
 from src.services.background_service import background_service # Import background service for initialization
 from src.services.cohort_migration_scheduler import start_cohort_migration_scheduler # Import cohort migration scheduler
 from src.services.cohort_start_notification_scheduler import start_cohort_start_notification_scheduler  # Cohort start email notifications
+from src.services.forum_view_counter import start_forum_view_flusher  # Buffered forum view counts
+from src.services.lesson_progress_buffer import start_lesson_progress_flusher  # Coalesced lesson progress heartbeats
+from src.services.email_outbox_service import start_email_outbox_dispatcher  # Batched Brevo delivery of queued emails
+from src.services.email_campaign_service import start_email_campaign_resumer  # Resumes pending/abandoned email campaigns
+from src.services.forum_search_service import ForumSearchService  # Forum full-text search index
+from src.services.application_search_service import ApplicationSearchService  # Applicant search index
+from src.services.grading_queue_service import GradingQueueService  # Grading queue keyset index
+from src.services.student_summary_service import StudentSummaryService  # Admin student summary projection (registers stale-row hook)
 from flask_migrate import Migrate
 from flask_cors import CORS
 
@@ -401,6 +411,9 @@ def _auto_migrate_missing_columns():
 with app.app_context():
     db.create_all()
     _auto_migrate_missing_columns()
+    ForumSearchService.ensure_index()
+    ApplicationSearchService.ensure_index()
+    GradingQueueService.ensure_index()
     if not Role.query.filter_by(name='student').first():
         db.session.add(Role(name='student'))
     if not Role.query.filter_by(name='instructor').first():
@@ -424,6 +437,18 @@ start_cohort_migration_scheduler(app)
 # Start cohort-start email notification scheduler (notifies students when their cohort begins)
 start_cohort_start_notification_scheduler(app)
 
+# Flush buffered forum view counts periodically (per worker)
+start_forum_view_flusher(app)
+
+# Flush coalesced lesson progress heartbeats periodically (per worker)
+start_lesson_progress_flusher(app)
+
+# Deliver queued outbox emails in Brevo batches (claims are safe across workers)
+start_email_outbox_dispatcher(app)
+
+# Pick up email campaigns that are pending or whose worker stopped (lease-based, safe across workers)
+start_email_campaign_resumer(app)
+
 # Request lifecycle hooks for connection management
 @app.teardown_appcontext
 def shutdown_session(exception=None):
@@ -47,6 +47,8 @@ from .utils import (
 )
 from src.services.internship_mailer import InternshipMailer
 from src.services.internship_offer_service import InternshipOfferService
+from src.services.export_service import ExportService
+from src.services.background_service import background_service
 
 logger = logging.getLogger(__name__)
 
@@ -759,102 +761,13 @@ def assign_cohort(app_id):
 @internships_bp.route('/admin/applications/export', methods=['GET'])
 @role_required(['admin', 'staff'])
 def export_applications_csv():
-    """Export applications data as CSV with current filters."""
-    try:
-        import csv
-        import io
-
-        status_filter = request.args.get('status')
-        track_id = request.args.get('track_id')
-        cohort_id = request.args.get('cohort_id')
-        search = request.args.get('search')
-        applicant_type = request.args.get('applicant_type')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-
-        query = InternshipApplication.query.order_by(InternshipApplication.created_at.desc())
-
-        if status_filter:
-            try:
-                query = query.filter_by(status=ApplicationStatusEnum(status_filter))
-            except ValueError:
-                pass
-        if track_id:
-            query = query.filter_by(track_id=track_id)
-        if cohort_id:
-            query = query.filter_by(cohort_id=cohort_id)
-        if applicant_type:
-            try:
-                query = query.filter_by(applicant_type=ApplicantTypeEnum(applicant_type))
-            except ValueError:
-                pass
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(or_(
-                InternshipApplication.full_name.ilike(search_term),
-                InternshipApplication.email.ilike(search_term),
-                InternshipApplication.reference_code.ilike(search_term),
-            ))
-        if start_date:
-            try:
-                query = query.filter(InternshipApplication.created_at >= datetime.fromisoformat(start_date))
-            except ValueError:
-                pass
-        if end_date:
-            try:
-                query = query.filter(InternshipApplication.created_at <= datetime.fromisoformat(end_date))
-            except ValueError:
-                pass
-
-        applications = query.all()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        writer.writerow([
-            'Reference Code', 'Full Name', 'Email', 'Phone', 'Applicant Type',
-            'Track', 'Cohort', 'Status', 'Motivation Letter',
-            'Portfolio URL', 'GitHub URL', 'LinkedIn URL',
-            'Reviewer', 'Reviewer Notes', 'Interview Date', 'Interview Notes',
-            'Applied Date', 'Last Updated'
-        ])
-
-        for app in applications:
-            writer.writerow([
-                app.reference_code,
-                app.full_name,
-                app.email,
-                app.phone,
-                app.applicant_type.value if app.applicant_type else '',
-                app.track.name if app.track else '',
-                app.cohort.cohort_code if app.cohort else '',
-                app.status.value if app.status else '',
-                app.motivation_letter[:200] if app.motivation_letter else '',
-                app.portfolio_url or '',
-                app.github_url or '',
-                app.linkedin_url or '',
-                f"{app.reviewer.first_name} {app.reviewer.last_name}" if app.reviewer else '',
-                app.reviewer_notes or '',
-                app.interview_date.strftime('%Y-%m-%d %H:%M') if app.interview_date else '',
-                app.interview_notes or '',
-                app.created_at.strftime('%Y-%m-%d') if app.created_at else '',
-                app.updated_at.strftime('%Y-%m-%d') if app.updated_at else '',
-            ])
-
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-
-        response = current_app.response_class(
-            csv_content,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment;filename=applications_export.csv'}
-        )
-        return response
-
-    except Exception as e:
-        logger.error(f"Error exporting applications: {str(e)}")
-        return error_response('Failed to export applications', status_code=500)
+    """Export applications data as CSV with current filters (streamed)."""
+    params = {
+        key: request.args.get(key)
+        for key in ('status', 'track_id', 'cohort_id', 'search',
+                    'applicant_type', 'start_date', 'end_date')
+    }
+    return _run_export('internship_applications', params, 'Failed to export applications')
 
 
 @internships_bp.route('/admin/applications/<app_id>/interview-notes', methods=['PUT'])
@@ -1485,59 +1398,69 @@ def batch_generate_offers():
 
         results = {'sent': [], 'skipped': [], 'errors': []}
 
+        applications = {
+            application.id: application
+            for application in InternshipApplication.query.filter(
+                InternshipApplication.id.in_(application_ids)
+            ).all()
+        }
+        offered_ids = {
+            application_id for (application_id,) in db.session.query(
+                InternshipOfferLetter.application_id
+            ).filter(InternshipOfferLetter.application_id.in_(application_ids)).all()
+        }
+
+        to_offer = []
         for app_id in application_ids:
-            try:
-                application = InternshipApplication.query.get(app_id)
-                if not application:
-                    results['errors'].append({'id': app_id, 'reason': 'Application not found'})
-                    continue
+            application = applications.get(app_id)
+            if not application:
+                results['errors'].append({'id': app_id, 'reason': 'Application not found'})
+                continue
 
-                if application.status != ApplicationStatusEnum.ACCEPTED:
-                    results['skipped'].append({
-                        'id': app_id,
-                        'name': application.full_name,
-                        'reason': 'Application not in accepted status'
-                    })
-                    continue
+            if application.status != ApplicationStatusEnum.ACCEPTED:
+                results['skipped'].append({
+                    'id': app_id,
+                    'name': application.full_name,
+                    'reason': 'Application not in accepted status'
+                })
+                continue
 
-                # Check if offer already exists
-                existing_offer = InternshipOfferLetter.query.filter_by(application_id=app_id).first()
-                if existing_offer:
-                    results['skipped'].append({
-                        'id': app_id,
-                        'name': application.full_name,
-                        'reason': 'Offer already sent'
-                    })
-                    continue
+            # Check if offer already exists
+            if app_id in offered_ids:
+                results['skipped'].append({
+                    'id': app_id,
+                    'name': application.full_name,
+                    'reason': 'Offer already sent'
+                })
+                continue
 
-                # Generate offer
-                success, message, offer, password = InternshipOfferService.create_offer(
-                    application, admin_user, offer_dir
-                )
+            to_offer.append(application)
 
-                if not success:
-                    results['errors'].append({'id': app_id, 'name': application.full_name, 'reason': message})
-                    continue
+        # Generate offers (PDFs are rendered in parallel, committed once)
+        created = InternshipOfferService.create_offers_batch(to_offer, admin_user, offer_dir) if to_offer else {}
 
-                # Send email
-                try:
-                    is_existing_user = password is None
-                    mailer.send_offer_letter(application, offer, password=password, is_existing_user=is_existing_user)
-                except Exception as mail_err:
-                    logger.warning(f"Failed to send offer email for {app_id}: {mail_err}")
+        for application in to_offer:
+            outcome = created[application.id]
+            if not outcome['success']:
+                results['errors'].append({'id': application.id, 'name': application.full_name, 'reason': outcome['message']})
+                continue
 
-                results['sent'].append({
-                    'id': app_id,
-                    'name': application.full_name,
-                    'offer_number': offer.offer_number,
-                    'username': offer.generated_username,
-                })
+            offer = outcome['offer']
+            password = outcome['password']
 
-            except Exception as e:
-                results['errors'].append({'id': app_id, 'reason': str(e)})
-                logger.error(f"Error processing batch offer for {app_id}: {str(e)}")
+            # Send email
+            try:
+                is_existing_user = password is None
+                mailer.send_offer_letter(application, offer, password=password, is_existing_user=is_existing_user)
+            except Exception as mail_err:
+                logger.warning(f"Failed to send offer email for {application.id}: {mail_err}")
 
-        db.session.commit()
+            results['sent'].append({
+                'id': application.id,
+                'name': application.full_name,
+                'offer_number': offer.offer_number,
+                'username': offer.generated_username,
+            })
 
         logger.info(f"Batch offer generation: {len(results['sent'])} sent, {len(results['skipped'])} skipped, {len(results['errors'])} errors")
 
@@ -1729,78 +1652,66 @@ def get_admin_interns():
 @internships_bp.route('/admin/interns/export', methods=['GET'])
 @role_required(['admin', 'staff'])
 def export_admin_interns_csv():
-    """Export interns data as CSV for reporting."""
-    try:
-        import csv
-        import io
+    """Export interns data as CSV for reporting (streamed)."""
+    params = {
+        'cohort_id': request.args.get('cohort_id'),
+        'track_id': request.args.get('track_id'),
+    }
+    return _run_export('internship_interns', params, 'Failed to export interns')
 
-        cohort_id = request.args.get('cohort_id')
-        track_id = request.args.get('track_id')
 
-        query = InternshipApplication.query.filter_by(
-            status=ApplicationStatusEnum.ACCEPTED
-        ).order_by(InternshipApplication.full_name.asc())
-
-        if cohort_id:
-            query = query.filter_by(cohort_id=cohort_id)
-        if track_id:
-            query = query.filter_by(track_id=track_id)
-
-        interns = query.all()
-
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Header
-        writer.writerow([
-            'Reference Code', 'Full Name', 'Email', 'Phone',
-            'Track', 'Cohort', 'Status', 'Offer Number', 'Offer Status',
-            'Total Tasks', 'Completed', 'Progress %', 'Avg Score',
-            'Applied Date', 'Last Updated'
-        ])
-
-        for intern in interns:
-            offer = InternshipOfferLetter.query.filter_by(application_id=intern.id).first()
-
-            total_assigned = InternshipTaskAssignment.query.filter_by(intern_id=intern.id).count()
-            completed = InternshipTaskAssignment.query.filter_by(intern_id=intern.id, status='approved').count()
-            avg_score_query = db.session.query(db.func.avg(InternshipTaskAssignment.score)).filter(
-                InternshipTaskAssignment.intern_id == intern.id,
-                InternshipTaskAssignment.score.isnot(None)
-            ).scalar()
-
-            writer.writerow([
-                intern.reference_code,
-                intern.full_name,
-                intern.email,
-                intern.phone,
-                intern.track.name if intern.track else '',
-                intern.cohort.cohort_code if intern.cohort else '',
-                intern.status.value if intern.status else '',
-                offer.offer_number if offer else '',
-                offer.status if offer else '',
-                total_assigned,
-                completed,
-                round((completed / total_assigned * 100)) if total_assigned > 0 else 0,
-                round(float(avg_score_query), 1) if avg_score_query else '',
-                intern.created_at.strftime('%Y-%m-%d') if intern.created_at else '',
-                intern.updated_at.strftime('%Y-%m-%d') if intern.updated_at else '',
-            ])
-
-        output.seek(0)
-        csv_content = output.getvalue()
-        output.close()
-
-        response = current_app.response_class(
-            csv_content,
-            mimetype='text/csv',
-            headers={'Content-Disposition': 'attachment;filename=interns_export.csv'}
+@internships_bp.route('/admin/exports/<task_id>', methods=['GET'])
+@role_required(['admin', 'staff'])
+def get_export_status(task_id):
+    """Status of a background export started by one of the export endpoints."""
+    task = background_service.get_task_status(task_id)
+    if not task or task.get('user_id') != int(get_jwt_identity()):
+        return error_response('Export not found', status_code=404)
+
+    result = task.get('result') or {}
+    return success_response('Export status retrieved', {
+        'task_id': task_id,
+        'status': task['status'],
+        'row_count': result.get('row_count'),
+        'format': result.get('format'),
+        'filename': result.get('filename'),
+        'error': task.get('error'),
+    })
+
+
+@internships_bp.route('/admin/exports/<task_id>/download', methods=['GET'])
+@role_required(['admin', 'staff'])
+def download_export(task_id):
+    """Download the file produced by a completed background export."""
+    task = background_service.get_task_status(task_id)
+    if not task or task.get('user_id') != int(get_jwt_identity()):
+        return error_response('Export not found', status_code=404)
+    if task['status'] != 'completed':
+        return error_response('Export is not ready', status_code=409)
+
+    response = ExportService.job_file_response(task)
+    if response is None:
+        return error_response('Export file has expired', status_code=410)
+    return response
+
+
+def _run_export(kind, params, failure_message):
+    """Stream an export inline, or queue it when large or ``async=true``."""
+    try:
+        response, job = ExportService.export(
+            kind,
+            params,
+            fmt=request.args.get('format'),
+            force_async=request.args.get('async', 'false').lower() == 'true',
+            requested_by=int(get_jwt_identity()),
         )
-        return response
-
     except Exception as e:
-        logger.error(f"Error exporting interns: {str(e)}")
-        return error_response('Failed to export interns', status_code=500)
+        logger.error(f"Error exporting {kind}: {str(e)}")
+        return error_response(failure_message, status_code=500)
+
+    if job:
+        return success_response('Export is being prepared in the background', job, status_code=202)
+    return response
 
 
 # ============= INSTRUCTOR ROUTES (Task Management & Progress Tracking) =============
@@ -260,3 +260,30 @@ class CourseApplication(db.Model):
             parts = self.full_name.strip().split()
             self.first_name = parts[0] if parts else ""
             self.last_name = " ".join(parts[1:]) if len(parts) > 1 else ""
+
+
+class ApplicationMigrationLog(db.Model):
+    """Audit trail of waitlisted applications moved between cohorts"""
+    __tablename__ = "application_migration_logs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, db.ForeignKey('course_applications.id', ondelete='CASCADE'),
+                               nullable=False, index=True)
+    from_window_id = db.Column(db.Integer, db.ForeignKey('application_windows.id'), nullable=True)
+    to_window_id = db.Column(db.Integer, db.ForeignKey('application_windows.id'), nullable=False, index=True)
+    migrated_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    batch_id = db.Column(db.String(36), nullable=False, index=True)  # Shared by every row of one migration run
+    notes = db.Column(db.Text, nullable=True)
+    migrated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "application_id": self.application_id,
+            "from_window_id": self.from_window_id,
+            "to_window_id": self.to_window_id,
+            "migrated_by": self.migrated_by,
+            "batch_id": self.batch_id,
+            "notes": self.notes,
+            "migrated_at": self.migrated_at.isoformat() if self.migrated_at else None,
+        }
@@ -283,8 +283,13 @@ class Course(db.Model):
             "cohort_label": self.cohort_label,
         }
 
-    def get_all_application_windows_list(self, now=None):
-        """Return all application windows as list of dicts with computed status."""
+    def get_all_application_windows_list(self, now=None, windows=None):
+        """
+        Return all application windows as list of dicts with computed status.
+
+        ``windows`` are this course's ``ApplicationWindow`` rows ordered by
+        ``opens_at``, when the caller has already loaded them.
+        """
         current_time = now or datetime.now(timezone.utc)
 
         def _to_utc(dt):
@@ -292,7 +297,8 @@ class Course(db.Model):
                 return None
             return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
 
-        windows = list(self.application_windows.order_by(ApplicationWindow.opens_at).all())  # type: ignore[attr-defined]
+        if windows is None:
+            windows = list(self.application_windows.order_by(ApplicationWindow.opens_at).all())  # type: ignore[attr-defined]
 
         if windows:
             return [w.to_dict(now=current_time) for w in windows]
@@ -303,10 +309,10 @@ class Course(db.Model):
 
         return []
 
-    def get_primary_application_window(self, now=None):
+    def get_primary_application_window(self, now=None, windows=None):
         """Return the most relevant (open > upcoming > first) window, or legacy fallback."""
         current_time = now or datetime.now(timezone.utc)
-        windows = self.get_all_application_windows_list(now=current_time)
+        windows = self.get_all_application_windows_list(now=current_time, windows=windows)
 
         if not windows:
             return self.get_application_window_status(now=current_time)
@@ -319,7 +325,9 @@ class Course(db.Model):
                 return win
         return windows[0]
 
-    def to_dict(self, include_modules=False, include_announcements=False, for_student=False, cohort_id=None):
+    def to_dict(self, include_modules=False, include_announcements=False, for_student=False, cohort_id=None,
+                application_windows=None):
+        """``application_windows``: preloaded windows, see ``get_all_application_windows_list``"""
         data = {
             'id': self.id,
             'title': self.title,
@@ -359,8 +367,8 @@ class Course(db.Model):
             'cohort_end_date': self.cohort_end_date.isoformat() if self.cohort_end_date else None,
             'cohort_label': self.cohort_label,
             'application_timezone': self.application_timezone,
-            'application_window': self.get_primary_application_window(),
-            'application_windows': self.get_all_application_windows_list(),
+            'application_window': self.get_primary_application_window(windows=application_windows),
+            'application_windows': self.get_all_application_windows_list(windows=application_windows),
             # Module release settings
             'start_date': self.start_date.isoformat() if self.start_date else None,
             'module_release_count': self.module_release_count,
@@ -972,7 +980,8 @@ class Enrollment(db.Model):
         # Calculate average, or return 0 if no modules
         return (total_score / scored_modules) if scored_modules > 0 else 0.0
 
-    def to_dict(self):
+    def to_dict(self, course_score=None):
+        """Serialize the enrollment; pass ``course_score`` if already computed."""
         student_data = None
         if self.student:
             student_data = {
@@ -994,7 +1003,7 @@ class Enrollment(db.Model):
             'course_id': self.course_id,
             'enrollment_date': self.enrollment_date.isoformat(),
             'progress': self.progress,
-            'course_score': self.calculate_course_score(),  # Overall course score
+            'course_score': course_score if course_score is not None else self.calculate_course_score(),  # Overall course score
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'status': self.status,
             'terminated_at': self.terminated_at.isoformat() if self.terminated_at else None,
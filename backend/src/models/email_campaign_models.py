@@ -0,0 +1,101 @@
+"""
+Email campaign models
+A campaign streams its recipients into the email outbox page by page; the
+campaign row is the checkpoint that lets any worker resume or report on it.
+"""
+
+from datetime import datetime
+import json
+
+from .user_models import db
+
+
+class CampaignStatus:
+    """Lifecycle of a campaign (delivery itself is tracked in the outbox)"""
+    PENDING = 'pending'      # Created, no worker has started it yet
+    RUNNING = 'running'      # A worker holds the lease and is queueing pages
+    QUEUED = 'queued'        # Every recipient is in the outbox
+    COMPLETED = 'completed'  # Every queued email was sent or failed
+    FAILED = 'failed'        # Stopped on an error
+
+
+class EmailCampaign(db.Model):
+    """A custom email sent to every application matching a filter"""
+    __tablename__ = 'email_campaigns'
+
+    id = db.Column(db.String(36), primary_key=True)  # Doubles as the task id returned to the client
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    subject = db.Column(db.String(500), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    filters = db.Column(db.Text, nullable=True)  # JSON: course_id, status_filter, include_all
+
+    status = db.Column(db.String(20), nullable=False, default=CampaignStatus.PENDING, index=True)
+    total_recipients = db.Column(db.Integer, nullable=False, default=0)
+
+    # Checkpoint: everything up to last_application_id is in the outbox
+    last_application_id = db.Column(db.Integer, nullable=False, default=0)
+    scanned = db.Column(db.Integer, nullable=False, default=0)
+    queued = db.Column(db.Integer, nullable=False, default=0)
+    duplicates = db.Column(db.Integer, nullable=False, default=0)
+
+    # Lease held by the worker that is queueing pages
+    lease_token = db.Column(db.String(36), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    queued_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    recipients = db.relationship('EmailCampaignRecipient', backref='campaign', lazy='dynamic',
+                                 cascade='all, delete-orphan')
+
+    @property
+    def outbox_category(self):
+        return f'campaign:{self.id}'
+
+    def get_filters(self):
+        if self.filters:
+            try:
+                return json.loads(self.filters)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'subject': self.subject,
+            'status': self.status,
+            'filters': self.get_filters(),
+            'total_recipients': self.total_recipients,
+            'scanned': self.scanned,
+            'queued': self.queued,
+            'duplicates': self.duplicates,
+            'last_error': self.last_error,
+            'created_by': self.created_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'queued_at': self.queued_at.isoformat() if self.queued_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+        }
+
+    def __repr__(self):
+        return f'<EmailCampaign {self.id} {self.status}>'
+
+
+class EmailCampaignRecipient(db.Model):
+    """One deduplicated recipient of a campaign and its outbox row"""
+    __tablename__ = 'email_campaign_recipients'
+
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.String(36), db.ForeignKey('email_campaigns.id', ondelete='CASCADE'), nullable=False)
+    email = db.Column(db.String(255), nullable=False)  # Lower-cased
+    recipient_name = db.Column(db.String(255), nullable=True)
+    application_id = db.Column(db.Integer, nullable=True)
+    outbox_id = db.Column(db.Integer, db.ForeignKey('email_outbox.id', ondelete='SET NULL'), nullable=True, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('campaign_id', 'email', name='uq_campaign_recipient_email'),
+    )
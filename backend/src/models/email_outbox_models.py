@@ -0,0 +1,74 @@
+"""
+Email outbox model
+Emails are written here first and delivered by the outbox dispatcher, which
+packs them into Brevo batch requests and records each recipient's outcome.
+"""
+
+from datetime import datetime
+import json
+
+from .user_models import db
+
+
+class OutboxStatus:
+    """Delivery states of an outbox row"""
+    PENDING = 'pending'    # Waiting to be sent (or to be retried)
+    SENDING = 'sending'    # Claimed by a dispatcher run
+    SENT = 'sent'          # Accepted by Brevo
+    FAILED = 'failed'      # Rejected, or out of attempts
+
+
+class EmailOutbox(db.Model):
+    """One email to one recipient, queued for batched delivery"""
+    __tablename__ = 'email_outbox'
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(255), nullable=False, index=True)
+    to_name = db.Column(db.String(255), nullable=True)
+    subject = db.Column(db.String(500), nullable=False)
+    html_content = db.Column(db.Text, nullable=True)
+    text_content = db.Column(db.Text, nullable=True)
+    headers = db.Column(db.Text, nullable=True)  # JSON object of custom headers
+    sender_name = db.Column(db.String(255), nullable=True)
+
+    # Free-form grouping, e.g. 'waitlist_migration' or 'campaign:42'
+    category = db.Column(db.String(100), nullable=True, index=True)
+
+    status = db.Column(db.String(20), nullable=False, default=OutboxStatus.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+    claim_token = db.Column(db.String(36), nullable=True, index=True)
+    last_error = db.Column(db.Text, nullable=True)
+    message_id = db.Column(db.String(255), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def get_headers(self):
+        if self.headers:
+            try:
+                return json.loads(self.headers)
+            except json.JSONDecodeError:
+                return None
+        return None
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'to_email': self.to_email,
+            'to_name': self.to_name,
+            'subject': self.subject,
+            'category': self.category,
+            'status': self.status,
+            'attempts': self.attempts,
+            'next_attempt_at': self.next_attempt_at.isoformat() if self.next_attempt_at else None,
+            'last_error': self.last_error,
+            'message_id': self.message_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'sent_at': self.sent_at.isoformat() if self.sent_at else None,
+        }
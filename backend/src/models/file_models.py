@@ -85,4 +85,27 @@ class FileAnalysis(db.Model):
             'virus_scan_clean': self.virus_scan_clean,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'analyzed_at': self.analyzed_at.isoformat() if self.analyzed_at else None
-        }
\ No newline at end of file
+        }
+
+class DriveFolder(db.Model):
+    """Cached Google Drive folder IDs, keyed by parent folder and folder name"""
+    __tablename__ = 'drive_folders'
+
+    id = db.Column(db.Integer, primary_key=True)
+    parent_id = db.Column(db.String(128), nullable=False)  # '' for folders without a parent
+    name = db.Column(db.String(255), nullable=False)
+    folder_id = db.Column(db.String(128), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('parent_id', 'name', name='_drive_folder_parent_name_uc'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'parent_id': self.parent_id or None,
+            'name': self.name,
+            'folder_id': self.folder_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
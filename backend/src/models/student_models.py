@@ -91,9 +91,20 @@ class LessonCompletion(db.Model):
         
         Returns a score from 0-100
         """
-        reading = self.reading_progress or 0.0
-        engagement = self.engagement_score or 0.0
-        
+        return self.score_from_progress(
+            self.reading_progress or 0.0,
+            self.engagement_score or 0.0,
+            self.assessment_state(),
+        )
+
+    def assessment_state(self):
+        """
+        Quiz and assignment facts the lesson score depends on.
+
+        Kept apart from the scoring arithmetic so callers that see many
+        reading/engagement updates for one lesson can load these once and
+        score each update in memory with ``score_from_progress``.
+        """
         # Check what assessments exist for this lesson
         from ..models.quiz_progress_models import QuizAttempt
         from ..models.course_models import Quiz, Assignment, AssignmentSubmission
@@ -101,6 +112,31 @@ class LessonCompletion(db.Model):
         lesson_quiz = Quiz.query.filter_by(lesson_id=self.lesson_id, is_published=True).first()
         lesson_assignment = Assignment.query.filter_by(lesson_id=self.lesson_id).first()
         
+        best_attempt = None
+        if lesson_quiz is not None:
+            best_attempt = QuizAttempt.query.filter_by(
+                user_id=self.student_id,
+                quiz_id=lesson_quiz.id
+            ).order_by(QuizAttempt.score_percentage.desc()).first()
+        
+        best_submission = None
+        if lesson_assignment is not None:
+            best_submission = AssignmentSubmission.query.filter_by(
+                student_id=self.student_id,
+                assignment_id=lesson_assignment.id
+            ).first()
+        
+        return self.assessment_state_from(lesson_quiz, best_attempt, lesson_assignment, best_submission)
+
+    @staticmethod
+    def assessment_state_from(lesson_quiz, best_attempt, lesson_assignment, best_submission):
+        """
+        ``assessment_state()`` for rows the caller has already loaded.
+
+        ``lesson_quiz`` is the lesson's published quiz and ``best_attempt``
+        the student's highest-scoring attempt at it; ``lesson_assignment``
+        and ``best_submission`` likewise. Any of them may be None.
+        """
         has_quiz = lesson_quiz is not None
         has_assignment = lesson_assignment is not None
         
@@ -108,11 +144,6 @@ class LessonCompletion(db.Model):
         quiz_score = 0.0
         quiz_passed = True  # Default for lessons without quiz
         if has_quiz:
-            best_attempt = QuizAttempt.query.filter_by(
-                user_id=self.student_id,
-                quiz_id=lesson_quiz.id
-            ).order_by(QuizAttempt.score_percentage.desc()).first()
-            
             if best_attempt:
                 raw_quiz_score = best_attempt.score_percentage or 0.0
                 quiz_passing_score = lesson_quiz.passing_score or 70.0
@@ -128,11 +159,6 @@ class LessonCompletion(db.Model):
         assignment_passed = True  # Default for lessons without assignment
         assignment_pending_review = False  # Track if assignment is submitted but not yet graded
         if has_assignment:
-            best_submission = AssignmentSubmission.query.filter_by(
-                student_id=self.student_id,
-                assignment_id=lesson_assignment.id
-            ).first()
-            
             if best_submission and best_submission.grade is not None:
                 # Calculate percentage score
                 points_possible = lesson_assignment.points_possible or 100
@@ -148,7 +174,28 @@ class LessonCompletion(db.Model):
                 assignment_pending_review = True
             else:
                 assignment_passed = False  # No submission means not passed
-        
+
+        return {
+            'has_quiz': has_quiz,
+            'has_assignment': has_assignment,
+            'quiz_score': quiz_score,
+            'quiz_passed': quiz_passed,
+            'assignment_score': assignment_score,
+            'assignment_passed': assignment_passed,
+            'assignment_pending_review': assignment_pending_review,
+        }
+
+    @staticmethod
+    def score_from_progress(reading, engagement, assessment):
+        """Lesson score (0-100) for the given reading/engagement and ``assessment_state()``."""
+        has_quiz = assessment['has_quiz']
+        has_assignment = assessment['has_assignment']
+        quiz_score = assessment['quiz_score']
+        quiz_passed = assessment['quiz_passed']
+        assignment_score = assessment['assignment_score']
+        assignment_passed = assessment['assignment_passed']
+        assignment_pending_review = assessment['assignment_pending_review']
+
         # Apply reading and engagement penalties for poor performance
         reading_penalty = 1.0
         if reading < 90.0:
@@ -260,11 +307,6 @@ class LessonCompletion(db.Model):
         assignment_passed = True  # Default for lessons without assignment
         assignment_status = "not_required"
         if has_assignment:
-            best_submission = AssignmentSubmission.query.filter_by(
-                student_id=self.student_id,
-                assignment_id=lesson_assignment.id
-            ).first()
-            
             if best_submission and best_submission.grade is not None:
                 points_possible = lesson_assignment.points_possible or 100
                 raw_assignment_score = (best_submission.grade / points_possible) * 100 if points_possible > 0 else 0.0
@@ -357,10 +399,11 @@ class LessonCompletion(db.Model):
             'last_accessed': self.last_accessed.isoformat() if self.last_accessed else None
         }
 
-    def calculate_and_store_component_scores(self):
+    def calculate_and_store_component_scores(self, commit=True):
         """
         Calculate individual component scores and store them in the database.
         This should be called whenever quiz or assignment grades are updated.
+        Pass ``commit=False`` to leave committing to the caller's transaction.
         
         Returns:
             dict: Component scores and overall lesson score
@@ -413,11 +456,6 @@ class LessonCompletion(db.Model):
         assignment_component = 0.0
         assignment_pending_review = False
         if has_assignment:
-            best_submission = AssignmentSubmission.query.filter_by(
-                student_id=self.student_id,
-                assignment_id=lesson_assignment.id
-            ).first()
-            
             if best_submission and best_submission.grade is not None:
                 points_possible = lesson_assignment.points_possible or 100
                 assignment_percentage = (best_submission.grade / points_possible) * 100 if points_possible > 0 else 0.0
@@ -496,11 +534,12 @@ class LessonCompletion(db.Model):
         # Update the completion status
         self.updated_at = datetime.utcnow()
         
-        try:
-            db.session.commit()
-        except Exception as e:
-            db.session.rollback()
-            raise e
+        if commit:
+            try:
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                raise e
             
         return {
             'reading_component': reading_component,
@@ -951,7 +990,7 @@ class ModuleProgress(db.Model):
         """Alias for calculate_module_score for backwards compatibility"""
         return self.calculate_module_score()
     
-    def calculate_module_weighted_score(self):
+    def calculate_module_weighted_score(self, module_score=None, assessment_flags=None):
         """
         Calculate the weighted module score for passing requirements.
         Uses DYNAMIC WEIGHTS based on available assessments:
@@ -962,12 +1001,15 @@ class ModuleProgress(db.Model):
           (the 20% that would go to Final Assessment is redistributed to Quiz)
         - If all available: 10% Reading, 30% Quiz, 40% Assignment, 20% Final
         
+        Pass ``module_score`` when the lesson average has already been
+        computed to avoid scoring every lesson a second time, and
+        ``assessment_flags`` (see ``module_assessment_flags``) when scoring
+        many students of the same module.
+        
         Returns a score from 0-100.
         """
-        from .course_models import Quiz, Assignment
-        
         # Get the module score (average of all lesson scores)
-        module_lessons_score = self.calculate_module_score()
+        module_lessons_score = module_score if module_score is not None else self.calculate_module_score()
         
         # Ensure all scores default to 0.0 if None
         course_contrib = module_lessons_score
@@ -976,21 +1018,9 @@ class ModuleProgress(db.Model):
         final = self.final_assessment_score or 0.0
         
         # Check what assessments exist in this module
-        lesson_ids = [lesson.id for lesson in self.module.lessons] if self.module else []
-        
-        # Check for lesson-level quizzes (quizzes linked to lessons in this module)
-        has_quizzes = Quiz.query.filter(Quiz.lesson_id.in_(lesson_ids)).first() is not None if lesson_ids else False
-        
-        # Check for lesson-level assignments
-        has_assignments = Assignment.query.filter(Assignment.lesson_id.in_(lesson_ids)).first() is not None if lesson_ids else False
-        
-        # Check for module-level final assessment quiz (quiz with module_id but no lesson_id)
-        # This correctly identifies if a final assessment EXISTS, not just if one has been taken
-        has_final_assessment = Quiz.query.filter(
-            Quiz.module_id == self.module_id,
-            Quiz.lesson_id.is_(None),
-            Quiz.is_published == True
-        ).first() is not None if self.module else False
+        if assessment_flags is None:
+            assessment_flags = self.module_assessment_flags(self.module)
+        has_quizzes, has_assignments, has_final_assessment = assessment_flags
         
         # Calculate dynamic weights based on available assessments
         if not has_quizzes and not has_assignments and not has_final_assessment:
@@ -1029,6 +1059,30 @@ class ModuleProgress(db.Model):
         self.cumulative_score = weighted_score
         return weighted_score
     
+    @staticmethod
+    def module_assessment_flags(module):
+        """(has lesson quizzes, has lesson assignments, has final assessment) for a module."""
+        from .course_models import Quiz, Assignment
+        
+        if not module:
+            return False, False, False
+        lesson_ids = [lesson.id for lesson in module.lessons]
+        
+        # Check for lesson-level quizzes (quizzes linked to lessons in this module)
+        has_quizzes = Quiz.query.filter(Quiz.lesson_id.in_(lesson_ids)).first() is not None if lesson_ids else False
+        
+        # Check for lesson-level assignments
+        has_assignments = Assignment.query.filter(Assignment.lesson_id.in_(lesson_ids)).first() is not None if lesson_ids else False
+        
+        # Check for module-level final assessment quiz (quiz with module_id but no lesson_id)
+        # This correctly identifies if a final assessment EXISTS, not just if one has been taken
+        has_final_assessment = Quiz.query.filter(
+            Quiz.module_id == module.id,
+            Quiz.lesson_id.is_(None),
+            Quiz.is_published == True
+        ).first() is not None
+        return has_quizzes, has_assignments, has_final_assessment
+    
     def calculate_cumulative_score(self):
         """Alias for calculate_module_weighted_score for backwards compatibility"""
         return self.calculate_module_weighted_score()
@@ -1158,9 +1212,17 @@ class ModuleProgress(db.Model):
             "passed_lessons": len(lessons) - len(failed_lessons)
         }
     
-    def to_dict(self):
-        module_score = self.calculate_module_score()
-        weighted_score = self.calculate_module_weighted_score()
+    def to_dict(self, module_score=None, assessment_flags=None):
+        """
+        Pass ``module_score`` and ``assessment_flags`` when they were computed
+        in bulk (see ``CertificateService._load_module_scores``); otherwise
+        each lesson of the module is scored with its own queries.
+        """
+        if module_score is None:
+            module_score = self.calculate_module_score()
+        weighted_score = self.calculate_module_weighted_score(
+            module_score=module_score, assessment_flags=assessment_flags
+        )
         
         return {
             'id': self.id,
@@ -1394,36 +1456,35 @@ class StudentTranscript(db.Model):
     student = db.relationship('User', backref=db.backref('transcript', uselist=False))
     
     def update_statistics(self):
-        """Update transcript statistics"""
-        # Count completed courses through enrollments
-        completed_enrollments = db.session.query(Enrollment).filter(
-            Enrollment.student_id == self.student_id,
-            Enrollment.completed_at.isnot(None)
-        ).count()
-        
-        # Count certificates
-        certificates_count = db.session.query(Certificate).filter_by(
-            student_id=self.student_id, 
-            is_active=True
-        ).count()
-        
-        # Count badges
-        badges_count = db.session.query(StudentSkillBadge).filter_by(student_id=self.student_id).count()
+        """Update transcript statistics with a single aggregate query"""
+        active_certificates = db.session.query(Certificate).filter(
+            Certificate.student_id == self.student_id,
+            Certificate.is_active == True
+        )
+        
+        completed, certificates_count, total_score, badges_count = db.session.query(
+            # Count completed courses through enrollments
+            db.session.query(db.func.count(Enrollment.id)).filter(
+                Enrollment.student_id == self.student_id,
+                Enrollment.completed_at.isnot(None)
+            ).scalar_subquery(),
+            # Count certificates and total their scores for the GPA
+            active_certificates.with_entities(db.func.count(Certificate.id)).scalar_subquery(),
+            active_certificates.with_entities(db.func.sum(Certificate.overall_score)).scalar_subquery(),
+            # Count badges
+            db.session.query(db.func.count(StudentSkillBadge.id)).filter(
+                StudentSkillBadge.student_id == self.student_id
+            ).scalar_subquery(),
+        ).one()
         
         # Update statistics
-        self.total_courses_completed = completed_enrollments
-        self.total_certificates = certificates_count
-        self.total_badges = badges_count
+        self.total_courses_completed = completed or 0
+        self.total_certificates = certificates_count or 0
+        self.total_badges = badges_count or 0
         
         # Calculate GPA based on certificates
-        certificates = db.session.query(Certificate).filter_by(
-            student_id=self.student_id, 
-            is_active=True
-        ).all()
-        
-        if certificates:
-            total_score = sum(cert.overall_score for cert in certificates if cert.overall_score)
-            self.overall_gpa = (total_score / len(certificates)) / 25 if total_score > 0 else 0.0  # Convert to 4.0 scale
+        if certificates_count and total_score:
+            self.overall_gpa = (total_score / certificates_count) / 25  # Convert to 4.0 scale
         else:
             self.overall_gpa = 0.0
     
@@ -1577,4 +1638,56 @@ class StudentSuspension(db.Model):
             'course_title': self.course.title if self.course else None,
             'failed_module_title': self.failed_module.title if self.failed_module else None,
             'student_name': f"{self.student.first_name} {self.student.last_name}" if self.student else None
-        }
\ No newline at end of file
+        }
+
+class StudentSummary(db.Model):
+    """Per-student rollup behind the admin student list, export and reports.
+
+    A write to one of the source tables marks the row stale and bumps its
+    version; the next read recomputes it. See ``StudentSummaryService``.
+    """
+    __tablename__ = 'student_summary'
+    student_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+    total_enrollments = db.Column(db.Integer, nullable=False, default=0)
+    active_enrollments = db.Column(db.Integer, nullable=False, default=0)
+    completed_enrollments = db.Column(db.Integer, nullable=False, default=0)
+    terminated_enrollments = db.Column(db.Integer, nullable=False, default=0)
+    avg_progress = db.Column(db.Float, nullable=False, default=0.0, index=True)  # Percent, mean over enrollments
+
+    avg_score = db.Column(db.Float, nullable=False, default=0.0, index=True)  # Mean module cumulative_score
+    scored_modules = db.Column(db.Integer, nullable=False, default=0)
+    performance_level = db.Column(db.String(10), nullable=False, default='low', index=True)  # high, medium, low
+
+    lessons_completed = db.Column(db.Integer, nullable=False, default=0, index=True)
+    quiz_submissions = db.Column(db.Integer, nullable=False, default=0)
+    certificates = db.Column(db.Integer, nullable=False, default=0)
+
+    # Contact numbers from the student's most recent course application
+    application_phone = db.Column(db.String(30), nullable=True)
+    application_whatsapp = db.Column(db.String(30), nullable=True)
+
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Bumped by every invalidating write; a recomputed row is only stored if the version is unchanged
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    is_stale = db.Column(db.Boolean, nullable=False, default=False, server_default='0', index=True)
+
+    student = db.relationship('User', backref=db.backref('summary', uselist=False, passive_deletes=True))
+
+    def enrollment_summary(self):
+        return {
+            'total': self.total_enrollments,
+            'active': self.active_enrollments,
+            'completed': self.completed_enrollments,
+            'terminated': self.terminated_enrollments,
+        }
+
+    def progress_summary(self):
+        return {
+            'avg_progress': self.avg_progress,
+            'avg_score': self.avg_score,
+            'lessons_completed': self.lessons_completed,
+            'quiz_submissions': self.quiz_submissions,
+            'certificates': self.certificates,
+        }
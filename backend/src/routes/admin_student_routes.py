@@ -4,6 +4,7 @@ from flask import Blueprint, request, jsonify
 from functools import wraps
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import func, or_, and_, desc, asc, case
+from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta
 from ..models.user_models import db, User, Role
 from ..models.course_application import CourseApplication
@@ -14,9 +15,10 @@ from ..models.course_models import (
 )
 from ..models.student_models import (
     LessonCompletion, UserProgress, ModuleProgress, StudentNote,
-    StudentBookmark, Certificate, LearningAnalytics
+    StudentBookmark, Certificate, LearningAnalytics, StudentSummary
 )
 from ..services.certificate_service import CertificateService
+from ..services.student_summary_service import StudentSummaryService
 from ..utils.payment_notifications import send_enrollment_payment_notification
 import hashlib
 import logging
@@ -74,8 +76,11 @@ def list_students():
         if not student_role:
             return jsonify({"error": "Student role not found"}), 500
 
-        # Base query for students
-        query = User.query.filter(User.role_id == student_role.id)
+        # Base query: students joined with their summary row
+        StudentSummaryService.ensure_current(student_role.id)
+        query = db.session.query(User, StudentSummary).join(
+            StudentSummary, StudentSummary.student_id == User.id
+        ).filter(User.role_id == student_role.id)
 
         # Search filter
         if search:
@@ -150,6 +155,10 @@ def list_students():
             except ValueError:
                 pass
 
+        # Performance filter on the stored summary level
+        if performance in ("high", "medium", "low"):
+            query = query.filter(StudentSummary.performance_level == performance)
+
         # Sorting
         sort_map = {
             "username": User.username,
@@ -157,116 +166,71 @@ def list_students():
             "created_at": User.created_at,
             "last_activity": User.last_activity,
             "last_login": User.last_login,
+            "avg_score": StudentSummary.avg_score,
+            "avg_progress": StudentSummary.avg_progress,
+            "lessons_completed": StudentSummary.lessons_completed,
+            "certificates": StudentSummary.certificates,
+            "enrollments": StudentSummary.total_enrollments,
         }
         order_col = sort_map.get(sort_by, User.created_at)
-        query = query.order_by(order_col.desc() if sort_order == "desc" else order_col.asc())
+        if sort_order == "desc":
+            query = query.order_by(order_col.desc(), User.id.desc())
+        else:
+            query = query.order_by(order_col.asc(), User.id.asc())
 
         # Paginate
         paginated = query.paginate(page=page, per_page=per_page, error_out=False)
-        students = paginated.items
+        rows = paginated.items
 
-        # Enrich student data with enrollment/progress info
-        student_list = []
-        for student in students:
-            enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-            total_enrollments = len(enrollments)
-            active_enrollments = sum(1 for e in enrollments if e.status == "active")
-            completed_enrollments = sum(1 for e in enrollments if e.status == "completed")
-
-            cohort_enrollment = None
-            if course_filter or window_id is not None:
-                cohort_query = Enrollment.query.filter_by(student_id=student.id)
-                if course_filter:
-                    cohort_query = cohort_query.filter(Enrollment.course_id == course_filter)
-                if window_id == "none":
-                    cohort_query = cohort_query.filter(Enrollment.application_window_id.is_(None))
-                elif window_id is not None:
-                    try:
-                        cohort_query = cohort_query.filter(Enrollment.application_window_id == int(window_id))
-                    except (TypeError, ValueError):
-                        pass
-                cohort_enrollment = cohort_query.order_by(Enrollment.enrollment_date.desc()).first()
+        # Cohort enrollment for the whole page in one query (latest per student)
+        cohort_by_student = {}
+        if rows and (course_filter or window_id is not None):
+            cohort_query = Enrollment.query.options(joinedload(Enrollment.application_window)).filter(
+                Enrollment.student_id.in_([student.id for student, _ in rows])
+            )
+            if course_filter:
+                cohort_query = cohort_query.filter(Enrollment.course_id == course_filter)
+            if window_id == "none":
+                cohort_query = cohort_query.filter(Enrollment.application_window_id.is_(None))
+            elif window_id is not None:
+                try:
+                    cohort_query = cohort_query.filter(Enrollment.application_window_id == int(window_id))
+                except (TypeError, ValueError):
+                    pass
+            for enrollment in cohort_query.order_by(Enrollment.enrollment_date.asc()):
+                cohort_by_student[enrollment.student_id] = enrollment
 
+        student_list = []
+        now = datetime.utcnow()
+        for student, summary in rows:
+            cohort_enrollment = cohort_by_student.get(student.id)
             cohort_window = cohort_enrollment.application_window if cohort_enrollment else None
             cohort_status = cohort_window.compute_status() if cohort_window else None
             cohort_label = None
             if cohort_enrollment:
                 cohort_label = cohort_enrollment.cohort_label or (cohort_window.cohort_label if cohort_window else None)
-            
-            # Calculate average progress
-            avg_progress = 0.0
-            if enrollments:
-                total_progress = sum(e.progress or 0 for e in enrollments)
-                avg_progress = round(total_progress / total_enrollments * 100, 1)
-
-            # Get completed lessons count
-            lessons_completed = LessonCompletion.query.filter_by(
-                student_id=student.id, completed=True
-            ).count()
-
-            # Get quiz submissions count
-            quiz_submissions = Submission.query.filter_by(student_id=student.id).count()
-
-            # Get certificates count
-            certificates = Certificate.query.filter_by(student_id=student.id).count()
-
-            # Calculate average score from module progress (uses cumulative_score)
-            module_progresses = ModuleProgress.query.filter_by(student_id=student.id).all()
-            avg_score = 0.0
-            if module_progresses:
-                scores = [mp.cumulative_score or 0 for mp in module_progresses if mp.cumulative_score is not None]
-                avg_score = round(sum(scores) / len(scores), 1) if scores else 0.0
 
             # Days since last activity
             days_inactive = None
             if student.last_activity:
-                days_inactive = (datetime.utcnow() - student.last_activity).days
-
-            # Resolve phone: prefer User.phone_number, fall back to CourseApplication.phone
-            phone_number = getattr(student, 'phone_number', None)
-            whatsapp_number = None
-            # Find linked application: first via enrollment application_id, then by email match
-            app = CourseApplication.query.join(
-                Enrollment, Enrollment.application_id == CourseApplication.id
-            ).filter(Enrollment.student_id == student.id).order_by(
-                CourseApplication.id.desc()
-            ).first()
-            if not app:
-                app = CourseApplication.query.filter(
-                    CourseApplication.email == student.email
-                ).order_by(CourseApplication.id.desc()).first()
-            if not phone_number:
-                if app:
-                    phone_number = app.phone
-                    whatsapp_number = app.whatsapp_number
-            else:
-                if app:
-                    whatsapp_number = app.whatsapp_number
+                days_inactive = (now - student.last_activity).days
+
+            # Resolve phone: prefer User.phone_number, fall back to the latest application
+            phone_number = getattr(student, 'phone_number', None) or summary.application_phone
 
             student_data = {
                 **student.to_dict(),
                 "phone_number": phone_number,
-                "whatsapp_number": whatsapp_number,
-                "enrollment_summary": {
-                    "total": total_enrollments,
-                    "active": active_enrollments,
-                    "completed": completed_enrollments,
-                    "terminated": sum(1 for e in enrollments if e.status == "terminated"),
-                },
-                "progress_summary": {
-                    "avg_progress": avg_progress,
-                    "avg_score": avg_score,
-                    "lessons_completed": lessons_completed,
-                    "quiz_submissions": quiz_submissions,
-                    "certificates": certificates,
-                },
+                "whatsapp_number": summary.application_whatsapp,
+                "enrollment_summary": summary.enrollment_summary(),
+                "progress_summary": summary.progress_summary(),
                 "cohort_enrollment": {
                     "enrollment_id": cohort_enrollment.id if cohort_enrollment else None,
                     "course_id": cohort_enrollment.course_id if cohort_enrollment else None,
                     "application_window_id": cohort_enrollment.application_window_id if cohort_enrollment else None,
                     "cohort_label": cohort_label,
                     "cohort_status": cohort_status,
-                    "cohort_reason": cohort_window.compute_status() if cohort_window else None,
+                    "cohort_reason": cohort_status,
                     "enrollment_status": cohort_enrollment.status if cohort_enrollment else None,
                     "enrollment_date": cohort_enrollment.enrollment_date.isoformat() if cohort_enrollment and cohort_enrollment.enrollment_date else None,
                     "payment_status": cohort_enrollment.payment_status if cohort_enrollment else None,
@@ -281,32 +245,20 @@ def list_students():
                     "last_login": student.last_login.isoformat() if student.last_login else None,
                     "last_activity": student.last_activity.isoformat() if student.last_activity else None,
                     "days_inactive": days_inactive,
-                }
+                },
+                "performance_level": summary.performance_level,
             }
-            
-            # Performance classification
-            if avg_score >= 80:
-                student_data["performance_level"] = "high"
-            elif avg_score >= 50:
-                student_data["performance_level"] = "medium"
-            else:
-                student_data["performance_level"] = "low"
-
             student_list.append(student_data)
 
-        # Apply performance filter on enriched data (post-query)
-        if performance:
-            student_list = [s for s in student_list if s.get("performance_level") == performance]
-
         # Summary statistics
-        total_students = User.query.filter(User.role_id == student_role.id).count()
-        active_students = User.query.filter(User.role_id == student_role.id, User.is_active == True).count()
-        
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recently_active = User.query.filter(
-            User.role_id == student_role.id,
-            User.last_activity >= seven_days_ago
-        ).count()
+        seven_days_ago = now - timedelta(days=7)
+        total_students, active_students, recently_active = db.session.query(
+            func.count(User.id),
+            func.sum(case((User.is_active == True, 1), else_=0)),
+            func.sum(case((User.last_activity >= seven_days_ago, 1), else_=0)),
+        ).filter(User.role_id == student_role.id).one()
+        active_students = int(active_students or 0)
+        recently_active = int(recently_active or 0)
 
         return jsonify({
             "students": student_list,
@@ -892,20 +844,25 @@ def student_performance_report():
         if not student_role:
             return jsonify({"error": "Student role not found"}), 500
 
+        StudentSummaryService.ensure_current(student_role.id)
+
         # Total students
         total_students = User.query.filter(User.role_id == student_role.id).count()
 
-        # Enrollment statistics
-        enrollment_query = Enrollment.query
+        # Enrollment statistics in one pass over the filtered enrollments
+        enrollment_stats = db.session.query(
+            func.count(Enrollment.id),
+            func.sum(case((Enrollment.status == "active", 1), else_=0)),
+            func.sum(case((Enrollment.status == "completed", 1), else_=0)),
+            func.sum(case((Enrollment.status == "terminated", 1), else_=0)),
+        )
         if course_id:
-            enrollment_query = enrollment_query.filter(Enrollment.course_id == course_id)
+            enrollment_stats = enrollment_stats.filter(Enrollment.course_id == course_id)
         if start_date:
-            enrollment_query = enrollment_query.filter(Enrollment.enrollment_date >= start_date)
-
-        total_enrollments = enrollment_query.count()
-        active_enrollments = enrollment_query.filter(Enrollment.status == "active").count()
-        completed_enrollments = enrollment_query.filter(Enrollment.status == "completed").count()
-        terminated_enrollments = enrollment_query.filter(Enrollment.status == "terminated").count()
+            enrollment_stats = enrollment_stats.filter(Enrollment.enrollment_date >= start_date)
+        total_enrollments, active_enrollments, completed_enrollments, terminated_enrollments = (
+            int(value or 0) for value in enrollment_stats.one()
+        )
 
         # Average progress
         avg_progress = db.session.query(
@@ -929,30 +886,29 @@ def student_performance_report():
             lesson_completions = lesson_completions.filter(LessonCompletion.completed_at >= start_date)
         total_lesson_completions = lesson_completions.count()
 
-        # Top performing students (by average module score)
+        # Top performing students (by average module score), read off the summary index
         top_students_query = db.session.query(
             User.id,
             User.username,
             User.first_name,
             User.last_name,
             User.email,
-            func.avg(ModuleProgress.cumulative_score).label("avg_score"),
-            func.count(ModuleProgress.id).label("modules_completed"),
+            StudentSummary.avg_score,
+            StudentSummary.scored_modules,
         ).join(
-            ModuleProgress, ModuleProgress.student_id == User.id
+            StudentSummary, StudentSummary.student_id == User.id
         ).filter(
             User.role_id == student_role.id,
-            ModuleProgress.cumulative_score.isnot(None)
-        ).group_by(User.id, User.username, User.first_name, User.last_name, User.email
-        ).order_by(desc("avg_score")).limit(10).all()
+            StudentSummary.scored_modules > 0,
+        ).order_by(StudentSummary.avg_score.desc(), User.id.asc()).limit(10).all()
 
         top_students = [{
             "id": s.id,
             "username": s.username,
             "full_name": f"{s.first_name or ''} {s.last_name or ''}".strip() or s.username,
             "email": s.email,
-            "avg_score": round(float(s.avg_score), 1),
-            "modules_completed": s.modules_completed,
+            "avg_score": s.avg_score,
+            "modules_completed": s.scored_modules,
         } for s in top_students_query]
 
         # Students needing attention (low progress, active enrollment)
@@ -1334,9 +1290,13 @@ def export_students():
         search = request.args.get("search", "").strip()
         status_filter = request.args.get("status")
         course_filter = request.args.get("course_id", type=int)
+        performance = request.args.get("performance")
         student_ids_param = request.args.get("student_ids")
 
-        query = User.query.filter(User.role_id == student_role.id)
+        StudentSummaryService.ensure_current(student_role.id)
+        query = db.session.query(User, StudentSummary).join(
+            StudentSummary, StudentSummary.student_id == User.id
+        ).filter(User.role_id == student_role.id)
 
         if student_ids_param:
             ids = [int(x) for x in student_ids_param.split(",") if x.strip().isdigit()]
@@ -1359,8 +1319,10 @@ def export_students():
                     Enrollment.course_id == course_filter
                 ))
             )
+        if performance in ("high", "medium", "low"):
+            query = query.filter(StudentSummary.performance_level == performance)
 
-        students = query.order_by(User.created_at.desc()).limit(5000).all()
+        rows = query.order_by(User.created_at.desc()).limit(5000).all()
 
         output = io.StringIO()
         writer = csv.writer(output)
@@ -1371,20 +1333,7 @@ def export_students():
             "Avg Progress %", "Avg Score", "Lessons Completed", "Certificates"
         ])
 
-        for student in students:
-            enrollments = Enrollment.query.filter_by(student_id=student.id).all()
-            total_enroll = len(enrollments)
-            active_enroll = sum(1 for e in enrollments if e.status == "active")
-            completed_enroll = sum(1 for e in enrollments if e.status == "completed")
-            avg_progress = round(
-                sum(e.progress or 0 for e in enrollments) / total_enroll * 100, 1
-            ) if total_enroll > 0 else 0
-            lessons = LessonCompletion.query.filter_by(student_id=student.id, completed=True).count()
-            certs = Certificate.query.filter_by(student_id=student.id).count()
-            mps = ModuleProgress.query.filter_by(student_id=student.id).all()
-            scores = [mp.cumulative_score or 0 for mp in mps if mp.cumulative_score is not None]
-            avg_score = round(sum(scores) / len(scores), 1) if scores else 0
-
+        for student, summary in rows:
             writer.writerow([
                 student.id, student.username,
                 student.first_name or "", student.last_name or "",
@@ -1393,8 +1342,8 @@ def export_students():
                 student.created_at.strftime("%Y-%m-%d") if student.created_at else "",
                 student.last_login.strftime("%Y-%m-%d %H:%M") if student.last_login else "Never",
                 student.last_activity.strftime("%Y-%m-%d %H:%M") if student.last_activity else "Never",
-                total_enroll, active_enroll, completed_enroll,
-                avg_progress, avg_score, lessons, certs
+                summary.total_enrollments, summary.active_enrollments, summary.completed_enrollments,
+                summary.avg_progress, summary.avg_score, summary.lessons_completed, summary.certificates
             ])
 
         output.seek(0)
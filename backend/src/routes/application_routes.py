@@ -19,6 +19,12 @@ from ..utils.application_scoring import (
     evaluate_application,
 )
 from ..utils.user_utils import generate_username, generate_temp_password
+from ..services.application_scoring_service import ApplicationScoringService
+from ..services.email_campaign_service import EmailCampaignService
+from ..models.email_campaign_models import CampaignStatus
+from ..services.application_search_service import ApplicationSearchService, KEYSET_SORT_FIELDS
+from ..services.export_service import ExportService
+from ..services.background_service import background_service
 from ..utils.brevo_email_service import brevo_service
 from ..utils.email_templates import (
     application_received_email,
@@ -38,8 +44,6 @@ from ..utils.payment_notifications import (
     get_payment_info_from_application_window,
     get_payment_info_from_course
 )
-import pandas as pd
-import io
 import os
 from flask import current_app
 
@@ -557,6 +561,7 @@ def apply_for_course():
         if not application.id:
             db.session.add(application)
         db.session.commit()
+        ApplicationSearchService.index_application(application)
         
         # Send confirmation email with professional template
         try:
@@ -778,6 +783,7 @@ def save_application_draft():
         evaluate_application(app)
 
         db.session.commit()
+        ApplicationSearchService.index_application(app)
         
         # ──── Send email notification for payment-required courses ────
         try:
@@ -1375,49 +1381,11 @@ def advanced_application_search():
         # Build base query
         query = CourseApplication.query
         
-        # Apply text search with enhanced matching
-        if search_config["text_search"]:
-            text = search_config["text_search"].strip()
-            
-            if text:
-                # Create multiple search patterns for better matching
-                exact_pattern = f"%{text}%"
-                words = text.split()
-                
-                # Build search conditions
-                search_conditions = []
-                
-                # Exact phrase matching in all fields
-                exact_conditions = [
-                    CourseApplication.full_name.ilike(exact_pattern),
-                    CourseApplication.email.ilike(exact_pattern),
-                    CourseApplication.phone.ilike(exact_pattern),
-                    CourseApplication.motivation.ilike(exact_pattern),
-                    CourseApplication.field_of_study.ilike(exact_pattern),
-                    CourseApplication.learning_outcomes.ilike(exact_pattern),
-                    CourseApplication.career_impact.ilike(exact_pattern),
-                    CourseApplication.country.ilike(exact_pattern),
-                    CourseApplication.city.ilike(exact_pattern),
-                    CourseApplication.referral_source.ilike(exact_pattern)
-                ]
-                search_conditions.extend(exact_conditions)
-                
-                # Individual word matching for better results
-                if len(words) > 1:
-                    for word in words:
-                        if len(word) > 2:  # Skip short words
-                            word_pattern = f"%{word}%"
-                            word_conditions = [
-                                CourseApplication.full_name.ilike(word_pattern),
-                                CourseApplication.email.ilike(word_pattern),
-                                CourseApplication.motivation.ilike(word_pattern),
-                                CourseApplication.field_of_study.ilike(word_pattern),
-                                CourseApplication.country.ilike(word_pattern),
-                                CourseApplication.city.ilike(word_pattern)
-                            ]
-                            search_conditions.extend(word_conditions)
-                
-                query = query.filter(or_(*search_conditions))
+        # Apply indexed text search (full-text + name/email/phone matching)
+        relevance = None
+        text_search = (search_config.get("text_search") or "").strip()
+        if text_search:
+            query, relevance = ApplicationSearchService.apply_search(query, text_search)
         
         # Apply filters
         filters = search_config.get("filters", {})
@@ -1452,28 +1420,57 @@ def advanced_application_search():
                     to_date = to_date.replace(hour=23, minute=59, second=59)
                     query = query.filter(column <= to_date)
         
-        # Apply sorting
+        # Apply sorting – "relevance" (the default when searching without an
+        # explicit sort) orders by match quality
         sort_config = search_config.get("sort_config", {})
         sort_field = sort_config.get("field", "final_rank_score")
         sort_order = sort_config.get("order", "desc")
-        
-        if hasattr(CourseApplication, sort_field):
-            column = getattr(CourseApplication, sort_field)
-            if sort_order == "asc":
-                query = query.order_by(column.asc())
-            else:
-                query = query.order_by(column.desc())
+        if relevance is not None and "sort_config" not in data:
+            sort_field = "relevance"
         
         # Pagination
         page_config = search_config.get("pagination", {})
         page = page_config.get("page", 1)
         per_page = page_config.get("per_page", 50)
+        cursor = page_config.get("cursor")
+        
+        if sort_field == "relevance" and relevance is not None:
+            sort_expr = relevance
+        elif sort_field in KEYSET_SORT_FIELDS:
+            sort_expr = ApplicationSearchService.sort_expression(sort_field)
+        elif hasattr(CourseApplication, sort_field):
+            sort_expr = None
+            column = getattr(CourseApplication, sort_field)
+            query = query.order_by(column.asc() if sort_order == "asc" else column.desc(), CourseApplication.id.desc())
+        else:
+            sort_expr = None
         
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        next_cursor = None
+        if cursor is not None and sort_expr is not None:
+            # Keyset pagination: the client passes back next_cursor ("" for the first page)
+            try:
+                items, next_cursor = ApplicationSearchService.keyset_page(
+                    query, sort_expr, descending=sort_order != "asc",
+                    cursor=cursor or None, limit=per_page
+                )
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            total = None
+            pages = None
+        else:
+            if sort_expr is not None:
+                query = query.order_by(
+                    sort_expr.asc() if sort_order == "asc" else sort_expr.desc(),
+                    CourseApplication.id.desc()
+                )
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = pagination.items
+            total = pagination.total
+            pages = pagination.pages
         
         # Convert results
         applications_data = []
-        for app in pagination.items:
+        for app in items:
             try:
                 applications_data.append(app.to_dict(include_sensitive=True))
             except Exception as e:
@@ -1488,17 +1485,18 @@ def advanced_application_search():
         
         result = {
             "applications": applications_data,
-            "total": pagination.total,
-            "pages": pagination.pages,
+            "total": total,
+            "pages": pages,
             "current_page": page,
             "per_page": per_page,
+            "next_cursor": next_cursor,
             "search_config": search_config
         }
         
         # Add analytics if requested
         if search_config.get("include_analytics"):
             # Calculate search analytics
-            total_count = query.count()
+            total_count = total if total is not None else query.order_by(None).count()
             result["analytics"] = {
                 "total_found": total_count,
                 "search_performance": {
@@ -1532,8 +1530,9 @@ def list_applications():
     - Advanced filters: country, city, education_level, current_status, excel_skill_level, referral_source
     - Date filters: date_from, date_to (YYYY-MM-DD format)
     - Score filters: min_score, max_score, score_type (application_score, final_rank_score, etc.)
-    - Sorting: sort_by, order
-    - Pagination: page, per_page
+    - Sorting: sort_by, order (searching with the default sort ranks by relevance)
+    - Pagination: page, per_page, or cursor for keyset paging (pass "" for the
+      first page, then the returned next_cursor)
     """
     # Basic parameters
     course_id = request.args.get("course_id", type=int)
@@ -1544,6 +1543,7 @@ def list_applications():
     order = request.args.get("order", "desc")
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 50, type=int)
+    cursor = request.args.get("cursor")  # keyset pagination; "" requests the first page
     
     # Enhanced search parameters
     search_term = request.args.get("search", "").strip()
@@ -1605,75 +1605,11 @@ def list_applications():
     elif cohort_label:
         query = query.filter_by(cohort_label=cohort_label)
     
-    # Apply enhanced text search across multiple fields with exact match priority
+    # Apply indexed text search; relevance ranks exact/prefix name and email
+    # matches first, then substring identity matches, then full-text matches
+    relevance = None
     if search_term:
-        text = search_term.strip()
-        
-        if text:
-            # Create search patterns with different priorities
-            exact_match_conditions = [
-                CourseApplication.full_name.ilike(text),  # Exact match
-                CourseApplication.email.ilike(text)       # Exact email match
-            ]
-            
-            starts_with_conditions = [
-                CourseApplication.full_name.ilike(f"{text}%"),  # Starts with
-                CourseApplication.email.ilike(f"{text}%")       # Email starts with
-            ]
-            
-            word_boundary_conditions = [
-                CourseApplication.full_name.ilike(f"% {text} %"),  # Word boundaries
-                CourseApplication.full_name.ilike(f"{text} %"),    # Starts with word
-                CourseApplication.full_name.ilike(f"% {text}")     # Ends with word
-            ]
-            
-            partial_match_conditions = [
-                CourseApplication.full_name.ilike(f"%{text}%"),
-                CourseApplication.email.ilike(f"%{text}%"),
-                CourseApplication.phone.ilike(f"%{text}%"),
-                CourseApplication.motivation.ilike(f"%{text}%"),
-                CourseApplication.field_of_study.ilike(f"%{text}%"),
-                CourseApplication.learning_outcomes.ilike(f"%{text}%"),
-                CourseApplication.career_impact.ilike(f"%{text}%"),
-                CourseApplication.country.ilike(f"%{text}%"),
-                CourseApplication.city.ilike(f"%{text}%"),
-                CourseApplication.referral_source.ilike(f"%{text}%")
-            ]
-            
-            # Combine all conditions with OR
-            all_conditions = exact_match_conditions + starts_with_conditions + word_boundary_conditions + partial_match_conditions
-            
-            # Individual word matching for multi-word searches
-            words = text.split()
-            if len(words) > 1:
-                for word in words:
-                    if len(word) > 2:  # Skip short words
-                        word_pattern = f"%{word}%"
-                        word_conditions = [
-                            CourseApplication.full_name.ilike(word_pattern),
-                            CourseApplication.email.ilike(word_pattern),
-                            CourseApplication.motivation.ilike(word_pattern),
-                            CourseApplication.field_of_study.ilike(word_pattern),
-                            CourseApplication.country.ilike(word_pattern),
-                            CourseApplication.city.ilike(word_pattern)
-                        ]
-                        all_conditions.extend(word_conditions)
-            
-            query = query.filter(or_(*all_conditions))
-            
-            # Add custom ordering to prioritize exact matches
-            # Using CASE WHEN to create a relevance score
-            relevance_score = case(
-                (CourseApplication.full_name.ilike(text), 1000),  # Exact name match - highest priority
-                (CourseApplication.email.ilike(text), 900),       # Exact email match
-                (CourseApplication.full_name.ilike(f"{text}%"), 800),  # Name starts with
-                (CourseApplication.email.ilike(f"{text}%"), 700),      # Email starts with
-                (CourseApplication.full_name.ilike(f"% {text} %"), 600), # Word boundary
-                else_=0
-            )
-            
-            # Apply this relevance ordering before other sorting
-            query = query.order_by(relevance_score.desc())
+        query, relevance = ApplicationSearchService.apply_search(query, search_term)
     
     # Apply advanced filters
     if country:
@@ -1770,26 +1706,44 @@ def list_applications():
     }
     sort_by = sort_field_map.get(sort_by, sort_by)
     
-    # Apply sorting with fallback to final_rank_score
-    # Note: If search_term was provided, relevance ordering is already applied
-    if not search_term or sort_by != "final_rank_score":  # Allow custom sorting even with search
-        try:
-            sort_column = getattr(CourseApplication, sort_by, CourseApplication.final_rank_score)
-        except AttributeError:
-            sort_column = CourseApplication.final_rank_score
-            
-        if order == "asc":
-            query = query.order_by(sort_column.asc())
-        else:
-            query = query.order_by(sort_column.desc())
+    # Searching with the default sort orders by relevance; any explicit
+    # sort_by still takes effect
+    descending = order != "asc"
+    if relevance is not None and sort_by == "final_rank_score":
+        sort_expr = relevance
+    elif sort_by in KEYSET_SORT_FIELDS:
+        sort_expr = ApplicationSearchService.sort_expression(sort_by)
+    elif hasattr(CourseApplication, sort_by):
+        sort_expr = getattr(CourseApplication, sort_by)
+    else:
+        sort_expr = ApplicationSearchService.sort_expression("final_rank_score")
+    keyset_capable = sort_expr is relevance or sort_by in KEYSET_SORT_FIELDS
+    keyset = cursor is not None and keyset_capable
     
     # Paginate
     try:
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        next_cursor = None
+        if keyset:
+            try:
+                items, next_cursor = ApplicationSearchService.keyset_page(
+                    query, sort_expr, descending=descending, cursor=cursor or None, limit=per_page
+                )
+            except ValueError as ve:
+                return jsonify({"error": str(ve)}), 400
+            total = pages = None
+        else:
+            query = query.order_by(
+                sort_expr.desc() if descending else sort_expr.asc(),
+                CourseApplication.id.desc()
+            )
+            pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+            items = pagination.items
+            total = pagination.total
+            pages = pagination.pages
         
         # Safely convert applications to dict, handling enum errors
         applications_data = []
-        for app in pagination.items:
+        for app in items:
             try:
                 record = app.to_dict(include_sensitive=True)
                 # Enrich with course & cohort payment details
@@ -1871,10 +1825,11 @@ def list_applications():
         
         return jsonify({
             "applications": applications_data,
-            "total": pagination.total,
-            "pages": pagination.pages,
+            "total": total,
+            "pages": pages,
             "current_page": page,
-            "per_page": per_page
+            "per_page": per_page,
+            "next_cursor": next_cursor
         }), 200
     except Exception as e:
         logger.error(f"Error listing applications: {str(e)}")
@@ -2803,6 +2758,63 @@ def recalculate_scores(app_id):
     }), 200
 
 
+# 🔄 Recalculate scores for a whole course / cohort
+@application_bp.route("/recalculate-bulk", methods=["POST"])
+@jwt_required()
+def recalculate_scores_bulk():
+    """
+    Re-rank every application of a course or cohort after the scoring rules
+    change. Body: course_id and/or window_id (or application_ids), optional status.
+    """
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
+    if not current_user or current_user.role.name not in ['admin', 'instructor']:
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json() or {}
+    course_id = data.get("course_id")
+    window_id = data.get("window_id")
+    application_ids = data.get("application_ids")
+    if course_id is None and window_id is None and not application_ids:
+        return jsonify({"error": "course_id, window_id or application_ids is required"}), 400
+
+    # Instructors may only rescore applications to their own courses
+    if current_user.role.name != 'admin':
+        owned_course_ids = {
+            c.id for c in Course.query.filter_by(instructor_id=current_user.id).all()
+        }
+        if course_id is not None and course_id not in owned_course_ids:
+            return jsonify({"error": "Unauthorized for this course"}), 403
+        if window_id is not None:
+            window = ApplicationWindow.query.get(window_id)
+            if not window or window.course_id not in owned_course_ids:
+                return jsonify({"error": "Unauthorized for this cohort"}), 403
+        if application_ids:
+            foreign = CourseApplication.query.filter(
+                CourseApplication.id.in_(application_ids),
+                ~CourseApplication.course_id.in_(owned_course_ids),
+            ).count()
+            if foreign:
+                return jsonify({"error": "Unauthorized for some of these applications"}), 403
+
+    try:
+        result = ApplicationScoringService.rescore(
+            course_id=course_id,
+            window_id=window_id,
+            application_ids=application_ids,
+            status=data.get("status"),
+        )
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Bulk score recalculation failed: {e}")
+        return jsonify({"error": "Failed to recalculate scores"}), 500
+
+    return jsonify({
+        "message": f"Scores recalculated for {result['scored']} applications",
+        **result
+    }), 200
+
+
 # 🎯 Get courses for filtering (with cohort/window info)
 @application_bp.route("/courses", methods=["GET"])
 @jwt_required()
@@ -2971,92 +2983,82 @@ def get_statistics():
 @application_bp.route("/export", methods=["GET"])
 @jwt_required()
 def export_applications():
-    """Export applications to Excel file with comprehensive data"""
-    course_id = request.args.get("course_id", type=int)
-    status = request.args.get("status")
-    cohort_label = request.args.get("cohort_label")
-    application_window_id_raw = request.args.get("application_window_id")
-    
-    query = CourseApplication.query
-    if course_id:
-        query = query.filter_by(course_id=course_id)
-    if status:
-        query = query.filter_by(status=status)
-    if application_window_id_raw and application_window_id_raw.lower() == 'none':
-        query = query.filter(CourseApplication.application_window_id.is_(None))
-    elif application_window_id_raw:
-        try:
-            query = query.filter_by(application_window_id=int(application_window_id_raw))
-        except (ValueError, TypeError):
-            pass
-    elif cohort_label:
-        query = query.filter_by(cohort_label=cohort_label)
-    
-    apps = query.order_by(CourseApplication.final_rank_score.desc()).all()
-    
-    data = []
-    for a in apps:
-        data.append({
-            "ID": a.id,
-            "Full Name": a.full_name,
-            "Email": a.email,
-            "Phone": a.phone,
-            "Country": a.country,
-            "City": a.city,
-            "Age Range": a.age_range,
-            "Gender": a.gender,
-            "Education": a.education_level,
-            "Current Status": a.current_status,
-            "Field of Study": a.field_of_study,
-            "Excel Skill": a.excel_skill_level,
-            "Has Computer": a.has_computer,
-            "Internet Type": a.internet_access_type,
-            "Learning Mode": a.preferred_learning_mode,
-            "Committed": a.committed_to_complete,
-            "Agrees to Assessments": a.agrees_to_assessments,
-            "Risk Score": a.risk_score,
-            "High Risk": a.is_high_risk,
-            "Application Score": a.application_score,
-            "Readiness Score": a.readiness_score,
-            "Commitment Score": a.commitment_score,
-            "Final Rank": a.final_rank_score,
-            "Status": a.status,
-            "Cohort": a.cohort_label or "",
-            "Referral Source": a.referral_source,
-            "Applied At": a.created_at.strftime('%Y-%m-%d %H:%M') if a.created_at else "",
-        })
-    
-    df = pd.DataFrame(data)
-    
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, sheet_name='Applications', index=False)
-        
-        # Add statistics sheet
-        stats_data = {
-            "Metric": ["Total", "Pending", "Approved", "Rejected", "Waitlisted", "High Risk"],
-            "Count": [
-                len(apps),
-                len([a for a in apps if a.status == "pending"]),
-                len([a for a in apps if a.status == "approved"]),
-                len([a for a in apps if a.status == "rejected"]),
-                len([a for a in apps if a.status == "waitlisted"]),
-                len([a for a in apps if a.is_high_risk]),
-            ]
-        }
-        stats_df = pd.DataFrame(stats_data)
-        stats_df.to_excel(writer, sheet_name='Statistics', index=False)
-    
-    output.seek(0)
-    
-    filename = f"applications_course_{course_id}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    
-    return send_file(
-        output,
-        download_name=filename,
-        as_attachment=True,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
+    """
+    Export applications to Excel (default) or CSV with comprehensive data.
+
+    Query params:
+    - course_id, status, cohort_label, application_window_id: filters
+    - format: "xlsx" (default) or "csv"
+    - async: "true" to always build the file in a background task
+
+    Large exports (over EXPORT_SYNC_ROW_LIMIT rows) are always built in the
+    background; the response is then 202 with a task_id to poll via
+    /export/<task_id>/status and fetch via /export/<task_id>/download.
+    """
+    params = {
+        "course_id": request.args.get("course_id", type=int),
+        "status": request.args.get("status"),
+        "cohort_label": request.args.get("cohort_label"),
+        "application_window_id": request.args.get("application_window_id"),
+    }
+    force_async = request.args.get("async", "false").lower() == "true"
+
+    try:
+        response, job = ExportService.export(
+            "course_applications",
+            params,
+            fmt=request.args.get("format"),
+            force_async=force_async,
+            requested_by=int(get_jwt_identity()),
+        )
+    except Exception as e:
+        logger.error(f"Error exporting applications: {str(e)}")
+        return jsonify({"error": "Failed to export applications"}), 500
+
+    if job:
+        return jsonify({
+            "message": "Export is being prepared in the background",
+            **job,
+        }), 202
+    return response
+
+
+# 🧾 Check background export status
+@application_bp.route("/export/<task_id>/status", methods=["GET"])
+@jwt_required()
+def get_export_status(task_id):
+    """Status of a background export started by /export"""
+    task = background_service.get_task_status(task_id)
+    if not task or task.get("user_id") != int(get_jwt_identity()):
+        return jsonify({"error": "Task not found"}), 404
+
+    result = task.get("result") or {}
+    return jsonify({
+        "task_id": task_id,
+        "status": task["status"],
+        "progress": task.get("progress", 0),
+        "row_count": result.get("row_count"),
+        "format": result.get("format"),
+        "filename": result.get("filename"),
+        "error": task.get("error"),
+    }), 200
+
+
+# 🧾 Download a finished background export
+@application_bp.route("/export/<task_id>/download", methods=["GET"])
+@jwt_required()
+def download_export(task_id):
+    """Download the file produced by a completed background export"""
+    task = background_service.get_task_status(task_id)
+    if not task or task.get("user_id") != int(get_jwt_identity()):
+        return jsonify({"error": "Task not found"}), 404
+    if task["status"] != "completed":
+        return jsonify({"error": "Export is not ready", "status": task["status"]}), 409
+
+    response = ExportService.job_file_response(task)
+    if response is None:
+        return jsonify({"error": "Export file has expired"}), 410
+    return response
 
 
 # ✅ Get user application statistics
@@ -3710,9 +3712,13 @@ def _bulk_waitlist_application(application, custom_message, admin_id, send_email
 @jwt_required()
 def send_custom_email():
     """
-    Start a custom email sending task in the background.
+    Start a custom email campaign in the background.
     Returns immediately with a task ID that can be polled for status.
     
+    Recipients are streamed page by page into the email outbox, deduplicated
+    by address, and the campaign checkpoints its progress in the database so
+    it resumes after a restart and can be polled from any worker.
+    
     Request body:
     {
         "subject": "Email subject",
@@ -3740,84 +3746,113 @@ def send_custom_email():
     data = request.get_json() or {}
     subject = data.get("subject", "").strip()
     message = data.get("message", "").strip()
-    course_id = data.get("course_id")
-    status_filter = data.get("status_filter")
-    include_all = data.get("include_all", False)
     
     if not subject or not message:
         return jsonify({"error": "Subject and message are required"}), 400
     
     try:
-        # Build query for applications (same as before)
-        query = CourseApplication.query
-        
-        if not include_all:
-            if course_id:
-                query = query.filter(CourseApplication.course_id == course_id)
-            if status_filter:
-                query = query.filter(CourseApplication.status == status_filter)
-        
-        applications = query.all()
+        campaign = EmailCampaignService.create(
+            subject=subject,
+            message=message,
+            created_by=current_user.id,
+            course_id=data.get("course_id"),
+            status_filter=data.get("status_filter"),
+            include_all=data.get("include_all", False),
+        )
         
-        if not applications:
+        if not campaign:
             return jsonify({"error": "No applications found matching the criteria"}), 404
         
-        # Generate unique task ID
-        task_id = str(uuid.uuid4())
-        
-        # Initialize task tracking
-        custom_email_tasks[task_id] = {
-            "status": "started",
-            "progress": {"processed": 0, "total": len(applications)},
-            "results": {
-                "sent_count": 0,
-                "failed_count": 0,
-                "total_applications": len(applications),
-                "failed_emails": []
-            },
-            "started_at": datetime.utcnow().isoformat(),
-            "admin_id": current_user_id
-        }
-        
-        # Start background task with proper Flask app context
-        application_ids = [app.id for app in applications]
+        task_id = campaign.id
+        total = campaign.total_recipients
         
+        # A campaign that fails to start here stays pending and is picked up
+        # by the campaign resumer
         try:
-            # Pass the current Flask app context to background thread
-            from flask import current_app
             thread = threading.Thread(
-                target=process_custom_email_task,
-                args=(task_id, application_ids, subject, message, current_user_id, current_app._get_current_object())
+                target=process_email_campaign,
+                args=(task_id, current_app._get_current_object())
             )
             thread.daemon = True
             thread.start()
-            logger.info(f"🚀 Started background thread for task {task_id}")
+            logger.info(f"🚀 Started email campaign {task_id} for {total} recipients")
         except Exception as thread_error:
-            logger.error(f"❌ Failed to start background thread: {str(thread_error)}")
-            custom_email_tasks[task_id]["status"] = "failed"
-            custom_email_tasks[task_id]["error"] = f"Failed to start background thread: {str(thread_error)}"
-            return jsonify({"error": f"Failed to start background thread: {str(thread_error)}"}), 500
+            logger.error(f"❌ Failed to start campaign thread, leaving it to the resumer: {str(thread_error)}")
         
         # Return immediate response
         return jsonify({
             "task_id": task_id,
             "message": "Custom email task started in background",
             "status_url": f"/api/v1/applications/custom-email/{task_id}/status",
-            "total_applications": len(applications),
+            "total_applications": total,
             "estimated_time": "1-3 minutes"
         }), 202  # 202 Accepted
         
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error starting custom email task: {str(e)}")
         return jsonify({"error": f"Failed to start custom email task: {str(e)}"}), 500
 
 
+def process_email_campaign(campaign_id, app_instance):
+    """Queue a campaign's recipients from a background thread"""
+    with app_instance.app_context():
+        try:
+            EmailCampaignService.run(campaign_id)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"❌ Email campaign {campaign_id} failed: {str(e)}")
+        finally:
+            db.session.remove()
+
+
+_CAMPAIGN_TASK_STATUS = {
+    CampaignStatus.PENDING: "started",
+    CampaignStatus.RUNNING: "processing",
+    CampaignStatus.QUEUED: "processing",
+    CampaignStatus.COMPLETED: "completed",
+    CampaignStatus.FAILED: "failed",
+}
+
+
+def _campaign_task_response(stats):
+    """Shape campaign stats like the custom email task status payload"""
+    response = {
+        "task_id": stats["id"],
+        "status": _CAMPAIGN_TASK_STATUS.get(stats["status"], stats["status"]),
+        "campaign_status": stats["status"],
+        "progress": {
+            "processed": stats["sent_count"] + stats["failed_count"],
+            "total": stats["total_recipients"],
+            "scanned": stats["scanned"],
+            "queued": stats["queued"],
+            "duplicates": stats["duplicates"],
+        },
+        "stats": {
+            "delivery": stats["delivery"],
+            "emails_per_minute": stats["emails_per_minute"],
+            "started_at": stats["started_at"],
+            "last_sent_at": stats["last_sent_at"],
+        },
+    }
+    if stats["status"] == CampaignStatus.COMPLETED:
+        response["results"] = {
+            "sent_count": stats["sent_count"],
+            "failed_count": stats["failed_count"],
+            "total_applications": stats["total_recipients"],
+            "failed_emails": stats["failed_emails"],
+        }
+    if stats["status"] == CampaignStatus.FAILED:
+        response["error"] = stats["last_error"]
+    return response
+
+
 # ✅ Custom Email Task Status (Admin Only)
 @application_bp.route("/custom-email/<task_id>/status", methods=["GET"])
 @jwt_required()
 def get_custom_email_task_status(task_id):
     """
-    Get the status of a custom email background task
+    Get the status of a custom email campaign (or email retry task)
     """
     current_user_id = get_jwt_identity()
     current_user = User.query.get(current_user_id)
@@ -3825,13 +3860,14 @@ def get_custom_email_task_status(task_id):
     if not current_user or current_user.role.name not in ["admin"]:
         return jsonify({"error": "Unauthorized"}), 403
     
+    stats = EmailCampaignService.stats(task_id)
+    if stats:
+        return jsonify(_campaign_task_response(stats)), 200
+    
     task = custom_email_tasks.get(task_id)
     if not task:
         return jsonify({"error": "Task not found"}), 404
     
-    # Add debug logging
-    logger.info(f"🔍 Task {task_id} status check: {task.get('status')}, progress: {task.get('progress')}")
-    
     response = {
         "task_id": task_id,
         "status": task["status"],
@@ -3840,7 +3876,6 @@ def get_custom_email_task_status(task_id):
     
     if task.get("status") == "completed":
         response["results"] = task.get("results", {})
-        logger.info(f"📋 Task {task_id} completed with results: {task.get('results', {})}")
     
     if task.get("status") == "failed":
         response["error"] = task.get("error")
@@ -3848,12 +3883,13 @@ def get_custom_email_task_status(task_id):
     return jsonify(response), 200
 
 
-# 🐛 Debug endpoint to see all tasks (Admin Only - for debugging)
-@application_bp.route("/custom-email/debug/all-tasks", methods=["GET"])
+# 📬 Recent custom email campaigns with delivery statistics (Admin Only)
+@application_bp.route("/custom-email/campaigns", methods=["GET"])
 @jwt_required()
-def debug_all_custom_email_tasks():
+def list_custom_email_campaigns():
     """
-    Debug endpoint to see all active custom email tasks
+    List recent custom email campaigns with their progress, throughput and
+    failure counts. Reads from the database, so it answers from any worker.
     """
     current_user_id = get_jwt_identity()
     current_user = User.query.get(current_user_id)
@@ -3861,333 +3897,60 @@ def debug_all_custom_email_tasks():
     if not current_user or current_user.role.name not in ["admin"]:
         return jsonify({"error": "Unauthorized"}), 403
     
-    return jsonify({
-        "total_tasks": len(custom_email_tasks),
-        "tasks": custom_email_tasks.all()
-    }), 200
+    limit = min(request.args.get("limit", 20, type=int), 100)
+    campaigns = [EmailCampaignService.stats(campaign.id) for campaign in EmailCampaignService.recent(limit)]
+    for campaign in campaigns:
+        campaign["failed_emails"] = campaign["failed_emails"][:20]
+    
+    return jsonify({"campaigns": campaigns}), 200
 
 
-def process_custom_email_task(task_id, application_ids, subject, message, admin_id, app_instance):
-    """
-    Process custom email sending in background with proper Flask context
-    """
-    import time
-    from flask import current_app
+# ▶️ Resume a failed custom email campaign from its checkpoint (Admin Only)
+@application_bp.route("/custom-email/<task_id>/resume", methods=["POST"])
+@jwt_required()
+def resume_custom_email_campaign(task_id):
+    """Restart a failed campaign from where it stopped"""
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
     
-    logger.info(f"🎯 BACKGROUND THREAD STARTED: Task {task_id} with {len(application_ids)} applications")
+    if not current_user or current_user.role.name != "admin":
+        return jsonify({"error": "Unauthorized. Admin access required."}), 403
     
-    # Initialize counters
-    sent_count = 0
-    failed_count = 0
-    failed_emails = []
+    if not EmailCampaignService.resume(task_id):
+        return jsonify({"error": "No failed campaign with this ID"}), 404
     
-    try:
-        # Get the Flask app from the main module
-        import sys
-        import os
-        sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-        from main import app as flask_app
-        
-        # Create proper Flask application context
-        with flask_app.app_context():
-            logger.info(f"🌐 Flask context created successfully for task {task_id}")
-            
-            # Update task status to processing
-            custom_email_tasks[task_id]["status"] = "processing"
-            logger.info(f"📝 Task {task_id} status updated to 'processing'")
-            
-            # Import models inside the Flask context
-            from ..models.course_application import CourseApplication
-            from ..models.user_models import db
-            
-            try:
-                # Re-query applications with fresh database session
-                applications = CourseApplication.query.filter(
-                    CourseApplication.id.in_(application_ids)
-                ).all()
-                
-                logger.info(f"📄 Retrieved {len(applications)} applications from database for task {task_id}")
-                
-                if not applications:
-                    raise Exception("No applications found in database")
-                
-                # Split applications: first 10 get individual emails, rest get BCC
-                direct_applications = applications[:10]
-                bcc_applications = applications[10:]
-                
-                logger.info(f"📧 Processing emails: {len(direct_applications)} individual, {len(bcc_applications)} BCC")
-                
-                # Process individual emails first
-                direct_emails_data = []
-                for i, app in enumerate(direct_applications):
-                    try:
-                        recipient_name = app.full_name or "Applicant"
-                        email_content = custom_application_email(
-                            recipient_name=recipient_name,
-                            subject=subject,
-                            message=message
-                        )
-                        
-                        direct_emails_data.append({
-                            'email': app.email,
-                            'template': email_content,
-                            'recipient_name': recipient_name,
-                            'application_id': app.id
-                        })
-                        
-                        # Update progress incrementally
-                        processed = i + 1
-                        custom_email_tasks[task_id]["progress"]["processed"] = processed
-                        logger.info(f"📈 Progress: {processed}/{len(applications)} for task {task_id}")
-                        
-                        # Small delay to prevent overwhelming
-                        time.sleep(0.1)
-                        
-                    except Exception as prep_error:
-                        logger.error(f"❌ Error preparing email for {app.email}: {str(prep_error)}")
-                        failed_emails.append({
-                            "email": app.email,
-                            "recipient_name": app.full_name or "Applicant",
-                            "error": f"Email preparation failed: {str(prep_error)}",
-                            "application_id": app.id
-                        })
-                        failed_count += 1
-                
-                # Send individual emails using batch function with enhanced error handling
-                if direct_emails_data:
-                    try:
-                        successful_emails, failed_email_details = send_emails_with_brevo(
-                            direct_emails_data, retries=3
-                        )
-                        
-                        sent_count += len(successful_emails)
-                        failed_count += len(failed_email_details)
-                        failed_emails.extend(failed_email_details)
-                        
-                        logger.info(f"📧 Individual emails: {len(successful_emails)} sent, {len(failed_email_details)} failed")
-                        
-                    except Exception as batch_error:
-                        logger.error(f"❌ Batch email error: {str(batch_error)}")
-                        # Mark all direct emails as failed
-                        for email_data in direct_emails_data:
-                            failed_emails.append({
-                                "email": email_data['email'],
-                                "recipient_name": email_data['recipient_name'],
-                                "error": f"Batch sending failed: {str(batch_error)}",
-                                "application_id": email_data['application_id']
-                            })
-                        failed_count += len(direct_emails_data)
-                
-                # Update progress after individual emails
-                custom_email_tasks[task_id]["progress"]["processed"] = len(direct_applications)
-                
-                # Process BCC emails if any
-                if bcc_applications:
-                    try:
-                        bcc_emails = [app.email for app in bcc_applications]
-                        logger.info(f"📧 Sending BCC email to {len(bcc_emails)} recipients")
-                        
-                        # Use a generic name for BCC email
-                        email_content = custom_application_email(
-                            recipient_name="Applicant",
-                            subject=subject,
-                            message=message
-                        )
-                        
-                        # Use first BCC email as primary recipient for better delivery
-                        primary_recipient = bcc_emails[0]
-                        remaining_bcc = bcc_emails[1:] if len(bcc_emails) > 1 else []
-                        
-                        success = send_email_with_bcc(
-                            to=[primary_recipient],
-                            bcc=remaining_bcc,
-                            subject=subject,
-                            template=email_content
-                        )
-                        
-                        if success:
-                            sent_count += len(bcc_applications)
-                            logger.info(f"✅ BCC custom email sent to {len(bcc_applications)} recipients")
-                        else:
-                            failed_count += len(bcc_applications)
-                            for app in bcc_applications:
-                                failed_emails.append({
-                                    "email": app.email,
-                                    "recipient_name": app.full_name or "Applicant",
-                                    "error": "BCC email delivery failed",
-                                    "application_id": app.id
-                                })
-                            logger.error(f"❌ Failed to send BCC custom email")
-                            
-                    except Exception as bcc_error:
-                        logger.error(f"❌ BCC email error: {str(bcc_error)}")
-                        failed_count += len(bcc_applications)
-                        for app in bcc_applications:
-                            failed_emails.append({
-                                "email": app.email,
-                                "recipient_name": app.full_name or "Applicant",
-                                "error": f"BCC email failed: {str(bcc_error)}",
-                                "application_id": app.id
-                            })
-                
-                # Update final progress
-                custom_email_tasks[task_id]["progress"]["processed"] = len(applications)
-                
-                # Mark task as completed
-                custom_email_tasks[task_id]["status"] = "completed"
-                custom_email_tasks[task_id]["results"] = {
-                    "sent_count": sent_count,
-                    "failed_count": failed_count,
-                    "total_applications": len(applications),
-                    "failed_emails": failed_emails
-                }
-                custom_email_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
-                
-                logger.info(f"✅ Custom email task {task_id} completed: {sent_count} sent, {failed_count} failed")
-                logger.info(f"💾 Task results stored: {len(failed_emails)} failed emails recorded")
-                
-            except Exception as db_error:
-                logger.error(f"❌ Database error in task {task_id}: {str(db_error)}")
-                custom_email_tasks[task_id]["status"] = "failed"
-                custom_email_tasks[task_id]["error"] = f"Database error: {str(db_error)}"
-                custom_email_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
-                
-    except Exception as context_error:
-        logger.error(f"❌ Flask context error for task {task_id}: {str(context_error)}")
-        custom_email_tasks[task_id]["status"] = "failed"
-        custom_email_tasks[task_id]["error"] = f"Flask context error: {str(context_error)}"
-        custom_email_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
+    thread = threading.Thread(
+        target=process_email_campaign,
+        args=(task_id, current_app._get_current_object())
+    )
+    thread.daemon = True
+    thread.start()
+    
+    return jsonify({
+        "task_id": task_id,
+        "message": "Campaign resumed from its last checkpoint",
+        "status_url": f"/api/v1/applications/custom-email/{task_id}/status"
+    }), 202
+
+
+# 🐛 Debug endpoint to see all tasks (Admin Only - for debugging)
+@application_bp.route("/custom-email/debug/all-tasks", methods=["GET"])
+@jwt_required()
+def debug_all_custom_email_tasks():
     """
-    Process custom email sending in background
+    Debug endpoint to see all custom email tasks and recent campaigns
     """
-    from ..models.course_application import CourseApplication
+    current_user_id = get_jwt_identity()
+    current_user = User.query.get(current_user_id)
     
-    logger.info(f"🎯 BACKGROUND THREAD STARTED: Task {task_id} with {len(application_ids)} applications")
+    if not current_user or current_user.role.name not in ["admin"]:
+        return jsonify({"error": "Unauthorized"}), 403
     
-    # Create Flask application context using the passed app instance
-    try:
-        with app_instance.app_context():
-            logger.info(f"🌐 Flask context created successfully for task {task_id}")
-            
-            logger.info(f"🎯 Starting custom email task {task_id} for {len(application_ids)} applications")
-            
-            # Update task status
-            custom_email_tasks[task_id]["status"] = "processing"
-            logger.info(f"📝 Task {task_id} status updated to 'processing'")
-            
-            # Re-query applications in the new context
-            applications = CourseApplication.query.filter(CourseApplication.id.in_(application_ids)).all()
-            logger.info(f"🔄 Re-queried {len(applications)} applications for task {task_id}")
-            
-            sent_count = 0
-            failed_count = 0
-            failed_emails = []
-            
-            # Split applications: first 10 get individual emails, rest get BCC
-            direct_applications = applications[:10]
-            bcc_applications = applications[10:]
-            
-            # Process individual emails first
-            direct_emails_data = []
-            for i, app in enumerate(direct_applications):
-                recipient_name = app.full_name or "Applicant"
-                email_content = custom_application_email(
-                    recipient_name=recipient_name,
-                    subject=subject,
-                    message=message
-                )
-                direct_emails_data.append({
-                    'email': app.email,
-                    'template': email_content,
-                    'recipient_name': recipient_name,
-                    'application_id': app.id
-                })
-            
-            logger.info(f"📧 Processing {len(direct_emails_data)} direct emails for task {task_id}")
-            
-            # Send individual emails using batch function
-            successful_emails, failed_email_details = send_emails_with_brevo(
-                direct_emails_data, retries=3
-            )
-            
-            sent_count = len(successful_emails)
-            failed_count = len(failed_email_details)
-            failed_emails = failed_email_details
-            
-            # Update progress after direct emails
-            custom_email_tasks[task_id]["progress"]["processed"] = len(direct_applications)
-            logger.info(f"📈 Updated progress for task {task_id}: {len(direct_applications)}/{len(applications)} processed")
-            
-            # Process BCC emails if any
-            if bcc_applications:
-                try:
-                    bcc_emails = [app.email for app in bcc_applications]
-                    
-                    # Use a generic name for BCC email
-                    email_content = custom_application_email(
-                        recipient_name="Applicant",
-                        subject=subject,
-                        message=message
-                    )
-                    
-                    # Use first BCC email as primary recipient
-                    primary_recipient = bcc_emails[0]
-                    remaining_bcc = bcc_emails[1:] if len(bcc_emails) > 1 else []
-                    
-                    success = send_email_with_bcc(
-                        to=[primary_recipient],
-                        bcc=remaining_bcc,
-                        subject=subject,
-                        template=email_content
-                    )
-                    
-                    if success:
-                        sent_count += len(bcc_applications)
-                        logger.info(f"✅ BCC custom email sent to {len(bcc_applications)} recipients")
-                    else:
-                        failed_count += len(bcc_applications)
-                        for app in bcc_applications:
-                            failed_emails.append({
-                                "email": app.email,
-                                "recipient_name": app.full_name or "Applicant",
-                                "error": "BCC email failed",
-                                "application_id": app.id
-                            })
-                        logger.error(f"❌ Failed to send BCC custom email")
-                        
-                except Exception as email_error:
-                    failed_count += len(bcc_applications)
-                    for app in bcc_applications:
-                        failed_emails.append({
-                            "email": app.email,
-                            "recipient_name": app.full_name or "Applicant",
-                            "error": str(email_error),
-                            "application_id": app.id
-                        })
-                    logger.error(f"❌ Error sending BCC custom email: {str(email_error)}")
-            
-            # Update final progress
-            custom_email_tasks[task_id]["progress"]["processed"] = len(applications)
-            logger.info(f"📊 Final progress update for task {task_id}: {len(applications)}/{len(applications)} processed")
-            
-            # Mark task as completed
-            custom_email_tasks[task_id]["status"] = "completed"
-            custom_email_tasks[task_id]["results"] = {
-                "sent_count": sent_count,
-                "failed_count": failed_count,
-                "total_applications": len(applications),
-                "failed_emails": failed_emails
-            }
-            custom_email_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
-            
-            logger.info(f"✅ Custom email task {task_id} completed: {sent_count} sent, {failed_count} failed")
-            logger.info(f"💾 Task results stored: {len(failed_emails)} failed emails recorded")
-            
-    except Exception as e:
-        logger.error(f"❌ Custom email task {task_id} failed: {str(e)}")
-        custom_email_tasks[task_id]["status"] = "failed"
-        custom_email_tasks[task_id]["error"] = str(e)
-        custom_email_tasks[task_id]["completed_at"] = datetime.utcnow().isoformat()
+    return jsonify({
+        "total_tasks": len(custom_email_tasks),
+        "tasks": custom_email_tasks.all(),
+        "campaigns": [campaign.to_dict() for campaign in EmailCampaignService.recent()]
+    }), 200
 
 
 # ✅ Retry Failed Custom Emails (Admin Only)
@@ -4197,7 +3960,10 @@ def retry_failed_emails():
     """
     Retry sending emails to previously failed recipients
     
-    Request body:
+    For a campaign, pass only its ID and its failed outbox emails are put
+    back in the queue: {"campaign_id": "uuid"}
+    
+    Otherwise, request body:
     {
         "failed_emails": [
             {
@@ -4228,6 +3994,19 @@ def retry_failed_emails():
         return jsonify({"error": "Unauthorized. Admin access required."}), 403
     
     data = request.get_json() or {}
+    campaign_id = data.get("campaign_id")
+    if campaign_id:
+        requeued = EmailCampaignService.retry_failed(campaign_id)
+        if not requeued:
+            return jsonify({"error": "No failed emails to retry for this campaign"}), 404
+        return jsonify({
+            "task_id": campaign_id,
+            "message": "Failed emails queued for retry",
+            "status_url": f"/api/v1/applications/custom-email/{campaign_id}/status",
+            "total_emails": requeued,
+            "estimated_time": "30-60 seconds"
+        }), 202
+    
     failed_emails_data = data.get("failed_emails", [])
     subject = data.get("subject", "").strip()
     message = data.get("message", "").strip()
@@ -5,6 +5,7 @@ from functools import wraps
 
 from ..models.user_models import User
 from ..services.certificate_service import CertificateService
+from ..services.certificate_artifact_store import CertificateArtifactStore
 
 # Helper decorator for student access
 def student_required(f):
@@ -282,14 +283,10 @@ def download_certificate(certificate_id):
                 "error": "Certificate is locked. Complete the course to download."
             }), 403
         
-        # Log certificate details for debugging
-        current_app.logger.info(f"Generating PDF for certificate ID={certificate_id}, Student={student_id}")
-        current_app.logger.debug(f"Certificate has student: {certificate.student is not None}, course: {certificate.course is not None}")
+        # Rendered once, then served from the artifact store
+        artifact = CertificateArtifactStore.get_or_create(certificate, 'pdf')
         
-        # Generate PDF using the service
-        pdf_buffer = CertificateService.generate_certificate_pdf(certificate)
-        
-        if not pdf_buffer:
+        if not artifact:
             current_app.logger.error(f"PDF generation returned None for certificate ID={certificate_id}")
             return jsonify({
                 "success": False,
@@ -300,15 +297,8 @@ def download_certificate(certificate_id):
         course_title_safe = certificate.course.title.replace(' ', '_').replace('/', '_') if certificate.course else "Course"
         filename = f"{course_title_safe}_Certificate.pdf"
         
-        current_app.logger.info(f"PDF generated successfully for certificate ID={certificate_id}, filename={filename}")
-        
-        # Return PDF file
-        return send_file(
-            pdf_buffer,
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Return PDF file (304 when the client's ETag still matches)
+        return CertificateArtifactStore.send(artifact, filename)
         
     except Exception as e:
         current_app.logger.error(f"Certificate download error: {str(e)}")
@@ -348,12 +338,10 @@ def download_certificate_image(certificate_id):
                 "error": "Certificate is locked. Complete the course to download."
             }), 403
         
-        current_app.logger.info(f"Generating PNG for certificate ID={certificate_id}, Student={student_id}")
+        # Rendered once, then served from the artifact store
+        artifact = CertificateArtifactStore.get_or_create(certificate, 'png')
         
-        # Generate PNG using the service
-        img_buffer = CertificateService.generate_certificate_image(certificate)
-        
-        if not img_buffer:
+        if not artifact:
             current_app.logger.error(f"PNG generation returned None for certificate ID={certificate_id}")
             return jsonify({
                 "success": False,
@@ -364,15 +352,8 @@ def download_certificate_image(certificate_id):
         course_title_safe = certificate.course.title.replace(' ', '_').replace('/', '_') if certificate.course else "Course"
         filename = f"{course_title_safe}_Certificate.png"
         
-        current_app.logger.info(f"PNG generated successfully for certificate ID={certificate_id}, filename={filename}")
-        
-        # Return PNG file
-        return send_file(
-            img_buffer,
-            mimetype='image/png',
-            as_attachment=True,
-            download_name=filename
-        )
+        # Return PNG file (304 when the client's ETag still matches)
+        return CertificateArtifactStore.send(artifact, filename)
         
     except Exception as e:
         current_app.logger.error(f"Certificate image download error: {str(e)}")
@@ -14,10 +14,13 @@ from datetime import datetime
 from io import BytesIO
 import mimetypes
 
+from sqlalchemy.orm import joinedload
+
 from ..models.user_models import db, User
-from ..models.course_models import AssignmentSubmission, ProjectSubmission, Course
+from ..models.course_models import AssignmentSubmission, ProjectSubmission, Course, Assignment, Project
 from ..models.file_models import FileComment, FileAnalysis
 from ..utils.google_drive_service import GoogleDriveService
+from ..services.submission_archive_service import SubmissionArchiveService
 
 logger = logging.getLogger(__name__)
 
@@ -196,69 +199,63 @@ def download_submission_files(submission_id):
         if course.instructor_id != current_user_id:
             return jsonify({"message": "Access denied"}), 403
         
-        # Parse files from submission
-        files_data = []
-        if submission.file_url:
-            try:
-                files_data = json.loads(submission.file_url) if submission.file_url else []
-                if not isinstance(files_data, list):
-                    files_data = []
-            except (json.JSONDecodeError, TypeError):
-                files_data = []
-        
-        if not files_data:
+        entries = SubmissionArchiveService.submission_entries(submission)
+        if not entries:
             return jsonify({"message": "No files to download"}), 404
         
-        # Create ZIP file in memory
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            drive_service = GoogleDriveService()
-            
-            for file_info in files_data:
-                try:
-                    filename = file_info.get('filename', 'unknown_file')
-                    file_url = file_info.get('url', '')
-                    
-                    if not file_url:
-                        continue
-                    
-                    # Download file content
-                    if 'drive.google.com' in file_url:
-                        # Handle Google Drive files
-                        file_id = drive_service.extract_file_id_from_url(file_url)
-                        if file_id:
-                            content = drive_service.download_file(file_id)
-                            if content:
-                                zip_file.writestr(filename, content)
-                    else:
-                        # Handle direct file URLs (if any)
-                        # This would require additional implementation for direct URL downloads
-                        pass
-                        
-                except Exception as file_error:
-                    logger.warning(f"Failed to add file {filename} to ZIP: {str(file_error)}")
-                    continue
-        
-        zip_buffer.seek(0)
-        
         # Generate filename
         student_name = f"{submission.student.first_name}_{submission.student.last_name}"
         assignment_title = submission.assignment.title if hasattr(submission, 'assignment') else submission.project.title
         filename = f"{student_name}_{assignment_title}_files.zip"
         filename = secure_filename(filename)
         
-        return send_file(
-            zip_buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/zip'
-        )
+        # Files are fetched in parallel and the ZIP is streamed as it is built
+        return SubmissionArchiveService.zip_response(entries, filename)
         
     except Exception as e:
         logger.error(f"Error downloading submission files: {str(e)}", exc_info=True)
         return jsonify({"message": "Failed to download files", "error": str(e)}), 500
 
 
+@enhanced_file_bp.route("/download/assignment/<int:assignment_id>", methods=["GET"])
+@instructor_required
+def download_assignment_files(assignment_id):
+    """Download every student's files for an assignment (or project with ?type=project) as one ZIP"""
+    try:
+        current_user_id = int(get_jwt_identity())
+        is_project = request.args.get('type') == 'project'
+        
+        if is_project:
+            parent = Project.query.get(assignment_id)
+            submission_model, parent_column = ProjectSubmission, ProjectSubmission.project_id
+        else:
+            parent = Assignment.query.get(assignment_id)
+            submission_model, parent_column = AssignmentSubmission, AssignmentSubmission.assignment_id
+        
+        if not parent:
+            return jsonify({"message": "Project not found" if is_project else "Assignment not found"}), 404
+        if parent.course.instructor_id != current_user_id:
+            return jsonify({"message": "Access denied"}), 403
+        
+        submissions = (
+            submission_model.query
+            .options(joinedload(submission_model.student))
+            .filter(parent_column == assignment_id)
+            .order_by(submission_model.student_id)
+            .all()
+        )
+        entries = SubmissionArchiveService.assignment_entries(submissions)
+        if not entries:
+            return jsonify({"message": "No files to download"}), 404
+        
+        filename = secure_filename(f"{parent.title}_submissions.zip")
+        return SubmissionArchiveService.zip_response(entries, filename)
+        
+    except Exception as e:
+        logger.error(f"Error downloading assignment files: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to download files", "error": str(e)}), 500
+
+
 @enhanced_file_bp.route("/download/single", methods=["POST"])
 @instructor_required
 def download_single_file():
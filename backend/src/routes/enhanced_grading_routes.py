@@ -19,6 +19,9 @@ from ..models.course_models import (
 )
 from ..models.student_models import AssessmentAttempt, LessonCompletion, ModuleProgress
 from ..utils.email_notifications import send_grade_notification, send_project_graded_notification, send_grade_with_modification_notification
+from ..services.grading_queue_service import GradingQueueService
+from ..services.submission_similarity_service import SubmissionSimilarityService
+from ..services.bulk_grading_service import BulkGradingService, SYNC_LIMIT as BULK_GRADE_SYNC_LIMIT
 # from ..utils.ai_grading_helper import AIGradingHelper
 # from ..utils.plagiarism_checker import PlagiarismChecker
 
@@ -47,6 +50,18 @@ enhanced_grading_bp = Blueprint("enhanced_grading_bp", __name__, url_prefix="/ap
 # ENHANCED SUBMISSION RETRIEVAL
 # =====================
 
+def submission_file_name(submission):
+    """Name of the first uploaded file, from the submission's file metadata."""
+    if not submission.file_url:
+        return None
+    try:
+        files = json.loads(submission.file_url)
+    except (json.JSONDecodeError, TypeError):
+        return None
+    if isinstance(files, list) and files and isinstance(files[0], dict):
+        return files[0].get('filename') or files[0].get('name')
+    return None
+
 @enhanced_grading_bp.route("/assignments/submissions/enhanced", methods=["GET"])
 @instructor_required
 def get_enhanced_assignment_submissions():
@@ -66,98 +81,80 @@ def get_enhanced_assignment_submissions():
         priority = request.args.get('priority')  # low, medium, high
         sort_by = request.args.get('sort_by', 'submitted_at')
         sort_order = request.args.get('sort_order', 'desc')
-        page = request.args.get('page', 1, type=int)
-        per_page = min(request.args.get('per_page', 20, type=int), 100)
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
         
         # Date range filtering
         date_start = request.args.get('date_start')
         date_end = request.args.get('date_end')
         
-        # Build enhanced query with optimized joins
-        query = db.session.query(AssignmentSubmission).join(Assignment).join(Course)
-        query = query.options(
-            db.joinedload(AssignmentSubmission.assignment),
-            db.joinedload(AssignmentSubmission.student)
+        cursor = request.args.get('cursor')
+        now = datetime.utcnow()
+        
+        query = GradingQueueService.filtered_query(
+            current_user_id,
+            course_id=course_id,
+            assignment_id=assignment_id,
+            student_id=student_id,
+            search_query=search_query,
+            date_start=date_start,
+            date_end=date_end,
         )
         
-        # Filter by instructor's courses
-        query = query.filter(Course.instructor_id == current_user_id)
-        
-        # Apply filters
-        if course_id:
-            query = query.filter(Assignment.course_id == course_id)
-        if assignment_id:
-            query = query.filter(AssignmentSubmission.assignment_id == assignment_id)
-        if student_id:
-            query = query.filter(AssignmentSubmission.student_id == student_id)
-        
-        # Status filtering with enhanced logic
-        if status == 'pending':
-            query = query.filter(AssignmentSubmission.grade.is_(None))
-        elif status == 'graded':
-            query = query.filter(AssignmentSubmission.grade.isnot(None))
-        elif status == 'overdue':
-            query = query.filter(
-                and_(
-                    Assignment.due_date < datetime.utcnow(),
-                    AssignmentSubmission.grade.is_(None)
+        # Counts for every status tab in one aggregate query
+        status_counts = GradingQueueService.status_counts(query, now)
+        status_filter = GradingQueueService.status_condition(status, now)
+        if status_filter is not None:
+            query = query.filter(status_filter)
+        total_count = status_counts.get(status, status_counts['all'])
+        query = GradingQueueService.with_related(query)
+        
+        next_cursor = None
+        if cursor is not None and sort_by == 'submitted_at':
+            # Keyset pagination on (submitted_at, id)
+            try:
+                submissions, next_cursor = GradingQueueService.keyset_page(
+                    query, descending=sort_order != 'asc', cursor=cursor or None, limit=per_page
                 )
+            except ValueError as ve:
+                return jsonify({"message": str(ve)}), 400
+        else:
+            # Calculate priority scores for sorting
+            priority_score = case(
+                (and_(Assignment.due_date < now, AssignmentSubmission.grade.is_(None)), 3),  # Overdue
+                (Assignment.due_date < now + timedelta(days=1), 2),  # Due soon
+                else_=1
             )
-        
-        # Search functionality
-        if search_query:
-            search_filter = or_(
-                User.first_name.ilike(f'%{search_query}%'),
-                User.last_name.ilike(f'%{search_query}%'),
-                User.email.ilike(f'%{search_query}%'),
-                Assignment.title.ilike(f'%{search_query}%'),
-                AssignmentSubmission.submission_text.ilike(f'%{search_query}%')
-            )
-            query = query.join(User, User.id == AssignmentSubmission.student_id)
-            query = query.filter(search_filter)
-        
-        # Date range filtering
-        if date_start:
-            query = query.filter(AssignmentSubmission.submitted_at >= datetime.fromisoformat(date_start))
-        if date_end:
-            query = query.filter(AssignmentSubmission.submitted_at <= datetime.fromisoformat(date_end))
-        
-        # Calculate priority scores for sorting
-        priority_score = case(
-            (and_(Assignment.due_date < datetime.utcnow(), AssignmentSubmission.grade.is_(None)), 3),  # Overdue
-            (Assignment.due_date < datetime.utcnow() + timedelta(days=1), 2),  # Due soon
-            else_=1
-        )
-        
-        # Enhanced sorting options
-        sort_mapping = {
-            'submitted_at': AssignmentSubmission.submitted_at,
-            'due_date': Assignment.due_date,
-            'student_name': User.last_name,
-            'grade': AssignmentSubmission.grade,
-            'priority': priority_score,
-            'days_late': func.greatest(0, func.date_part('day', AssignmentSubmission.submitted_at - Assignment.due_date))
-        }
-        
-        if sort_by in sort_mapping:
-            sort_column = sort_mapping[sort_by]
-            if sort_order == 'desc':
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(sort_column)
-        
-        # Secondary sort by priority for consistent ordering
-        query = query.order_by(desc(priority_score), desc(AssignmentSubmission.submitted_at))
-        
-        # Pagination
-        total_count = query.count()
-        submissions = query.offset((page - 1) * per_page).limit(per_page).all()
+            
+            # Enhanced sorting options
+            sort_mapping = {
+                'submitted_at': AssignmentSubmission.submitted_at,
+                'due_date': Assignment.due_date,
+                'student_name': User.last_name,
+                'grade': AssignmentSubmission.grade,
+                'priority': priority_score,
+                'days_late': func.greatest(0, func.date_part('day', AssignmentSubmission.submitted_at - Assignment.due_date))
+            }
+            
+            if sort_by == 'student_name':
+                query = query.join(User, User.id == AssignmentSubmission.student_id)
+            if sort_by in sort_mapping:
+                sort_column = sort_mapping[sort_by]
+                if sort_order == 'desc':
+                    query = query.order_by(desc(sort_column))
+                else:
+                    query = query.order_by(sort_column)
+            
+            # Secondary sort by priority for consistent ordering
+            query = query.order_by(desc(priority_score), desc(AssignmentSubmission.submitted_at), desc(AssignmentSubmission.id))
+            
+            submissions = query.offset((page - 1) * per_page).limit(per_page).all()
         
         # Enhanced submission data with AI insights
         enhanced_submissions = []
         for submission in submissions:
             # Calculate enhanced metrics
-            word_count = len(submission.submission_text.split()) if submission.submission_text else 0
+            word_count = len(submission.content.split()) if submission.content else 0
             reading_time = max(1, word_count // 200)  # Assume 200 words per minute
             
             # Calculate days late with precision
@@ -177,7 +174,7 @@ def get_enhanced_assignment_submissions():
             estimated_time = 10  # Base time
             if word_count > 500:
                 estimated_time += (word_count // 500) * 2
-            if submission.file_path:
+            if submission.file_url:
                 estimated_time += 5
             if submission.external_url:
                 estimated_time += 3
@@ -185,7 +182,7 @@ def get_enhanced_assignment_submissions():
             # Complexity score (1-10)
             complexity_score = min(10, max(1, (
                 (word_count // 100) + 
-                (3 if submission.file_path else 0) +
+                (3 if submission.file_url else 0) +
                 (2 if submission.external_url else 0) +
                 (days_late * 0.5)
             )))
@@ -201,10 +198,10 @@ def get_enhanced_assignment_submissions():
                 'student_id': submission.student_id,
                 'student_name': f"{submission.student.first_name} {submission.student.last_name}",
                 'student_email': submission.student.email,
-                'submitted_at': submission.submitted_at.isoformat(),
-                'submission_text': submission.submission_text,
-                'file_path': submission.file_path,
-                'file_name': submission.file_name,
+                'submitted_at': submission.submitted_at.isoformat() if submission.submitted_at else None,
+                'submission_text': submission.content,
+                'file_path': submission.file_url,
+                'file_name': submission_file_name(submission),
                 'external_url': submission.external_url,
                 'due_date': submission.assignment.due_date.isoformat() if submission.assignment.due_date else None,
                 'days_late': round(days_late, 2),
@@ -245,8 +242,10 @@ def get_enhanced_assignment_submissions():
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
-                'pages': math.ceil(total_count / per_page)
+                'pages': math.ceil(total_count / per_page),
+                'next_cursor': next_cursor
             },
+            'status_counts': status_counts,
             'analytics': analytics,
             'suggestions': suggestions
         }), 200
@@ -297,6 +296,58 @@ def get_ai_grading_suggestions(submission_id):
         logger.error(f"❌ Error generating AI suggestions: {str(e)}", exc_info=True)
         return jsonify({"message": "Failed to generate suggestions", "error": str(e)}), 500
 
+@enhanced_grading_bp.route("/assignments/<int:assignment_id>/ai-suggestions", methods=["GET"])
+@instructor_required
+def get_assignment_ai_suggestions(assignment_id):
+    """
+    Get AI grading suggestions for every ungraded submission of an assignment.
+    Similar submissions for the whole set come from one batched index lookup.
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        
+        assignment = Assignment.query.get(assignment_id)
+        if not assignment:
+            return jsonify({"message": "Assignment not found"}), 404
+        if assignment.course.instructor_id != current_user_id:
+            return jsonify({"message": "Access denied"}), 403
+        
+        include_similar = request.args.get('include_similar', 'true').lower() == 'true'
+        confidence_threshold = request.args.get('confidence_threshold', 0.7, type=float)
+        explanation_detail = request.args.get('explanation_detail', 'detailed')
+        similarity_threshold = request.args.get('similarity_threshold', 0.3, type=float)
+        
+        submissions = AssignmentSubmission.query.filter(
+            AssignmentSubmission.assignment_id == assignment_id,
+            AssignmentSubmission.grade.is_(None)
+        ).order_by(AssignmentSubmission.id).all()
+        
+        similar = {}
+        if include_similar and submissions:
+            similar = SubmissionSimilarityService.similar_for_assignment(
+                assignment_id, [s.id for s in submissions], threshold=similarity_threshold
+            )
+        
+        suggestions = [
+            generate_comprehensive_ai_suggestion(
+                submission,
+                include_similar,
+                confidence_threshold,
+                explanation_detail,
+                similar=similar.get(submission.id, [])
+            )
+            for submission in submissions
+        ]
+        
+        return jsonify({
+            'assignment_id': assignment_id,
+            'suggestions': suggestions
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"❌ Error generating assignment AI suggestions: {str(e)}", exc_info=True)
+        return jsonify({"message": "Failed to generate suggestions", "error": str(e)}), 500
+
 @enhanced_grading_bp.route("/assignments/submissions/<int:submission_id>/ai-feedback", methods=["POST"])
 @instructor_required
 def generate_ai_feedback(submission_id):
@@ -339,7 +390,9 @@ def generate_ai_feedback(submission_id):
 @instructor_required
 def bulk_grade_enhanced():
     """
-    Enhanced bulk grading with curve application, validation, and analytics.
+    Enhanced bulk grading with late penalty policies and validation.
+    Large batches (or async=true) run as a background job; poll
+    /assignments/submissions/bulk-grade/<task_id> for progress and the result.
     """
     try:
         current_user_id = int(get_jwt_identity())
@@ -352,173 +405,27 @@ def bulk_grade_enhanced():
         if not submissions_data:
             return jsonify({"message": "No submissions provided"}), 400
         
-        graded_count = 0
-        errors = []
-        graded_submissions = []
-        
-        # Process each submission
-        for item in submissions_data:
-            try:
-                submission_id = item.get('id')
-                grade = item.get('grade')
-                feedback = item.get('feedback', '')
-                rubric_scores = item.get('rubric_scores', {})
-                tags = item.get('tags', [])
-                
-                if submission_id is None or grade is None:
-                    errors.append(f"Submission {submission_id}: Missing grade or id")
-                    continue
-                
-                submission = AssignmentSubmission.query.get(submission_id)
-                if not submission:
-                    errors.append(f"Submission {submission_id}: Not found")
-                    continue
-                
-                # Verify instructor owns the course
-                if submission.assignment.course.instructor_id != current_user_id:
-                    errors.append(f"Submission {submission_id}: Access denied")
-                    continue
-                
-                # Apply late penalty if policy specified
-                original_grade = float(grade)
-                final_grade = original_grade
-                
-                if late_penalty_policy and submission.assignment.due_date:
-                    days_late = max(0, (submission.submitted_at - submission.assignment.due_date).days)
-                    grace_period = late_penalty_policy.get('grace_period_days', 0)
-                    
-                    if days_late > grace_period:
-                        penalty_days = days_late - grace_period
-                        per_day_penalty = late_penalty_policy.get('per_day_penalty', 5)
-                        max_penalty = late_penalty_policy.get('max_penalty', 50)
-                        
-                        total_penalty = min(penalty_days * per_day_penalty, max_penalty)
-                        final_grade = max(0, original_grade - total_penalty)
-                
-                # Update submission
-                submission.grade = final_grade
-                submission.feedback = feedback
-                submission.graded_at = datetime.utcnow()
-                submission.graded_by = current_user_id
-                
-                # Store rubric scores if provided
-                if rubric_scores:
-                    submission.rubric_scores = json.dumps(rubric_scores)
-                
-                # Update lesson completion and module progress
-                update_learning_progress(submission, final_grade)
-                
-                graded_submissions.append({
-                    'id': submission.id,
-                    'original_grade': original_grade,
-                    'final_grade': final_grade,
-                    'penalty_applied': original_grade - final_grade if original_grade != final_grade else 0
-                })
-                
-                graded_count += 1
-                
-            except Exception as e:
-                errors.append(f"Submission {submission_id}: {str(e)}")
-                continue
-        
-        # Apply grading curve if specified
-        if apply_curve and graded_submissions:
-            try:
-                apply_grading_curve_to_submissions(graded_submissions, apply_curve)
-            except Exception as e:
-                logger.warning(f"Failed to apply grading curve: {str(e)}")
+        # Curves are applied separately through /curve/apply
+        if apply_curve:
+            logger.warning("Bulk grading ignores apply_curve; use /curve/apply after grading")
         
-        # Commit changes
-        db.session.commit()
-        
-        # Send notifications and handle auto-modification for below-passing scores
-        modification_count = 0
-        for submission_data in graded_submissions:
-            try:
-                submission = AssignmentSubmission.query.get(submission_data['id'])
-                if not submission:
-                    continue
-                
-                assignment = submission.assignment
-                student = submission.student
-                final_grade = submission_data['final_grade']
-                points_possible = assignment.points_possible or 100
-                percentage_score = round((final_grade / points_possible) * 100, 2)
-                
-                # Use the passing score set during assignment creation, fallback to default
-                passing_threshold = assignment.passing_score if assignment.passing_score is not None else DEFAULT_PASSING_PERCENTAGE
-                
-                if percentage_score < passing_threshold:
-                    # Auto-modification request for below-passing scores
-                    max_resubs = assignment.max_resubmissions or 3
-                    current_resubs = assignment.resubmission_count or 0
-                    
-                    if current_resubs < max_resubs:
-                        mod_reason = (
-                            f"Your score of {final_grade:.1f}/{points_possible} ({percentage_score:.1f}%) is below the "
-                            f"passing threshold of {passing_threshold}%. "
-                            f"Please review the instructor feedback and resubmit your work with improvements."
-                        )
-                        if submission.feedback:
-                            mod_reason += f"\n\nInstructor Feedback: {submission.feedback}"
-                        
-                        assignment.modification_requested = True
-                        assignment.modification_request_reason = mod_reason
-                        assignment.modification_requested_at = datetime.utcnow()
-                        assignment.modification_requested_by = current_user_id
-                        assignment.can_resubmit = True
-                        assignment.resubmission_count = current_resubs + 1
-                        modification_count += 1
-                        
-                        # Send combined grade + modification email
-                        if student and student.email:
-                            instructor = User.query.get(current_user_id)
-                            instructor_name = f"{instructor.first_name} {instructor.last_name}" if instructor else "Your Instructor"
-                            frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:3000')
-                            resubmission_deadline = (datetime.utcnow() + timedelta(days=7)).strftime('%B %d, %Y')
-                            
-                            send_grade_with_modification_notification(
-                                submission=submission,
-                                assignment=assignment,
-                                student=student,
-                                grade=final_grade,
-                                feedback=submission.feedback or "",
-                                modification_reason=mod_reason,
-                                instructor_name=instructor_name,
-                                resubmission_deadline=resubmission_deadline,
-                                frontend_url=frontend_url,
-                                passing_percentage=passing_threshold
-                            )
-                else:
-                    # Score is at or above passing - clear any existing modification request
-                    if assignment.modification_requested:
-                        assignment.modification_requested = False
-                        assignment.modification_request_reason = None
-                        assignment.modification_requested_at = None
-                        assignment.modification_requested_by = None
-                        assignment.can_resubmit = False
-                    
-                    # Standard grade notification for passing scores
-                    if student and student.email:
-                        send_grade_notification(
-                            submission=submission,
-                            assignment=assignment,
-                            student=student,
-                            grade=final_grade,
-                            feedback=submission.feedback or "Your assignment has been graded."
-                        )
-            except Exception as e:
-                logger.warning(f"Failed to send notification for submission {submission_data['id']}: {str(e)}")
+        if data.get('async') or len(submissions_data) > BULK_GRADE_SYNC_LIMIT:
+            task_id = BulkGradingService.start(current_user_id, submissions_data, late_penalty_policy)
+            return jsonify({
+                'task_id': task_id,
+                'status': 'started',
+                'total': len(submissions_data),
+                'poll_url': f"/api/v1/grading/assignments/submissions/bulk-grade/{task_id}"
+            }), 202
         
-        if modification_count > 0:
-            db.session.commit()
+        result = BulkGradingService.grade(current_user_id, submissions_data, late_penalty_policy)
         
         return jsonify({
-            'success_count': graded_count,
-            'error_count': len(errors),
-            'errors': errors,
-            'graded_submissions': graded_submissions,
-            'modifications_requested': modification_count
+            'success_count': result['graded_count'],
+            'error_count': result['error_count'],
+            'errors': result['errors'],
+            'graded_submissions': result['graded_submissions'],
+            'modifications_requested': result['modifications_requested']
         }), 200
         
     except Exception as e:
@@ -786,13 +693,16 @@ def generate_ai_grading_suggestion(submission_data: Dict[str, Any]) -> Dict[str,
         ]
     }
 
-def generate_comprehensive_ai_suggestion(submission: AssignmentSubmission, include_similar: bool, confidence_threshold: float, explanation_detail: str) -> Dict[str, Any]:
-    """Generate comprehensive AI suggestion with detailed analysis."""
+def generate_comprehensive_ai_suggestion(submission: AssignmentSubmission, include_similar: bool, confidence_threshold: float, explanation_detail: str, similar: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Generate comprehensive AI suggestion with detailed analysis.
+    
+    ``similar`` may carry precomputed similar submissions (see the batch endpoint).
+    """
     # This would integrate with actual AI services in production
     # For now, provide a structured response
     
-    word_count = len(submission.submission_text.split()) if submission.submission_text else 0
-    has_file = bool(submission.file_path)
+    word_count = len(submission.content.split()) if submission.content else 0
+    has_file = bool(submission.file_url)
     has_url = bool(submission.external_url)
     
     # Calculate suggestion
@@ -800,7 +710,7 @@ def generate_comprehensive_ai_suggestion(submission: AssignmentSubmission, inclu
         'id': submission.id,
         'word_count': word_count,
         'complexity_score': 5 + (2 if has_file else 0) + (1 if has_url else 0),
-        'days_late': max(0, (submission.submitted_at - submission.assignment.due_date).days) if submission.assignment.due_date else 0
+        'days_late': max(0, (submission.submitted_at - submission.assignment.due_date).days) if submission.assignment.due_date and submission.submitted_at else 0
     })
     
     # Add detailed analysis
@@ -817,6 +727,11 @@ def generate_comprehensive_ai_suggestion(submission: AssignmentSubmission, inclu
         ]
     })
     
+    if include_similar:
+        if similar is None:
+            similar = SubmissionSimilarityService.similar_submissions(submission)
+        suggestion['similar_submissions'] = similar
+    
     return suggestion
 
 def generate_ai_feedback_content(submission: AssignmentSubmission, tone: str, focus_areas: List[str], include_suggestions: bool, personalization_level: str) -> Dict[str, Any]:
@@ -2,7 +2,6 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
-from io import BytesIO
 import json
 import logging
 import os
@@ -37,6 +36,14 @@ def student_required(f):
     
     return decorated_function
 
+def _stream_size(stream):
+    """Size of an uploaded file's stream; the read position is preserved"""
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
+
 file_upload_bp = Blueprint("file_upload", __name__, url_prefix="/api/v1/uploads")
 
 @file_upload_bp.route("/validate-file", methods=["POST"])
@@ -666,15 +673,11 @@ def upload_single_file():
         assignment_id = request.form.get('assignmentId')
         student_id = request.form.get('studentId', str(current_user_id))
 
-        # Read file data for validation
-        file_content = file.read()
-        file.seek(0)  # Reset file pointer
-        
-        # Validate file
+        # Validate file (size from the spooled stream, without reading it into memory)
         file_data = {
             'filename': file.filename,
             'content_type': file.content_type,
-            'size': len(file_content)
+            'size': _stream_size(file.stream)
         }
         
         is_valid, errors = StudentValidators.validate_file_upload(file_data)
@@ -690,11 +693,9 @@ def upload_single_file():
         
         if storage_provider == 'google_drive' and google_drive_service.is_configured:
             try:
-                # Upload to Google Drive
-                file_data_io = BytesIO(file_content)
-                
+                # Upload to Google Drive, streaming from the request
                 result = google_drive_service.upload_file(
-                    file_data=file_data_io,
+                    file_data=file.stream,
                     filename=file.filename,
                     mime_type=file.content_type,
                     assignment_id=int(assignment_id) if assignment_id else 0,
@@ -754,6 +755,123 @@ def upload_single_file():
         }), 500
 
 
+@file_upload_bp.route("/files", methods=["POST"])
+@jwt_required()
+def upload_multiple_files():
+    """Upload several files for one submission to Google Drive in parallel"""
+    try:
+        current_user_id = get_jwt_identity()
+        user = User.query.get(current_user_id)
+        
+        if not user:
+            return jsonify({
+                "success": False,
+                "error": "User not found"
+            }), 404
+
+        files = [f for f in request.files.getlist('files') if f.filename]
+        if not files:
+            return jsonify({
+                "success": False,
+                "error": "No files provided"
+            }), 400
+
+        # Get optional parameters
+        folder = request.form.get('folder', 'general')
+        assignment_id = request.form.get('assignmentId')
+        student_id = request.form.get('studentId', str(current_user_id))
+
+        # Validate every file before uploading any of them
+        sizes = []
+        for file in files:
+            file_data = {
+                'filename': file.filename,
+                'content_type': file.content_type,
+                'size': _stream_size(file.stream)
+            }
+            is_valid, errors = StudentValidators.validate_file_upload(file_data)
+            if not is_valid:
+                return jsonify({
+                    "success": False,
+                    "error": f"File validation failed for {file.filename}: {', '.join(errors)}"
+                }), 400
+            sizes.append(file_data['size'])
+
+        storage_provider = os.getenv('FILE_STORAGE_PROVIDER', 'google_drive').lower()
+        
+        if storage_provider == 'google_drive' and google_drive_service.is_configured:
+            results = google_drive_service.upload_files(
+                [(file.stream, file.filename, file.content_type) for file in files],
+                assignment_id=int(assignment_id) if assignment_id else 0,
+                student_id=int(student_id),
+                metadata={
+                    'folder': folder,
+                    'uploaded_by': current_user_id,
+                    'upload_type': 'multi_file'
+                }
+            )
+
+            uploaded = []
+            failed = []
+            for result in results:
+                if 'error' in result:
+                    failed.append({"filename": result['original_filename'], "error": result['error']})
+                    continue
+                uploaded.append({
+                    "url": result['view_link'],
+                    "download_url": result['download_link'],
+                    "file_id": result['file_id'],
+                    "filename": result['original_filename'],
+                    "pathname": f"{folder}/{assignment_id or 'general'}/{student_id}/{result['filename']}",
+                    "size": result['size'],
+                    "contentType": result['mime_type'],
+                    "uploadedAt": result['uploaded_at'],
+                    "storage": "google_drive"
+                })
+
+            logger.info(
+                f"Uploaded {len(uploaded)}/{len(files)} files to Google Drive for user {current_user_id}"
+            )
+            return jsonify({
+                "success": not failed,
+                "files": uploaded,
+                "failed": failed,
+                "message": f"{len(uploaded)} of {len(files)} files uploaded to Google Drive"
+            }), 200 if not failed else 207
+
+        # Fallback to mock response (for development/testing)
+        import time
+        timestamp = int(time.time())
+        uploaded = []
+        for file, size in zip(files, sizes):
+            mock_pathname = f"{folder}/{assignment_id or 'general'}/{student_id}/{timestamp}_{file.filename}"
+            uploaded.append({
+                "url": f"/uploads/{mock_pathname}",
+                "filename": file.filename,
+                "pathname": mock_pathname,
+                "size": size,
+                "contentType": file.content_type,
+                "uploadedAt": datetime.utcnow().isoformat(),
+                "storage": "fallback"
+            })
+        
+        logger.warning(f"Using fallback storage for {len(files)} files (user {current_user_id})")
+        
+        return jsonify({
+            "success": True,
+            "files": uploaded,
+            "failed": [],
+            "message": "File upload completed (fallback storage)"
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Multi-file upload error: {str(e)}")
+        return jsonify({
+            "success": False,
+            "error": f"Upload failed: {str(e)}"
+        }), 500
+
+
 @file_upload_bp.route("/google-drive/files/<file_id>", methods=["GET"])
 @jwt_required()
 def get_google_drive_file_info(file_id):
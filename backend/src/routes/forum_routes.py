@@ -11,8 +11,11 @@ from src.services.notification_service import (
     notify_forum_post_flagged,
     notify_forum_created,
 )
+from src.services.forum_view_counter import forum_view_counter
+from src.services.forum_search_service import ForumSearchService
 from datetime import datetime
 from sqlalchemy import func, desc, or_, and_
+from sqlalchemy.orm import selectinload
 from functools import wraps
 import logging
 
@@ -247,6 +250,7 @@ def create_forum(current_user):
         
         db.session.add(new_forum)
         db.session.commit()
+        ForumSearchService.index_forum(new_forum)
 
         # ── Notify enrolled students when a course forum is created ──
         try:
@@ -307,11 +311,11 @@ def get_forum_details(current_user, forum_id):
                     'error': 'You must be enrolled in this course to access this forum'
                 }), 403
         
-        # Increment view count
-        forum.view_count = (forum.view_count or 0) + 1
-        db.session.commit()
+        # Buffer the view; flushed to the database in batches
+        forum_view_counter.record_forum_view(forum_id)
         
         forum_dict = forum.to_dict()
+        forum_dict['view_count'] = (forum.view_count or 0) + forum_view_counter.pending_forum_views(forum_id)
         
         # Get threads (top-level posts) with enhanced info
         threads_query = ForumPost.query.filter_by(
@@ -332,6 +336,7 @@ def get_forum_details(current_user, forum_id):
         threads_list = []
         for thread in threads:
             thread_dict = thread.to_dict()
+            thread_dict['view_count'] = (thread.view_count or 0) + forum_view_counter.pending_thread_views(thread.id)
             
             # Get reply count (approved only for non-moderators)
             reply_query = ForumPost.query.filter_by(
@@ -433,6 +438,7 @@ def update_forum(current_user, forum_id):
         
         forum.updated_at = datetime.utcnow()
         db.session.commit()
+        ForumSearchService.index_forum(forum)
         
         return jsonify({
             'success': True,
@@ -470,6 +476,7 @@ def delete_forum(current_user, forum_id):
         ForumPost.query.filter_by(forum_id=forum_id).update({'is_active': False})
         
         db.session.commit()
+        ForumSearchService.remove_forum(forum_id)
         
         return jsonify({
             'success': True,
@@ -554,6 +561,7 @@ def create_thread(current_user, forum_id):
         forum.updated_at = datetime.utcnow()
         
         db.session.commit()
+        ForumSearchService.index_post(new_thread)
 
         # ── Unified in-app notification for forum subscribers ──
         try:
@@ -633,14 +641,21 @@ def get_thread_details(current_user, thread_id):
                 'error': 'Thread not found'
             }), 404
         
-        # Increment view count
-        thread.view_count = (thread.view_count or 0) + 1
-        db.session.commit()
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+        
+        # Buffer the view, once per visit rather than per page of replies; flushed to the database in batches
+        if page == 1:
+            forum_view_counter.record_thread_view(thread_id)
         
         thread_dict = thread.to_dict()
+        thread_dict['view_count'] = (thread.view_count or 0) + forum_view_counter.pending_thread_views(thread_id)
         
-        # Get all replies with enhanced info
-        replies_query = ForumPost.query.filter_by(
+        # Get replies with author and nested replies eager-loaded
+        replies_query = ForumPost.query.options(
+            selectinload(ForumPost.author),
+            selectinload(ForumPost.replies)
+        ).filter_by(
             parent_post_id=thread_id,
             is_active=True
         )
@@ -654,20 +669,28 @@ def get_thread_details(current_user, thread_id):
                 )
             )
         
-        replies = replies_query.order_by(ForumPost.created_at.asc()).all()
+        replies_pagination = replies_query.order_by(
+            ForumPost.created_at.asc(),
+            ForumPost.id.asc()
+        ).paginate(page=page, per_page=per_page, error_out=False)
+        replies = replies_pagination.items
+        
+        # Load the user's reactions to the thread and this page of replies in one query
+        post_ids = [thread_id] + [reply.id for reply in replies]
+        user_likes = {
+            like.post_id: like.is_like
+            for like in ForumPostLike.query.filter(
+                ForumPostLike.user_id == current_user.id,
+                ForumPostLike.post_id.in_(post_ids)
+            ).all()
+        }
         
         replies_list = []
         for reply in replies:
             reply_dict = reply.to_dict()
             
-            # Check user reaction
-            user_like = ForumPostLike.query.filter_by(
-                post_id=reply.id,
-                user_id=current_user.id
-            ).first()
-            
             reply_dict['user_reaction'] = {
-                'liked': user_like.is_like if user_like else None,
+                'liked': user_likes.get(reply.id),
                 'can_edit': reply.author_id == current_user.id or current_user.role.name in ['admin', 'instructor'],
                 'can_delete': reply.author_id == current_user.id or current_user.role.name == 'admin'
             }
@@ -675,15 +698,17 @@ def get_thread_details(current_user, thread_id):
             replies_list.append(reply_dict)
         
         thread_dict['replies'] = replies_list
-        
-        # Check user permissions and reactions for thread
-        user_like = ForumPostLike.query.filter_by(
-            post_id=thread_id,
-            user_id=current_user.id
-        ).first()
+        thread_dict['replies_pagination'] = {
+            'current_page': replies_pagination.page,
+            'per_page': replies_pagination.per_page,
+            'total_pages': replies_pagination.pages,
+            'total_items': replies_pagination.total,
+            'has_next': replies_pagination.has_next,
+            'has_prev': replies_pagination.has_prev
+        }
         
         thread_dict['user_reaction'] = {
-            'liked': user_like.is_like if user_like else None,
+            'liked': user_likes.get(thread_id),
             'can_edit': thread.author_id == current_user.id or current_user.role.name in ['admin', 'instructor'],
             'can_delete': thread.author_id == current_user.id or current_user.role.name == 'admin',
             'can_pin': current_user.role.name in ['admin', 'instructor'],
@@ -858,6 +883,7 @@ def edit_post(current_user, post_id):
             post.title = data['title'].strip()
         
         db.session.commit()
+        ForumSearchService.index_post(post)
         
         return jsonify({
             'success': True,
@@ -903,6 +929,7 @@ def delete_post(current_user, post_id):
             ForumPost.query.filter_by(parent_post_id=post_id).update({'is_active': False})
         
         db.session.commit()
+        ForumSearchService.remove_post(post_id)
         
         return jsonify({
             'success': True,
@@ -1243,12 +1270,14 @@ def subscribe_to_thread(current_user, thread_id):
 @forum_bp.route("/search", methods=["GET"])
 @any_authenticated_user
 def search_forums(current_user):
-    """Enhanced search forums and threads"""
+    """Ranked full-text search over forums and threads"""
     try:
         query = request.args.get('q', '').strip()
         category = request.args.get('category')
         forum_id = request.args.get('forum_id', type=int)
         sort_by = request.args.get('sort', 'relevance')  # relevance, date, popularity
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(request.args.get('per_page', 20, type=int), 100)
         
         if not query:
             return jsonify({
@@ -1256,65 +1285,80 @@ def search_forums(current_user):
                 'error': 'Search query is required'
             }), 400
         
-        # Search forums
-        forums_query = StudentForum.query.filter(
-            StudentForum.is_active == True,
-            or_(
-                StudentForum.title.ilike(f'%{query}%'),
-                StudentForum.description.ilike(f'%{query}%')
-            )
-        )
-        
-        if category:
-            forums_query = forums_query.filter(StudentForum.category == category)
-        
+        # Students only see general forums and forums of courses they're enrolled in
+        course_ids = None
         if current_user.role.name == 'student':
-            # Apply enrollment filtering for students
-            enrolled_course_ids = db.session.query(Enrollment.course_id).filter_by(
-                student_id=current_user.id
-            ).all()
-            enrolled_course_ids = [c[0] for c in enrolled_course_ids]
-            
-            forums_query = forums_query.filter(
-                or_(
-                    StudentForum.course_id == None,
-                    StudentForum.course_id.in_(enrolled_course_ids)
-                )
+            course_ids = [
+                c[0] for c in db.session.query(Enrollment.course_id).filter_by(
+                    student_id=current_user.id
+                ).all()
+            ]
+        
+        # Forums are only returned alongside the first page of threads
+        forum_hits = []
+        if page == 1 and not forum_id:
+            forum_hits = ForumSearchService.search_forums(
+                query, limit=10, category=category, course_ids=course_ids
             )
         
-        forums = forums_query.all()
-        
-        # Search threads
-        threads_query = ForumPost.query.filter(
-            ForumPost.is_active == True,
-            ForumPost.is_approved == True,
-            ForumPost.parent_post_id == None,
-            or_(
-                ForumPost.title.ilike(f'%{query}%'),
-                ForumPost.content.ilike(f'%{query}%')
-            )
+        thread_hits, total_threads = ForumSearchService.search_threads(
+            query,
+            page=page,
+            per_page=per_page,
+            sort_by=sort_by,
+            forum_id=forum_id,
+            category=category,
+            course_ids=course_ids,
         )
         
-        if forum_id:
-            threads_query = threads_query.filter(ForumPost.forum_id == forum_id)
+        forums_by_id = {}
+        if forum_hits:
+            forums_by_id = {
+                f.id: f for f in StudentForum.query.filter(
+                    StudentForum.id.in_([hit['id'] for hit in forum_hits])
+                ).all()
+            }
+        
+        threads_by_id = {}
+        if thread_hits:
+            threads_by_id = {
+                t.id: t for t in ForumPost.query.options(
+                    selectinload(ForumPost.author),
+                    selectinload(ForumPost.replies)
+                ).filter(ForumPost.id.in_([hit['id'] for hit in thread_hits])).all()
+            }
         
-        if sort_by == 'date':
-            threads_query = threads_query.order_by(ForumPost.created_at.desc())
-        elif sort_by == 'popularity':
-            threads_query = threads_query.order_by(ForumPost.like_count.desc())
+        def _with_highlights(obj, hit):
+            data = obj.to_dict()
+            data['search'] = {
+                'rank': hit['rank'],
+                'title_highlight': hit['title_highlight'],
+                'snippet': hit['snippet']
+            }
+            return data
         
-        threads = threads_query.all()
+        forums = [_with_highlights(forums_by_id[h['id']], h) for h in forum_hits if h['id'] in forums_by_id]
+        threads = [_with_highlights(threads_by_id[h['id']], h) for h in thread_hits if h['id'] in threads_by_id]
         
         return jsonify({
             'success': True,
             'data': {
-                'forums': [f.to_dict() for f in forums],
-                'threads': [t.to_dict() for t in threads],
-                'total_results': len(forums) + len(threads)
+                'forums': forums,
+                'threads': threads,
+                'total_results': len(forums) + total_threads,
+                'pagination': {
+                    'current_page': page,
+                    'per_page': per_page,
+                    'total_pages': (total_threads + per_page - 1) // per_page if per_page else 0,
+                    'total_items': total_threads,
+                    'has_next': page * per_page < total_threads,
+                    'has_prev': page > 1
+                }
             }
         }), 200
         
     except Exception as e:
+        db.session.rollback()
         print(f"Error searching forums: {str(e)}")
         return jsonify({
             'success': False,
@@ -23,6 +23,10 @@ from ..services.notification_service import (
     notify_modification_requested,
     notify_resubmission_received,
 )
+from ..services.grading_queue_service import GradingQueueService
+from ..services.bulk_grading_service import BulkGradingService, SYNC_LIMIT as BULK_GRADE_SYNC_LIMIT
+from ..services.background_service import background_service
+from ..models.task_models import BackgroundTask
 
 logger = logging.getLogger(__name__)
 
@@ -55,6 +59,8 @@ def get_assignment_submissions():
     """
     Get assignment submissions for grading with filtering options.
     Query params: course_id, assignment_id, status (pending/graded/all), student_id
+    Pagination: page/per_page, or cursor for keyset paging on submission time
+    (pass "" for the first page, then the returned next_cursor).
     """
     try:
         current_user_id = int(get_jwt_identity())
@@ -62,161 +68,111 @@ def get_assignment_submissions():
         # Get filter parameters
         course_id = request.args.get('course_id', type=int)
         cohort_id = request.args.get('cohort_id', type=int)  # application_window_id for cohort filtering
-        module_id = request.args.get('module_id', type=int)
-        lesson_id = request.args.get('lesson_id', type=int)
-        assignment_id = request.args.get('assignment_id', type=int)
         status = request.args.get('status', 'pending')  # pending, graded, all, resubmitted, modification_requested
-        student_id = request.args.get('student_id', type=int)
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        search_query = request.args.get('search_query', type=str)
+        page = max(1, request.args.get('page', 1, type=int))
+        per_page = max(1, min(request.args.get('per_page', 20, type=int), 100))
+        cursor = request.args.get('cursor')
         sort_by = request.args.get('sort_by', 'submitted_at')
         sort_order = request.args.get('sort_order', 'desc')
-        date_start = request.args.get('date_start')
-        date_end = request.args.get('date_end')
-        
-        # Build query
-        query = db.session.query(AssignmentSubmission).join(Assignment).join(Course)
-        
-        # Filter by instructor's courses
-        query = query.filter(Course.instructor_id == current_user_id)
-        
-        # Apply filters
-        if course_id:
-            query = query.filter(Assignment.course_id == course_id)
-        
-        # Cohort filter: join through Enrollment to filter by application_window_id
-        if cohort_id:
-            cohort_student_ids = db.session.query(Enrollment.student_id).filter(
-                Enrollment.application_window_id == cohort_id,
-                Enrollment.status.in_(['active', 'completed'])
-            )
-            if course_id:
-                cohort_student_ids = cohort_student_ids.filter(Enrollment.course_id == course_id)
-            query = query.filter(AssignmentSubmission.student_id.in_(cohort_student_ids))
-        
-        if module_id:
-            query = query.filter(Assignment.module_id == module_id)
-        
-        if lesson_id:
-            query = query.filter(Assignment.lesson_id == lesson_id)
-        
-        if assignment_id:
-            query = query.filter(AssignmentSubmission.assignment_id == assignment_id)
-        
-        if student_id:
-            query = query.filter(AssignmentSubmission.student_id == student_id)
-        
-        # Enhanced status filter
-        if status == 'pending':
-            # Regular pending submissions (not resubmissions, not modification requested)
-            query = query.filter(
-                and_(
-                    AssignmentSubmission.grade.is_(None),
-                    AssignmentSubmission.is_resubmission == False,
-                    Assignment.modification_requested == False
-                )
-            )
-        elif status == 'resubmitted':
-            # Resubmissions that need grading
-            query = query.filter(
-                and_(
-                    AssignmentSubmission.is_resubmission == True,
-                    AssignmentSubmission.grade.is_(None)
-                )
-            )
-        elif status == 'modification_requested':
-            # Assignments with modification requests (but no new submission yet)
-            query = query.filter(
-                and_(
-                    Assignment.modification_requested == True,
-                    AssignmentSubmission.is_resubmission == False
-                )
-            )
-        elif status == 'graded':
-            query = query.filter(AssignmentSubmission.grade.isnot(None))
-        # 'all' status shows everything - no additional filtering needed
-        
-        # Search functionality
-        if search_query:
-            search_filter = or_(
-                User.first_name.ilike(f'%{search_query}%'),
-                User.last_name.ilike(f'%{search_query}%'),
-                User.email.ilike(f'%{search_query}%'),
-                Assignment.title.ilike(f'%{search_query}%'),
-                AssignmentSubmission.content.ilike(f'%{search_query}%')
-            )
-            query = query.join(User, User.id == AssignmentSubmission.student_id)
-            query = query.filter(search_filter)
-        
-        # Date range filtering
-        if date_start:
-            query = query.filter(AssignmentSubmission.submitted_at >= datetime.fromisoformat(date_start))
-        if date_end:
-            query = query.filter(AssignmentSubmission.submitted_at <= datetime.fromisoformat(date_end))
-        
-        # Enhanced priority scores for sorting
-        priority_score = case(
-            # Highest priority: Resubmissions needing review
-            (and_(AssignmentSubmission.is_resubmission == True, AssignmentSubmission.grade.is_(None)), 5),
-            # High priority: Overdue submissions
-            (and_(Assignment.due_date < datetime.utcnow(), AssignmentSubmission.grade.is_(None)), 4),
-            # Medium priority: Modification requests (waiting for student)
-            (Assignment.modification_requested == True, 3),
-            # Medium priority: Due soon
-            (Assignment.due_date < datetime.utcnow() + timedelta(days=1), 2),
-            else_=1
+        now = datetime.utcnow()
+        
+        query = GradingQueueService.filtered_query(
+            current_user_id,
+            course_id=course_id,
+            cohort_id=cohort_id,
+            module_id=request.args.get('module_id', type=int),
+            lesson_id=request.args.get('lesson_id', type=int),
+            assignment_id=request.args.get('assignment_id', type=int),
+            student_id=request.args.get('student_id', type=int),
+            search_query=request.args.get('search_query', type=str),
+            date_start=request.args.get('date_start'),
+            date_end=request.args.get('date_end'),
         )
         
-        # Enhanced sorting options
-        sort_mapping = {
-            'submitted_at': AssignmentSubmission.submitted_at,
-            'due_date': Assignment.due_date,
-            'student_name': User.last_name,
-            'grade': AssignmentSubmission.grade,
-            'priority': priority_score,
-            'days_late': func.greatest(0, func.date_part('day', AssignmentSubmission.submitted_at - Assignment.due_date))
-        }
-        
-        if sort_by in sort_mapping:
-            sort_column = sort_mapping[sort_by]
-            if sort_order == 'desc':
-                query = query.order_by(desc(sort_column))
-            else:
-                query = query.order_by(sort_column)
+        # Counts for every status tab in one aggregate query
+        status_counts = GradingQueueService.status_counts(query, now)
+        status_filter = GradingQueueService.status_condition(status, now)
+        if status_filter is not None:
+            query = query.filter(status_filter)
+        total = status_counts.get(status, status_counts['all'])
+        query = GradingQueueService.with_related(query)
+        
+        next_cursor = None
+        if cursor is not None and sort_by == 'submitted_at':
+            # Keyset pagination on (submitted_at, id)
+            try:
+                submissions, next_cursor = GradingQueueService.keyset_page(
+                    query, descending=sort_order != 'asc', cursor=cursor or None, limit=per_page
+                )
+            except ValueError as ve:
+                return jsonify({"message": str(ve)}), 400
         else:
-            # Default order by priority and submission date
-            query = query.order_by(
-                desc(priority_score),
-                AssignmentSubmission.grade.is_(None).desc(),
-                AssignmentSubmission.submitted_at.desc()
+            # Enhanced priority scores for sorting
+            priority_score = case(
+                # Highest priority: Resubmissions needing review
+                (and_(AssignmentSubmission.is_resubmission == True, AssignmentSubmission.grade.is_(None)), 5),
+                # High priority: Overdue submissions
+                (and_(Assignment.due_date < now, AssignmentSubmission.grade.is_(None)), 4),
+                # Medium priority: Modification requests (waiting for student)
+                (Assignment.modification_requested == True, 3),
+                # Medium priority: Due soon
+                (Assignment.due_date < now + timedelta(days=1), 2),
+                else_=1
             )
+            
+            # Enhanced sorting options
+            sort_mapping = {
+                'submitted_at': AssignmentSubmission.submitted_at,
+                'due_date': Assignment.due_date,
+                'student_name': User.last_name,
+                'grade': AssignmentSubmission.grade,
+                'priority': priority_score,
+                'days_late': func.greatest(0, func.date_part('day', AssignmentSubmission.submitted_at - Assignment.due_date))
+            }
+            
+            if sort_by == 'student_name':
+                query = query.join(User, User.id == AssignmentSubmission.student_id)
+            if sort_by in sort_mapping:
+                sort_column = sort_mapping[sort_by]
+                if sort_order == 'desc':
+                    query = query.order_by(desc(sort_column), desc(AssignmentSubmission.id))
+                else:
+                    query = query.order_by(sort_column, AssignmentSubmission.id)
+            else:
+                # Default order by priority and submission date
+                query = query.order_by(
+                    desc(priority_score),
+                    AssignmentSubmission.grade.is_(None).desc(),
+                    AssignmentSubmission.submitted_at.desc()
+                )
+            
+            submissions = query.offset((page - 1) * per_page).limit(per_page).all()
         
-        # Paginate
-        paginated = query.paginate(page=page, per_page=per_page, error_out=False)
+        enrollments = GradingQueueService.enrollments_for(submissions)
         
         # Build response
         submissions_data = []
-        for submission in paginated.items:
+        for submission in submissions:
+            assignment = submission.assignment
             submission_dict = submission.to_dict()
             # Add assignment details
-            submission_dict['assignment_title'] = submission.assignment.title
-            submission_dict['assignment_points'] = submission.assignment.points_possible
-            submission_dict['course_title'] = submission.assignment.course.title
-            submission_dict['course_id'] = submission.assignment.course_id
-            submission_dict['due_date'] = submission.assignment.due_date.isoformat() if submission.assignment.due_date else None
+            submission_dict['assignment_title'] = assignment.title
+            submission_dict['assignment_points'] = assignment.points_possible
+            submission_dict['course_title'] = assignment.course.title
+            submission_dict['course_id'] = assignment.course_id
+            submission_dict['due_date'] = assignment.due_date.isoformat() if assignment.due_date else None
             
             # Add assignment-level modification request information
-            submission_dict['modification_requested'] = submission.assignment.modification_requested
-            submission_dict['modification_request_reason'] = submission.assignment.modification_request_reason
-            submission_dict['modification_requested_at'] = submission.assignment.modification_requested_at.isoformat() if submission.assignment.modification_requested_at else None
-            submission_dict['modification_requested_by'] = submission.assignment.modification_requested_by
-            submission_dict['can_resubmit'] = submission.assignment.can_resubmit
+            submission_dict['modification_requested'] = assignment.modification_requested
+            submission_dict['modification_request_reason'] = assignment.modification_request_reason
+            submission_dict['modification_requested_at'] = assignment.modification_requested_at.isoformat() if assignment.modification_requested_at else None
+            submission_dict['modification_requested_by'] = assignment.modification_requested_by
+            submission_dict['can_resubmit'] = assignment.can_resubmit
             
             # Calculate days late
             days_late = 0
-            if submission.assignment.due_date and submission.submitted_at:
-                time_diff = submission.submitted_at - submission.assignment.due_date
+            if assignment.due_date and submission.submitted_at:
+                time_diff = submission.submitted_at - assignment.due_date
                 days_late = max(0, time_diff.days + time_diff.seconds / 86400)
             
             # Enhanced metrics
@@ -230,9 +186,9 @@ def get_assignment_submissions():
                 priority_level = 'high'  # Resubmissions have highest priority
             elif days_late > 0 and not submission.grade:
                 priority_level = 'high'
-            elif submission.assignment.modification_requested:
+            elif assignment.modification_requested:
                 priority_level = 'medium'
-            elif submission.assignment.due_date and submission.assignment.due_date < datetime.utcnow() + timedelta(days=1):
+            elif assignment.due_date and assignment.due_date < now + timedelta(days=1):
                 priority_level = 'medium'
             
             # Estimated grading time
@@ -247,30 +203,25 @@ def get_assignment_submissions():
             submission_dict['estimated_grading_time'] = estimated_time
             
             # Add cohort info from enrollment
-            enrollment = Enrollment.query.filter_by(
-                student_id=submission.student_id,
-                course_id=submission.assignment.course_id
-            ).first()
-            if enrollment:
-                submission_dict['cohort_label'] = enrollment.cohort_label
-                submission_dict['application_window_id'] = enrollment.application_window_id
-            else:
-                submission_dict['cohort_label'] = None
-                submission_dict['application_window_id'] = None
+            enrollment = enrollments.get((submission.student_id, assignment.course_id))
+            submission_dict['cohort_label'] = enrollment.cohort_label if enrollment else None
+            submission_dict['application_window_id'] = enrollment.application_window_id if enrollment else None
             
             submissions_data.append(submission_dict)
         
         # Generate analytics for the current set of submissions
-        analytics = generate_grading_analytics(paginated.items, current_user_id, course_id)
+        analytics = generate_grading_analytics(submissions, current_user_id, course_id)
         
         return jsonify({
             'submissions': submissions_data,
             'pagination': {
-                'page': paginated.page,
-                'per_page': paginated.per_page,
-                'total': paginated.total,
-                'pages': paginated.pages
+                'page': page,
+                'per_page': per_page,
+                'total': total,
+                'pages': math.ceil(total / per_page) if per_page else 0,
+                'next_cursor': next_cursor
             },
+            'status_counts': status_counts,
             'analytics': analytics
         }), 200
         
@@ -724,7 +675,9 @@ def grade_assignment_submission(submission_id):
 def bulk_grade_assignments():
     """
     Grade multiple assignment submissions at once.
-    Body: { submissions: [{ id: int, grade: float, feedback: string }, ...] }
+    Body: { submissions: [{ id: int, grade: float, feedback: string }, ...], async: bool }
+    Large batches (or async=true) run as a background job; poll
+    /assignments/submissions/bulk-grade/<task_id> for progress and the result.
     """
     try:
         current_user_id = int(get_jwt_identity())
@@ -734,164 +687,18 @@ def bulk_grade_assignments():
         if not submissions_to_grade:
             return jsonify({"message": "No submissions provided"}), 400
         
-        graded_count = 0
-        errors = []
-        
-        for item in submissions_to_grade:
-            try:
-                submission_id = item.get('id')
-                grade = item.get('grade')
-                feedback = item.get('feedback', '')
-                
-                if submission_id is None or grade is None:
-                    errors.append(f"Submission {submission_id}: Missing grade or id")
-                    continue
-                
-                submission = AssignmentSubmission.query.get(submission_id)
-                if not submission:
-                    errors.append(f"Submission {submission_id}: Not found")
-                    continue
-                
-                # Verify instructor owns the course
-                if submission.assignment.course.instructor_id != current_user_id:
-                    errors.append(f"Submission {submission_id}: Access denied")
-                    continue
-                
-                # Validate grade
-                grade = float(grade)
-                if grade < 0 or grade > submission.assignment.points_possible:
-                    errors.append(f"Submission {submission_id}: Invalid grade value")
-                    continue
-                
-                # Update submission
-                submission.grade = grade
-                submission.feedback = feedback
-                submission.graded_at = datetime.utcnow()
-                submission.graded_by = current_user_id
-                
-                # Create/Update LessonCompletion for this assignment
-                try:
-                    assignment = submission.assignment
-                    lesson_id = assignment.lesson_id if hasattr(assignment, 'lesson_id') else None
-                    
-                    if lesson_id:
-                        # Calculate assignment percentage
-                        points_possible = assignment.points_possible or 100
-                        assignment_percentage = (grade / points_possible) * 100
-                        
-                        lesson_completion = LessonCompletion.query.filter_by(
-                            student_id=submission.student_id,
-                            lesson_id=lesson_id
-                        ).first()
-                        
-                        if not lesson_completion:
-                            # Create with reasonable defaults based on assignment grade
-                            default_reading = min(100.0, 70.0 + (assignment_percentage * 0.3))
-                            default_engagement = min(100.0, 60.0 + (assignment_percentage * 0.4))
-                            
-                            lesson_completion = LessonCompletion(
-                                student_id=submission.student_id,
-                                lesson_id=lesson_id,
-                                completed=True,
-                                reading_progress=default_reading,
-                                engagement_score=default_engagement,
-                                scroll_progress=default_reading,
-                                time_spent=300,
-                                completed_at=datetime.utcnow(),
-                                updated_at=datetime.utcnow(),
-                                last_accessed=datetime.utcnow()
-                            )
-                            db.session.add(lesson_completion)
-                            logger.info(f"Created LessonCompletion for lesson {lesson_id}, student {submission.student_id} (bulk grading)")
-                        else:
-                            # Boost scores if too low and assignment grade is good
-                            if lesson_completion.reading_progress < 50.0 and assignment_percentage >= 70:
-                                new_reading = min(100.0, 70.0 + (assignment_percentage * 0.3))
-                                if new_reading > lesson_completion.reading_progress:
-                                    lesson_completion.reading_progress = new_reading
-                                    lesson_completion.scroll_progress = new_reading
-                            
-                            if lesson_completion.engagement_score < 50.0 and assignment_percentage >= 70:
-                                new_engagement = min(100.0, 60.0 + (assignment_percentage * 0.4))
-                                if new_engagement > lesson_completion.engagement_score:
-                                    lesson_completion.engagement_score = new_engagement
-                            
-                            lesson_completion.updated_at = datetime.utcnow()
-                except Exception as lc_error:
-                    logger.warning(f"Error creating LessonCompletion for submission {submission_id}: {str(lc_error)}")
-                
-                # ===== AUTO-MODIFICATION REQUEST in bulk grading =====
-                try:
-                    assignment = submission.assignment
-                    points_possible = assignment.points_possible or 100
-                    percentage_score = round((grade / points_possible) * 100, 2)
-                    
-                    # Use the passing score set during assignment creation, fallback to default
-                    passing_threshold = assignment.passing_score if assignment.passing_score is not None else DEFAULT_PASSING_PERCENTAGE
-                    
-                    if percentage_score < passing_threshold:
-                        max_resubs = assignment.max_resubmissions or 3
-                        current_resubs = assignment.resubmission_count or 0
-                        
-                        if current_resubs < max_resubs:
-                            mod_reason = (
-                                f"Your score of {grade:.1f}/{points_possible} ({percentage_score:.1f}%) is below the "
-                                f"passing threshold of {passing_threshold}%. "
-                                f"Please review the instructor feedback and resubmit your work with improvements."
-                            )
-                            if feedback:
-                                mod_reason += f"\n\nInstructor Feedback: {feedback}"
-                            
-                            assignment.modification_requested = True
-                            assignment.modification_request_reason = mod_reason
-                            assignment.modification_requested_at = datetime.utcnow()
-                            assignment.modification_requested_by = current_user_id
-                            assignment.can_resubmit = True
-                            assignment.resubmission_count = current_resubs + 1
-                            
-                            logger.info(f"🔄 Bulk grading: auto-modification requested for assignment {assignment.id}, student {submission.student_id}")
-                            
-                            # Send combined grade + modification email
-                            try:
-                                student = User.query.get(submission.student_id)
-                                if student and student.email:
-                                    instructor = User.query.get(current_user_id)
-                                    instructor_name = f"{instructor.first_name} {instructor.last_name}" if instructor else "Your Instructor"
-                                    frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:3000')
-                                    resubmission_deadline = (datetime.utcnow() + timedelta(days=7)).strftime('%B %d, %Y')
-                                    
-                                    send_grade_with_modification_notification(
-                                        submission=submission,
-                                        assignment=assignment,
-                                        student=student,
-                                        grade=grade,
-                                        feedback=feedback,
-                                        modification_reason=mod_reason,
-                                        instructor_name=instructor_name,
-                                        resubmission_deadline=resubmission_deadline,
-                                        frontend_url=frontend_url,
-                                        passing_percentage=passing_threshold
-                                    )
-                            except Exception as email_err:
-                                logger.warning(f"⚠️ Bulk grading: email failed for submission {submission_id}: {email_err}")
-                    else:
-                        # Score is at or above passing - clear any existing modification request
-                        if assignment.modification_requested:
-                            assignment.modification_requested = False
-                            assignment.modification_request_reason = None
-                            assignment.modification_requested_at = None
-                            assignment.modification_requested_by = None
-                            assignment.can_resubmit = False
-                except Exception as mod_error:
-                    logger.warning(f"⚠️ Error in bulk auto-modification for submission {submission_id}: {str(mod_error)}")
-                # ===== END AUTO-MODIFICATION =====
-                
-                graded_count += 1
-                
-            except Exception as e:
-                errors.append(f"Submission {item.get('id')}: {str(e)}")
+        if data.get('async') or len(submissions_to_grade) > BULK_GRADE_SYNC_LIMIT:
+            task_id = BulkGradingService.start(current_user_id, submissions_to_grade, validate_range=True)
+            return jsonify({
+                "message": f"Grading {len(submissions_to_grade)} submissions in background",
+                "task_id": task_id,
+                "status": "started",
+                "poll_url": f"/api/v1/grading/assignments/submissions/bulk-grade/{task_id}"
+            }), 202
         
-        db.session.commit()
+        result = BulkGradingService.grade(current_user_id, submissions_to_grade, validate_range=True)
+        graded_count = result['graded_count']
+        errors = result['errors']
         
         return jsonify({
             "message": f"Successfully graded {graded_count} submissions",
@@ -905,6 +712,36 @@ def bulk_grade_assignments():
         return jsonify({"message": "Failed to bulk grade", "error": str(e)}), 500
 
 
+@grading_bp.route("/assignments/submissions/bulk-grade/<task_id>", methods=["GET"])
+@instructor_required
+def get_bulk_grade_status(task_id):
+    """Progress and result of a background bulk grading job."""
+    current_user_id = int(get_jwt_identity())
+    
+    task_status = background_service.get_task_status(task_id)
+    task = BackgroundTask.query.get(task_id) if task_status else None
+    if not task or task.user_id != current_user_id:
+        return jsonify({"message": "Task not found"}), 404
+    
+    if task_status['status'] == 'completed':
+        return jsonify({
+            "status": "completed",
+            "progress": 100,
+            "result": task_status['result']
+        }), 200
+    if task_status['status'] == 'failed':
+        return jsonify({
+            "status": "failed",
+            "message": "Bulk grading failed",
+            "error": task_status['error']
+        }), 500
+    return jsonify({
+        "status": task_status['status'],
+        "progress": task_status['progress'],
+        "message": "Bulk grading in progress"
+    }), 202
+
+
 # =====================
 # PROJECT GRADING
 # =====================
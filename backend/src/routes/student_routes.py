@@ -17,6 +17,7 @@ from ..models.student_models import (
     Certificate, SkillBadge, StudentSkillBadge
 )
 from ..models.achievement_models import UserAchievement, Achievement
+from ..services.lesson_progress_buffer import lesson_progress_buffer
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -289,7 +290,62 @@ def update_lesson_progress(lesson_id):
     """Update lesson reading progress with auto-completion at 80% score"""
     current_user_id = int(get_jwt_identity())
     data = request.get_json() or {}
-    
+    # Heartbeats still buffered for this lesson are saved along with this update
+    data = lesson_progress_buffer.absorb(current_user_id, lesson_id, data)
+    response = _apply_lesson_progress(current_user_id, lesson_id, data)
+    lesson_progress_buffer.forget(current_user_id, lesson_id)
+    return response
+
+
+@student_bp.route("/lessons/<int:lesson_id>/progress/heartbeat", methods=["POST"])
+@student_required
+def lesson_progress_heartbeat(lesson_id):
+    """
+    Record a periodic reading/video progress heartbeat.
+
+    Heartbeats are merged in memory and written in periodic batches.  Only
+    the heartbeat that takes the lesson to the completion threshold (or
+    first completes a video) runs the full progress update synchronously.
+    """
+    current_user_id = int(get_jwt_identity())
+    data = request.get_json(silent=True) or {}
+
+    if not lesson_progress_buffer.is_tracking(current_user_id, lesson_id):
+        lesson = Lesson.query.get_or_404(lesson_id)
+        enrolled = db.session.query(Enrollment.id).filter_by(
+            student_id=current_user_id,
+            course_id=lesson.module.course_id
+        ).first()
+        if not enrolled:
+            return jsonify({"message": "Not enrolled in this course"}), 403
+        lesson_progress_buffer.track(current_user_id, lesson_id)
+
+    state = lesson_progress_buffer.record(current_user_id, lesson_id, data)
+    if state['needs_evaluation']:
+        merged = lesson_progress_buffer.take(current_user_id, lesson_id)
+        response = _apply_lesson_progress(current_user_id, lesson_id, dict(merged, auto_saved=True))
+        lesson_progress_buffer.forget(current_user_id, lesson_id)
+        return response
+
+    progress = state['progress']
+    return jsonify({
+        "message": "Lesson progress recorded",
+        "buffered": True,
+        "progress": {
+            "reading_progress": progress.get('reading_progress', 0.0),
+            "engagement_score": progress.get('engagement_score', 0.0),
+            "scroll_progress": progress.get('scroll_progress'),
+            "time_spent": progress.get('time_spent'),
+            "lesson_score": state['lesson_score'],
+            "completed": state['completed'],
+        },
+        "auto_completed": False,
+        "completion_threshold": 80.0
+    }), 202
+
+
+def _apply_lesson_progress(current_user_id, lesson_id, data):
+    """Save a progress update, recompute scores and auto-complete at 80%."""
     lesson = Lesson.query.get_or_404(lesson_id)
     
     # Check if student is enrolled in the course
@@ -549,6 +605,8 @@ def _unlock_next_lesson(current_lesson, student_id, enrollment_id):
 def get_lesson_progress(lesson_id):
     """Get lesson reading progress with dynamic score breakdown"""
     current_user_id = int(get_jwt_identity())
+    # Write out heartbeats this worker is still holding so the read is current
+    lesson_progress_buffer.flush(keys=[(current_user_id, lesson_id)])
     
     lesson = Lesson.query.get_or_404(lesson_id)
     
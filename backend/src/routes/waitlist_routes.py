@@ -19,6 +19,7 @@ from ..models.course_models import Course, ApplicationWindow, Enrollment
 from ..models.course_application import CourseApplication
 from ..services.waitlist_service import WaitlistService
 from ..utils.brevo_email_service import brevo_service
+from ..services.email_outbox_service import email_outbox
 from ..services.payment_slip_service import generate_payment_slip_html
 from ..utils.payment_notifications import _get_payment_info_from_enrollment
 
@@ -175,9 +176,10 @@ def bulk_migrate_waitlist():
     if not success:
         return jsonify({"error": message, "data": result}), 400
 
-    # Send batch notification emails
+    # Queue batch notification emails
+    result["emails_queued"] = 0
     if data.get("send_emails", True) and result.get("migrated"):
-        _send_bulk_migration_emails(result, course_id)
+        result["emails_queued"] = _send_bulk_migration_emails(result, course_id)
 
     return jsonify({"success": True, "message": message, "data": result}), 200
 
@@ -614,35 +616,41 @@ def _build_migration_email(application, course, target_window, requires_payment=
 
 
 def _send_bulk_migration_emails(result, course_id):
-    """Send notification emails for bulk migration."""
+    """Queue notification emails for a bulk migration as one outbox batch."""
     try:
         course = Course.query.get(course_id)
         target_window_id = result.get("target_window_id")
         target_window = ApplicationWindow.query.get(target_window_id) if target_window_id else None
 
         if not course or not target_window:
-            return
+            return 0
 
-        for migrated_app in result.get("migrated", []):
-            app_id = migrated_app.get("application_id")
-            application = CourseApplication.query.get(app_id)
-            if not application:
-                continue
+        migrated = {m["application_id"]: m for m in result.get("migrated", [])}
+        applications = CourseApplication.query.filter(CourseApplication.id.in_(list(migrated))).all()
+        subject = f"📋 Application Update - {course.title} (New Cohort)"
 
+        messages = []
+        for application in applications:
             try:
-                email_html = _build_migration_email(
-                    application=application,
-                    course=course,
-                    target_window=target_window,
-                    requires_payment=migrated_app.get("requires_payment", False)
-                )
-                brevo_service.send_email(
-                    to_emails=[application.email],
-                    subject=f"📋 Application Update - {course.title} (New Cohort)",
-                    html_content=email_html
-                )
+                messages.append({
+                    "to_email": application.email,
+                    "to_name": application.full_name,
+                    "subject": subject,
+                    "html_content": _build_migration_email(
+                        application=application,
+                        course=course,
+                        target_window=target_window,
+                        requires_payment=migrated[application.id].get("requires_payment", False)
+                    ),
+                })
             except Exception as e:
-                logger.error(f"Failed to send migration email to {application.email}: {str(e)}")
+                logger.error(f"Failed to build migration email for {application.email}: {str(e)}")
+
+        email_outbox.enqueue_many(messages, category=f"waitlist_migration:{target_window.id}")
+        logger.info(f"Queued {len(messages)} migration emails for window {target_window.id}")
+        return len(messages)
 
     except Exception as e:
+        db.session.rollback()
         logger.error(f"Error in bulk migration emails: {str(e)}")
+        return 0
@@ -0,0 +1,486 @@
+"""
+Admin analytics dashboard built from grouped aggregate queries.
+
+Every section of the dashboard is one query: KPI counts are conditional
+sums over a single scan per table, and the monthly/weekly time series are
+``GROUP BY`` a month bucket (``date_trunc`` on PostgreSQL, ``strftime`` on
+SQLite) or a week ``CASE`` bucket.  The number of queries is fixed no matter
+how much history the period covers.
+
+Snapshots are cached per period for ``ADMIN_ANALYTICS_CACHE_TTL`` seconds
+(default 120).  A request that finds an expired snapshot younger than
+``ADMIN_ANALYTICS_CACHE_MAX_STALE`` (default 15 minutes) gets it immediately
+while a background thread rebuilds it; older or missing snapshots are
+built inline.
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import case, desc, func, or_
+from sqlalchemy.orm import joinedload
+
+from ..models.user_models import db, User, Role
+from ..models.course_models import Course, Enrollment
+from ..models.student_models import LessonCompletion
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    '7days': timedelta(days=7),
+    '30days': timedelta(days=30),
+    '90days': timedelta(days=90),
+    '1year': timedelta(days=365),
+    'all': None,
+}
+
+CACHE_TTL = float(os.getenv('ADMIN_ANALYTICS_CACHE_TTL', '120'))
+CACHE_MAX_STALE = float(os.getenv('ADMIN_ANALYTICS_CACHE_MAX_STALE', '900'))
+
+ROLE_COLORS = {
+    'student': '#3b82f6',
+    'instructor': '#10b981',
+    'admin': '#8b5cf6',
+}
+
+_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+_refreshing = set()
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _pct_change(current, previous):
+    if previous and previous > 0:
+        return round(((current - previous) / previous) * 100, 1)
+    return 0.0
+
+
+def _month_starts(now: datetime, count: int) -> List[datetime]:
+    """The first instant of the last ``count`` calendar months, oldest first."""
+    year, month = now.year, now.month
+    starts = []
+    for _ in range(count):
+        starts.append(datetime(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return starts[::-1]
+
+
+class AdminAnalyticsService:
+    """Build and cache the admin analytics dashboard payload."""
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def get_dashboard(cls, period: str = '30days', force_refresh: bool = False) -> Dict[str, Any]:
+        """Return the dashboard for ``period``, from cache when fresh enough."""
+        if period not in PERIODS:
+            period = '30days'
+
+        if not force_refresh:
+            with _cache_lock:
+                cached = _cache.get(period)
+            if cached:
+                age = time.monotonic() - cached[0]
+                if age < CACHE_TTL:
+                    return cached[1]
+                if age < CACHE_MAX_STALE:
+                    cls._refresh_in_background(period)
+                    return cached[1]
+
+        return cls._rebuild(period)
+
+    @classmethod
+    def _rebuild(cls, period: str) -> Dict[str, Any]:
+        started = time.monotonic()
+        payload = cls.build_dashboard(period)
+        with _cache_lock:
+            _cache[period] = (time.monotonic(), payload)
+        logger.debug(f"Built admin analytics for {period} in {time.monotonic() - started:.3f}s")
+        return payload
+
+    @classmethod
+    def _refresh_in_background(cls, period: str) -> None:
+        with _cache_lock:
+            if period in _refreshing:
+                return
+            _refreshing.add(period)
+
+        app = current_app._get_current_object()
+
+        def refresh():
+            try:
+                with app.app_context():
+                    cls._rebuild(period)
+            except Exception as e:
+                logger.error(f"Background refresh of admin analytics ({period}) failed: {e}")
+            finally:
+                with _cache_lock:
+                    _refreshing.discard(period)
+
+        threading.Thread(target=refresh, name=f"admin-analytics-{period}", daemon=True).start()
+
+    @staticmethod
+    def invalidate(period: Optional[str] = None) -> None:
+        with _cache_lock:
+            if period is None:
+                _cache.clear()
+            else:
+                _cache.pop(period, None)
+
+    # ------------------------------------------------------------------
+    # Buckets
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _month_bucket(column):
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            return func.to_char(func.date_trunc('month', column), 'YYYY-MM')
+        if dialect in ('mysql', 'mariadb'):
+            return func.date_format(column, '%Y-%m')
+        return func.strftime('%Y-%m', column)
+
+    @classmethod
+    def _monthly_counts(cls, column, *conditions, since: Optional[datetime] = None,
+                        extra: Optional[Dict[str, Any]] = None) -> Dict[str, Dict[str, int]]:
+        """``{'YYYY-MM': {'count': n, <extra>: m}}`` for rows grouped by month of ``column``."""
+        bucket = cls._month_bucket(column).label('bucket')
+        columns = [bucket, func.count().label('count')]
+        for name, condition in (extra or {}).items():
+            columns.append(_count_if(condition).label(name))
+
+        query = db.session.query(*columns).filter(column.isnot(None), *conditions)
+        if since is not None:
+            query = query.filter(column >= since)
+
+        return {
+            row.bucket: {key: int(value or 0) for key, value in row._mapping.items() if key != 'bucket'}
+            for row in query.group_by(bucket).all()
+        }
+
+    # ------------------------------------------------------------------
+    # Dashboard
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build_dashboard(cls, period: str = '30days', now: Optional[datetime] = None) -> Dict[str, Any]:
+        now = now or datetime.utcnow()
+        delta = PERIODS.get(period)
+        start_date = (now - delta) if delta else None  # None = all time
+        prev_start = (start_date - delta) if start_date else None
+
+        # ══════════ 1. KPI Cards ══════════
+        user_columns = [func.count(User.id), _count_if(User.is_active == True)]
+        enrollment_completed = or_(Enrollment.status == 'completed', Enrollment.completed_at.isnot(None))
+        enrollment_columns = [
+            func.count(Enrollment.id),
+            _count_if(enrollment_completed),
+            _count_if((Enrollment.status == 'active') & Enrollment.completed_at.is_(None)),
+            _count_if(Enrollment.status.in_(['terminated', 'suspended'])),
+            _count_if(Enrollment.payment_status == 'pending'),
+            _count_if(Enrollment.payment_status == 'completed'),
+            _count_if(Enrollment.payment_status == 'waived'),
+        ]
+        if start_date:
+            user_columns += [
+                _count_if(User.created_at >= start_date),
+                _count_if((User.created_at >= prev_start) & (User.created_at < start_date)),
+            ]
+            enrollment_columns += [
+                _count_if(Enrollment.enrollment_date >= start_date),
+                _count_if((Enrollment.enrollment_date >= prev_start) & (Enrollment.enrollment_date < start_date)),
+            ]
+
+        user_row = [int(v or 0) for v in db.session.query(*user_columns).one()]
+        enrollment_row = [int(v or 0) for v in db.session.query(*enrollment_columns).one()]
+        total_users, active_users = user_row[:2]
+        (total_enrollments, completed_enrollments, active_enrollments, terminated_enrollments,
+         pending_payments, completed_payments, waived_payments) = enrollment_row[:7]
+        if start_date:
+            period_users, prev_users = user_row[2:]
+            period_enrollments, prev_enrollments = enrollment_row[7:]
+        else:
+            period_users, prev_users = total_users, 0
+            period_enrollments, prev_enrollments = total_enrollments, 0
+
+        free_course = or_(Course.enrollment_type == 'free', Course.enrollment_type.is_(None))
+        total_courses, published_courses, paid_courses, free_courses = (
+            int(v or 0) for v in db.session.query(
+                func.count(Course.id),
+                _count_if(Course.is_published == True),
+                _count_if(Course.enrollment_type == 'paid'),
+                _count_if(free_course),
+            ).one()
+        )
+
+        completion_rate = round((completed_enrollments / total_enrollments * 100), 1) if total_enrollments > 0 else 0
+
+        kpi = {
+            "total_users": total_users,
+            "active_users": active_users,
+            "total_enrollments": total_enrollments,
+            "total_courses": total_courses,
+            "published_courses": published_courses,
+            "completion_rate": completion_rate,
+            "period_new_users": period_users,
+            "period_new_enrollments": period_enrollments,
+            "user_change_pct": _pct_change(period_users, prev_users),
+            "enrollment_change_pct": _pct_change(period_enrollments, prev_enrollments),
+        }
+
+        # ══════════ 2. User Growth (calendar months) ══════════
+        months_back = 12 if period in ('1year', 'all') else (6 if period == '90days' else 5)
+        month_starts = _month_starts(now, months_back)
+        month_keys = [m.strftime('%Y-%m') for m in month_starts]
+
+        # All-time buckets so the running totals include users from before the window
+        users_by_month = cls._monthly_counts(User.created_at, extra={'active': User.is_active == True})
+        running_total = sum(v['count'] for k, v in users_by_month.items() if k < month_keys[0])
+        running_active = sum(v['active'] for k, v in users_by_month.items() if k < month_keys[0])
+        user_growth = []
+        for month_start, key in zip(month_starts, month_keys):
+            bucket = users_by_month.get(key, {})
+            running_total += bucket.get('count', 0)
+            running_active += bucket.get('active', 0)
+            user_growth.append({
+                "month": month_start.strftime('%b %Y'),
+                "users": running_total,
+                "active": running_active,
+                "new": bucket.get('count', 0),
+            })
+
+        # ══════════ 3. Enrollment Trends (calendar months) ══════════
+        enrollments_by_month = cls._monthly_counts(Enrollment.enrollment_date, since=month_starts[0])
+        completions_by_month = cls._monthly_counts(Enrollment.completed_at, since=month_starts[0])
+        enrollment_trends = [
+            {
+                "month": month_start.strftime('%b %Y'),
+                "enrollments": enrollments_by_month.get(key, {}).get('count', 0),
+                "completions": completions_by_month.get(key, {}).get('count', 0),
+            }
+            for month_start, key in zip(month_starts, month_keys)
+        ]
+
+        # ══════════ 4. Course Popularity ══════════
+        enrollment_count = func.count(Enrollment.id)
+        course_popularity_query = db.session.query(
+            Course.id,
+            Course.title,
+            Course.is_published,
+            Course.enrollment_type,
+            Course.price,
+            Course.currency,
+            enrollment_count.label('enrollment_count'),
+            _count_if(enrollment_completed).label('completed'),
+        ).outerjoin(Enrollment, Course.id == Enrollment.course_id
+        ).group_by(Course.id, Course.title, Course.is_published, Course.enrollment_type, Course.price, Course.currency
+        ).order_by(desc(enrollment_count)
+        ).limit(10).all()
+
+        course_popularity = [
+            {
+                "id": c.id,
+                "title": c.title,
+                "enrollments": c.enrollment_count,
+                "is_published": c.is_published,
+                "enrollment_type": c.enrollment_type,
+                "price": c.price,
+                "currency": c.currency or 'USD',
+                "completion_rate": round((int(c.completed) / c.enrollment_count * 100), 1) if c.enrollment_count > 0 else 0,
+                "completed": int(c.completed),
+            }
+            for c in course_popularity_query
+        ]
+
+        # ══════════ 5. Enrollment Status Breakdown (completion rates) ══════════
+        completion_rates = [
+            {"name": "Completed", "value": completed_enrollments, "color": "#10b981"},
+            {"name": "In Progress", "value": active_enrollments, "color": "#3b82f6"},
+            {"name": "Not Started", "value": max(0, total_enrollments - completed_enrollments - active_enrollments - terminated_enrollments), "color": "#f59e0b"},
+            {"name": "Terminated", "value": terminated_enrollments, "color": "#ef4444"},
+        ]
+
+        # ══════════ 6. User Demographics (by role) ══════════
+        users_by_role = db.session.query(
+            Role.name,
+            func.count(User.id)
+        ).join(User).group_by(Role.name).all()
+
+        user_demographics = [
+            {
+                "name": role_name.capitalize(),
+                "value": count,
+                "color": ROLE_COLORS.get(role_name.lower(), '#6b7280')
+            }
+            for role_name, count in users_by_role
+        ]
+
+        # ══════════ 7. Engagement Metrics (weekly lesson activity) ══════════
+        weeks = 8 if period in ('90days', '1year', 'all') else 4
+        engagement_metrics = cls._weekly_engagement(now, weeks)
+
+        # ══════════ 8. Recent Activity ══════════
+        recent_activity = cls._recent_activity()
+
+        # ══════════ 9. Payment Overview ══════════
+        payment_stats = {
+            "paid_courses": paid_courses,
+            "free_courses": free_courses,
+            "pending_payments": pending_payments,
+            "completed_payments": completed_payments,
+            "waived_payments": waived_payments,
+        }
+
+        # ══════════ 10. Course Status Distribution ══════════
+        course_status = {
+            "published": published_courses,
+            "draft": total_courses - published_courses,
+            "paid": paid_courses,
+            "free": free_courses,
+        }
+
+        # ══════════ 11. Top Active Students ══════════
+        top_students_query = db.session.query(
+            User.id,
+            User.username,
+            User.first_name,
+            User.last_name,
+            func.count(LessonCompletion.id).label('completions')
+        ).join(
+            LessonCompletion, User.id == LessonCompletion.student_id
+        ).filter(
+            LessonCompletion.completed == True
+        )
+        if start_date:
+            top_students_query = top_students_query.filter(
+                LessonCompletion.completed_at >= start_date
+            )
+        top_students = top_students_query.group_by(
+            User.id, User.username, User.first_name, User.last_name
+        ).order_by(desc(func.count(LessonCompletion.id))).limit(10).all()
+
+        top_active_students = [
+            {
+                "id": s.id,
+                "username": s.username,
+                "name": f"{s.first_name or ''} {s.last_name or ''}".strip() or s.username,
+                "lessons_completed": s.completions,
+            }
+            for s in top_students
+        ]
+
+        return {
+            "success": True,
+            "period": period,
+            "generated_at": now.isoformat(),
+            "kpi": kpi,
+            "user_growth": user_growth,
+            "enrollment_trends": enrollment_trends,
+            "course_popularity": course_popularity,
+            "completion_rates": completion_rates,
+            "user_demographics": user_demographics,
+            "engagement_metrics": engagement_metrics,
+            "recent_activity": recent_activity,
+            "payment_stats": payment_stats,
+            "course_status": course_status,
+            "top_active_students": top_active_students,
+        }
+
+    @staticmethod
+    def _weekly_engagement(now: datetime, weeks: int) -> List[Dict[str, Any]]:
+        """
+        Lessons completed, active students and week-over-week retention.
+
+        One query returns (week, student, completions) for the window plus
+        the week before it; retention is the share of the previous week's
+        active students who were active again.
+        """
+        # Week i covers [now - (i + 1) weeks, now - i weeks); week ``weeks`` is only the retention baseline
+        week_bucket = case(
+            *[
+                (LessonCompletion.completed_at >= now - timedelta(weeks=i + 1), i)
+                for i in range(weeks + 1)
+            ],
+            else_=None,
+        ).label('week')
+
+        rows = db.session.query(
+            week_bucket,
+            LessonCompletion.student_id,
+            _count_if(LessonCompletion.completed == True).label('completed'),
+        ).filter(
+            LessonCompletion.completed_at >= now - timedelta(weeks=weeks + 1),
+            LessonCompletion.completed_at < now,
+        ).group_by(week_bucket, LessonCompletion.student_id).all()
+
+        students: Dict[int, set] = {i: set() for i in range(weeks + 1)}
+        completed: Dict[int, int] = {i: 0 for i in range(weeks + 1)}
+        for week, student_id, count in rows:
+            if week is None:
+                continue
+            students[int(week)].add(student_id)
+            completed[int(week)] += int(count or 0)
+
+        engagement_metrics = []
+        for i in range(weeks - 1, -1, -1):
+            prior = students[i + 1]
+            retained = len(students[i] & prior)
+            engagement_metrics.append({
+                "week": f"Week {weeks - i}",
+                "week_label": (now - timedelta(weeks=i + 1)).strftime('%b %d'),
+                "lessons_completed": completed[i],
+                "active_students": len(students[i]),
+                "retention_rate": round((retained / len(prior) * 100), 1) if prior else 0,
+            })
+        return engagement_metrics
+
+    @staticmethod
+    def _recent_activity() -> List[Dict[str, Any]]:
+        recent_activity = []
+        recent_users = User.query.options(joinedload(User.role)).order_by(User.created_at.desc()).limit(5).all()
+        for user in recent_users:
+            recent_activity.append({
+                "type": "user_registration",
+                "description": f"New user registered: {user.username}",
+                "timestamp": user.created_at.isoformat() if user.created_at else None,
+                "user": user.username,
+                "role": user.role.name if user.role else 'unknown',
+            })
+
+        with_people = (joinedload(Enrollment.student), joinedload(Enrollment.course))
+        recent_enrollments_list = Enrollment.query.options(*with_people).order_by(
+            Enrollment.enrollment_date.desc()
+        ).limit(5).all()
+        for enrollment in recent_enrollments_list:
+            recent_activity.append({
+                "type": "enrollment",
+                "description": f"{enrollment.student.username} enrolled in {enrollment.course.title}",
+                "timestamp": enrollment.enrollment_date.isoformat() if enrollment.enrollment_date else None,
+                "user": enrollment.student.username,
+                "course": enrollment.course.title,
+            })
+
+        recent_completions_list = Enrollment.query.options(*with_people).filter(
+            Enrollment.completed_at.isnot(None)
+        ).order_by(Enrollment.completed_at.desc()).limit(5).all()
+        for enrollment in recent_completions_list:
+            recent_activity.append({
+                "type": "course_completion",
+                "description": f"{enrollment.student.username} completed {enrollment.course.title}",
+                "timestamp": enrollment.completed_at.isoformat() if enrollment.completed_at else None,
+                "user": enrollment.student.username,
+                "course": enrollment.course.title,
+            })
+
+        recent_activity.sort(key=lambda x: x.get("timestamp") or "", reverse=True)
+        return recent_activity[:15]
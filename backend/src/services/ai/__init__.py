@@ -13,6 +13,7 @@ Enhanced AI services with:
 from .ai_providers import AIProviderManager, ai_provider_manager
 from .json_parser import JSONResponseParser, json_parser
 from .enhanced_json_parser import EnhancedJSONParser, enhanced_json_parser
+from .json_repair import repair_json, parse_repaired
 from .course_generator import CourseGenerator, course_generator
 from .lesson_generator import LessonGenerator, lesson_generator
 from .comprehensive_lesson_generator import ComprehensiveLessonGenerator, comprehensive_lesson_generator
@@ -34,6 +35,8 @@ __all__ = [
     'json_parser',
     'EnhancedJSONParser', 
     'enhanced_json_parser',
+    'repair_json',
+    'parse_repaired',
     
     # Course Generation
     'CourseGenerator',
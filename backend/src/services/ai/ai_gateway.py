@@ -0,0 +1,580 @@
+"""
+Async AI Gateway
+Runs outbound AI provider calls on one asyncio event loop per worker, so a
+request waiting on a rate limit or a slow completion parks a coroutine
+instead of a thread.
+
+- Each provider has a token bucket (``*_MAX_RPM``) that every thread draws
+  from, and a concurrency cap (``*_MAX_CONCURRENCY``) on in-flight calls.
+  The singleton keeps its buckets in a ``SharedRateLimitStore``
+  (shared_rate_limit.py), so every worker process draws from one budget.
+- A 429 pauses the provider's bucket for ``Retry-After`` (capped at
+  ``MAX_COOLDOWN_SLEEP``) and the call is retried without blocking others.
+- Identical in-flight requests (same coalescing key) share one call.
+- Sync code calls ``request_sync``, which submits to the loop and waits
+  for that one result.
+
+Usage:
+    from .ai_gateway import ai_gateway, openrouter_chat
+
+    content = ai_gateway.request_sync(
+        'openrouter',
+        lambda: openrouter_chat(ai_gateway, url, headers, payload, timeout=60),
+        key=cache_key,
+    )
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+from sqlalchemy.exc import SQLAlchemyError
+
+from .shared_rate_limit import SharedRateLimitStore, requests_last_minute
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+    logger.warning("aiohttp package not installed. AI gateway HTTP calls will be unavailable.")
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    from google.generativeai.types import BlockedPromptException, StopCandidateException
+    GEMINI_BLOCKED_ERRORS = (BlockedPromptException, StopCandidateException)
+except ImportError:
+    google_exceptions = None
+    GEMINI_BLOCKED_ERRORS = ()
+
+# Maximum seconds a provider is ever paused for a single rate-limit cooldown
+MAX_COOLDOWN_SLEEP = 120
+
+
+class ProviderError(requests.HTTPError):
+    """
+    A failed provider call. Subclasses ``requests.HTTPError`` and carries
+    ``status_code`` so existing 429 handling (``RateLimitHandler``,
+    ``make_ai_request``) recognises it.
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None,
+                 retry_after: Optional[float] = None, provider: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.provider = provider
+
+    @property
+    def retryable(self) -> bool:
+        """Server errors, timeouts and transport errors are worth retrying"""
+        return self.status_code is None or self.status_code >= 500
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Seconds to wait from ``Retry-After`` or an OpenRouter ``x-ratelimit-reset`` header"""
+    retry_after = headers.get('Retry-After')
+    if retry_after:
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            pass
+    reset = headers.get('x-ratelimit-reset')
+    if reset:
+        try:
+            reset = float(reset)
+        except (TypeError, ValueError):
+            return None
+        # Absolute Unix timestamp (seconds or milliseconds) or relative seconds
+        if reset > 1_000_000_000_000:
+            reset /= 1000
+        return max(0.0, reset - time.time()) if reset > 1_000_000_000 else reset
+    return None
+
+
+class TokenBucket:
+    """
+    Requests-per-minute token bucket shared by every thread and coroutine.
+
+    Each ``reserve`` takes a token (the balance may go negative) and returns
+    how long the caller must wait for it; ``pause`` holds every reservation
+    back until a cooldown ends.
+    """
+
+    def __init__(self, rpm: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.rate = rpm / 60.0 if rpm and rpm > 0 else 0.0  # tokens per second, 0 = unlimited
+        # A burst of one paces requests evenly, so no 60s window exceeds the RPM limit
+        self.capacity = burst if burst is not None else 1.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self.total_wait = 0.0
+        self.acquired = 0
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            wait = 0.0
+            if self.rate:
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = -self._tokens / self.rate
+            wait = max(wait, self._paused_until - now)
+            self._recent.append(now + wait)
+            self.total_wait += wait
+            self.acquired += 1
+            return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold every reservation back for ``seconds`` (after a 429)"""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+    def pause_remaining(self) -> float:
+        with self._lock:
+            return max(0.0, self._paused_until - self._clock())
+
+    def requests_last_minute(self) -> int:
+        with self._lock:
+            horizon = self._clock() - 60
+            while self._recent and self._recent[0] < horizon:
+                self._recent.popleft()
+            return len(self._recent)
+
+    def metrics(self, rpm: float) -> Dict[str, Any]:
+        last_minute = self.requests_last_minute()
+        return {
+            'requests_last_minute': last_minute,
+            'utilization': round(last_minute / rpm, 3) if rpm else None,
+            'cooldown_remaining_seconds': round(self.pause_remaining(), 1),
+            'total_wait_seconds': round(self.total_wait, 1),
+            'avg_wait_seconds': round(self.total_wait / self.acquired, 2) if self.acquired else 0.0,
+        }
+
+    async def acquire(self) -> float:
+        waited = 0.0
+        wait = self.reserve()
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            # A 429 seen while we slept pushes us back further
+            wait = self.pause_remaining()
+        return waited
+
+
+class SharedTokenBucket(TokenBucket):
+    """
+    ``TokenBucket`` whose schedule and cooldown live in a ``SharedRateLimitStore``.
+
+    If the store can't be reached the bucket falls back to its in-process
+    state, so AI calls are throttled per worker rather than failing.
+    """
+
+    def __init__(self, provider: str, rpm: float, store: SharedRateLimitStore,
+                 clock: Callable[[], float] = time.time):
+        super().__init__(rpm, clock=clock)
+        self.provider = provider
+        self.store = store
+        self.interval = 1 / self.rate if self.rate else 0.0
+        self._store_failed_at = 0.0
+
+    def _store_call(self, fn: Callable[[], Any]) -> Any:
+        try:
+            return fn()
+        except SQLAlchemyError as e:
+            now = self._clock()
+            if now - self._store_failed_at > 60:
+                logger.warning(f"Shared rate-limit store unavailable for {self.provider}, "
+                               f"using per-worker limits: {e}")
+            self._store_failed_at = now
+            raise
+
+    def reserve(self) -> float:
+        now = self._clock()
+        try:
+            wait = self._store_call(lambda: self.store.reserve(self.provider, self.interval, now))
+        except SQLAlchemyError:
+            return super().reserve()
+        with self._lock:
+            self._recent.append(now + wait)
+            self.total_wait += wait
+            self.acquired += 1
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        super().pause(seconds)
+        try:
+            self._store_call(lambda: self.store.pause(self.provider, seconds, self._clock()))
+        except SQLAlchemyError:
+            pass
+
+    def pause_remaining(self) -> float:
+        local = super().pause_remaining()
+        try:
+            state = self._store_call(lambda: self.store.state(self.provider))
+        except SQLAlchemyError:
+            return local
+        return max(local, (state.get('paused_until') or 0.0) - self._clock())
+
+    async def acquire(self) -> float:
+        # Store round-trips run off the event loop
+        waited = 0.0
+        wait = await asyncio.to_thread(self.reserve)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            waited += wait
+            # A 429 seen by any worker while we slept pushes us back further
+            wait = await asyncio.to_thread(self.pause_remaining)
+        return waited
+
+    def requests_last_minute(self) -> int:
+        try:
+            state = self._store_call(lambda: self.store.state(self.provider))
+        except SQLAlchemyError:
+            return super().requests_last_minute()
+        return round(requests_last_minute(state, self._clock()))
+
+    def metrics(self, rpm: float) -> Dict[str, Any]:
+        """Local metrics (this worker's waits) plus totals across every worker"""
+        metrics = super().metrics(rpm)
+        try:
+            state = self._store_call(lambda: self.store.state(self.provider))
+        except SQLAlchemyError:
+            return dict(metrics, shared=False)
+        requests = state.get('requests') or 0
+        total_wait = state.get('total_wait') or 0.0
+        return dict(
+            metrics,
+            shared=True,
+            all_workers={
+                'requests': requests,
+                'rate_limited': state.get('rate_limited') or 0,
+                'total_wait_seconds': round(total_wait, 1),
+                'avg_wait_seconds': round(total_wait / requests, 2) if requests else 0.0,
+                'last_429_at': state.get('last_429_at'),
+            },
+        )
+
+
+class AIGateway:
+    """Per-worker asyncio gateway for AI provider calls."""
+
+    def __init__(self, limits: Optional[Dict[str, Dict[str, float]]] = None, max_cooldown: float = MAX_COOLDOWN_SLEEP,
+                 store: Optional[SharedRateLimitStore] = None):
+        limits = limits or {
+            'openrouter': {'rpm': int(os.environ.get('OPENROUTER_MAX_RPM', '200')),
+                           'concurrency': int(os.environ.get('OPENROUTER_MAX_CONCURRENCY', '8'))},
+            'gemini': {'rpm': int(os.environ.get('GEMINI_MAX_RPM', '15')),
+                       'concurrency': int(os.environ.get('GEMINI_MAX_CONCURRENCY', '2'))},
+        }
+        self.limits = limits
+        self.max_cooldown = max_cooldown
+        # With a store, every worker draws from the same per-provider budget
+        self.store = store
+        self.buckets = {
+            name: SharedTokenBucket(name, limit['rpm'], store) if store else TokenBucket(limit['rpm'])
+            for name, limit in limits.items()
+        }
+        self.stats = {name: {'requests': 0, 'coalesced': 0, 'rate_limited': 0, 'errors': 0, 'in_flight': 0}
+                      for name in limits}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Only touched on the loop thread
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[Any, asyncio.Future] = {}
+        self._http = None
+
+    # ------------------------------------------------------------------
+    # Event loop
+    # ------------------------------------------------------------------
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(target=loop.run_forever, name='ai-gateway', daemon=True)
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def close(self) -> None:
+        """Close the HTTP session and stop the loop (tests, shutdown)"""
+        if self._loop is None:
+            return
+        if self._http is not None:
+            asyncio.run_coroutine_threadsafe(self._http.close(), self._loop).result(5)
+            self._http = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self._loop = None
+
+    def http(self):
+        """The shared aiohttp session (created on the loop thread)"""
+        if not AIOHTTP_AVAILABLE:
+            raise ProviderError('aiohttp is not installed')
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession()
+        return self._http
+
+    def _semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._semaphores:
+            self._semaphores[provider] = asyncio.Semaphore(max(1, int(self.limits[provider]['concurrency'])))
+        return self._semaphores[provider]
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    async def request(self, provider: str, send: Callable[[], Awaitable[Any]],
+                      key: Any = None, retries: int = 2) -> Any:
+        """
+        Run ``send()`` under the provider's rate and concurrency limits,
+        retrying rate limits and transient errors. Calls with the same
+        ``key`` while one is in flight share its result.
+        """
+        if key is None:
+            return await self._send(provider, send, retries)
+
+        shared = self._inflight.get(key)
+        if shared is not None:
+            self.stats[provider]['coalesced'] += 1
+            return await asyncio.shield(shared)
+
+        shared = asyncio.ensure_future(self._send(provider, send, retries))
+        self._inflight[key] = shared
+        shared.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(shared)
+
+    async def _send(self, provider: str, send: Callable[[], Awaitable[Any]], retries: int) -> Any:
+        bucket = self.buckets[provider]
+        stats = self.stats[provider]
+        for attempt in range(retries + 1):
+            await bucket.acquire()
+            try:
+                async with self._semaphore(provider):
+                    stats['requests'] += 1
+                    stats['in_flight'] += 1
+                    try:
+                        return await send()
+                    finally:
+                        stats['in_flight'] -= 1
+            except ProviderError as e:
+                error = e
+            except asyncio.TimeoutError:
+                error = ProviderError(f'{provider} request timed out', provider=provider)
+            except Exception as e:
+                if AIOHTTP_AVAILABLE and isinstance(e, aiohttp.ClientError):
+                    error = ProviderError(f'{provider} transport error: {e}', provider=provider)
+                else:
+                    raise
+
+            error.provider = provider
+            if error.status_code == 429:
+                stats['rate_limited'] += 1
+                cooldown = min(self.max_cooldown, max(error.retry_after or 0, (2 ** attempt) * 5))
+                bucket.pause(cooldown)
+                logger.warning(f"[RATE LIMIT] {provider} → 429 (attempt {attempt + 1}/{retries + 1}). "
+                               f"Pausing {provider} for {cooldown:.1f}s")
+            elif error.retryable:
+                stats['errors'] += 1
+                logger.warning(f"{provider} request failed (attempt {attempt + 1}/{retries + 1}): {error}")
+                if attempt < retries:
+                    await asyncio.sleep(2)
+            else:
+                stats['errors'] += 1
+                raise error
+            if attempt == retries:
+                raise error
+
+    def request_sync(self, provider: str, send: Callable[[], Awaitable[Any]], key: Any = None,
+                     retries: int = 2, timeout: Optional[float] = None) -> Any:
+        """Blocking facade for sync callers: run ``request`` on the gateway loop and wait for it."""
+        loop = self.loop
+        if self._thread is threading.current_thread():
+            raise RuntimeError('request_sync called from the gateway loop; await request() instead')
+        future = asyncio.run_coroutine_threadsafe(self.request(provider, send, key, retries), loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise ProviderError(f'{provider} request did not finish in {timeout}s', provider=provider)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: dict(
+                self.stats[name],
+                rpm_limit=self.limits[name]['rpm'],
+                max_concurrency=self.limits[name]['concurrency'],
+                **self.buckets[name].metrics(self.limits[name]['rpm']),
+            )
+            for name in self.limits
+        }
+
+
+# ===== Provider calls =====
+
+async def openrouter_chat(gateway: AIGateway, url: str, headers: Dict[str, str],
+                          payload: Dict[str, Any], timeout: float,
+                          on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    POST an OpenRouter chat completion and return the message content.
+    With ``on_text`` the completion is streamed (server-sent events) and
+    each delta is passed to it as it arrives; an exception from
+    ``on_text`` stops the stream.
+    """
+    if on_text:
+        payload = dict(payload, stream=True)
+    async with gateway.http().post(url, json=payload, headers=headers,
+                                   timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        if response.status >= 400:
+            body = await response.text()
+            raise ProviderError(f'{response.status} from OpenRouter: {body[:300]}', response.status,
+                                retry_after_seconds(response.headers), 'openrouter')
+        if on_text:
+            return await _read_openrouter_stream(response, payload, on_text)
+        result = await response.json(content_type=None)
+
+    choices = result.get('choices') or []
+    if not choices:
+        raise ProviderError(f'Unexpected OpenRouter response format: {str(result)[:300]}', provider='openrouter')
+    logger.info(f"OpenRouter API request successful (model: {payload.get('model')}, "
+                f"tokens: {result.get('usage', {}).get('total_tokens', 'N/A')})")
+    return choices[0]['message']['content']
+
+
+async def _read_openrouter_stream(response, payload: Dict[str, Any], on_text: Callable[[str], None]) -> str:
+    parts = []
+    async for line in response.content:
+        line = line.decode('utf-8', errors='replace').strip()
+        # Blank lines separate events; ":" lines are keep-alive comments
+        if not line.startswith('data:'):
+            continue
+        data = line[5:].strip()
+        if data == '[DONE]':
+            break
+        try:
+            event = json.loads(data)
+        except json.JSONDecodeError:
+            continue
+        if event.get('error'):
+            error = event['error']
+            status = error.get('code') if isinstance(error.get('code'), int) else None
+            raise ProviderError(f"OpenRouter stream error: {error.get('message', error)}", status,
+                                provider='openrouter')
+        delta = ((event.get('choices') or [{}])[0].get('delta') or {}).get('content')
+        if delta:
+            parts.append(delta)
+            on_text(delta)
+    if not parts:
+        raise ProviderError('OpenRouter stream returned no content', provider='openrouter')
+    logger.info(f"OpenRouter stream complete (model: {payload.get('model')}, chars: {sum(map(len, parts))})")
+    return ''.join(parts)
+
+
+_GEMINI_RETRY_IN = re.compile(r'retry in (\d+\.?\d*)s', re.IGNORECASE)
+_GEMINI_RETRY_DELAY = re.compile(r'retry_delay\s*\{\s*seconds:\s*(\d+)')
+
+
+def _gemini_status(error: Exception) -> Optional[int]:
+    """
+    HTTP status of a Gemini SDK error, so permission, invalid-argument and
+    blocked-prompt errors fail fast instead of being retried.
+    """
+    if isinstance(error, GEMINI_BLOCKED_ERRORS):
+        return 400
+    if google_exceptions is not None and isinstance(error, google_exceptions.GoogleAPICallError):
+        return error.code
+    return None
+
+
+async def gemini_generate(model, prompt: str, generation_config: Dict[str, Any], timeout: float,
+                          on_text: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Run a Gemini ``generate_content_async`` call and return its text,
+    streaming each chunk to ``on_text`` when given.
+    """
+    try:
+        if on_text:
+            text = await asyncio.wait_for(_read_gemini_stream(model, prompt, generation_config, on_text), timeout)
+        else:
+            response = await asyncio.wait_for(
+                model.generate_content_async(prompt, generation_config=generation_config), timeout)
+            try:
+                text = response.text if response else None
+            except ValueError as e:  # blocked or empty candidate; the same prompt would get the same answer
+                raise ProviderError(f'Gemini returned no usable candidate: {e}', 400, provider='gemini')
+    except asyncio.TimeoutError:
+        raise
+    except ProviderError:
+        raise
+    except _ConsumerError as e:
+        raise e.error  # Raised by on_text, not by Gemini
+    except Exception as e:
+        message = str(e)
+        status = _gemini_status(e)
+        if status is None and ('429' in message or 'quota' in message.lower() or 'rate limit' in message.lower()):
+            status = 429
+        if status == 429:
+            match = _GEMINI_RETRY_IN.search(message) or _GEMINI_RETRY_DELAY.search(message)
+            raise ProviderError(message, 429, float(match.group(1)) + 2 if match else None, 'gemini')
+        raise ProviderError(message, status, provider='gemini')
+
+    if not text:
+        raise ProviderError('Gemini returned empty response', provider='gemini')
+    return text
+
+
+async def _read_gemini_stream(model, prompt: str, generation_config: Dict[str, Any],
+                              on_text: Callable[[str], None]) -> str:
+    parts = []
+    response = await model.generate_content_async(prompt, generation_config=generation_config, stream=True)
+    async for chunk in response:
+        try:
+            delta = chunk.text
+        except ValueError:  # blocked or empty candidate
+            delta = None
+        if delta:
+            parts.append(delta)
+            try:
+                on_text(delta)
+            except Exception as e:
+                raise _ConsumerError(e)
+    return ''.join(parts)
+
+
+class _ConsumerError(Exception):
+    """Carries an exception raised by a stream's ``on_text`` past Gemini error mapping"""
+
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+
+
+# Singleton instance (limits shared across workers unless AI_RATE_LIMIT_STORE_URL=local)
+ai_gateway = AIGateway(store=SharedRateLimitStore.from_env())
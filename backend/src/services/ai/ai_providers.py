@@ -9,15 +9,17 @@ import re
 import time
 import hashlib
 import logging
-import random
-import concurrent.futures
 import threading
 from typing import Dict, List, Optional, Any, Tuple
-from collections import deque
 from datetime import datetime
 import requests
 
 from .rate_limit_handler import rate_limit_handler, TaskCancelledError, RateLimitExhaustedError
+from .ai_gateway import MAX_COOLDOWN_SLEEP, ProviderError, ai_gateway, gemini_generate, openrouter_chat
+from .json_parser import json_parser
+from .streaming_json import (
+    IncrementalJSONParser, ResponseSpec, StreamingJSONError, build_completion_prompt, merge_completion,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -135,20 +137,14 @@ class AIProviderManager:
             },
         }
         
-        # Rate limiting configuration (per provider)
+        # Rate limiting configuration (per provider), enforced by the AI gateway
         self.openrouter_max_rpm = int(os.environ.get('OPENROUTER_MAX_RPM', '200'))
         self.gemini_max_rpm = int(os.environ.get('GEMINI_MAX_RPM', '15'))
-        self.request_timestamps = {'openrouter': deque(maxlen=200), 'gemini': deque(maxlen=15)}
-        self.min_request_interval = 0.3
-        self.last_request_time = {'openrouter': 0, 'gemini': 0}
+        self.gateway = ai_gateway
 
-        # Rate limit cooldown (set when 429 is received)
-        self._rate_limit_cooldown_until = {'openrouter': 0, 'gemini': 0}
-
-        # Proactive throttling threshold (fraction of RPM limit)
-        self.proactive_threshold = float(os.environ.get(
-            'RATE_LIMIT_PROACTIVE_THRESHOLD', '0.9'
-        ))
+        # Streamed JSON generation (make_json_request)
+        self.streaming_enabled = os.environ.get('AI_STREAMING_ENABLED', 'true').lower() in ('true', '1', 'yes')
+        self.stream_repair_attempts = int(os.environ.get('AI_STREAM_REPAIR_ATTEMPTS', '1'))
         
         # Token/prompt optimization
         self.max_prompt_length = 100000
@@ -161,11 +157,6 @@ class AIProviderManager:
         # When set, keys are loaded from UserAISetting table.
         self._active_user_id = None
         
-        # Initialize HTTP session — no custom Retry adapter
-        # urllib3's default Retry with max_retries=0 can swallow response objects
-        # on 429s, making e.response None. Use plain Session instead.
-        self.session = requests.Session()
-        
         self._initialize_providers()
 
     def _load_api_keys_from_settings(self):
@@ -429,66 +420,11 @@ class AIProviderManager:
             logger.info(f"Invalidated {removed} cached response(s) for prompt")
     
     # ===== Rate Limiting =====
-    
-    # Maximum seconds we'll ever sleep for a single rate-limit cooldown
-    MAX_COOLDOWN_SLEEP = 120
-
-    def _wait_for_rate_limit(self, provider: str = 'openrouter'):
-        """Implement provider-specific rate limiting with cooldown awareness and proactive throttling"""
-        current_time = time.time()
-        max_rpm = self.openrouter_max_rpm if provider == 'openrouter' else self.gemini_max_rpm
-        timestamps = self.request_timestamps[provider]
-
-        # === PROACTIVE THROTTLING ===
-        # If we're approaching the RPM limit, proactively sleep before making the call
-        requests_last_minute = len(timestamps)
-        if max_rpm > 0 and requests_last_minute >= max_rpm * self.proactive_threshold:
-            # Calculate how long until the oldest request falls out of the 60s window
-            if timestamps:
-                oldest = timestamps[0]
-                window_elapsed = current_time - oldest
-                if window_elapsed < 60:
-                    wait_time = 60 - window_elapsed + 0.5
-                    logger.warning(
-                        f"[PROACTIVE] {provider} at {requests_last_minute}/{max_rpm} RPM. "
-                        f"Pausing {wait_time:.1f}s for window reset."
-                    )
-                    time.sleep(wait_time)
-                    current_time = time.time()
-
-        # Check rate-limit cooldown (set when 429 is received from the provider)
-        cooldown_until = self._rate_limit_cooldown_until.get(provider, 0)
-        cooldown_remaining = cooldown_until - current_time
-        if cooldown_remaining > 0:
-            # Safety cap: never sleep longer than MAX_COOLDOWN_SLEEP
-            if cooldown_remaining > self.MAX_COOLDOWN_SLEEP:
-                logger.warning(f"Cooldown for {provider} was {cooldown_remaining:.1f}s — capping to {self.MAX_COOLDOWN_SLEEP}s")
-                cooldown_remaining = self.MAX_COOLDOWN_SLEEP
-                # Reset the stored value so next call isn't stuck too
-                self._rate_limit_cooldown_until[provider] = current_time + cooldown_remaining
-            logger.info(f"Rate limit cooldown active for {provider}: waiting {cooldown_remaining:.1f}s")
-            time.sleep(cooldown_remaining)
-            current_time = time.time()
-
-        time_since_last = current_time - self.last_request_time[provider]
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            logger.debug(f"Rate limiting ({provider}): waiting {sleep_time:.2f}s before next request")
-            time.sleep(sleep_time)
-            current_time = time.time()
-
-        # Check if we've hit the RPM limit (legacy check)
-        if len(timestamps) >= max_rpm:
-            oldest_request = timestamps[0]
-            time_window = current_time - oldest_request
-            if time_window < 60:
-                sleep_time = 60 - time_window + 1
-                logger.warning(f"Rate limit reached for {provider} ({max_rpm} requests/min). Waiting {sleep_time:.2f}s")
-                time.sleep(sleep_time)
-                current_time = time.time()
-
-        timestamps.append(current_time)
-        self.last_request_time[provider] = current_time
+    # Per-provider token buckets, concurrency caps and 429 cooldowns live in
+    # the AI gateway (ai_gateway.py), shared by every thread in the worker.
+
+    # Maximum seconds we'll ever pause a provider for a single rate-limit cooldown
+    MAX_COOLDOWN_SLEEP = MAX_COOLDOWN_SLEEP
     
     # ===== Provider State Management =====
     
@@ -605,10 +541,30 @@ class AIProviderManager:
     
     # ===== API Request Methods =====
     
+    @staticmethod
+    def _stream_sink(stream_to):
+        """``on_text`` for one streamed attempt; a retry or fallback starts the sink afresh"""
+        if stream_to is None:
+            return None
+        stream_to.reset()
+        return stream_to.feed
+
+    @staticmethod
+    def _replay(cached: str, stream_to) -> str:
+        """Feed a cached response to the stream sink as if it had just been streamed"""
+        if stream_to is not None:
+            stream_to.reset()
+            stream_to.feed(cached)
+        return cached
+
     def _make_openrouter_request(self, prompt: str, model_tier: str = 'primary', 
                                  retry_count: int = 2, temperature: float = 0.7,
-                                 max_tokens: int = 4096) -> Optional[str]:
-        """Make a request to OpenRouter API with automatic model fallback"""
+                                 max_tokens: int = 4096, stream_to=None) -> Optional[str]:
+        """
+        Make a request to OpenRouter API (through the AI gateway) with automatic model fallback.
+        With ``stream_to`` (an object with ``reset()`` and ``feed(text)``, e.g. an
+        IncrementalJSONParser) the completion is streamed into it as it arrives.
+        """
         if not self.openrouter_api_key:
             logger.warning("OpenRouter API key not configured")
             return None
@@ -623,177 +579,88 @@ class AIProviderManager:
         cache_key = self._get_cache_key(prompt, 'openrouter', model_name)
         cached = self._get_cached_response(cache_key)
         if cached:
-            return cached
+            return self._replay(cached, stream_to)
         
         optimized_prompt = self._optimize_prompt(prompt, model_config['max_tokens'] * 3)
         
-        for attempt in range(retry_count + 1):
-            try:
-                self._wait_for_rate_limit('openrouter')
-                
-                logger.info(f"Making OpenRouter API request (model: {model_name}, attempt {attempt + 1}/{retry_count + 1}, prompt length: {len(optimized_prompt)} chars)")
-                
-                headers = {
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "HTTP-Referer": self.site_url,
-                    "X-Title": self.site_name,
-                    "Content-Type": "application/json",
-                }
-                
-                payload = {
-                    "model": model_name,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are an expert instructional designer and course content creator. Provide detailed, well-structured, and engaging educational content. When the user asks for JSON output, you MUST respond with ONLY valid JSON — no markdown, no explanatory text, no code blocks."
-                        },
-                        {
-                            "role": "user",
-                            "content": optimized_prompt
-                        }
-                    ],
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "top_p": 0.9,
-                    "frequency_penalty": 0.1,
-                    "presence_penalty": 0.1,
+        headers = {
+            "Authorization": f"Bearer {self.openrouter_api_key}",
+            "HTTP-Referer": self.site_url,
+            "X-Title": self.site_name,
+            "Content-Type": "application/json",
+        }
+        
+        payload = {
+            "model": model_name,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are an expert instructional designer and course content creator. Provide detailed, well-structured, and engaging educational content. When the user asks for JSON output, you MUST respond with ONLY valid JSON — no markdown, no explanatory text, no code blocks."
+                },
+                {
+                    "role": "user",
+                    "content": optimized_prompt
                 }
-                
-                response = self.session.post(
-                    self.openrouter_base_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=self.openrouter_timeout
-                )
-                
-                response.raise_for_status()
-                result = response.json()
-                
-                if 'choices' in result and len(result['choices']) > 0:
-                    content = result['choices'][0]['message']['content']
-                    logger.info(f"OpenRouter API request successful (model: {model_name}, tokens: {result.get('usage', {}).get('total_tokens', 'N/A')})")
-                    
-                    self._mark_provider_success('openrouter')
-                    self._cache_response(cache_key, content)
-                    return content
-                else:
-                    logger.error(f"Unexpected OpenRouter response format: {result}")
-                    
-            except requests.exceptions.HTTPError as e:
-                error_msg = str(e)
-                # Extract status code: prefer response object, fall back to parsing error string
-                status_code = None
-                if e.response is not None:
-                    status_code = e.response.status_code
-                elif '429' in error_msg:
-                    status_code = 429
-                elif '401' in error_msg:
-                    status_code = 401
-                elif '402' in error_msg:
-                    status_code = 402  
-                elif '403' in error_msg:
-                    status_code = 403
-                else:
-                    # Try to extract any 4xx/5xx from error string
-                    _match = re.search(r'\b(4\d{2}|5\d{2})\b', error_msg)
-                    if _match:
-                        status_code = int(_match.group(1))
-
-                if status_code == 404:
-                    # Model not found — don't retry, immediately try next tier
-                    logger.warning(f"OpenRouter model '{model_name}' not found (404). Trying next tier.")
-                    self._mark_provider_failure('openrouter')
-                    if model_tier == 'primary':
-                        return self._make_openrouter_request(prompt, 'secondary', 1, temperature, max_tokens)
-                    elif model_tier == 'secondary':
-                        return self._make_openrouter_request(prompt, 'fast', 1, temperature, max_tokens)
-                    return None
-
-                if status_code in [401, 402, 403]:
-                    logger.error(f"OpenRouter auth/billing error (status {status_code}): {error_msg}")
-                    self._mark_provider_failure('openrouter')
-                    return None
-                
-                elif status_code == 429:
-                    # Rate limit — exponential backoff: 5s, 10s, 20s (capped at 60s)
-                    backoff_time = min(60, (2 ** attempt) * 5)
-                    
-                    # Check for Retry-After / x-ratelimit-reset headers
-                    if e.response is not None:
-                        retry_after = e.response.headers.get('Retry-After')
-                        ratelimit_reset = e.response.headers.get('x-ratelimit-reset')
-                        
-                        if retry_after:
-                            try:
-                                ra_val = float(retry_after)
-                                # Retry-After is typically a relative delay in seconds
-                                backoff_time = max(backoff_time, int(ra_val) + 1)
-                            except (ValueError, TypeError):
-                                pass
-                        elif ratelimit_reset:
-                            try:
-                                reset_val = float(ratelimit_reset)
-                                now = time.time()
-                                # x-ratelimit-reset is an ABSOLUTE Unix timestamp
-                                # (if it's in the future and > 1 billion, it's a timestamp)
-                                if reset_val > 1_000_000_000 and reset_val > now:
-                                    backoff_time = max(backoff_time, int(reset_val - now) + 1)
-                                else:
-                                    # Treat as relative seconds (small values)
-                                    backoff_time = max(backoff_time, int(reset_val) + 1)
-                            except (ValueError, TypeError):
-                                pass
-                    
-                    # Safety cap: never set a backoff larger than 120s
-                    backoff_time = min(backoff_time, self.MAX_COOLDOWN_SLEEP)
-                    
-                    logger.warning(f"OpenRouter rate limit 429 (attempt {attempt + 1}/{retry_count + 1}). Backing off {backoff_time}s...")
-                    
-                    # Set cooldown so _wait_for_rate_limit also respects it
-                    self._rate_limit_cooldown_until['openrouter'] = time.time() + backoff_time
-                    
-                    if attempt < retry_count:
-                        time.sleep(backoff_time)
-                        continue
-                    else:
-                        # All retries exhausted — try a different model tier
-                        logger.warning(f"OpenRouter rate limit persists after {retry_count + 1} attempts on '{model_tier}' tier")
-                        if model_tier == 'primary':
-                            logger.info("Trying secondary model tier...")
-                            return self._make_openrouter_request(prompt, 'secondary', 1, temperature, max_tokens)
-                        elif model_tier == 'secondary':
-                            logger.info("Trying fast model tier...")
-                            return self._make_openrouter_request(prompt, 'fast', 1, temperature, max_tokens)
-                        # Don't chain further — let make_ai_request fall back to Gemini
-                        self._mark_provider_failure('openrouter')
-                        # Raise so RateLimitHandler.execute_with_retry can catch and retry
-                        raise  # re-raise the requests.HTTPError for 429
-                
-                else:
-                    # Other HTTP errors (500, 502, etc.)
-                    logger.error(f"OpenRouter HTTP error {status_code} (attempt {attempt + 1}/{retry_count + 1}): {error_msg}")
-                    if attempt < retry_count:
-                        time.sleep(2)
-                        continue
-                    
-            except requests.exceptions.Timeout as e:
-                logger.warning(f"OpenRouter request timed out after {self.openrouter_timeout}s (attempt {attempt + 1}/{retry_count + 1}): {e}")
-                if attempt < retry_count:
-                    time.sleep(2)
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"OpenRouter request error (attempt {attempt + 1}): {e}")
-                if attempt < retry_count:
-                    time.sleep(2)
-                    continue
+            ],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": 0.9,
+            "frequency_penalty": 0.1,
+            "presence_penalty": 0.1,
+        }
         
-        self._mark_provider_failure('openrouter')
-        return None
+        logger.info(f"Making OpenRouter API request (model: {model_name}, prompt length: {len(optimized_prompt)} chars)")
+        try:
+            # Identical prompts in flight from other threads share this call
+            content = self.gateway.request_sync(
+                'openrouter',
+                lambda: openrouter_chat(self.gateway, self.openrouter_base_url, headers, payload,
+                                        self.openrouter_timeout, on_text=self._stream_sink(stream_to)),
+                # Streams feed one caller's parser, so only plain requests are coalesced
+                key=None if stream_to else cache_key,
+                retries=retry_count,
+            )
+        except ProviderError as e:
+            if e.status_code == 404:
+                # Model not found — don't retry, immediately try next tier
+                logger.warning(f"OpenRouter model '{model_name}' not found (404). Trying next tier.")
+                self._mark_provider_failure('openrouter')
+                if model_tier == 'primary':
+                    return self._make_openrouter_request(prompt, 'secondary', 1, temperature, max_tokens, stream_to)
+                elif model_tier == 'secondary':
+                    return self._make_openrouter_request(prompt, 'fast', 1, temperature, max_tokens, stream_to)
+                return None
+
+            if e.status_code in [401, 402, 403]:
+                logger.error(f"OpenRouter auth/billing error (status {e.status_code}): {e}")
+                self._mark_provider_failure('openrouter')
+                return None
+
+            if e.status_code == 429:
+                self._mark_provider_429('openrouter')
+                # All retries exhausted — try a different model tier
+                logger.warning(f"OpenRouter rate limit persists after {retry_count + 1} attempts on '{model_tier}' tier")
+                if model_tier == 'primary':
+                    logger.info("Trying secondary model tier...")
+                    return self._make_openrouter_request(prompt, 'secondary', 1, temperature, max_tokens, stream_to)
+                elif model_tier == 'secondary':
+                    logger.info("Trying fast model tier...")
+                    return self._make_openrouter_request(prompt, 'fast', 1, temperature, max_tokens, stream_to)
+                # Don't chain further — let make_ai_request fall back to Gemini
+                # Raise so RateLimitHandler.execute_with_retry can catch and retry
+                raise
+
+            logger.error(f"OpenRouter request failed after {retry_count + 1} attempts: {e}")
+            self._mark_provider_failure('openrouter')
+            return None
+
+        self._mark_provider_success('openrouter')
+        self._cache_response(cache_key, content)
+        return content
     
     def _make_gemini_request(self, prompt: str, retry_count: int = 2, 
-                            temperature: float = 0.7) -> Optional[str]:
-        """Make a request to Gemini API with rate limiting and retry logic"""
+                            temperature: float = 0.7, stream_to=None) -> Optional[str]:
+        """Make a request to Gemini API (through the AI gateway) with rate limiting and retry logic"""
         if not self.gemini_model:
             logger.warning("Gemini model not initialized")
             return None
@@ -801,108 +668,43 @@ class AIProviderManager:
         cache_key = self._get_cache_key(prompt, 'gemini', self.gemini_model_name)
         cached = self._get_cached_response(cache_key)
         if cached:
-            return cached
+            return self._replay(cached, stream_to)
         
         optimized_prompt = self._optimize_prompt(prompt, 30000)
+        generation_config = {
+            'temperature': temperature,
+            'top_p': 0.9,
+            'top_k': 40,
+            'max_output_tokens': self.gemini_max_output_tokens,
+        }
+        model = self.gemini_model
         
-        for attempt in range(retry_count + 1):
-            executor = None
-            future = None
-            try:
-                self._wait_for_rate_limit('gemini')
-                
-                logger.info(f"Making Gemini API request (attempt {attempt + 1}/{retry_count + 1}, prompt length: {len(optimized_prompt)} chars)")
-                
-                generation_config = {
-                    'temperature': temperature,
-                    'top_p': 0.9,
-                    'top_k': 40,
-                    'max_output_tokens': self.gemini_max_output_tokens,
-                }
-
-                # Use ThreadPoolExecutor WITHOUT 'with' to avoid blocking shutdown on timeout
-                executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
-                start_time = time.time()
-                future = executor.submit(
-                    self.gemini_model.generate_content,
-                    optimized_prompt,
-                    generation_config=generation_config
-                )
-                
-                try:
-                    response = future.result(timeout=self.gemini_timeout)
-                except concurrent.futures.TimeoutError:
-                    elapsed = time.time() - start_time
-                    logger.error(f"Gemini request timed out after {elapsed:.1f}s (limit: {self.gemini_timeout}s, attempt {attempt + 1}/{retry_count + 1})")
-                    future.cancel()
-                    if attempt < retry_count:
-                        time.sleep(2)
-                        continue
-                    break
-                
-                if not response or not hasattr(response, 'text') or not response.text:
-                    logger.error(f"Gemini returned empty response (attempt {attempt + 1}/{retry_count + 1})")
-                    if attempt < retry_count:
-                        time.sleep(2)
-                        continue
-                    break
-                
-                logger.info(f"Gemini API request successful (attempt {attempt + 1}/{retry_count + 1})")
-                self._mark_provider_success('gemini')
-                self._cache_response(cache_key, response.text)
-                return response.text
-                
-            except Exception as e:
-                error_msg = str(e)
-                
-                if '429' in error_msg or 'quota' in error_msg.lower() or 'rate limit' in error_msg.lower():
-                    logger.error(f"Gemini quota/rate limit error on attempt {attempt + 1}: {error_msg}")
-                    
-                    # Default exponential backoff
-                    backoff_time = min(self.MAX_COOLDOWN_SLEEP, (attempt + 1) * 15)
-                    
-                    # Try to parse the server-suggested retry delay
-                    if 'retry in' in error_msg.lower():
-                        try:
-                            match = re.search(r'retry in (\d+\.?\d*)s', error_msg)
-                            if match:
-                                server_delay = float(match.group(1)) + 2
-                                backoff_time = min(self.MAX_COOLDOWN_SLEEP, max(backoff_time, server_delay))
-                        except Exception:
-                            pass
-                    
-                    # Also try to parse retry_delay { seconds: N } from protobuf-style error
-                    retry_seconds_match = re.search(r'retry_delay\s*\{\s*seconds:\s*(\d+)', error_msg)
-                    if retry_seconds_match:
-                        try:
-                            server_delay = float(retry_seconds_match.group(1)) + 2
-                            backoff_time = min(self.MAX_COOLDOWN_SLEEP, max(backoff_time, server_delay))
-                        except Exception:
-                            pass
-                    
-                    # Set cooldown so _wait_for_rate_limit also respects it
-                    self._rate_limit_cooldown_until['gemini'] = time.time() + backoff_time
-                    
-                    if attempt < retry_count:
-                        logger.info(f"Waiting {backoff_time:.1f}s before retry (server suggested delay respected)...")
-                        time.sleep(backoff_time)
-                        continue
-                
-                logger.error(f"Error calling Gemini API (attempt {attempt + 1}/{retry_count + 1}): {e}")
-                if attempt < retry_count:
-                    time.sleep(2)
-                    continue
-            finally:
-                # Non-blocking cleanup — don't wait for running thread
-                if executor:
-                    executor.shutdown(wait=False)
-                    
-        # If we get here, all retries exhausted on a rate limit — propagate
-        raise  # re-raise the last rate-limit exception
+        logger.info(f"Making Gemini API request (prompt length: {len(optimized_prompt)} chars)")
+        try:
+            text = self.gateway.request_sync(
+                'gemini',
+                lambda: gemini_generate(model, optimized_prompt, generation_config, self.gemini_timeout,
+                                        on_text=self._stream_sink(stream_to)),
+                key=None if stream_to else cache_key,
+                retries=retry_count,
+            )
+        except ProviderError as e:
+            if e.status_code == 429:
+                # All retries exhausted on a rate limit — propagate
+                self._mark_provider_429('gemini')
+                raise
+            logger.error(f"Error calling Gemini API after {retry_count + 1} attempts: {e}")
+            self._mark_provider_failure('gemini')
+            return None
+        
+        logger.info("Gemini API request successful")
+        self._mark_provider_success('gemini')
+        self._cache_response(cache_key, text)
+        return text
     
     def make_ai_request(self, prompt: str, temperature: float = 0.7, 
                         max_tokens: int = 4096, prefer_fast: bool = False,
-                        _raise_on_rate_limit: bool = False) -> Tuple[Optional[str], str]:
+                        _raise_on_rate_limit: bool = False, stream_to=None) -> Tuple[Optional[str], str]:
         """
         Unified AI request method with automatic provider switching
         
@@ -915,6 +717,7 @@ class AIProviderManager:
                                    fail due to rate limits, instead of returning (None, 'none').
                                    This allows RateLimitHandler.execute_with_retry to catch
                                    and retry with proper 2-minute waits.
+            stream_to: Optional sink (``reset()`` / ``feed(text)``) the response is streamed into
         
         Returns:
             Tuple of (response_text, provider_used)
@@ -926,28 +729,29 @@ class AIProviderManager:
         
         try:
             if self.current_provider == 'openrouter':
-                result = self._make_openrouter_request(prompt, model_tier, 2, temperature, max_tokens)
+                result = self._make_openrouter_request(prompt, model_tier, 2, temperature, max_tokens, stream_to)
                 if result:
                     return result, 'openrouter'
                 
                 # Fallback to Gemini — give it enough retries to wait out rate limits
                 logger.warning("OpenRouter failed, falling back to Gemini")
-                result = self._make_gemini_request(prompt, 2, temperature)
+                result = self._make_gemini_request(prompt, 2, temperature, stream_to)
                 if result:
                     return result, 'gemini'
             else:
-                result = self._make_gemini_request(prompt, 2, temperature)
+                result = self._make_gemini_request(prompt, 2, temperature, stream_to)
                 if result:
                     return result, 'gemini'
                 
                 # Fallback to OpenRouter with fewer retries
                 logger.warning("Gemini failed, falling back to OpenRouter")
-                result = self._make_openrouter_request(prompt, model_tier, 1, temperature, max_tokens)
+                result = self._make_openrouter_request(prompt, model_tier, 1, temperature, max_tokens, stream_to)
                 if result:
                     return result, 'openrouter'
         except requests.HTTPError as e:
             # Rate limit propagated from _make_openrouter_request or _make_gemini_request
-            if _raise_on_rate_limit and e.response and e.response.status_code == 429:
+            status_code = getattr(e, 'status_code', None) or (e.response.status_code if e.response is not None else None)
+            if _raise_on_rate_limit and status_code == 429:
                 logger.warning(
                     f"[RATE LIMIT] All providers exhausted due to rate limits. "
                     f"Propagating to RateLimitHandler for retry with wait."
@@ -960,11 +764,97 @@ class AIProviderManager:
         logger.warning("All AI providers returned no content")
         return None, 'none'
     
+    def make_json_request(self, prompt: str, spec: Optional[ResponseSpec] = None,
+                          context: str = "response", temperature: float = 0.7,
+                          max_tokens: int = 4096, prefer_fast: bool = False,
+                          _raise_on_rate_limit: bool = False) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Generate a JSON object, streaming the response through an incremental parser
+        
+        Fields are validated against ``spec`` as they arrive and a structural error
+        stops the stream early. Whatever is still missing afterwards (fields cut off,
+        invalid, or short arrays) is requested on its own, up to
+        ``AI_STREAM_REPAIR_ATTEMPTS`` times, instead of regenerating everything.
+        
+        Args:
+            prompt: The prompt to send to the AI
+            spec: Required fields, validators and minimum array sizes
+            context: Description of what's being generated (for logging)
+            temperature, max_tokens, prefer_fast, _raise_on_rate_limit: As for make_ai_request
+        
+        Returns:
+            Tuple of (parsed dict or None, provider_used)
+        """
+        spec = spec or ResponseSpec()
+        if not self.streaming_enabled:
+            text, provider = self.make_ai_request(prompt, temperature, max_tokens, prefer_fast, _raise_on_rate_limit)
+            return (json_parser.parse_json_response(text, context) if text else None), provider
+
+        result, provider = self._stream_json_object(prompt, spec, context, temperature, max_tokens,
+                                                    prefer_fast, _raise_on_rate_limit)
+        missing = spec.missing(result)
+        for attempt in range(self.stream_repair_attempts):
+            if result and not missing:
+                break
+            if not result:
+                # Nothing usable came through (e.g. it broke on the first field): start over
+                logger.info(f"Re-generating {context} after an unusable response (attempt {attempt + 1})")
+                result, provider = self._stream_json_object(prompt, spec, context, temperature, max_tokens,
+                                                            prefer_fast, _raise_on_rate_limit)
+            else:
+                logger.info(f"Re-generating missing parts of {context}: {missing} (attempt {attempt + 1})")
+                completion, _, _ = self._stream_json(
+                    build_completion_prompt(prompt, result, missing), spec.for_missing(missing),
+                    f"{context} (missing fields)", temperature, max_tokens, prefer_fast, _raise_on_rate_limit,
+                )
+                result = merge_completion(result, completion, missing)
+            missing = spec.missing(result)
+
+        if not result:
+            return None, provider
+        if missing:
+            logger.warning(f"{context} is still missing {missing} after targeted re-generation")
+        return result, provider
+
+    def _stream_json_object(self, prompt: str, spec: ResponseSpec, context: str, temperature: float,
+                            max_tokens: int, prefer_fast: bool,
+                            _raise_on_rate_limit: bool) -> Tuple[Dict[str, Any], str]:
+        """Stream a whole response, falling back to the full-text parser when it isn't an object we could follow"""
+        result, text, provider = self._stream_json(prompt, spec, context, temperature, max_tokens,
+                                                   prefer_fast, _raise_on_rate_limit)
+        if not result and text:
+            # e.g. a top-level array or prose around the JSON
+            parsed = json_parser.parse_json_response(text, context)
+            if parsed:
+                return parsed, provider
+            self.invalidate_cache_for_prompt(prompt)
+        return result, provider
+
+    def _stream_json(self, prompt: str, spec: ResponseSpec, context: str, temperature: float,
+                     max_tokens: int, prefer_fast: bool,
+                     _raise_on_rate_limit: bool) -> Tuple[Dict[str, Any], Optional[str], str]:
+        """Stream one response into an IncrementalJSONParser; returns (valid fields, raw text, provider)"""
+        parser = IncrementalJSONParser(spec)
+        try:
+            text, provider = self.make_ai_request(prompt, temperature, max_tokens, prefer_fast,
+                                                  _raise_on_rate_limit, stream_to=parser)
+        except StreamingJSONError as e:
+            logger.warning(f"Stopped streaming {context} early: {e}")
+            # Don't serve the malformed response from cache next time
+            self.invalidate_cache_for_prompt(prompt)
+            return parser.result(), parser.text, self.current_provider
+        if text and parser.invalid:
+            logger.warning(f"Invalid fields in {context}: {parser.invalid}")
+        return (parser.result() if not parser.passthrough else {}), text, provider
+
     def get_provider_stats(self) -> Dict[str, Any]:
         """Get statistics about AI provider usage and performance"""
         with self._provider_lock:
             or_state = dict(self._provider_state.get('openrouter', {}))
             gem_state = dict(self._provider_state.get('gemini', {}))
+        # Cooldowns live in the gateway's buckets, shared by every worker
+        or_cooldown = self._get_cooldown_remaining('openrouter')
+        gem_cooldown = self._get_cooldown_remaining('gemini')
 
         return {
             "current_provider": self.current_provider,
@@ -972,32 +862,31 @@ class AIProviderManager:
                 "available": bool(self.openrouter_api_key),
                 "failure_count": self.provider_failure_counts.get('openrouter', 0),
                 "last_success": datetime.fromtimestamp(min(self.provider_last_success.get('openrouter', 0), time.time())).isoformat(),
-                "requests_this_minute": len(self.request_timestamps['openrouter']),
+                "requests_this_minute": self.gateway.buckets['openrouter'].requests_last_minute(),
                 "rpm_limit": self.openrouter_max_rpm,
-                "is_cooling_down": or_state.get('is_cooling_down', False),
-                "cooldown_remaining_seconds": self._get_cooldown_remaining('openrouter'),
+                "is_cooling_down": or_state.get('is_cooling_down', False) or or_cooldown > 0,
+                "cooldown_remaining_seconds": or_cooldown,
             },
             "gemini": {
                 "available": bool(self.gemini_model),
                 "failure_count": self.provider_failure_counts.get('gemini', 0),
                 "last_success": datetime.fromtimestamp(min(self.provider_last_success.get('gemini', 0), time.time())).isoformat(),
-                "requests_this_minute": len(self.request_timestamps['gemini']),
+                "requests_this_minute": self.gateway.buckets['gemini'].requests_last_minute(),
                 "rpm_limit": self.gemini_max_rpm,
-                "is_cooling_down": gem_state.get('is_cooling_down', False),
-                "cooldown_remaining_seconds": self._get_cooldown_remaining('gemini'),
+                "is_cooling_down": gem_state.get('is_cooling_down', False) or gem_cooldown > 0,
+                "cooldown_remaining_seconds": gem_cooldown,
             },
             "cache": {
                 "size": len(self.response_cache),
                 "max_size": 100,
                 "ttl_seconds": self.cache_ttl,
-            }
+            },
+            "gateway": self.gateway.get_stats(),
         }
 
     def _get_cooldown_remaining(self, provider: str) -> int:
         """Get remaining cooldown time in seconds for a provider"""
-        cooldown_until = self._rate_limit_cooldown_until.get(provider, 0)
-        remaining = cooldown_until - time.time()
-        return max(0, int(remaining))
+        return int(self.gateway.buckets[provider].pause_remaining())
 
 
 # Singleton instance
@@ -10,6 +10,7 @@ from typing import Dict, List, Optional, Any
 from .ai_providers import ai_provider_manager
 from .json_parser import json_parser
 from .rate_limit_handler import rate_limit_handler
+from .streaming_json import ResponseSpec, has_keys
 
 logger = logging.getLogger(__name__)
 
@@ -90,23 +91,26 @@ Return this exact JSON structure:
   ]
 }}"""
         
-        result, provider = rate_limit_handler.execute_with_retry(
-            self.provider.make_ai_request,
+        # Streamed: complete questions are kept as they arrive, and a cut-off
+        # response only asks for the questions it is short of
+        parsed, provider = rate_limit_handler.execute_with_retry(
+            self.provider.make_json_request,
             prompt,
+            self._quiz_spec(num_questions),
+            "quiz questions",
             session_id=session_id,
             task_id=task_id,
             step_label=f"Generating {num_questions} quiz questions for {lesson_title}",
             temperature=0.7,
             max_tokens=4096,
         )
-        if result:
-            parsed = json_parser.parse_json_response(result, "quiz questions")
-            if parsed:
+        if parsed:
+            if parsed.get("questions"):
                 # Validate and fix quiz structure
                 parsed = self._validate_quiz_data(parsed, lesson_title, num_questions)
                 return parsed
             else:
-                logger.warning(f"Failed to parse AI response for quiz questions, using fallback")
+                logger.warning(f"AI response for quiz questions had no usable questions, using fallback")
         
         # Fallback if AI generation fails
         return self._generate_fallback_quiz(lesson_title, num_questions)
@@ -180,23 +184,26 @@ Format as JSON:
   ]
 }}"""
         
-        result, provider = rate_limit_handler.execute_with_retry(
-            self.provider.make_ai_request,
+        # Streamed: complete questions are kept as they arrive, and a cut-off
+        # response only asks for the questions it is short of
+        parsed, provider = rate_limit_handler.execute_with_retry(
+            self.provider.make_json_request,
             prompt,
+            self._quiz_spec(num_questions),
+            "quiz from content",
             session_id=session_id,
             task_id=task_id,
             step_label=f"Generating quiz from {content_type}: {content_title}",
             temperature=0.7,
             max_tokens=4096,
         )
-        if result:
-            parsed = json_parser.parse_json_response(result, "quiz from content")
-            if parsed:
+        if parsed:
+            if parsed.get("questions"):
                 # Validate and fix quiz structure if needed
                 parsed = self._validate_quiz_data(parsed, content_title, num_questions)
                 return parsed
             else:
-                logger.warning(f"Failed to parse AI response for quiz generation, using fallback")
+                logger.warning(f"AI response for quiz generation had no usable questions, using fallback")
         
         # Fallback if AI generation fails
         return self._generate_fallback_quiz(content_title, num_questions)
@@ -799,6 +806,15 @@ Format as JSON:
             "submission_format": "Submit as PDF document or zip file with all components"
         }
     
+    @staticmethod
+    def _quiz_spec(num_questions: int) -> ResponseSpec:
+        """What a streamed quiz must contain: num_questions complete questions"""
+        return ResponseSpec(
+            required=['questions'],
+            item_validators={'questions': has_keys('question_text', 'correct_answer')},
+            min_items={'questions': num_questions},
+        )
+
     def _validate_quiz_data(self, parsed_data: Dict[str, Any], content_title: str, num_questions: int) -> Dict[str, Any]:
         """
         Validate and ensure quiz data has all required fields with defaults
@@ -32,6 +32,7 @@ from .json_parser import json_parser
 from .content_validator import ContentValidator
 from .fallback_generators import fallback_generators
 from .rate_limit_handler import rate_limit_handler
+from .streaming_json import ResponseSpec, has_keys, min_text
 
 logger = logging.getLogger(__name__)
 
@@ -777,17 +778,25 @@ Each chapter should:
 - Build logically on previous chapters
 - Include both theory and practical elements"""
 
+        # Streamed: chapters are kept as they arrive and only missing ones are re-requested
+        spec = ResponseSpec(
+            required=['chapters'],
+            item_validators={'chapters': has_keys('title')},
+            min_items={'chapters': target_chapters},
+        )
         try:
-            response, _ = rate_limit_handler.execute_with_retry(
-                self.provider.make_ai_request,
+            parsed, _ = rate_limit_handler.execute_with_retry(
+                self.provider.make_json_request,
                 prompt,
+                spec,
+                "chapter outline",
                 session_id=session.session_id if hasattr(self, '_current_session') and self._current_session else None,
                 task_id=None,
                 step_label="Generating chapter outline",
                 temperature=0.7,
                 max_tokens=4000,
             )
-            return json_parser.parse_json_response(response) or {"chapters": []}
+            return parsed or {"chapters": []}
         except Exception as e:
             logger.error(f"Chapter outline generation failed: {e}")
             return self._fallback_chapter_outline(context, target_chapters)
@@ -946,17 +955,26 @@ CONTENT QUALITY REQUIREMENTS:
 
 Each subsection should teach something concrete that the reader can apply immediately."""
 
+        # Streamed: subsections are validated as they arrive; a cut-off response
+        # only re-requests the subsections (or overview) it is missing
+        spec = ResponseSpec(
+            required=['content', 'subsections'],
+            validators={'content': min_text(100)},
+            item_validators={'subsections': has_keys('title', 'content')},
+            min_items={'subsections': subsection_config['count']},
+        )
         try:
-            response, _ = rate_limit_handler.execute_with_retry(
-                self.provider.make_ai_request,
+            result, _ = rate_limit_handler.execute_with_retry(
+                self.provider.make_json_request,
                 prompt,
+                spec,
+                f"chapter theory: {chapter.title}",
                 session_id=session.session_id if self._current_session else None,
                 task_id=None,
                 step_label=f"Generating chapter theory: {chapter.title}",
                 temperature=0.7,
                 max_tokens=5000,
             )
-            result = json_parser.parse_json_response(response)
             if result:
                 return result
         except Exception as e:
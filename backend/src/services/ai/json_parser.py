@@ -3,10 +3,14 @@ JSON Response Parser Module
 Handles parsing and cleaning of JSON responses from AI providers
 """
 
-import json
+import hashlib
 import logging
+import os
+import re
 from typing import Dict, Any, Optional
 
+from .json_repair import parse_repaired, repair_json
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,6 +22,10 @@ class JSONResponseParser:
         """
         Parse JSON response from AI with error recovery
         
+        Valid JSON is parsed directly; anything else goes through one pass of
+        ``repair_json`` (code fences, unescaped newlines and quotes, trailing
+        commas, truncated output).
+        
         Args:
             result: The raw response text
             context: Description of what's being parsed (for logging)
@@ -27,36 +35,42 @@ class JSONResponseParser:
         """
         if not result:
             return None
-            
+        
+        notes = []
         try:
-            # Clean up the response - remove markdown code blocks and control characters
-            cleaned_result = JSONResponseParser._clean_response(result)
-            
-            # Try to parse JSON
-            try:
-                parsed = json.loads(cleaned_result)
-                return JSONResponseParser._ensure_dict(parsed, context)
-            except json.JSONDecodeError as e:
-                # Try to fix common JSON issues
-                logger.warning(f"Initial JSON parse failed for {context}: {e}. Attempting to fix...")
-                
-                # Log response for debugging (limit to first 1000 chars)
-                logger.error(f"Raw {context} (first 1000 chars): {result[:1000]}")
-                
-                # Try multiple recovery strategies
-                fixed_json = JSONResponseParser._attempt_json_recovery(cleaned_result)
-                if fixed_json:
-                    return JSONResponseParser._ensure_dict(fixed_json, context)
-                
-                # Last resort: try to extract just the JSON object
-                extracted_json = JSONResponseParser._extract_json_object(cleaned_result)
-                if extracted_json:
-                    return JSONResponseParser._ensure_dict(extracted_json, context)
-                        
-        except Exception as e:
+            parsed = parse_repaired(result, notes)
+        except ValueError as e:
             logger.error(f"Failed to parse AI {context} as JSON: {e}")
-            
-        return None
+            # Log response for debugging (limit to first 1000 chars)
+            logger.error(f"Raw {context} (first 1000 chars): {result[:1000]}")
+            JSONResponseParser._save_sample(result, context, 'failed')
+            return None
+        
+        if 'truncated' in notes:
+            logger.warning(f"AI {context} was cut off; kept the complete part of the JSON")
+        elif notes:
+            logger.info(f"Repaired malformed JSON in AI {context}")
+        if notes:
+            JSONResponseParser._save_sample(result, context, notes[-1])
+        return JSONResponseParser._ensure_dict(parsed, context)
+    
+    @staticmethod
+    def _save_sample(result: str, context: str, outcome: str) -> None:
+        """
+        Keep a raw response that needed repair in ``AI_JSON_CORPUS_DIR`` (if set),
+        to grow the corpus in tests/fixtures/ai_outputs and the JSON repair benchmark
+        """
+        corpus_dir = os.environ.get('AI_JSON_CORPUS_DIR')
+        if not corpus_dir:
+            return
+        try:
+            os.makedirs(corpus_dir, exist_ok=True)
+            digest = hashlib.sha1(result.encode('utf-8', 'replace')).hexdigest()[:12]
+            slug = re.sub(r'[^a-z0-9]+', '_', context.lower()).strip('_')[:40] or 'response'
+            with open(os.path.join(corpus_dir, f"{slug}-{outcome}-{digest}.txt"), 'w', encoding='utf-8') as f:
+                f.write(result)
+        except OSError as e:
+            logger.debug(f"Could not save AI {context} sample: {e}")
     
     @staticmethod
     def _ensure_dict(parsed: Any, context: str = "response") -> Optional[Dict[str, Any]]:
@@ -92,7 +106,7 @@ class JSONResponseParser:
     @staticmethod
     def clean_json_response(result: str) -> str:
         """
-        Clean JSON response by removing markdown code blocks
+        Clean JSON response by removing markdown code blocks and repairing the JSON
         
         Args:
             result: The raw response text
@@ -100,184 +114,8 @@ class JSONResponseParser:
         Returns:
             Cleaned string ready for JSON parsing
         """
-        return JSONResponseParser._clean_response(result)
-    
-    @staticmethod
-    def _clean_response(result: str) -> str:
-        """
-        Internal method to clean up AI response text
-        
-        Args:
-            result: The raw response text
-            
-        Returns:
-            Cleaned string ready for JSON parsing
-        """
-        # Remove leading/trailing whitespace
-        cleaned = result.strip()
-        
-        # Remove markdown code blocks
-        if cleaned.startswith('```json'):
-            cleaned = cleaned[7:]
-        elif cleaned.startswith('```'):
-            cleaned = cleaned[3:]
-        if cleaned.endswith('```'):
-            cleaned = cleaned[:-3]
-        
-        # Clean up again after removing code blocks
-        cleaned = cleaned.strip()
-        
-        # Simple but effective approach: replace problematic characters
-        # Focus on the most common issue: unescaped newlines in strings
-        
-        # Step 1: Replace actual newlines with escaped newlines in the context where they appear
-        # This is a simple replacement that works for most AI responses
-        import re
-        
-        # Replace unescaped newlines with escaped newlines
-        # Look for newlines that are inside quotes and not already escaped
-        def fix_newlines_in_json(text):
-            # Use a state machine approach
-            result = []
-            in_string = False
-            i = 0
-            while i < len(text):
-                char = text[i]
-                if char == '"' and (i == 0 or text[i-1] != '\\'):
-                    # Quote that's not escaped
-                    in_string = not in_string
-                    result.append(char)
-                elif char == '\n' and in_string:
-                    # Newline inside a string - escape it
-                    result.append('\\n')
-                elif char == '\r':
-                    # Skip carriage returns entirely
-                    pass
-                elif char == '\t' and in_string:
-                    # Replace tabs in strings with spaces
-                    result.append('    ')
-                else:
-                    result.append(char)
-                i += 1
-            return ''.join(result)
-        
-        cleaned = fix_newlines_in_json(cleaned)
-        
-        return cleaned
-    
-    @staticmethod
-    def _attempt_json_recovery(cleaned_result: str) -> Optional[Dict[str, Any]]:
-        """
-        Attempt multiple strategies to recover valid JSON from malformed input
-        
-        Args:
-            cleaned_result: Pre-cleaned JSON string
-            
-        Returns:
-            Parsed JSON dict or None
-        """
-        import re
-        
-        # Strategy 1: Fix unescaped newlines in string values
-        try:
-            # More comprehensive newline fixing
-            fixed = re.sub(r'"([^"]*?)\n([^"]*?)"', lambda m: '"' + m.group(1) + '\\n' + m.group(2) + '"', cleaned_result)
-            return json.loads(fixed)
-        except (json.JSONDecodeError, Exception):
-            pass
-        
-        # Strategy 2: Fix trailing commas
-        try:
-            fixed = cleaned_result.replace(',}', '}').replace(',]', ']')
-            # Also fix trailing commas before newlines
-            fixed = re.sub(r',\s*\n\s*}', '}', fixed)
-            fixed = re.sub(r',\s*\n\s*]', ']', fixed)
-            return json.loads(fixed)
-        except json.JSONDecodeError:
-            pass
-        
-        # Strategy 3: Fix missing quotes on keys
-        try:
-            fixed = re.sub(r'(\w+):', r'"\1":', cleaned_result)
-            return json.loads(fixed)
-        except json.JSONDecodeError:
-            pass
-        
-        # Strategy 4: Fix JSON structure issues in quiz format
-        try:
-            # Common issue: missing quotes around property names
-            fixed = re.sub(r'(\s+)(\w+)(\s*):', r'\1"\2"\3:', cleaned_result)
-            # Fix missing commas
-            fixed = re.sub(r'}(\s*){', r'},\1{', fixed)
-            fixed = re.sub(r'](\s*){', r'],\1{', fixed)
-            return json.loads(fixed)
-        except json.JSONDecodeError:
-            pass
-        
-        # Strategy 5: More aggressive newline fixing for long content
-        try:
-            # Replace all literal newlines with escaped newlines in string contexts
-            lines = cleaned_result.split('\n')
-            in_string = False
-            quote_char = None
-            fixed_lines = []
-            current_line = ""
-            
-            for line in lines:
-                if not in_string:
-                    fixed_lines.append(line)
-                else:
-                    # We're continuing a string from previous line
-                    current_line += '\\n' + line
-                    # Check if string ends in this line
-                    if quote_char and quote_char in line and not line.endswith('\\'):
-                        fixed_lines[-1] = current_line
-                        in_string = False
-                        current_line = ""
-                
-                # Check if this line starts a string that might continue
-                if '"' in line and line.count('"') % 2 == 1:
-                    in_string = True
-                    quote_char = '"'
-            
-            fixed = '\n'.join(fixed_lines)
-            return json.loads(fixed)
-        except (json.JSONDecodeError, Exception):
-            pass
-        
-        return None
-    
-    @staticmethod
-    def _extract_json_object(cleaned_result: str) -> Optional[Dict[str, Any]]:
-        """
-        Try to extract JSON object from text that may contain extra content
-        
-        Args:
-            cleaned_result: Text potentially containing JSON
-            
-        Returns:
-            Parsed JSON dict or None
-        """
-        try:
-            # Find the first { and last }
-            start_idx = cleaned_result.find('{')
-            end_idx = cleaned_result.rfind('}')
-            
-            if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
-                json_str = cleaned_result[start_idx:end_idx + 1]
-                
-                # Clean the extracted string
-                json_str = JSONResponseParser._clean_response(json_str)
-                
-                # Try parsing the extracted JSON
-                return json.loads(json_str)
-                        
-        except json.JSONDecodeError:
-            logger.error("Failed to extract valid JSON from response")
-        except Exception as e:
-            logger.error(f"Error extracting JSON: {e}")
-            
-        return None
+        repaired = repair_json(result)
+        return repaired if repaired is not None else result.strip()
     
     @staticmethod
     def extract_outline_from_markdown(text: str) -> Optional[Dict[str, Any]]:
@@ -294,8 +132,6 @@ class JSONResponseParser:
         Returns:
             A dict matching the lesson outline schema, or None if extraction fails
         """
-        import re
-        
         if not text or not text.strip():
             return None
         
@@ -0,0 +1,289 @@
+"""
+JSON Repair Module
+Single-pass repair of the almost-JSON that AI providers return.
+
+``repair_json`` reads a response once, left to right, and writes out
+valid JSON for the first object or array in it:
+
+- text around the JSON (code fences, "Here is the JSON:", notes after
+  it) is skipped;
+- raw newlines, tabs and other control characters inside strings are
+  escaped, and so are stray backslashes (``\\(`` in LaTeX, ``C:\\Users``);
+- a quote inside a string is kept as text unless what follows it can
+  follow a string (``,`` then the next member, ``}``, ``]``, or the next
+  member with its comma missing);
+- trailing and doubled commas are dropped, missing commas and colons
+  added, bare keys quoted, and ``True``/``False``/``None`` turned into
+  JSON literals;
+- a truncated response is closed off: an unfinished string is ended, a
+  key without a value is dropped and open brackets are closed.
+
+Whitespace runs and string bodies are consumed with anchored regex
+matches, and each look-ahead stops at the next quote, so the cost stays
+linear in the length of the response.
+
+Usage:
+    parsed = parse_repaired(ai_text)   # json.loads first, then one repair pass
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+# Where the JSON starts: the first '{', or a '[' that opens an array of values
+_START = re.compile(r'\{|\[(?=[ \t\r\n]*(?:[\[{"]|\Z))')
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_STRING_RUN = re.compile(r'[^"\\\x00-\x1f]+')
+_HEX4 = re.compile(r'[0-9a-fA-F]{4}')
+_BARE_KEY = re.compile(r'[A-Za-z_$][\w$-]*')
+_KEY_AHEAD = re.compile(r'[A-Za-z_$][\w$-]*[ \t]*:')
+_KEY_STRING_AHEAD = re.compile(r'"[^"\\\r\n]*(?:"[ \t\r\n]*(?::|\Z)|\Z)')  # "key": (or one cut off)
+_LITERAL_AHEAD = re.compile(r'(?:true|false|null)\b')
+_NUMBER = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+_JSON_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?\Z')
+_BARE_VALUE = re.compile(r'[^,}\]\r\n]+')
+
+_LITERALS = {
+    'true': 'true', 'false': 'false', 'null': 'null',
+    'True': 'true', 'False': 'false', 'None': 'null',
+    'NaN': 'null', 'Infinity': 'null', 'undefined': 'null',
+}
+_SIMPLE_ESCAPES = frozenset('"\\/bfnrt')
+_CONTROL_ESCAPES = {chr(code): '\\u%04x' % code for code in range(32)}
+_CONTROL_ESCAPES.update({'\n': '\\n', '\t': '\\t', '\b': '\\b', '\f': '\\f', '\r': ''})
+_CLOSERS = {'{': '}', '[': ']'}
+
+
+def repair_json(text: str, notes: Optional[List[str]] = None) -> Optional[str]:
+    """
+    Rewrite ``text`` as valid JSON in one pass
+
+    Args:
+        text: Raw AI response
+        notes: If given, 'truncated' is appended when the response was cut off
+
+    Returns:
+        JSON text for the first object or array in ``text``, or None if it has none
+    """
+    if not text:
+        return None
+    start = _START.search(text)
+    if not start:
+        return None
+
+    n = len(text)
+    i = start.start()
+    out: List[str] = [text[i]]
+    stack: List[str] = [text[i]]
+    open_count = {'{': 0, '[': 0}
+    open_count[text[i]] += 1
+    # What the innermost container takes next: 'key', 'colon', 'value' or 'comma'
+    expect = 'key' if text[i] == '{' else 'value'
+    member = 0  # Length of ``out`` before the latest key, to drop it if no value follows
+    i += 1
+
+    while i < n:
+        c = text[i]
+        if c in ' \t\r\n':
+            i = _WHITESPACE.match(text, i).end()
+            continue
+
+        if c == '}' or c == ']':
+            opener = '{' if c == '}' else '['
+            i += 1
+            if not open_count[opener]:
+                continue  # Stray closer
+            if expect in ('colon', 'value') and stack[-1] == '{':
+                del out[member:]
+            while True:
+                top = stack.pop()
+                open_count[top] -= 1
+                out.append(_CLOSERS[top])
+                if top == opener:
+                    break
+            if not stack:
+                break
+            expect = 'comma'
+
+        elif expect == 'comma':
+            expect = 'key' if stack[-1] == '{' else 'value'
+            if c == ',':
+                i += 1
+            # Anything else is the next member with its comma missing
+
+        elif expect == 'key':
+            if c == '"':
+                member = len(out)
+                if out[-1] != '{':
+                    out.append(',')
+                key, i, closed = _read_string(text, i + 1, None)
+                if not closed:
+                    del out[member:]
+                    break
+                out.append(key)
+                expect = 'colon'
+                continue
+            match = _BARE_KEY.match(text, i)
+            if match:
+                member = len(out)
+                if out[-1] != '{':
+                    out.append(',')
+                out.append('"' + match.group() + '"')
+                i = match.end()
+                expect = 'colon'
+            else:
+                i += 1  # A doubled comma or other junk where a key belongs
+
+        elif expect == 'colon':
+            if c == ':' or c == '=':
+                i += 1
+            out.append(':')
+            expect = 'value'
+
+        else:  # value
+            if c == ',':
+                i += 1
+                if stack[-1] == '{':
+                    del out[member:]  # "key": , has no value
+                    expect = 'key'
+                continue
+            if stack[-1] == '[' and out[-1] != '[':
+                out.append(',')
+            expect = 'comma'
+            if c == '"':
+                value, i, _ = _read_string(text, i + 1, stack[-1])
+                out.append(value)
+            elif c == '{' or c == '[':
+                out.append(c)
+                stack.append(c)
+                open_count[c] += 1
+                expect = 'key' if c == '{' else 'value'
+                i += 1
+            else:
+                value, i = _read_scalar(text, i)
+                out.append(value)
+
+    if stack:
+        # Cut off: drop a dangling key and close whatever is still open
+        if expect in ('colon', 'value') and stack[-1] == '{':
+            del out[member:]
+        out.extend(_CLOSERS[opener] for opener in reversed(stack))
+        if notes is not None:
+            notes.append('truncated')
+    return ''.join(out)
+
+
+def parse_repaired(text: str, notes: Optional[List[str]] = None) -> Any:
+    """
+    ``json.loads`` for AI output: a strict parse, then one repair pass
+
+    ``notes`` gets 'repaired' when the strict parse failed, plus what
+    ``repair_json`` reports.
+
+    Raises:
+        ValueError: If ``text`` holds no recoverable JSON object or array
+    """
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    except RecursionError:
+        raise ValueError("JSON is nested too deeply")
+    if notes is not None:
+        notes.append('repaired')
+    repaired = repair_json(text, notes)
+    if repaired is None:
+        raise ValueError("no JSON object or array found")
+    try:
+        return json.loads(repaired)
+    except RecursionError:
+        raise ValueError("JSON is nested too deeply")
+
+
+def _read_string(text: str, i: int, container: Optional[str]):
+    """
+    Read a string body starting after its opening quote
+
+    ``container`` is '{' or '[' for a value in an object or array, None for
+    a key. Returns (JSON string, index after it, whether it was closed).
+    """
+    n = len(text)
+    parts = ['"']
+    while True:
+        run = _STRING_RUN.match(text, i)
+        if run:
+            parts.append(run.group())
+            i = run.end()
+        if i >= n:
+            parts.append('"')
+            return ''.join(parts), i, False
+        c = text[i]
+        if c == '"':
+            if container is None or _ends_string(text, i + 1, container):
+                parts.append('"')
+                return ''.join(parts), i + 1, True
+            parts.append('\\"')
+            i += 1
+        elif c == '\\':
+            following = text[i + 1:i + 2]
+            if following in _SIMPLE_ESCAPES and following:
+                parts.append(text[i:i + 2])
+                i += 2
+            elif following == 'u' and _HEX4.match(text, i + 2):
+                parts.append(text[i:i + 6])
+                i += 6
+            else:
+                if following:
+                    parts.append('\\\\')
+                i += 1
+        else:
+            parts.append(_CONTROL_ESCAPES[c])
+            i += 1
+
+
+def _ends_string(text: str, i: int, container: str) -> bool:
+    """Whether a quote just before ``i`` closes the string rather than being part of it"""
+    n = len(text)
+    j = _WHITESPACE.match(text, i).end()
+    if j >= n:
+        return True
+    c = text[j]
+    if c == '}' or c == ']':
+        return True
+    if c == '"':
+        # The next member with its comma missing: on a new line, or a "key": on this one
+        return '\n' in text[i:j] or (container == '{' and _KEY_STRING_AHEAD.match(text, j) is not None)
+    if c != ',':
+        return False
+    j = _WHITESPACE.match(text, j + 1).end()
+    if j >= n:
+        return True
+    c = text[j]
+    if container == '{':
+        return c == '}' or (_KEY_STRING_AHEAD if c == '"' else _KEY_AHEAD).match(text, j) is not None
+    return c in '"{[]-0123456789' or _LITERAL_AHEAD.match(text, j) is not None
+
+
+def _read_scalar(text: str, i: int):
+    """Read a number, literal or unquoted word; returns (JSON text, index after it)"""
+    number = _NUMBER.match(text, i)
+    if number:
+        end = number.end()
+        if end >= len(text) or not (text[end].isalnum() or text[end] == '_'):
+            token = number.group()
+            if _JSON_NUMBER.match(token):
+                return token, end
+            if not any(ch in token for ch in '.eE'):
+                return str(int(token)), end  # +1, 007
+            return json.dumps(float(token)), end  # 1., .5
+    bare = _BARE_VALUE.match(text, i)
+    end = bare.end()
+    word = bare.group().strip()
+    if word in _LITERALS:
+        return _LITERALS[word], end
+    if end >= len(text):
+        # A literal cut off at the end of the response
+        for literal in ('true', 'false', 'null'):
+            if literal.startswith(word):
+                return literal, end
+    return json.dumps(word, ensure_ascii=False), end
@@ -14,9 +14,16 @@ from .json_parser import json_parser
 from .content_validator import content_validator
 from .fallback_generators import fallback_generators
 from .rate_limit_handler import rate_limit_handler
+from .streaming_json import ResponseSpec, min_text
 
 logger = logging.getLogger(__name__)
 
+# Fields a generated lesson must have; content_data is the lesson itself
+LESSON_CONTENT_SPEC = ResponseSpec(
+    required=['title', 'description', 'learning_objectives', 'content_data'],
+    validators={'title': min_text(3), 'content_data': min_text(500)},
+)
+
 
 class LessonGenerator:
     """Generates lesson content using AI"""
@@ -311,10 +318,14 @@ Format as JSON:
   "content_data": "# Introduction\\n\\n[400-500 word engaging introduction...]\\n\\n## Section 1: [Topic]\\n\\n[500-800 words of detailed content...]\\n\\n## Section 2: [Topic]\\n\\n[500-800 words...]\\n\\n[Continue for all sections...]\\n\\n## Worked Examples\\n\\n[Detailed examples with solutions...]\\n\\n## Key Takeaways\\n\\n[Specific actionable points...]\\n\\n## Discussion Questions\\n\\n[Thought-provoking questions...]"
 }}"""
         
-        # Request more tokens to accommodate comprehensive content (3000-4000 words)
-        result, provider = rate_limit_handler.execute_with_retry(
-            self.provider.make_ai_request,
+        # Request more tokens to accommodate comprehensive content (3000-4000 words).
+        # The response is streamed and checked field by field; only fields that
+        # come back missing or invalid are re-generated.
+        parsed, provider = rate_limit_handler.execute_with_retry(
+            self.provider.make_json_request,
             prompt,
+            LESSON_CONTENT_SPEC,
+            "lesson content",
             session_id=session_id,
             task_id=task_id,
             step_label=f"Generating lesson content: {lesson_title or module_title}",
@@ -323,9 +334,8 @@ Format as JSON:
         )
         
         # If first attempt failed or returned low quality, try with alternative provider
-        if result:
-            parsed = json_parser.parse_json_response(result, "lesson content")
-            if parsed:
+        if parsed:
+            if 'content_data' in parsed:
                 # Validate and fix generic titles
                 if self._is_generic_title(parsed.get('title', '')):
                     parsed['title'] = self._generate_meaningful_title(
@@ -335,7 +345,7 @@ Format as JSON:
                 logger.info(f"Lesson content generated successfully using {provider}")
                 return parsed
             else:
-                logger.warning(f"Failed to parse JSON response from {provider}, trying alternative approach")
+                logger.warning(f"Lesson content from {provider} has no usable content_data, trying alternative approach")
                 # Invalidate bad cached response so it's not served again
                 self.provider.invalidate_cache_for_prompt(prompt)
         else:
@@ -355,18 +365,19 @@ Format as JSON:
                 logger.info("Switched to OpenRouter for lesson generation retry")
             
             # Retry with alternative provider
-            result, provider = rate_limit_handler.execute_with_retry(
-                self.provider.make_ai_request,
+            parsed, provider = rate_limit_handler.execute_with_retry(
+                self.provider.make_json_request,
                 prompt,
+                LESSON_CONTENT_SPEC,
+                "lesson content",
                 session_id=session_id,
                 task_id=task_id,
                 step_label=f"Generating lesson content (fallback provider): {lesson_title or module_title}",
                 temperature=0.8,
                 max_tokens=8192,
             )
-            if result:
-                parsed = json_parser.parse_json_response(result, "lesson content")
-                if parsed:
+            if parsed:
+                if 'content_data' in parsed:
                     # Validate and fix generic titles from alternative provider
                     if self._is_generic_title(parsed.get('title', '')):
                         parsed['title'] = self._generate_meaningful_title(
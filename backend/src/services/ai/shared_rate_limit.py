@@ -0,0 +1,184 @@
+"""
+Shared AI Rate Limits
+Keeps each provider's request budget in one database row that every
+worker process draws from, so N Gunicorn workers together stay under
+``*_MAX_RPM`` instead of each sending the full limit.
+
+Each row holds:
+- a GCRA schedule (``tat``, the time the next request may start), which
+  every reservation pushes forward by ``60 / rpm`` seconds in one atomic
+  ``UPDATE ... RETURNING``;
+- the cooldown deadline set after a 429 (``paused_until``);
+- a two-window sliding counter of requests in the last minute;
+- running totals of requests, 429s and seconds spent waiting.
+
+The store is any SQLAlchemy URL in ``AI_RATE_LIMIT_STORE_URL``. By default
+it is a SQLite file in WAL mode in the system temp directory, shared by
+every worker on the host; point it at the PostgreSQL database to share the
+budget across hosts, or set it to ``local`` for per-process limits.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import (
+    Column, Float, Integer, MetaData, String, Table, case, create_engine, event, insert, select, update,
+)
+from sqlalchemy.exc import IntegrityError, OperationalError, ProgrammingError
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60
+
+metadata = MetaData()
+
+ai_rate_limits = Table(
+    'ai_rate_limits', metadata,
+    Column('provider', String(50), primary_key=True),
+    Column('tat', Float, nullable=False, default=0.0),           # Earliest start of the next request
+    Column('paused_until', Float, nullable=False, default=0.0),  # 429 cooldown deadline
+    Column('window_start', Float, nullable=False, default=0.0),
+    Column('window_count', Integer, nullable=False, default=0),
+    Column('prev_window_count', Integer, nullable=False, default=0),
+    Column('requests', Integer, nullable=False, default=0),
+    Column('rate_limited', Integer, nullable=False, default=0),
+    Column('total_wait', Float, nullable=False, default=0.0),
+    Column('last_429_at', Float, nullable=True),
+)
+
+
+def _greatest(*values):
+    """Portable GREATEST() for SQLite and PostgreSQL"""
+    result = values[0]
+    for value in values[1:]:
+        result = case((result > value, result), else_=value)
+    return result
+
+
+class SharedRateLimitStore:
+    """Rate-limit rows in a database shared by every worker."""
+
+    def __init__(self, url: str):
+        if url.startswith('postgres://'):
+            url = url.replace('postgres://', 'postgresql+psycopg2://', 1)
+        self.url = url
+        self._engine = None
+        self._lock = threading.Lock()
+        self._ready = set()
+
+    @classmethod
+    def from_env(cls) -> Optional['SharedRateLimitStore']:
+        """The store configured by ``AI_RATE_LIMIT_STORE_URL`` (None for per-process limits)"""
+        url = os.environ.get('AI_RATE_LIMIT_STORE_URL', '').strip()
+        if url.lower() == 'local':
+            return None
+        if not url:
+            url = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'afritec_ai_rate_limits.db')}"
+        return cls(url)
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._create_engine()
+        return self._engine
+
+    def _create_engine(self):
+        if self.url.startswith('sqlite'):
+            engine = create_engine(self.url, connect_args={'timeout': 10, 'check_same_thread': False})
+
+            @event.listens_for(engine, 'connect')
+            def _sqlite_pragmas(dbapi_connection, _):
+                cursor = dbapi_connection.cursor()
+                cursor.execute('PRAGMA journal_mode=WAL')
+                cursor.execute('PRAGMA synchronous=NORMAL')
+                cursor.close()
+        else:
+            engine = create_engine(self.url, pool_pre_ping=True, pool_size=2, max_overflow=2)
+        try:
+            metadata.create_all(engine)
+        except (OperationalError, ProgrammingError):
+            # Another worker created the table between the check and the CREATE
+            metadata.create_all(engine)
+        return engine
+
+    def _ensure_row(self, provider: str) -> None:
+        if provider in self._ready:
+            return
+        try:
+            with self.engine.begin() as conn:
+                exists = conn.execute(
+                    select(ai_rate_limits.c.provider).where(ai_rate_limits.c.provider == provider)).first()
+                if not exists:
+                    conn.execute(insert(ai_rate_limits).values(provider=provider))
+        except IntegrityError:
+            pass  # Another worker created it first
+        self._ready.add(provider)
+
+    def reserve(self, provider: str, interval: float, now: float) -> float:
+        """Take the next slot in the provider's schedule and return how long to wait for it"""
+        t = ai_rate_limits.c
+        start = _greatest(t.tat, now, t.paused_until)
+        window = now - now % WINDOW_SECONDS
+        self._ensure_row(provider)
+        with self.engine.begin() as conn:
+            tat = conn.execute(
+                update(ai_rate_limits)
+                .where(t.provider == provider)
+                .values(
+                    tat=start + interval,
+                    total_wait=t.total_wait + (start - now),
+                    requests=t.requests + 1,
+                    prev_window_count=case(
+                        (t.window_start == window, t.prev_window_count),
+                        (t.window_start == window - WINDOW_SECONDS, t.window_count),
+                        else_=0),
+                    window_count=case((t.window_start == window, t.window_count + 1), else_=1),
+                    window_start=window,
+                )
+                .returning(t.tat)
+            ).scalar_one()
+        return max(0.0, tat - interval - now)
+
+    def pause(self, provider: str, seconds: float, now: float) -> None:
+        """Hold every worker's reservations back until ``now + seconds``"""
+        t = ai_rate_limits.c
+        self._ensure_row(provider)
+        with self.engine.begin() as conn:
+            conn.execute(
+                update(ai_rate_limits)
+                .where(t.provider == provider)
+                .values(paused_until=_greatest(t.paused_until, now + seconds),
+                        rate_limited=t.rate_limited + 1, last_429_at=now)
+            )
+
+    def state(self, provider: str) -> Dict[str, Any]:
+        with self.engine.connect() as conn:
+            row = conn.execute(select(ai_rate_limits).where(ai_rate_limits.c.provider == provider)).first()
+        return dict(row._mapping) if row else {}
+
+    def reset(self, provider: Optional[str] = None) -> None:
+        """Delete the stored state (tests, manual recovery)"""
+        statement = ai_rate_limits.delete()
+        if provider:
+            statement = statement.where(ai_rate_limits.c.provider == provider)
+        with self.engine.begin() as conn:
+            conn.execute(statement)
+        self._ready.clear()
+
+
+def requests_last_minute(state: Dict[str, Any], now: float) -> float:
+    """Sliding-window estimate: this window's count plus the overlapping share of the previous one"""
+    if not state:
+        return 0.0
+    window = now - now % WINDOW_SECONDS
+    elapsed = (now - window) / WINDOW_SECONDS
+    if state['window_start'] == window:
+        return state['window_count'] + state['prev_window_count'] * (1 - elapsed)
+    if state['window_start'] == window - WINDOW_SECONDS:
+        return state['window_count'] * (1 - elapsed)
+    return 0.0
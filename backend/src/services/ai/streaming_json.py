@@ -0,0 +1,380 @@
+"""
+Streaming JSON Module
+Incremental parsing of JSON objects streamed from AI providers.
+
+The parser is fed text deltas as they arrive and keeps the top-level
+object's members (and the items of top-level arrays) as soon as each one
+is complete, checking them against a ``ResponseSpec``:
+
+- a structural error (a missing colon, a ``]`` closing an object, text
+  where a property name belongs) raises ``StreamingJSONError`` straight
+  away, so the caller can stop the stream instead of paying for the rest;
+- valid fields are kept when the output is cut off or breaks later on,
+  and ``ResponseSpec.missing`` says what is still needed, so only those
+  fields are re-generated (``build_completion_prompt`` /
+  ``merge_completion``).
+
+Usage:
+    spec = ResponseSpec(required=['title', 'questions'],
+                        item_validators={'questions': has_keys('question_text', 'options')},
+                        min_items={'questions': 5})
+    parsed, provider = ai_provider_manager.make_json_request(prompt, spec, context="quiz")
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A validator returns None when the value is acceptable, or the reason it isn't
+Validator = Callable[[Any], Optional[str]]
+
+_STRING_STOP = re.compile(r'["\\]')
+_WHITESPACE = ' \t\r\n'
+
+
+class StreamingJSONError(ValueError):
+    """The streamed text can't be the JSON object we asked for"""
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} at character {position}")
+        self.position = position
+
+
+def min_text(length: int) -> Validator:
+    """Validator: a string of at least ``length`` non-blank characters"""
+    def validate(value):
+        if not isinstance(value, str) or len(value.strip()) < length:
+            return f"expected text of at least {length} characters"
+        return None
+    return validate
+
+
+def has_keys(*keys: str) -> Validator:
+    """Validator: an object whose ``keys`` are all present and non-empty"""
+    def validate(value):
+        if not isinstance(value, dict):
+            return "expected an object"
+        absent = [key for key in keys if value.get(key) in (None, '', [], {})]
+        return f"missing {', '.join(absent)}" if absent else None
+    return validate
+
+
+@dataclass
+class ResponseSpec:
+    """What a generated JSON object must contain"""
+    required: List[str] = field(default_factory=list)
+    validators: Dict[str, Validator] = field(default_factory=dict)        # Whole top-level values
+    item_validators: Dict[str, Validator] = field(default_factory=dict)   # Items of top-level arrays
+    min_items: Dict[str, int] = field(default_factory=dict)
+
+    def check(self, key: str, value: Any) -> Optional[str]:
+        validator = self.validators.get(key)
+        return validator(value) if validator else None
+
+    def check_item(self, key: str, item: Any) -> Optional[str]:
+        validator = self.item_validators.get(key)
+        return validator(item) if validator else None
+
+    def missing(self, result: Dict[str, Any]) -> Dict[str, Optional[int]]:
+        """
+        What ``result`` still lacks: ``{key: None}`` for a whole field,
+        ``{key: n}`` for an array that needs ``n`` more items.
+        """
+        missing = {}
+        for key in self.required:
+            if key not in result:
+                missing[key] = None
+        for key, count in self.min_items.items():
+            have = result.get(key)
+            if isinstance(have, list) and have and len(have) < count:
+                missing[key] = count - len(have)
+            elif key not in result or not have:
+                missing[key] = None
+        return missing
+
+    def for_missing(self, missing: Dict[str, Optional[int]]) -> 'ResponseSpec':
+        """The spec for a follow-up request that fills in ``missing``"""
+        return ResponseSpec(
+            required=list(missing),
+            validators={k: v for k, v in self.validators.items() if k in missing},
+            item_validators={k: v for k, v in self.item_validators.items() if k in missing},
+            min_items={k: (n if n is not None else self.min_items[k])
+                       for k, n in missing.items() if k in self.min_items},
+        )
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for one streamed JSON object.
+
+    ``feed`` each text delta; ``result()`` returns the validated members
+    seen so far (a top-level array that was cut off contributes its
+    complete items). Text before the opening brace (a code fence or a
+    "Here is the JSON:" preamble) is skipped, raw newlines inside strings
+    and trailing commas are tolerated.
+    """
+
+    def __init__(self, spec: Optional[ResponseSpec] = None, max_preamble: int = 2000):
+        self.spec = spec or ResponseSpec()
+        self.max_preamble = max_preamble
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything (called before each provider attempt)"""
+        self._parts: List[str] = []
+        self._position = 0
+        self._state = 'preamble'
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._key_parts: List[str] = []
+        self._key: Optional[str] = None
+        self._value_parts: List[str] = []
+        self._array_key: Optional[str] = None  # Set while inside a top-level array value
+        self._value_closed = False  # The value's string/object/array has ended; only , or } may follow
+        self._item_parts: List[str] = []
+        self.fields: Dict[str, Any] = {}
+        self.items: Dict[str, List[Any]] = {}
+        self.invalid: Dict[str, str] = {}
+        self.passthrough = False  # The root is not an object; leave it to the full-text parser
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._parts)
+
+    def result(self) -> Dict[str, Any]:
+        result = dict(self.fields)
+        for key, items in self.items.items():
+            if key not in result and items:
+                result[key] = list(items)
+        return result
+
+    def missing(self) -> Dict[str, Optional[int]]:
+        return self.spec.missing(self.result())
+
+    # ------------------------------------------------------------------
+    # Scanning
+    # ------------------------------------------------------------------
+
+    def feed(self, chunk: str) -> None:
+        if not chunk:
+            return
+        self._parts.append(chunk)
+        if self.done or self.passthrough:
+            self._position += len(chunk)
+            return
+        i, n = 0, len(chunk)
+        while i < n:
+            if self._in_string:
+                i = self._scan_string(chunk, i)
+                continue
+            char = chunk[i]
+            i += 1
+            self._step(char, self._position + i - 1)
+            if self.done or self.passthrough:
+                break
+        self._position += n
+
+    def _collect(self, text: str) -> None:
+        """Route text to the key, value and array item being read"""
+        if self._state == 'key':
+            self._key_parts.append(text)
+        elif self._state == 'value':
+            self._value_parts.append(text)
+            if self._array_key is not None and len(self._stack) >= 1:
+                self._item_parts.append(text)
+
+    def _scan_string(self, chunk: str, i: int) -> int:
+        if self._escape:
+            self._escape = False
+            self._collect(chunk[i])
+            return i + 1
+        match = _STRING_STOP.search(chunk, i)
+        if not match:
+            self._collect(chunk[i:])
+            return len(chunk)
+        end = match.start()
+        if match.group() == '\\':
+            self._collect(chunk[i:end + 1])
+            self._escape = True
+            return end + 1
+        # Closing quote
+        self._in_string = False
+        if self._state == 'value' and not self._stack:
+            self._value_closed = True
+        if self._state == 'key':
+            self._key_parts.append(chunk[i:end])
+            try:
+                self._key = json.loads('"' + ''.join(self._key_parts) + '"', strict=False)
+            except json.JSONDecodeError:
+                self._error("malformed property name", self._position + end)
+            self._state = 'colon'
+        else:
+            self._collect(chunk[i:end + 1])
+        return end + 1
+
+    def _error(self, message: str, position: int) -> None:
+        self._state = 'error'
+        raise StreamingJSONError(message, position)
+
+    def _step(self, char: str, position: int) -> None:
+        state = self._state
+        if state == 'preamble':
+            if char == '{':
+                self._state = 'key_or_end'
+            elif char == '[':
+                self.passthrough = True
+            elif position >= self.max_preamble:
+                self._error("no JSON object found", position)
+        elif state in ('key_or_end', 'next'):
+            if char in _WHITESPACE:
+                return
+            if char == '"':
+                self._state = 'key'
+                self._in_string = True
+                self._key_parts = []
+            elif char == '}':
+                self.done = True
+            elif char == ',' and state == 'next':
+                self._state = 'key_or_end'
+            else:
+                self._error(f"expected a property name, got {char!r}", position)
+        elif state == 'colon':
+            if char == ':':
+                self._state = 'value_start'
+            elif char not in _WHITESPACE:
+                self._error(f"expected ':' after \"{self._key}\"", position)
+        elif state == 'value_start':
+            if char in _WHITESPACE:
+                return
+            if char in ',}]':
+                self._error(f"missing value for \"{self._key}\"", position)
+            self._state = 'value'
+            self._value_parts = []
+            self._array_key = self._key if char == '[' else None
+            self._item_parts = []
+            self._value_closed = False
+            self._value_char(char, position)
+        elif state == 'value':
+            self._value_char(char, position)
+
+    def _value_char(self, char: str, position: int) -> None:
+        stack = self._stack
+        if self._value_closed and char not in _WHITESPACE and char not in ',}':
+            self._error(f"expected ',' or '}}' after the value of \"{self._key}\"", position)
+        if char == '"':
+            self._collect(char)
+            self._in_string = True
+        elif char in '{[':
+            self._collect(char)
+            stack.append(char)
+        elif char in '}]':
+            if not stack:
+                if char == ']':
+                    self._error("unexpected ']'", position)
+                self._end_value()
+                self.done = True
+                return
+            opener = stack.pop()
+            if (opener == '{') != (char == '}'):
+                self._error(f"{char!r} closes {opener!r}", position)
+            if self._array_key is not None and not stack:
+                # The top-level array itself closed
+                self._value_parts.append(char)
+                self._end_item()
+            else:
+                self._collect(char)
+            if not stack:
+                self._value_closed = True
+        elif char == ',' and not stack:
+            self._end_value()
+            self._state = 'key_or_end'
+        elif char == ',' and self._array_key is not None and len(stack) == 1:
+            self._value_parts.append(char)
+            self._end_item()
+        else:
+            self._collect(char)
+
+    def _end_item(self) -> None:
+        raw = ''.join(self._item_parts).strip()
+        self._item_parts = []
+        if not raw:
+            return  # [] or a trailing comma
+        key = self._array_key
+        try:
+            item = json.loads(raw, strict=False)
+        except json.JSONDecodeError as e:
+            logger.debug(f"Dropped malformed item of \"{key}\": {e}")
+            return
+        reason = self.spec.check_item(key, item)
+        if reason:
+            logger.debug(f"Dropped item of \"{key}\": {reason}")
+            return
+        self.items.setdefault(key, []).append(item)
+
+    def _end_value(self) -> None:
+        key, raw = self._key, ''.join(self._value_parts).strip()
+        self._state = 'next'
+        if self._array_key is not None:
+            # Items were parsed and validated one by one as they arrived
+            value = self.items.get(key, [])
+            self._array_key = None
+        else:
+            try:
+                value = json.loads(raw, strict=False)
+            except json.JSONDecodeError as e:
+                self.invalid[key] = f"malformed value: {e}"
+                return
+        reason = self.spec.check(key, value)
+        if reason:
+            self.invalid[key] = reason
+            return
+        self.fields[key] = value
+        self.invalid.pop(key, None)
+
+
+def build_completion_prompt(prompt: str, partial: Dict[str, Any], missing: Dict[str, Optional[int]]) -> str:
+    """Follow-up prompt asking only for the fields ``missing`` from ``partial``"""
+    wanted = []
+    for key, count in missing.items():
+        if count is None:
+            wanted.append(f'- "{key}"')
+        else:
+            done = len(partial.get(key) or [])
+            wanted.append(f'- "{key}": an array of exactly {count} NEW items that continue after the '
+                          f'{done} already written (same item structure, no repeats)')
+    summary = {}
+    for key, value in partial.items():
+        if isinstance(value, str):
+            summary[key] = value if len(value) <= 300 else value[:300] + '...'
+        elif isinstance(value, list):
+            summary[key] = f"[{len(value)} items already written]"
+        else:
+            summary[key] = value
+    return (
+        f"{prompt}\n\n"
+        f"===== CONTINUATION =====\n"
+        f"Part of this response was already generated:\n{json.dumps(summary, indent=2, ensure_ascii=False)}\n\n"
+        f"Generate ONLY the following, consistent with the part above:\n" + '\n'.join(wanted) + "\n\n"
+        f"Return ONLY a valid JSON object with exactly these keys. No markdown, no explanatory text."
+    )
+
+
+def merge_completion(partial: Dict[str, Any], completion: Dict[str, Any],
+                     missing: Dict[str, Optional[int]]) -> Dict[str, Any]:
+    """Merge a follow-up response into ``partial``: whole fields are filled, short arrays extended"""
+    merged = dict(partial)
+    for key in missing:
+        if key not in completion:
+            continue
+        value = completion[key]
+        if isinstance(merged.get(key), list) and isinstance(value, list):
+            merged[key] = merged[key] + value
+        else:
+            merged[key] = value
+    return merged
@@ -0,0 +1,289 @@
+"""
+Bulk Application Scoring – Afritec Bridge LMS
+
+Re-ranks a whole course or cohort at once when the scoring rules change.
+Instead of loading every ``CourseApplication`` and running
+``evaluate_application`` on it, the scoring columns are read in keyset pages
+into a pandas DataFrame, every score is computed column-wise with NumPy, and
+only the rows whose scores actually moved are written back with a bulk
+UPDATE by primary key.
+
+``score_frame`` mirrors ``utils/application_scoring.py`` rule for rule and
+shares its point tables; tests/test_application_scoring_service.py keeps the
+two paths at parity.
+"""
+
+import json
+import logging
+import re
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, update
+
+from ..models.user_models import db
+from ..models.course_application import CourseApplication
+from ..utils.application_scoring import (
+    AFRICAN_COUNTRIES,
+    EDUCATION_APPLICATION,
+    EDUCATION_READINESS,
+    EMPLOYED_STATUSES,
+    INTERNET_RISK,
+    LIVE_LEARNING_MODES,
+    MOTIVATION_BANDS,
+    SKILL_APPLICATION,
+    SKILL_READINESS,
+    SKILL_RISK,
+    STATEMENT_BANDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns the scoring rules read
+INPUT_COLUMNS = (
+    'has_computer', 'has_internet', 'internet_access_type', 'online_learning_experience',
+    'committed_to_complete', 'agrees_to_assessments', 'tool_skill_level', 'excel_skill_level',
+    'tool_tasks_done', 'excel_tasks_done', 'education_level', 'current_status', 'motivation',
+    'learning_outcomes', 'career_impact', 'available_time', 'preferred_learning_mode', 'country',
+)
+
+# Columns the scoring rules write, in evaluate_application order
+SCORE_COLUMNS = (
+    'risk_score', 'is_high_risk', 'readiness_score', 'commitment_score',
+    'application_score', 'final_rank_score',
+)
+
+_AFRICAN_COUNTRY_RE = '|'.join(re.escape(country) for country in AFRICAN_COUNTRIES)
+
+
+def _flag(frame, column):
+    return frame[column].fillna(False).astype(bool).to_numpy()
+
+
+def _text(frame, column):
+    """Column as strings, with NULL as ''"""
+    return frame[column].fillna('').astype(str)
+
+
+def _lookup(values, points, default=0):
+    return values.map(points).fillna(default).to_numpy(dtype=np.int64)
+
+
+def _banded(lengths, bands):
+    return np.select([lengths >= min_length for min_length, _ in bands],
+                     [points for _, points in bands], 0)
+
+
+def _json_list_lengths(values):
+    """Length of each JSON-array string, -1 for anything that is not one"""
+    def length(raw):
+        try:
+            parsed = json.loads(raw)
+        except (ValueError, TypeError):
+            return -1
+        return len(parsed) if isinstance(parsed, list) else -1
+
+    # Answers repeat a lot across an intake, so parse each distinct one once
+    return values.map({raw: length(raw) for raw in values.unique()}).to_numpy(dtype=np.int64)
+
+
+def _first_answer(frame, preferred, fallback):
+    """``preferred or fallback`` per row, as in ``_get_skill_level``"""
+    first = _text(frame, preferred)
+    return first.where(first != '', _text(frame, fallback))
+
+
+def _legacy_skill_levels(skill_levels):
+    lowered = skill_levels.str.lower()
+    never = (lowered.str.contains('never', regex=False)
+             | lowered.str.contains('no experience', regex=False)
+             | lowered.str.contains('no ', regex=False))
+    return pd.Series(np.select(
+        [never] + [lowered.str.contains(level, regex=False)
+                   for level in ('expert', 'advanced', 'intermediate', 'beginner')],
+        ['never_used', 'expert', 'advanced', 'intermediate', 'beginner'],
+        'never_used',
+    ), index=skill_levels.index)
+
+
+def score_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Score every application in ``frame`` (one row per application, with the
+    ``INPUT_COLUMNS``) and return a frame of ``SCORE_COLUMNS`` on the same index.
+    """
+    has_computer = _flag(frame, 'has_computer')
+    has_internet = _flag(frame, 'has_internet')
+    online_experience = _flag(frame, 'online_learning_experience')
+    committed = _flag(frame, 'committed_to_complete')
+    agrees = _flag(frame, 'agrees_to_assessments')
+    access_type = frame['internet_access_type']
+    education = _text(frame, 'education_level').replace('', 'other')
+    current_status = frame['current_status']
+    learning_mode = frame['preferred_learning_mode']
+
+    skill = _legacy_skill_levels(_first_answer(frame, 'tool_skill_level', 'excel_skill_level'))
+    task_counts = _json_list_lengths(_first_answer(frame, 'tool_tasks_done', 'excel_tasks_done'))
+    time_slots = _json_list_lengths(_text(frame, 'available_time'))
+
+    motivation = _text(frame, 'motivation')
+    outcomes = _text(frame, 'learning_outcomes')
+    impact = _text(frame, 'career_impact')
+
+    # Risk
+    risk = (np.where(has_computer, 0, 30)
+            + np.where(has_internet, _lookup(access_type, INTERNET_RISK), 25)
+            + _lookup(skill, SKILL_RISK)
+            + np.where(online_experience, 0, 15)
+            + np.where(committed, 0, 5)
+            + np.where(agrees, 0, 5))
+
+    # Readiness
+    readiness = (np.where(has_computer, 15, 0)
+                 + np.where(has_internet, 10, 0)
+                 + np.where(access_type == 'stable_broadband', 5, 0)
+                 + _lookup(skill, SKILL_READINESS)
+                 + np.minimum(np.maximum(task_counts, 0) * 2, 10)
+                 + _lookup(education, EDUCATION_READINESS)
+                 + np.where(online_experience, 10, 0)
+                 + np.select([current_status.isin(EMPLOYED_STATUSES).to_numpy(),
+                              (current_status == 'student').to_numpy()], [10, 7], 0))
+
+    # Commitment
+    commitment = (np.where(committed, 10, 0)
+                  + np.where(agrees, 10, 0)
+                  + _banded(motivation.str.strip().str.len().to_numpy(), MOTIVATION_BANDS)
+                  + _banded(outcomes.str.strip().str.len().to_numpy(), STATEMENT_BANDS)
+                  + _banded(impact.str.strip().str.len().to_numpy(), STATEMENT_BANDS)
+                  + np.select([time_slots >= 2, time_slots == 1], [10, 5], 0))
+
+    # Application
+    application = (np.where(has_computer, 15, 0)
+                   + np.where(has_internet, 10, 0)
+                   + _lookup(skill, SKILL_APPLICATION)
+                   + _lookup(education, EDUCATION_APPLICATION)
+                   + np.where(motivation.str.len().to_numpy() >= 150, 10, 0)
+                   + np.where(outcomes.str.len().to_numpy() >= 50, 5, 0)
+                   + np.where(impact.str.len().to_numpy() >= 50, 5, 0)
+                   + np.where(committed, 5, 0)
+                   + np.where(agrees, 5, 0)
+                   + np.select([learning_mode.isin(LIVE_LEARNING_MODES).to_numpy(),
+                                (learning_mode == 'self_paced').to_numpy()], [5, 3], 0))
+
+    risk_score = np.minimum(risk, 100)
+    readiness_score = np.minimum(readiness, 100)
+    commitment_score = np.minimum(commitment, 100)
+    application_score = np.minimum(application, 100)
+
+    # Same operation order as calculate_final_rank so the floats match exactly
+    final = (application_score * 0.4 + readiness_score * 0.3) + commitment_score * 0.2 - risk_score * 0.1
+    african = _text(frame, 'country').str.lower().str.contains(_AFRICAN_COUNTRY_RE, regex=True).to_numpy()
+    final = np.where(african, final + 5, final)
+
+    return pd.DataFrame({
+        'risk_score': risk_score,
+        'is_high_risk': risk >= 50,
+        'readiness_score': readiness_score,
+        'commitment_score': commitment_score,
+        'application_score': application_score,
+        # Python's round() so ties land where calculate_final_rank puts them
+        'final_rank_score': [round(max(0.0, value), 2) for value in final.tolist()],
+    }, index=frame.index)
+
+
+class ApplicationScoringService:
+    """Re-scores applications in bulk."""
+
+    CHUNK_SIZE = 5000
+
+    @staticmethod
+    def _filters(course_id=None, window_id=None, application_ids=None, status=None) -> List:
+        filters = []
+        if course_id is not None:
+            filters.append(CourseApplication.course_id == course_id)
+        if window_id is not None:
+            filters.append(CourseApplication.application_window_id == window_id)
+        if application_ids is not None:
+            filters.append(CourseApplication.id.in_(list(application_ids)))
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            filters.append(CourseApplication.status.in_(statuses))
+        return filters
+
+    @classmethod
+    def iter_frames(cls, filters: List, chunk_size: Optional[int] = None) -> Iterable[pd.DataFrame]:
+        """Yield the id, input and current score columns in keyset pages"""
+        columns = [CourseApplication.id] + [getattr(CourseApplication, name)
+                                            for name in INPUT_COLUMNS + SCORE_COLUMNS]
+        chunk_size = chunk_size or cls.CHUNK_SIZE
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(*columns)
+                .where(CourseApplication.id > last_id, *filters)
+                .order_by(CourseApplication.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            frame = pd.DataFrame.from_records(rows, columns=['id', *INPUT_COLUMNS, *SCORE_COLUMNS])
+            yield frame.set_index('id')
+            last_id = rows[-1][0]
+            if len(rows) < chunk_size:
+                return
+
+    @staticmethod
+    def _changed(current: pd.DataFrame, scores: pd.DataFrame) -> np.ndarray:
+        changed = np.zeros(len(scores), dtype=bool)
+        for column in SCORE_COLUMNS:
+            old = current[column]
+            if column == 'is_high_risk':
+                old = old.fillna(False).astype(bool)
+            changed |= (old.isna() | (old != scores[column])).to_numpy()
+        return changed
+
+    @classmethod
+    def rescore(cls, course_id: Optional[int] = None, window_id: Optional[int] = None,
+                application_ids: Optional[Iterable[int]] = None, status=None,
+                chunk_size: Optional[int] = None, commit: bool = True) -> Dict:
+        """
+        Recompute the scores of every application matching the filters and
+        write back the ones that changed. Returns counts for the run.
+        """
+        filters = cls._filters(course_id, window_id, application_ids, status)
+        scored = updated = high_risk = 0
+
+        for frame in cls.iter_frames(filters, chunk_size):
+            scores = score_frame(frame)
+            scored += len(scores)
+            high_risk += int(scores['is_high_risk'].sum())
+
+            changed = scores[cls._changed(frame, scores)]
+            if changed.empty:
+                continue
+            records = [
+                {
+                    'id': int(app_id),
+                    'risk_score': int(row.risk_score),
+                    'is_high_risk': bool(row.is_high_risk),
+                    'readiness_score': int(row.readiness_score),
+                    'commitment_score': int(row.commitment_score),
+                    'application_score': int(row.application_score),
+                    'final_rank_score': float(row.final_rank_score),
+                }
+                for app_id, row in zip(changed.index, changed.itertuples(index=False))
+            ]
+            db.session.execute(update(CourseApplication), records)
+            updated += len(records)
+
+        if commit:
+            db.session.commit()
+
+        logger.info("Rescored %d applications (%d updated, %d high risk) for course=%s window=%s",
+                    scored, updated, high_risk, course_id, window_id)
+        return {
+            'scored': scored,
+            'updated': updated,
+            'unchanged': scored - updated,
+            'high_risk': high_risk,
+        }
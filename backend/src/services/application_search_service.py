@@ -0,0 +1,402 @@
+"""
+Applicant Search Index – Afritec Bridge LMS
+
+Replaces the ``ilike('%term%')`` OR-chains in the application list and
+advanced search with index-backed matching:
+ - Free text (motivation, field of study, outcomes, career impact, location,
+   referral source) goes through full-text search.
+ - Identity fields (name, email, phone) get substring matching through
+   trigram indexes, plus exact/prefix boosts.
+ - Results carry a relevance score and can be paged with keyset cursors on
+   ``(sort value, id)`` instead of OFFSET.
+
+Backends:
+ - PostgreSQL: weighted ``tsvector`` GIN expression index and ``pg_trgm``
+   GIN indexes (falls back to ``text_pattern_ops`` prefix indexes when the
+   extension cannot be installed).
+ - SQLite: FTS5 tables – porter/unicode61 for text, ``trigram`` for identity.
+ - Anything else: the legacy ``ilike`` scan.
+
+The SQLite tables are standalone, so write paths call
+``index_application`` after creating or updating an application and
+``remove_applications`` after deleting some.
+"""
+
+import base64
+import json
+import logging
+import re
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, case, func, literal, literal_column, or_, select, text, union_all
+
+from ..models.user_models import db
+from ..models.course_application import CourseApplication
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_MAX_TERMS = 8
+_MIN_TRIGRAM_LENGTH = 3
+
+# Relevance bands. Identity matches always outrank free-text matches.
+EXACT_NAME_SCORE = 1000
+EXACT_EMAIL_SCORE = 900
+PREFIX_NAME_SCORE = 800
+PREFIX_EMAIL_SCORE = 700
+IDENTITY_SUBSTRING_SCORE = 600
+TEXT_MATCH_SCORE = 100
+
+_FREE_TEXT_COLUMNS = (
+    'field_of_study', 'country', 'city',
+    'motivation', 'learning_outcomes', 'career_impact', 'referral_source',
+)
+
+_PG_TEXT_VECTOR = (
+    "(setweight(to_tsvector('simple', coalesce(course_applications.full_name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(course_applications.field_of_study, '') || ' ' || "
+    "coalesce(course_applications.country, '') || ' ' || coalesce(course_applications.city, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(course_applications.motivation, '') || ' ' || "
+    "coalesce(course_applications.learning_outcomes, '') || ' ' || "
+    "coalesce(course_applications.career_impact, '') || ' ' || "
+    "coalesce(course_applications.referral_source, '')), 'C'))"
+)
+_PG_TEXT_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_course_applications_search ON course_applications "
+    "USING GIN (" + _PG_TEXT_VECTOR + ")"
+)
+_PG_TRGM_INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_course_applications_name_trgm ON course_applications "
+    "USING GIN (lower(full_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_course_applications_email_trgm ON course_applications "
+    "USING GIN (lower(email) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_course_applications_phone_trgm ON course_applications "
+    "USING GIN (phone gin_trgm_ops)",
+]
+_PG_PREFIX_INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_course_applications_name_prefix ON course_applications "
+    "(lower(full_name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_course_applications_email_prefix ON course_applications "
+    "(lower(email) text_pattern_ops)",
+]
+_SQLITE_FTS_DDL = {
+    'course_applications_fts': (
+        "CREATE VIRTUAL TABLE course_applications_fts USING fts5("
+        "full_name, email, free_text, tokenize='porter unicode61')"
+    ),
+    'course_applications_trgm': (
+        "CREATE VIRTUAL TABLE course_applications_trgm USING fts5("
+        "full_name, email, phone, tokenize='trigram')"
+    ),
+}
+
+# Sort fields that can be paged with a keyset cursor. NULL scores sort as -1
+# and NULL timestamps as the epoch, so the sort key is never NULL.
+NULL_TIMESTAMP = datetime(1970, 1, 1)
+KEYSET_SORT_FIELDS = {
+    'final_rank_score', 'application_score', 'readiness_score',
+    'commitment_score', 'risk_score', 'created_at', 'updated_at', 'id',
+}
+
+
+class ApplicationSearchService:
+    """Index maintenance, ranked matching and keyset paging for applications."""
+
+    _backend: Optional[str] = None
+    _pg_trigram: bool = False
+
+    # ─────────────────────────────────────────────────────────
+    # INDEX MAINTENANCE
+    # ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def backend(cls) -> str:
+        if cls._backend is None:
+            dialect = db.engine.dialect.name
+            cls._backend = dialect if dialect in ('postgresql', 'sqlite') else 'like'
+            if cls._backend == 'postgresql':
+                cls._pg_trigram = cls._pg_has_trigram()
+        return cls._backend
+
+    @staticmethod
+    def _pg_has_trigram() -> bool:
+        try:
+            with db.engine.connect() as conn:
+                return bool(conn.execute(text(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+                )).scalar())
+        except Exception:
+            return False
+
+    @classmethod
+    def ensure_index(cls) -> None:
+        """Create search indexes if missing. Safe to call on every startup."""
+        backend = cls.backend()
+        try:
+            if backend == 'postgresql':
+                if not cls._pg_trigram:
+                    try:
+                        with db.engine.begin() as conn:
+                            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                        cls._pg_trigram = True
+                    except Exception as e:
+                        logger.warning(f"pg_trgm unavailable, applicant search uses prefix matching: {e}")
+                with db.engine.begin() as conn:
+                    conn.execute(text(_PG_TEXT_INDEX_DDL))
+                    for ddl in (_PG_TRGM_INDEX_DDL if cls._pg_trigram else _PG_PREFIX_INDEX_DDL):
+                        conn.execute(text(ddl))
+            elif backend == 'sqlite':
+                with db.engine.begin() as conn:
+                    existing = {
+                        row[0] for row in conn.execute(text(
+                            "SELECT name FROM sqlite_master WHERE type = 'table' "
+                            "AND name IN ('course_applications_fts', 'course_applications_trgm')"
+                        ))
+                    }
+                    created = False
+                    for name, ddl in _SQLITE_FTS_DDL.items():
+                        if name not in existing:
+                            conn.execute(text(ddl))
+                            created = True
+                if created:
+                    cls.rebuild()
+            logger.info(f"Applicant search index ready ({backend})")
+        except Exception as e:
+            logger.warning(f"Applicant search index unavailable, falling back to ilike: {e}")
+            cls._backend = 'like'
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Repopulate the SQLite index tables from ``course_applications``."""
+        if cls.backend() != 'sqlite':
+            return
+        free_text = " || ' ' || ".join(f"coalesce({col}, '')" for col in _FREE_TEXT_COLUMNS)
+        with db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM course_applications_fts"))
+            conn.execute(text(
+                "INSERT INTO course_applications_fts(rowid, full_name, email, free_text) "
+                f"SELECT id, coalesce(full_name, ''), coalesce(email, ''), {free_text} FROM course_applications"
+            ))
+            conn.execute(text("DELETE FROM course_applications_trgm"))
+            conn.execute(text(
+                "INSERT INTO course_applications_trgm(rowid, full_name, email, phone) "
+                "SELECT id, coalesce(full_name, ''), coalesce(email, ''), coalesce(phone, '') "
+                "FROM course_applications"
+            ))
+
+    @classmethod
+    def index_application(cls, application: CourseApplication) -> None:
+        """Incremental reindex hook – call after an application is created or updated."""
+        if cls.backend() != 'sqlite' or not application.id:
+            return
+        free_text = ' '.join(getattr(application, col) or '' for col in _FREE_TEXT_COLUMNS)
+        params = {
+            'rowid': application.id,
+            'full_name': application.full_name or '',
+            'email': application.email or '',
+            'phone': application.phone or '',
+            'free_text': free_text,
+        }
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text("DELETE FROM course_applications_fts WHERE rowid = :rowid"), params)
+                conn.execute(text(
+                    "INSERT INTO course_applications_fts(rowid, full_name, email, free_text) "
+                    "VALUES (:rowid, :full_name, :email, :free_text)"
+                ), params)
+                conn.execute(text("DELETE FROM course_applications_trgm WHERE rowid = :rowid"), params)
+                conn.execute(text(
+                    "INSERT INTO course_applications_trgm(rowid, full_name, email, phone) "
+                    "VALUES (:rowid, :full_name, :email, :phone)"
+                ), params)
+        except Exception as e:
+            logger.error(f"Failed to reindex application {application.id}: {e}")
+
+    @classmethod
+    def remove_applications(cls, application_ids: List[int]) -> None:
+        """Delete hook – call after applications are deleted and the deletion is committed."""
+        if cls.backend() != 'sqlite' or not application_ids:
+            return
+        params = [{'rowid': application_id} for application_id in application_ids]
+        try:
+            with db.engine.begin() as conn:
+                for table in _SQLITE_FTS_DDL:
+                    conn.execute(text(f"DELETE FROM {table} WHERE rowid = :rowid"), params)
+        except Exception as e:
+            logger.error(f"Failed to remove {len(application_ids)} applications from search index: {e}")
+
+    # ─────────────────────────────────────────────────────────
+    # MATCHING
+    # ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def apply_search(cls, query, search_text: str):
+        """
+        Restrict an ORM query on ``CourseApplication`` to rows matching
+        ``search_text`` and return ``(query, relevance_column)``.
+
+        The relevance column is a SQL expression the caller can order by,
+        add to the selected columns, or page on with ``keyset_page``.
+        """
+        search_text = (search_text or '').strip()
+        terms = _TOKEN_RE.findall(search_text.lower())[:_MAX_TERMS]
+        if not terms:
+            return query, literal(0)
+
+        matches = cls._match_subquery(search_text, terms)
+        lowered = search_text.lower()
+        boost = case(
+            (func.lower(CourseApplication.full_name) == lowered, EXACT_NAME_SCORE),
+            (func.lower(CourseApplication.email) == lowered, EXACT_EMAIL_SCORE),
+            (func.lower(CourseApplication.full_name).like(f'{cls._escape_like(lowered)}%', escape='\\'), PREFIX_NAME_SCORE),
+            (func.lower(CourseApplication.email).like(f'{cls._escape_like(lowered)}%', escape='\\'), PREFIX_EMAIL_SCORE),
+            else_=0,
+        )
+        relevance = func.coalesce(matches.c.score, 0) + boost
+        return query.join(matches, matches.c.id == CourseApplication.id), relevance
+
+    @classmethod
+    def _match_subquery(cls, search_text: str, terms: List[str]):
+        backend = cls.backend()
+        lowered = search_text.lower()
+        digits = re.sub(r'\D', '', search_text)
+
+        if backend == 'sqlite':
+            fts_query = ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+            fts = literal_column('course_applications_fts')
+            branches = [
+                select(
+                    literal_column('course_applications_fts.rowid').label('id'),
+                    (TEXT_MATCH_SCORE - func.bm25(fts, 10.0, 5.0, 1.0)).label('score'),
+                ).select_from(text('course_applications_fts')).where(
+                    text("course_applications_fts MATCH :app_fts_query").bindparams(app_fts_query=fts_query)
+                )
+            ]
+            substrings = [s for s in {lowered, digits} if len(s) >= _MIN_TRIGRAM_LENGTH]
+            for i, substring in enumerate(substrings):
+                param = f'app_trgm_query_{i}'
+                branches.append(
+                    select(
+                        literal_column('course_applications_trgm.rowid').label('id'),
+                        literal(IDENTITY_SUBSTRING_SCORE).label('score'),
+                    ).select_from(text('course_applications_trgm')).where(
+                        text(f"course_applications_trgm MATCH :{param}").bindparams(
+                            **{param: '"' + substring.replace('"', '""') + '"'}
+                        )
+                    )
+                )
+            if len(branches) == 1:
+                # No GROUP BY here: SQLite flattens a lone branch into the
+                # aggregate, where bm25() can no longer be evaluated
+                return branches[0].subquery('application_matches')
+            candidates = union_all(*branches).subquery()
+            return select(
+                candidates.c.id, func.max(candidates.c.score).label('score')
+            ).group_by(candidates.c.id).subquery('application_matches')
+
+        if backend == 'postgresql':
+            tsquery = func.to_tsquery('english', ' & '.join(terms[:-1] + [f'{terms[-1]}:*']))
+            vector = literal_column(_PG_TEXT_VECTOR)
+            if cls._pg_trigram:
+                pattern = f'%{cls._escape_like(lowered)}%'
+            else:
+                pattern = f'{cls._escape_like(lowered)}%'
+            identity_match = or_(
+                func.lower(CourseApplication.full_name).like(pattern, escape='\\'),
+                func.lower(CourseApplication.email).like(pattern, escape='\\'),
+            )
+            if cls._pg_trigram and len(digits) >= _MIN_TRIGRAM_LENGTH:
+                identity_match = or_(identity_match, CourseApplication.phone.like(f'%{digits}%'))
+            score = case(
+                (identity_match, IDENTITY_SUBSTRING_SCORE), else_=0
+            ) + func.ts_rank(vector, tsquery) * TEXT_MATCH_SCORE
+            return select(CourseApplication.id.label('id'), score.label('score')).where(
+                or_(vector.op('@@')(tsquery), identity_match)
+            ).subquery('application_matches')
+
+        # Legacy scan: every term must appear in at least one searchable column
+        columns = [
+            CourseApplication.full_name, CourseApplication.email, CourseApplication.phone,
+        ] + [getattr(CourseApplication, col) for col in _FREE_TEXT_COLUMNS]
+        return select(CourseApplication.id.label('id'), literal(0).label('score')).where(
+            and_(*(or_(*(col.ilike(f'%{term}%') for col in columns)) for term in terms))
+        ).subquery('application_matches')
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    # ─────────────────────────────────────────────────────────
+    # KEYSET PAGINATION
+    # ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def sort_expression(sort_field: str):
+        """Keyset-safe expression for a ``KEYSET_SORT_FIELDS`` column."""
+        column = getattr(CourseApplication, sort_field)
+        if sort_field == 'id':
+            return column
+        if sort_field in ('created_at', 'updated_at'):
+            return func.coalesce(column, literal(NULL_TIMESTAMP, DateTime))
+        return func.coalesce(column, -1)
+
+    @staticmethod
+    def encode_cursor(value: Any, row_id: int) -> str:
+        if isinstance(value, datetime):
+            payload = {'t': 'dt', 'v': value.isoformat(), 'id': row_id}
+        else:
+            payload = {'t': 'n', 'v': value, 'id': row_id}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[Any, int]:
+        """Decode a cursor; raises ``ValueError`` if it is malformed."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            value = payload['v']
+            if value is None:
+                raise ValueError("missing sort value")
+            if payload.get('t') == 'dt':
+                value = datetime.fromisoformat(value)
+            return value, int(payload['id'])
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {e}")
+
+    @classmethod
+    def keyset_page(cls, query, sort_expr, descending: bool = True,
+                    cursor: Optional[str] = None, limit: int = 50):
+        """
+        Page ``query`` ordered by ``(sort_expr, id)`` without OFFSET.
+
+        Returns ``(applications, next_cursor)``; ``next_cursor`` is None on
+        the last page.
+        """
+        if cursor:
+            value, last_id = cls.decode_cursor(cursor)
+            if descending:
+                query = query.filter(or_(
+                    sort_expr < value,
+                    and_(sort_expr == value, CourseApplication.id < last_id),
+                ))
+            else:
+                query = query.filter(or_(
+                    sort_expr > value,
+                    and_(sort_expr == value, CourseApplication.id > last_id),
+                ))
+
+        if descending:
+            query = query.order_by(sort_expr.desc(), CourseApplication.id.desc())
+        else:
+            query = query.order_by(sort_expr.asc(), CourseApplication.id.asc())
+
+        rows = query.add_columns(sort_expr.label('_sort_value')).limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        applications = [row[0] for row in rows]
+
+        next_cursor = None
+        if has_next and rows:
+            last_app, last_value = rows[-1][0], rows[-1][-1]
+            next_cursor = cls.encode_cursor(last_value, last_app.id)
+        return applications, next_cursor
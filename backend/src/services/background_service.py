@@ -21,11 +21,17 @@ class BackgroundTaskService:
     
     def __init__(self):
         self._lock = threading.Lock()
+        self._local = threading.local()  # task id of the task running on this thread
         self._cleanup_interval = 3600  # Cleanup completed tasks after 1 hour
         self._start_cleanup_thread()
     
-    def create_task(self, task_func: Callable, *args, **kwargs) -> str:
-        """Create a new background task and return task ID"""
+    def create_task(self, task_func: Callable, *args, owner_id: Optional[int] = None, **kwargs) -> str:
+        """
+        Create a new background task and return task ID
+        
+        ``owner_id`` is stored as the task's ``user_id`` before the task is
+        committed, for endpoints that only let the owner poll it.
+        """
         from flask import current_app
         from ..models.task_models import BackgroundTask, TaskStatus
         
@@ -36,7 +42,8 @@ class BackgroundTaskService:
             new_task = BackgroundTask(
                 id=task_id,
                 status=TaskStatus.PENDING,
-                task_name=task_func.__name__
+                task_name=task_func.__name__,
+                user_id=owner_id
             )
             
             from ..models.user_models import db
@@ -88,7 +95,8 @@ class BackgroundTaskService:
                     'completed_at': task.completed_at,
                     'result': task.get_result(),
                     'error': task.error_message,
-                    'progress': task.progress
+                    'progress': task.progress,
+                    'user_id': task.user_id
                 }
                 
                 return result
@@ -97,6 +105,31 @@ class BackgroundTaskService:
             logger.error(f"Failed to get task status: {str(e)}")
             return None
     
+    def update_progress(self, progress: int, task_id: Optional[str] = None) -> None:
+        """
+        Record progress (0-100) for a running task.
+        
+        Defaults to the task executing on the current thread. Written on its
+        own connection so the task's open transaction is left untouched.
+        """
+        task_id = task_id or getattr(self._local, 'task_id', None)
+        if not task_id:
+            return
+        
+        from sqlalchemy import update
+        from ..models.task_models import BackgroundTask
+        from ..models.user_models import db
+        
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(
+                    update(BackgroundTask.__table__)
+                    .where(BackgroundTask.__table__.c.id == task_id)
+                    .values(progress=max(0, min(100, int(progress))))
+                )
+        except Exception as e:
+            logger.warning(f"Failed to update progress for task {task_id}: {str(e)}")
+    
     def _get_app(self):
         """
         Get the Flask application instance.
@@ -134,7 +167,11 @@ class BackgroundTaskService:
                 
                 # Execute the task function
                 logger.info(f"Starting execution of task {task_id} with function {task_func.__name__}")
-                result = task_func(*args, **kwargs)
+                self._local.task_id = task_id
+                try:
+                    result = task_func(*args, **kwargs)
+                finally:
+                    self._local.task_id = None
                 
                 # Mark as completed
                 task = BackgroundTask.query.filter_by(id=task_id).first()
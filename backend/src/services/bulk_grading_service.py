@@ -0,0 +1,381 @@
+"""
+Bulk grading of assignment submissions.
+
+Grades a batch of submissions as one job instead of one request loop:
+
+1. All submissions (with assignment, course and student) are loaded in one
+   query and graded in memory, including late penalties and the automatic
+   modification request for below-passing scores.
+2. Lesson completions and module progress are recomputed once per touched
+   (student, lesson) and (student, module) pair, from rows fetched in a
+   handful of queries, using each pair's best score in the batch.
+3. Everything is committed in a single transaction.
+4. Only then are notifications created (one commit) and emails sent, so a
+   slow mail server never holds the transaction open.
+
+Large batches run through the background task service; progress is
+reported on the task row and read back with ``get_task_status``.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from flask import current_app
+from sqlalchemy.orm import joinedload
+
+from ..models.user_models import db, User
+from ..models.course_models import Assignment, AssignmentSubmission, Enrollment
+from ..models.student_models import LessonCompletion, ModuleProgress
+from .background_service import background_service
+from .notification_service import notify_assignments_graded
+from ..utils.email_notifications import send_grade_notification, send_grade_with_modification_notification
+
+logger = logging.getLogger(__name__)
+
+# Passing score threshold fallback (percentage) - used only when assignment has no passing_score set
+DEFAULT_PASSING_PERCENTAGE = 60.0
+
+# Batches up to this size are graded inside the request
+SYNC_LIMIT = int(os.environ.get('BULK_GRADE_SYNC_LIMIT', '25'))
+
+_LOAD_CHUNK = 500
+
+
+class BulkGradingService:
+    """Single-transaction bulk grading with batched score propagation."""
+
+    @classmethod
+    def start(cls, instructor_id: int, items: List[Dict[str, Any]],
+              late_penalty_policy: Optional[Dict[str, Any]] = None,
+              validate_range: bool = False) -> str:
+        """Queue a bulk grading job and return its task ID."""
+        # Owned from the start, so only the instructor can poll it
+        return background_service.create_task(
+            bulk_grade_submissions, instructor_id, items, late_penalty_policy, validate_range,
+            owner_id=instructor_id,
+        )
+
+    @staticmethod
+    def _load_submissions(submission_ids) -> Dict[int, AssignmentSubmission]:
+        ids = list(submission_ids)
+        loaded = {}
+        for start in range(0, len(ids), _LOAD_CHUNK):
+            rows = AssignmentSubmission.query.options(
+                joinedload(AssignmentSubmission.assignment).joinedload(Assignment.course),
+                joinedload(AssignmentSubmission.student),
+            ).filter(AssignmentSubmission.id.in_(ids[start:start + _LOAD_CHUNK])).all()
+            loaded.update((s.id, s) for s in rows)
+        return loaded
+
+    @staticmethod
+    def _late_penalty(submission: AssignmentSubmission, grade: float,
+                      policy: Optional[Dict[str, Any]]) -> float:
+        assignment = submission.assignment
+        if not policy or not assignment.due_date or not submission.submitted_at:
+            return grade
+
+        days_late = max(0, (submission.submitted_at - assignment.due_date).days)
+        grace_period = policy.get('grace_period_days', 0)
+        if days_late <= grace_period:
+            return grade
+
+        penalty_days = days_late - grace_period
+        total_penalty = min(penalty_days * policy.get('per_day_penalty', 5), policy.get('max_penalty', 50))
+        return max(0, grade - total_penalty)
+
+    @staticmethod
+    def _apply_modification_rule(submission: AssignmentSubmission, grade: float,
+                                 instructor_id: int, now: datetime) -> Optional[str]:
+        """Request (or clear) a resubmission based on the passing score.
+
+        Returns the modification reason when one was requested.
+        """
+        assignment = submission.assignment
+        points_possible = assignment.points_possible or 100
+        percentage_score = round((grade / points_possible) * 100, 2)
+
+        # Use the passing score set during assignment creation, fallback to default
+        passing_threshold = assignment.passing_score if assignment.passing_score is not None else DEFAULT_PASSING_PERCENTAGE
+
+        if percentage_score >= passing_threshold:
+            # Score is at or above passing - clear any existing modification request
+            if assignment.modification_requested:
+                assignment.modification_requested = False
+                assignment.modification_request_reason = None
+                assignment.modification_requested_at = None
+                assignment.modification_requested_by = None
+                assignment.can_resubmit = False
+            return None
+
+        max_resubs = assignment.max_resubmissions or 3
+        current_resubs = assignment.resubmission_count or 0
+        if current_resubs >= max_resubs:
+            return None
+
+        mod_reason = (
+            f"Your score of {grade:.1f}/{points_possible} ({percentage_score:.1f}%) is below the "
+            f"passing threshold of {passing_threshold}%. "
+            f"Please review the instructor feedback and resubmit your work with improvements."
+        )
+        if submission.feedback:
+            mod_reason += f"\n\nInstructor Feedback: {submission.feedback}"
+
+        assignment.modification_requested = True
+        assignment.modification_request_reason = mod_reason
+        assignment.modification_requested_at = now
+        assignment.modification_requested_by = instructor_id
+        assignment.can_resubmit = True
+        assignment.resubmission_count = current_resubs + 1
+        return mod_reason
+
+    @staticmethod
+    def propagate_scores(graded: List[AssignmentSubmission], now: Optional[datetime] = None) -> Dict[str, int]:
+        """Recompute lesson completion and module progress for graded submissions.
+
+        Each (student, lesson) and (student, module) pair is updated once with
+        its best percentage in the batch.
+        """
+        now = now or datetime.utcnow()
+        lesson_best: Dict[tuple, float] = {}
+        module_best: Dict[tuple, float] = {}
+        for submission in graded:
+            assignment = submission.assignment
+            percentage = (submission.grade / (assignment.points_possible or 100)) * 100
+            if assignment.lesson_id:
+                key = (submission.student_id, assignment.lesson_id)
+                lesson_best[key] = max(lesson_best.get(key, percentage), percentage)
+            if assignment.module_id:
+                key = (submission.student_id, assignment.course_id, assignment.module_id)
+                module_best[key] = max(module_best.get(key, percentage), percentage)
+
+        updated = {'lesson_completions': 0, 'module_progress': 0}
+
+        if lesson_best:
+            students = {student for student, _ in lesson_best}
+            lessons = {lesson for _, lesson in lesson_best}
+            completions = {
+                (lc.student_id, lc.lesson_id): lc
+                for lc in LessonCompletion.query.filter(
+                    LessonCompletion.student_id.in_(students),
+                    LessonCompletion.lesson_id.in_(lessons),
+                )
+            }
+            for (student_id, lesson_id), percentage in lesson_best.items():
+                reading = min(100.0, 70.0 + (percentage * 0.3))
+                engagement = min(100.0, 60.0 + (percentage * 0.4))
+                completion = completions.get((student_id, lesson_id))
+                if completion is None:
+                    db.session.add(LessonCompletion(
+                        student_id=student_id,
+                        lesson_id=lesson_id,
+                        completed=True,
+                        reading_progress=max(70.0, reading),
+                        engagement_score=max(60.0, engagement),
+                        scroll_progress=max(70.0, reading),
+                        time_spent=300,
+                        completed_at=now,
+                    ))
+                else:
+                    # Update with better scores if grade improved
+                    completion.reading_progress = max(completion.reading_progress or 0, reading)
+                    completion.engagement_score = max(completion.engagement_score or 0, engagement)
+                    completion.updated_at = now
+                updated['lesson_completions'] += 1
+
+        if module_best:
+            students = {student for student, _, _ in module_best}
+            courses = {course for _, course, _ in module_best}
+            modules = {module for _, _, module in module_best}
+
+            enrollments = {}
+            for enrollment in Enrollment.query.filter(
+                Enrollment.student_id.in_(students),
+                Enrollment.course_id.in_(courses),
+            ).order_by(Enrollment.id):
+                enrollments.setdefault((enrollment.student_id, enrollment.course_id), enrollment)
+
+            progress_rows = {
+                (mp.student_id, mp.module_id, mp.enrollment_id): mp
+                for mp in ModuleProgress.query.filter(
+                    ModuleProgress.student_id.in_(students),
+                    ModuleProgress.module_id.in_(modules),
+                )
+            }
+
+            flags_by_module = {}
+            for (student_id, course_id, module_id), percentage in module_best.items():
+                enrollment = enrollments.get((student_id, course_id))
+                module_progress = progress_rows.get((student_id, module_id, enrollment.id)) if enrollment else None
+                if module_progress is None:
+                    continue
+
+                # Keep the best assignment score
+                module_progress.assignment_score = max(module_progress.assignment_score or 0.0, percentage)
+                if module_id not in flags_by_module:
+                    flags_by_module[module_id] = ModuleProgress.module_assessment_flags(module_progress.module)
+                module_progress.calculate_module_weighted_score(assessment_flags=flags_by_module[module_id])
+                updated['module_progress'] += 1
+
+        return updated
+
+    @classmethod
+    def grade(cls, instructor_id: int, items: List[Dict[str, Any]],
+              late_penalty_policy: Optional[Dict[str, Any]] = None,
+              validate_range: bool = False) -> Dict[str, Any]:
+        """
+        Grade ``items`` (``{id, grade, feedback}``) in one transaction.
+
+        ``validate_range`` rejects grades outside 0..points_possible instead
+        of storing them.
+        """
+        now = datetime.utcnow()
+        errors = []
+        background_service.update_progress(5)
+
+        submissions = cls._load_submissions(
+            item.get('id') for item in items if item.get('id') is not None
+        )
+
+        graded: List[AssignmentSubmission] = []
+        graded_submissions = []
+        modifications = {}
+        for item in items:
+            submission_id = item.get('id')
+            grade = item.get('grade')
+            if submission_id is None or grade is None:
+                errors.append(f"Submission {submission_id}: Missing grade or id")
+                continue
+
+            submission = submissions.get(submission_id)
+            if not submission:
+                errors.append(f"Submission {submission_id}: Not found")
+                continue
+
+            # Verify instructor owns the course
+            if submission.assignment.course.instructor_id != instructor_id:
+                errors.append(f"Submission {submission_id}: Access denied")
+                continue
+
+            try:
+                original_grade = float(grade)
+            except (TypeError, ValueError):
+                errors.append(f"Submission {submission_id}: Invalid grade value")
+                continue
+            if validate_range and (original_grade < 0 or original_grade > (submission.assignment.points_possible or 100)):
+                errors.append(f"Submission {submission_id}: Invalid grade value")
+                continue
+
+            final_grade = cls._late_penalty(submission, original_grade, late_penalty_policy)
+
+            submission.grade = final_grade
+            submission.feedback = item.get('feedback', '')
+            submission.graded_at = now
+            submission.graded_by = instructor_id
+
+            mod_reason = cls._apply_modification_rule(submission, final_grade, instructor_id, now)
+            if mod_reason:
+                modifications[submission.id] = mod_reason
+
+            graded.append(submission)
+            graded_submissions.append({
+                'id': submission.id,
+                'original_grade': original_grade,
+                'final_grade': final_grade,
+                'penalty_applied': original_grade - final_grade if original_grade != final_grade else 0
+            })
+
+        background_service.update_progress(40)
+
+        try:
+            # Progress recompute must not cost the grades themselves
+            with db.session.begin_nested():
+                progress_updates = cls.propagate_scores(graded, now)
+        except Exception as e:
+            logger.warning(f"Bulk grading: learning progress update failed: {str(e)}", exc_info=True)
+            progress_updates = {'lesson_completions': 0, 'module_progress': 0}
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        background_service.update_progress(70)
+        logger.info(f"Bulk grading: {len(graded)} submissions graded by instructor {instructor_id} ({len(errors)} errors)")
+
+        notified, emailed = cls._notify(graded, modifications, instructor_id)
+
+        return {
+            'graded_count': len(graded),
+            'error_count': len(errors),
+            'errors': errors,
+            'graded_submissions': graded_submissions,
+            'modifications_requested': len(modifications),
+            'progress_updates': progress_updates,
+            'notifications_created': notified,
+            'emails_sent': emailed,
+        }
+
+    @staticmethod
+    def _notify(graded: List[AssignmentSubmission], modifications: Dict[int, str],
+                instructor_id: int) -> tuple:
+        """In-app notifications in one commit, then emails. Failures are logged, not raised."""
+        if not graded:
+            return 0, 0
+
+        notified = 0
+        try:
+            notified = notify_assignments_graded(
+                [(s, s.assignment, s.grade, s.feedback or '') for s in graded],
+                actor_id=instructor_id,
+            )
+        except Exception as e:
+            logger.warning(f"Bulk grading: in-app notifications failed: {str(e)}")
+
+        instructor = User.query.get(instructor_id)
+        instructor_name = f"{instructor.first_name} {instructor.last_name}" if instructor else "Your Instructor"
+        frontend_url = current_app.config.get('FRONTEND_URL', 'http://localhost:3000')
+        resubmission_deadline = (datetime.utcnow() + timedelta(days=7)).strftime('%B %d, %Y')
+
+        emailed = 0
+        for position, submission in enumerate(graded, start=1):
+            student = submission.student
+            assignment = submission.assignment
+            try:
+                if student and student.email:
+                    if submission.id in modifications:
+                        passing_threshold = assignment.passing_score if assignment.passing_score is not None else DEFAULT_PASSING_PERCENTAGE
+                        sent = send_grade_with_modification_notification(
+                            submission=submission,
+                            assignment=assignment,
+                            student=student,
+                            grade=submission.grade,
+                            feedback=submission.feedback or "",
+                            modification_reason=modifications[submission.id],
+                            instructor_name=instructor_name,
+                            resubmission_deadline=resubmission_deadline,
+                            frontend_url=frontend_url,
+                            passing_percentage=passing_threshold
+                        )
+                    else:
+                        sent = send_grade_notification(
+                            submission=submission,
+                            assignment=assignment,
+                            student=student,
+                            grade=submission.grade,
+                            feedback=submission.feedback or "Your assignment has been graded."
+                        )
+                    emailed += 1 if sent else 0
+            except Exception as e:
+                logger.warning(f"Bulk grading: email failed for submission {submission.id}: {str(e)}")
+
+            if position % 20 == 0:
+                background_service.update_progress(70 + (29 * position) // len(graded))
+
+        return notified, emailed
+
+
+def bulk_grade_submissions(instructor_id, items, late_penalty_policy=None, validate_range=False):
+    """Background task entry point for ``BulkGradingService.grade``."""
+    return BulkGradingService.grade(instructor_id, items, late_penalty_policy, validate_range)
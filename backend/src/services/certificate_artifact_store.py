@@ -0,0 +1,274 @@
+"""
+Content-addressed store for rendered certificate PDFs and PNGs.
+
+Certificates used to be re-rendered with ReportLab (and, for images,
+rasterized at 300 DPI through poppler) on every download.  Rendered files are
+now kept in an artifact store keyed by certificate number, template version
+and a digest of everything drawn on the certificate:
+
+    <certificate_number>/<template_version>-<digest>.pdf|png
+
+A certificate is rendered once; later downloads stream the stored file with
+an ETag so browsers can revalidate with ``If-None-Match``.  Re-issuing a
+certificate (new score or issue date) or bumping ``TEMPLATE_VERSION`` changes
+the key, and superseded artifacts for that certificate are removed.
+
+The store backend is pluggable; ``LocalArtifactBackend`` keeps files under
+``CERTIFICATE_ARTIFACT_DIR`` (default ``uploads/certificates``).  Setting
+``CERTIFICATE_ACCEL_REDIRECT_PREFIX`` hands the file transfer to nginx via
+``X-Accel-Redirect``; Flask's own ``USE_X_SENDFILE`` is honoured otherwise.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from flask import Response, request, send_file
+
+from ..models.student_models import Certificate
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever generate_certificate_pdf / generate_certificate_image change
+# what they draw, so previously stored artifacts are no longer served.
+TEMPLATE_VERSION = "1"
+
+ARTIFACT_TYPES = {
+    'pdf': 'application/pdf',
+    'png': 'image/png',
+}
+
+DEFAULT_ARTIFACT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads', 'certificates'
+)
+
+
+@dataclass
+class Artifact:
+    key: str
+    path: str
+    etag: str
+    size: int
+    mimetype: str
+
+
+class LocalArtifactBackend:
+    """Artifacts stored as plain files below a root directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self.path(key))
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self.path(key))
+
+    def write(self, key: str, data: bytes) -> None:
+        """Write atomically so concurrent readers never see a partial file."""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read(self, key: str) -> bytes:
+        with open(self.path(key), 'rb') as fh:
+            return fh.read()
+
+    def prune(self, prefix: str, keep: set) -> int:
+        """Delete artifacts under ``prefix/`` whose key is not in ``keep``."""
+        directory = self.path(prefix)
+        if not os.path.isdir(directory):
+            return 0
+        removed = 0
+        for name in os.listdir(directory):
+            key = f"{prefix}/{name}"
+            if key in keep or name.endswith('.tmp'):
+                continue
+            try:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+            except OSError as e:
+                logger.warning(f"Could not prune certificate artifact {key}: {e}")
+        return removed
+
+
+class CertificateArtifactStore:
+    """Render-once storage and conditional serving of certificate files."""
+
+    _backend = None
+    _render_locks: Dict[str, threading.Lock] = {}
+    _render_locks_guard = threading.Lock()
+
+    @classmethod
+    def backend(cls):
+        if cls._backend is None:
+            cls._backend = LocalArtifactBackend(
+                os.getenv('CERTIFICATE_ARTIFACT_DIR', DEFAULT_ARTIFACT_DIR)
+            )
+        return cls._backend
+
+    @classmethod
+    def set_backend(cls, backend) -> None:
+        """Swap the storage backend (e.g. a blob store or a test directory)."""
+        cls._backend = backend
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def content_digest(certificate: Certificate) -> str:
+        """Digest of every field the certificate template renders."""
+        student = certificate.student
+        parts = [
+            TEMPLATE_VERSION,
+            certificate.certificate_number or '',
+            f"{student.first_name} {student.last_name}" if student else '',
+            certificate.course.title if certificate.course else '',
+            repr(certificate.overall_score),
+            certificate.issued_at.isoformat() if certificate.issued_at else '',
+            certificate.skills_acquired or '',
+            certificate.verification_hash or '',
+        ]
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _prefix(certificate: Certificate) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', certificate.certificate_number or f"id-{certificate.id}")
+
+    @classmethod
+    def artifact_key(cls, certificate: Certificate, kind: str, digest: Optional[str] = None) -> str:
+        digest = digest or cls.content_digest(certificate)
+        return f"{cls._prefix(certificate)}/v{TEMPLATE_VERSION}-{digest[:24]}.{kind}"
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _lock_for(cls, key: str) -> threading.Lock:
+        with cls._render_locks_guard:
+            return cls._render_locks.setdefault(key, threading.Lock())
+
+    @classmethod
+    def get_or_create(cls, certificate: Certificate, kind: str = 'pdf') -> Optional[Artifact]:
+        """
+        Return the stored artifact, rendering it first if it does not exist.
+
+        Concurrent requests for the same artifact in one process render it
+        only once.  Returns ``None`` if rendering fails.
+        """
+        if kind not in ARTIFACT_TYPES:
+            raise ValueError(f"Unsupported certificate artifact type: {kind}")
+
+        from .certificate_service import CertificateService
+
+        backend = cls.backend()
+        digest = cls.content_digest(certificate)
+        key = cls.artifact_key(certificate, kind, digest)
+
+        if not backend.exists(key):
+            with cls._lock_for(key):
+                if not backend.exists(key):
+                    if kind == 'pdf':
+                        buffer = CertificateService.generate_certificate_pdf(certificate)
+                    else:
+                        pdf = cls.get_or_create(certificate, 'pdf')
+                        if pdf is None:
+                            return None
+                        buffer = CertificateService.generate_certificate_image(
+                            certificate, pdf_bytes=backend.read(pdf.key)
+                        )
+                    if not buffer:
+                        return None
+
+                    backend.write(key, buffer.getvalue())
+                    backend.prune(
+                        cls._prefix(certificate),
+                        keep={cls.artifact_key(certificate, k, digest) for k in ARTIFACT_TYPES},
+                    )
+                    logger.info(f"Stored certificate artifact {key}")
+            with cls._render_locks_guard:
+                cls._render_locks.pop(key, None)
+
+        return Artifact(
+            key=key,
+            path=backend.path(key),
+            etag=f"{kind}-v{TEMPLATE_VERSION}-{digest[:24]}",
+            size=backend.size(key),
+            mimetype=ARTIFACT_TYPES[kind],
+        )
+
+    @classmethod
+    def warm(cls, certificate_id: int) -> Dict[str, bool]:
+        """Render and store every artifact type for a certificate."""
+        certificate = Certificate.query.get(certificate_id)
+        if not certificate:
+            return {}
+        return {kind: cls.get_or_create(certificate, kind) is not None for kind in ARTIFACT_TYPES}
+
+    @classmethod
+    def warm_in_background(cls, certificate_id: int) -> Optional[str]:
+        """Queue :meth:`warm` as a background task; never raises."""
+        try:
+            from .background_service import background_service
+            return background_service.create_task(warm_certificate_artifacts, certificate_id)
+        except Exception as e:
+            logger.warning(f"Could not queue certificate artifact warm-up for {certificate_id}: {e}")
+            return None
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def send(artifact: Artifact, download_name: str) -> Response:
+        """
+        Send a stored artifact with ETag / conditional-GET support.
+
+        The file is only read when the client's copy is stale; with
+        ``CERTIFICATE_ACCEL_REDIRECT_PREFIX`` set, nginx serves the bytes.
+        """
+        accel_prefix = os.getenv('CERTIFICATE_ACCEL_REDIRECT_PREFIX')
+        if accel_prefix:
+            response = Response(mimetype=artifact.mimetype)
+            response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{artifact.key}"
+            response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+            response.set_etag(artifact.etag)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                # nginx would otherwise follow the redirect and send the file anyway
+                del response.headers['X-Accel-Redirect']
+        else:
+            response = send_file(
+                artifact.path,
+                mimetype=artifact.mimetype,
+                as_attachment=True,
+                download_name=download_name,
+                etag=artifact.etag,
+                conditional=True,
+            )
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response
+
+
+def warm_certificate_artifacts(certificate_id: int) -> Dict[str, bool]:
+    """Background task body for :meth:`CertificateArtifactStore.warm`."""
+    return CertificateArtifactStore.warm(certificate_id)
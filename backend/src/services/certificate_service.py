@@ -1,19 +1,39 @@
 # Certificate Service - Handle certificates, badges, and transcripts
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from flask import current_app
+from sqlalchemy import case, func
+from sqlalchemy.orm import joinedload
+import copy
 import json
 import hashlib
+import os
 import random
+import threading
+import time
 
 from ..models.user_models import db, User
-from ..models.course_models import Course, Enrollment, Module
+from ..models.course_models import (
+    Course, Enrollment, Module, Lesson, Quiz, Assignment, AssignmentSubmission, ApplicationWindow
+)
+from ..models.quiz_progress_models import QuizAttempt
 from ..models.student_models import (
     Certificate, SkillBadge, StudentSkillBadge, StudentTranscript,
-    ModuleProgress, AssessmentAttempt
+    ModuleProgress, AssessmentAttempt, LessonCompletion
 )
 
 
+# Computed transcripts per student, keyed by progress version (see
+# CertificateService.get_progress_version).  Per process and LRU-bounded;
+# the TTL bounds staleness from edits the version does not track, such as
+# lesson or quiz changes made by instructors.
+_transcript_cache: "OrderedDict[int, Tuple[str, float, Dict]]" = OrderedDict()
+_transcript_cache_lock = threading.Lock()
+TRANSCRIPT_CACHE_SIZE = int(os.getenv('TRANSCRIPT_CACHE_SIZE', 512))
+TRANSCRIPT_CACHE_TTL = int(os.getenv('TRANSCRIPT_CACHE_TTL', 600))
+
+
 class CertificateService:
     """Service class for handling certificates, badges, and transcripts"""
     
@@ -30,14 +50,16 @@ class CertificateService:
             Tuple of (eligible, reason, requirements_status)
         """
         try:
-            enrollment = Enrollment.query.filter_by(
+            enrollment = Enrollment.query.options(
+                joinedload(Enrollment.course)
+            ).filter_by(
                 student_id=student_id, course_id=course_id
             ).first()
             
             if not enrollment:
                 return False, "Not enrolled in course", {}
             
-            course = Course.query.get(course_id)
+            course = enrollment.course
             if not course:
                 return False, "Course not found", {}
             
@@ -54,7 +76,9 @@ class CertificateService:
                 return True, "Eligible for certificate", requirements_status
             
             # SECONDARY CHECK: Check module completion status in detail
-            modules = course.modules.order_by('order').all()
+            snapshot = CertificateService._load_progress_snapshot(student_id, [enrollment])
+            modules = snapshot["modules_by_course"].get(course_id, [])
+            progress_by_module = snapshot["progress_by_enrollment"].get(enrollment.id, {})
             requirements_status = {
                 "total_modules": len(modules),
                 "completed_modules": 0,
@@ -65,11 +89,7 @@ class CertificateService:
             overall_scores = []
             
             for module in modules:
-                module_progress = ModuleProgress.query.filter_by(
-                    student_id=student_id,
-                    module_id=module.id,
-                    enrollment_id=enrollment.id
-                ).first()
+                module_progress = progress_by_module.get(module.id)
                 
                 if not module_progress:
                     requirements_status["module_details"].append({
@@ -292,6 +312,10 @@ class CertificateService:
             # Award completion badges
             CertificateService._award_completion_badges(student_id, course_id)
             
+            # Render the PDF/PNG now so the first download is served from the store
+            from .certificate_artifact_store import CertificateArtifactStore
+            CertificateArtifactStore.warm_in_background(certificate.id)
+            
             return True, message, certificate.to_dict()
             
         except Exception as e:
@@ -512,6 +536,11 @@ class CertificateService:
         """
         Generate comprehensive student transcript
         
+        The result is cached per student under the current progress version,
+        so repeated requests cost a single version query until the student's
+        enrollments, progress, certificates or badges change.  Statistics on
+        the StudentTranscript row are only recomputed on such a change.
+        
         Args:
             student_id: ID of the student
             
@@ -519,56 +548,21 @@ class CertificateService:
             Complete transcript data
         """
         try:
-            transcript = StudentTranscript.query.filter_by(student_id=student_id).first()
-            if not transcript:
-                transcript = StudentTranscript(student_id=student_id)
-                db.session.add(transcript)
-                db.session.commit()
+            version = CertificateService.get_progress_version(student_id)
             
-            # Update transcript statistics
-            transcript.update_statistics()
-            db.session.commit()
+            with _transcript_cache_lock:
+                cached = _transcript_cache.get(student_id)
+                if cached and cached[0] == version and time.monotonic() - cached[1] < TRANSCRIPT_CACHE_TTL:
+                    _transcript_cache.move_to_end(student_id)
+                    return copy.deepcopy(cached[2])
             
-            student = User.query.get(student_id)
+            transcript_data = CertificateService._build_transcript(student_id)
             
-            # Get all enrollments and certificates
-            enrollments = Enrollment.query.filter_by(student_id=student_id).all()
-            certificates = Certificate.query.filter_by(student_id=student_id, is_active=True).all()
-            badges = StudentSkillBadge.query.filter_by(student_id=student_id).all()
-            
-            transcript_data = {
-                "student_info": {
-                    "id": student.id,
-                    "name": f"{student.first_name} {student.last_name}",
-                    "email": student.email,
-                    "join_date": student.created_at.isoformat()
-                },
-                "summary": transcript.to_dict(),
-                "course_history": [],
-                "certificates": [cert.to_dict() for cert in certificates],
-                "badges": [badge.to_dict() for badge in badges],
-                "generated_at": datetime.utcnow().isoformat()
-            }
-            
-            # Add detailed course history
-            for enrollment in enrollments:
-                course_data = {
-                    "course": enrollment.course.to_dict(),
-                    "enrollment": enrollment.to_dict(),
-                    "modules": []
-                }
-                
-                # Get module progress
-                module_progresses = ModuleProgress.query.filter_by(
-                    student_id=student_id, enrollment_id=enrollment.id
-                ).all()
-                
-                for mp in module_progresses:
-                    module_data = mp.to_dict()
-                    module_data["module_info"] = mp.module.to_dict()
-                    course_data["modules"].append(module_data)
-                
-                transcript_data["course_history"].append(course_data)
+            with _transcript_cache_lock:
+                _transcript_cache[student_id] = (version, time.monotonic(), copy.deepcopy(transcript_data))
+                _transcript_cache.move_to_end(student_id)
+                while len(_transcript_cache) > TRANSCRIPT_CACHE_SIZE:
+                    _transcript_cache.popitem(last=False)
             
             return transcript_data
             
@@ -576,6 +570,301 @@ class CertificateService:
             current_app.logger.error(f"Transcript generation error: {str(e)}")
             return {"error": "Failed to generate transcript"}
     
+    @staticmethod
+    def invalidate_transcript(student_id: int = None):
+        """Drop cached transcripts for one student, or all students"""
+        with _transcript_cache_lock:
+            if student_id is None:
+                _transcript_cache.clear()
+            else:
+                _transcript_cache.pop(student_id, None)
+    
+    @staticmethod
+    def get_progress_version(student_id: int) -> str:
+        """
+        Fingerprint of everything a transcript is built from, in one query.
+        
+        Counts and latest timestamps of the student's enrollments, module
+        progress, lesson completions, quiz attempts, assignment submissions,
+        certificates and badges are hashed together; any progress change
+        yields a new version.
+        """
+        def aggregate(*columns, where):
+            return [
+                db.session.query(column).filter(where).scalar_subquery()
+                for column in columns
+            ]
+        
+        fingerprint = db.session.query(
+            *aggregate(
+                func.count(Enrollment.id),
+                func.sum(Enrollment.progress),
+                func.max(Enrollment.completed_at),
+                func.max(Enrollment.terminated_at),
+                func.max(Enrollment.payment_verified_at),
+                *[
+                    func.count(case((Enrollment.status == status, 1)))
+                    for status in ('completed', 'terminated', 'suspended', 'pending_payment')
+                ],
+                where=Enrollment.student_id == student_id,
+            ),
+            db.session.query(func.max(Course.updated_at)).join(
+                Enrollment, Enrollment.course_id == Course.id
+            ).filter(Enrollment.student_id == student_id).scalar_subquery(),
+            *aggregate(
+                func.count(ModuleProgress.id),
+                func.sum(ModuleProgress.cumulative_score),
+                func.sum(ModuleProgress.attempts_count),
+                func.max(ModuleProgress.started_at),
+                func.max(ModuleProgress.completed_at),
+                func.max(ModuleProgress.failed_at),
+                func.max(ModuleProgress.unlocked_at),
+                where=ModuleProgress.student_id == student_id,
+            ),
+            *aggregate(
+                func.count(LessonCompletion.id),
+                func.max(LessonCompletion.updated_at),
+                where=LessonCompletion.student_id == student_id,
+            ),
+            *aggregate(
+                func.count(QuizAttempt.id),
+                func.max(QuizAttempt.end_time),
+                where=QuizAttempt.user_id == student_id,
+            ),
+            *aggregate(
+                func.count(AssignmentSubmission.id),
+                func.max(AssignmentSubmission.submitted_at),
+                func.max(AssignmentSubmission.graded_at),
+                where=AssignmentSubmission.student_id == student_id,
+            ),
+            *aggregate(
+                func.count(Certificate.id),
+                func.max(Certificate.issued_at),
+                func.sum(Certificate.overall_score),
+                where=(Certificate.student_id == student_id) & (Certificate.is_active == True),
+            ),
+            *aggregate(
+                func.count(StudentSkillBadge.id),
+                func.max(StudentSkillBadge.earned_at),
+                where=StudentSkillBadge.student_id == student_id,
+            ),
+        ).one()
+        
+        return hashlib.sha1(repr(tuple(fingerprint)).encode()).hexdigest()
+    
+    @staticmethod
+    def _load_progress_snapshot(student_id: int, enrollments: List[Enrollment]) -> Dict:
+        """
+        Bulk-load modules, application windows and module progress for a
+        set of enrollments.
+        
+        Three queries regardless of how many enrollments or modules there are.
+        Loading the modules also puts them in the session identity map, so
+        ``ModuleProgress.module`` resolves without a query per row.
+        """
+        course_ids = {e.course_id for e in enrollments}
+        enrollment_ids = [e.id for e in enrollments]
+        
+        modules_by_course: Dict[int, List[Module]] = {course_id: [] for course_id in course_ids}
+        windows_by_course: Dict[int, List[ApplicationWindow]] = {course_id: [] for course_id in course_ids}
+        if course_ids:
+            modules = Module.query.filter(
+                Module.course_id.in_(course_ids)
+            ).order_by(Module.course_id, Module.order).all()
+            for module in modules:
+                modules_by_course[module.course_id].append(module)
+            windows = ApplicationWindow.query.filter(
+                ApplicationWindow.course_id.in_(course_ids)
+            ).order_by(ApplicationWindow.opens_at).all()
+            for window in windows:
+                windows_by_course[window.course_id].append(window)
+        
+        progress_by_enrollment: Dict[int, Dict[int, ModuleProgress]] = {eid: {} for eid in enrollment_ids}
+        if enrollment_ids:
+            progresses = ModuleProgress.query.filter(
+                ModuleProgress.student_id == student_id,
+                ModuleProgress.enrollment_id.in_(enrollment_ids)
+            ).order_by(ModuleProgress.id).all()
+            for mp in progresses:
+                progress_by_enrollment[mp.enrollment_id][mp.module_id] = mp
+        
+        return {
+            "modules_by_course": modules_by_course,
+            "windows_by_course": windows_by_course,
+            "progress_by_enrollment": progress_by_enrollment,
+        }
+    
+    @staticmethod
+    def _load_module_scores(student_id: int, module_ids: List[int]) -> Tuple[Dict[int, float], Dict[int, Tuple]]:
+        """
+        Lesson-average score and assessment flags for each module, in bulk.
+        
+        Returns ``(module_score, assessment_flags)`` keyed by module id, the
+        values ``ModuleProgress.calculate_module_score`` and
+        ``ModuleProgress.module_assessment_flags`` would compute one lesson
+        and one query at a time. At most six queries for any number of
+        modules and lessons.
+        """
+        module_scores: Dict[int, float] = {module_id: 0.0 for module_id in module_ids}
+        flags: Dict[int, Tuple] = {module_id: (False, False, False) for module_id in module_ids}
+        if not module_ids:
+            return module_scores, flags
+        
+        lesson_module = dict(
+            Lesson.query.with_entities(Lesson.id, Lesson.module_id).filter(Lesson.module_id.in_(module_ids))
+        )
+        lesson_ids = list(lesson_module)
+        
+        completions = LessonCompletion.query.filter(
+            LessonCompletion.student_id == student_id,
+            LessonCompletion.lesson_id.in_(lesson_ids)
+        ).order_by(LessonCompletion.id).all() if lesson_ids else []
+        
+        # Lesson quizzes (published or not, for the flags) and module final assessments
+        quizzes = Quiz.query.filter(
+            db.or_(
+                Quiz.lesson_id.in_(lesson_ids),
+                db.and_(Quiz.module_id.in_(module_ids), Quiz.lesson_id.is_(None))
+            )
+        ).order_by(Quiz.id).all()
+        assignments = Assignment.query.filter(
+            Assignment.lesson_id.in_(lesson_ids)
+        ).order_by(Assignment.id).all() if lesson_ids else []
+        
+        quiz_by_lesson, assignment_by_lesson = {}, {}
+        has_quizzes, has_assignments, has_final = set(), set(), set()
+        for quiz in quizzes:
+            if quiz.lesson_id is None:
+                if quiz.is_published:
+                    has_final.add(quiz.module_id)
+                continue
+            has_quizzes.add(lesson_module[quiz.lesson_id])
+            if quiz.is_published:
+                quiz_by_lesson.setdefault(quiz.lesson_id, quiz)
+        for assignment in assignments:
+            has_assignments.add(lesson_module[assignment.lesson_id])
+            assignment_by_lesson.setdefault(assignment.lesson_id, assignment)
+        
+        best_attempts = {}
+        quiz_ids = [quiz.id for quiz in quiz_by_lesson.values()]
+        if completions and quiz_ids:
+            for attempt in QuizAttempt.query.filter(
+                QuizAttempt.user_id == student_id,
+                QuizAttempt.quiz_id.in_(quiz_ids)
+            ).order_by(QuizAttempt.id):
+                best = best_attempts.get(attempt.quiz_id)
+                if best is None or (attempt.score_percentage or 0.0) > (best.score_percentage or 0.0):
+                    best_attempts[attempt.quiz_id] = attempt
+        
+        submissions = {}
+        assignment_ids = [assignment.id for assignment in assignment_by_lesson.values()]
+        if completions and assignment_ids:
+            for submission in AssignmentSubmission.query.filter(
+                AssignmentSubmission.student_id == student_id,
+                AssignmentSubmission.assignment_id.in_(assignment_ids)
+            ).order_by(AssignmentSubmission.id):
+                submissions.setdefault(submission.assignment_id, submission)
+        
+        lesson_scores: Dict[int, List[float]] = {}
+        for completion in completions:
+            quiz = quiz_by_lesson.get(completion.lesson_id)
+            assignment = assignment_by_lesson.get(completion.lesson_id)
+            assessment = LessonCompletion.assessment_state_from(
+                quiz, best_attempts.get(quiz.id) if quiz else None,
+                assignment, submissions.get(assignment.id) if assignment else None,
+            )
+            score = LessonCompletion.score_from_progress(
+                completion.reading_progress or 0.0, completion.engagement_score or 0.0, assessment
+            )
+            lesson_scores.setdefault(lesson_module[completion.lesson_id], []).append(score)
+        
+        for module_id in module_ids:
+            scores = lesson_scores.get(module_id)
+            if scores:
+                module_scores[module_id] = sum(scores) / len(scores)
+            flags[module_id] = (module_id in has_quizzes, module_id in has_assignments, module_id in has_final)
+        return module_scores, flags
+    
+    @staticmethod
+    def _build_transcript(student_id: int) -> Dict:
+        """Compute the transcript from bulk-loaded enrollments and progress"""
+        transcript = StudentTranscript.query.filter_by(student_id=student_id).first()
+        if not transcript:
+            transcript = StudentTranscript(student_id=student_id)
+            db.session.add(transcript)
+        
+        # Only reached when the progress version changed
+        transcript.update_statistics()
+        db.session.commit()
+        
+        student = User.query.get(student_id)
+        
+        # Get all enrollments and certificates
+        enrollments = Enrollment.query.options(
+            joinedload(Enrollment.course).joinedload(Course.instructor),
+            joinedload(Enrollment.student),
+            joinedload(Enrollment.application_window),
+        ).filter_by(student_id=student_id).order_by(Enrollment.id).all()
+        certificates = Certificate.query.options(
+            joinedload(Certificate.student), joinedload(Certificate.course)
+        ).filter_by(student_id=student_id, is_active=True).all()
+        badges = StudentSkillBadge.query.options(
+            joinedload(StudentSkillBadge.badge),
+            joinedload(StudentSkillBadge.course),
+            joinedload(StudentSkillBadge.module),
+        ).filter_by(student_id=student_id).all()
+        
+        snapshot = CertificateService._load_progress_snapshot(student_id, enrollments)
+        module_scores, assessment_flags = CertificateService._load_module_scores(student_id, [
+            mp.module_id for progress in snapshot["progress_by_enrollment"].values() for mp in progress.values()
+        ])
+        
+        transcript_data = {
+            "student_info": {
+                "id": student.id,
+                "name": f"{student.first_name} {student.last_name}",
+                "email": student.email,
+                "join_date": student.created_at.isoformat()
+            },
+            "summary": transcript.to_dict(),
+            "course_history": [],
+            "certificates": [cert.to_dict() for cert in certificates],
+            "badges": [badge.to_dict() for badge in badges],
+            "generated_at": datetime.utcnow().isoformat()
+        }
+        
+        # Add detailed course history
+        for enrollment in enrollments:
+            modules = []
+            course_module_scores = []
+            course_module_ids = {m.id for m in snapshot["modules_by_course"].get(enrollment.course_id, [])}
+            
+            for mp in snapshot["progress_by_enrollment"].get(enrollment.id, {}).values():
+                module_data = mp.to_dict(
+                    module_score=module_scores[mp.module_id],
+                    assessment_flags=assessment_flags[mp.module_id],
+                )
+                module_data["module_info"] = mp.module.to_dict()
+                modules.append(module_data)
+                if mp.module_id in course_module_ids:
+                    course_module_scores.append(module_data["module_score"])
+            
+            # Same average Enrollment.calculate_course_score() would recompute
+            course_score = (
+                sum(course_module_scores) / len(course_module_scores)
+                if course_module_scores else 0.0
+            )
+            
+            transcript_data["course_history"].append({
+                "course": enrollment.course.to_dict(
+                    application_windows=snapshot["windows_by_course"][enrollment.course_id]
+                ),
+                "enrollment": enrollment.to_dict(course_score=course_score),
+                "modules": modules
+            })
+        
+        return transcript_data
+    
     @staticmethod
     def _get_portfolio_items(student_id: int, course_id: int) -> List[Dict]:
         """Get portfolio items (projects, assignments) for a course"""
@@ -1503,8 +1792,13 @@ class CertificateService:
             return None
     
     @staticmethod
-    def generate_certificate_image(certificate: Certificate):
-        """Generate PNG image for a certificate using PDF as source"""
+    def generate_certificate_image(certificate: Certificate, pdf_bytes: bytes = None):
+        """
+        Generate PNG image for a certificate using PDF as source
+        
+        Pass ``pdf_bytes`` when the PDF has already been rendered (e.g. from
+        the artifact store) to skip generating it again.
+        """
         try:
             from pdf2image import convert_from_bytes
             from io import BytesIO
@@ -1514,15 +1808,17 @@ class CertificateService:
             logger = logging.getLogger(__name__)
             
             # First generate the PDF
-            pdf_buffer = CertificateService.generate_certificate_pdf(certificate)
-            
-            if not pdf_buffer:
-                logger.error("Failed to generate PDF for image conversion")
-                return None
+            if pdf_bytes is None:
+                pdf_buffer = CertificateService.generate_certificate_pdf(certificate)
+                
+                if not pdf_buffer:
+                    logger.error("Failed to generate PDF for image conversion")
+                    return None
+                pdf_bytes = pdf_buffer.getvalue()
             
             # Convert PDF to image (first page only)
             images = convert_from_bytes(
-                pdf_buffer.getvalue(),
+                pdf_bytes,
                 dpi=300,  # High quality
                 fmt='png'
             )
@@ -0,0 +1,300 @@
+"""
+Shared PDF rendering helpers for payment slips, offer letters and other
+generated documents.
+
+* WeasyPrint documents reuse one ``FontConfiguration``, parse each distinct
+  ``<style>`` block once into a cached ``CSS`` object and fetch external
+  resources (logo URLs, images) through a caching URL fetcher.
+* ReportLab documents can draw their static decoration once into a
+  "background layer" PDF; each document then only draws its variable
+  content and is merged onto that layer, so embedded images are encoded and
+  vector decorations laid out once per process instead of once per letter.
+* ``render_many`` fans a batch of render jobs out over a process pool, and
+  ``render_one`` sends a single job to it, where the worker's caches are
+  already warm. Render functions and their arguments must be picklable
+  (module-level functions and plain data, not ORM objects).
+"""
+
+import atexit
+import hashlib
+import logging
+import multiprocessing
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+logger = logging.getLogger(__name__)
+
+_STYLE_BLOCK = re.compile(r'<style[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+
+CSS_CACHE_SIZE = 32
+RESOURCE_CACHE_SIZE = 64
+
+
+class DocumentRenderService:
+    """Process-wide caches and worker pool for document rendering."""
+
+    _lock = threading.Lock()
+    _font_config = None
+    _css_cache: "OrderedDict[str, Any]" = OrderedDict()
+    _resource_cache: "OrderedDict[str, Dict]" = OrderedDict()
+    _layers: Dict[str, bytes] = {}
+    _pool: Optional[ProcessPoolExecutor] = None
+    _pool_size = 0
+
+    # ------------------------------------------------------------------
+    # WeasyPrint
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _weasyprint_font_config(cls):
+        from weasyprint.text.fonts import FontConfiguration
+
+        if cls._font_config is None:
+            with cls._lock:
+                if cls._font_config is None:
+                    cls._font_config = FontConfiguration()
+        return cls._font_config
+
+    @classmethod
+    def _cached_css(cls, css_text: str):
+        from weasyprint import CSS
+
+        key = hashlib.sha1(css_text.encode('utf-8')).hexdigest()
+        with cls._lock:
+            stylesheet = cls._css_cache.get(key)
+            if stylesheet is not None:
+                cls._css_cache.move_to_end(key)
+                return stylesheet
+
+        stylesheet = CSS(string=css_text, font_config=cls._weasyprint_font_config())
+        with cls._lock:
+            cls._css_cache[key] = stylesheet
+            while len(cls._css_cache) > CSS_CACHE_SIZE:
+                cls._css_cache.popitem(last=False)
+        return stylesheet
+
+    @classmethod
+    def _url_fetcher(cls, url: str, *args, **kwargs) -> Dict:
+        """``default_url_fetcher`` with an in-memory cache for remote resources."""
+        from weasyprint import default_url_fetcher
+
+        if url.startswith('data:'):
+            return default_url_fetcher(url, *args, **kwargs)
+
+        with cls._lock:
+            cached = cls._resource_cache.get(url)
+            if cached is not None:
+                cls._resource_cache.move_to_end(url)
+                return dict(cached)
+
+        result = default_url_fetcher(url, *args, **kwargs)
+        if 'string' not in result and result.get('file_obj') is not None:
+            result['string'] = result.pop('file_obj').read()
+        result.pop('file_obj', None)
+
+        with cls._lock:
+            cls._resource_cache[url] = result
+            while len(cls._resource_cache) > RESOURCE_CACHE_SIZE:
+                cls._resource_cache.popitem(last=False)
+        return dict(result)
+
+    @classmethod
+    def render_html_pdf(cls, html: str) -> bytes:
+        """
+        Render an HTML document to PDF bytes with WeasyPrint.
+
+        ``<style>`` blocks are lifted out of the document and applied as
+        cached stylesheets, so a template rendered many times is only
+        parsed for its markup.
+        """
+        from weasyprint import HTML
+
+        styles = _STYLE_BLOCK.findall(html)
+        stylesheets = [cls._cached_css(css_text) for css_text in styles]
+        body = _STYLE_BLOCK.sub('', html) if styles else html
+
+        return HTML(string=body, url_fetcher=cls._url_fetcher).write_pdf(
+            stylesheets=stylesheets,
+            font_config=cls._weasyprint_font_config(),
+        )
+
+    # ------------------------------------------------------------------
+    # ReportLab
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def static_layer(cls, name: str, draw: Callable[[canvas.Canvas], None], pagesize=A4) -> bytes:
+        """
+        Return a one-page PDF holding ``draw``'s output, rendered once.
+
+        ``name`` should change whenever ``draw`` does (include a version).
+        """
+        layer = cls._layers.get(name)
+        if layer is None:
+            with cls._lock:
+                layer = cls._layers.get(name)
+                if layer is None:
+                    buffer = BytesIO()
+                    layer_canvas = canvas.Canvas(buffer, pagesize=pagesize)
+                    draw(layer_canvas)
+                    layer_canvas.showPage()
+                    layer_canvas.save()
+                    layer = buffer.getvalue()
+                    cls._layers[name] = layer
+                    logger.debug(f"Rendered static document layer '{name}' ({len(layer)} bytes)")
+        return layer
+
+    @staticmethod
+    def render_on_layer(layer: bytes, draw: Callable[[canvas.Canvas], None], pagesize=A4) -> bytes:
+        """
+        Draw ``draw``'s output on top of a static layer page.
+
+        The overlay page is attached to the layer page as a form XObject, so
+        neither content stream is parsed and resource names cannot clash.
+        """
+        from PyPDF2 import PdfReader, PdfWriter
+        from PyPDF2.generic import ArrayObject, DecodedStreamObject, DictionaryObject, NameObject
+
+        overlay_buffer = BytesIO()
+        overlay_canvas = canvas.Canvas(overlay_buffer, pagesize=pagesize)
+        draw(overlay_canvas)
+        overlay_canvas.showPage()
+        overlay_canvas.save()
+        overlay_buffer.seek(0)
+        overlay = PdfReader(overlay_buffer).pages[0]
+
+        writer = PdfWriter()
+        page = writer.add_page(PdfReader(BytesIO(layer)).pages[0])
+
+        overlay_contents = overlay['/Contents'].get_object()
+        if isinstance(overlay_contents, ArrayObject):
+            overlay_data = b'\n'.join(part.get_object().get_data() for part in overlay_contents)
+        else:
+            overlay_data = overlay_contents.get_data()
+
+        form = DecodedStreamObject()
+        form.set_data(overlay_data)
+        form.update({
+            NameObject('/Type'): NameObject('/XObject'),
+            NameObject('/Subtype'): NameObject('/Form'),
+            NameObject('/BBox'): overlay.mediabox,
+            NameObject('/Resources'): overlay['/Resources'].get_object().clone(writer),
+        })
+
+        resources = page['/Resources'].get_object()
+        if '/XObject' not in resources:
+            resources[NameObject('/XObject')] = DictionaryObject()
+        resources['/XObject'].get_object()[NameObject('/DocumentOverlay')] = writer._add_object(form)
+
+        invoke = DecodedStreamObject()
+        invoke.set_data(b'q /DocumentOverlay Do Q')
+        layer_contents = page.raw_get('/Contents')
+        parts = list(layer_contents.get_object()) if isinstance(layer_contents.get_object(), ArrayObject) else [layer_contents]
+        # Wrap the layer in q/Q so graphics state it leaves behind cannot leak into the overlay
+        prefix = DecodedStreamObject()
+        prefix.set_data(b'q')
+        suffix = DecodedStreamObject()
+        suffix.set_data(b'Q')
+        page[NameObject('/Contents')] = ArrayObject(
+            [writer._add_object(prefix)] + parts + [writer._add_object(suffix), writer._add_object(invoke)]
+        )
+
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
+
+    # ------------------------------------------------------------------
+    # Worker pool
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def pool_size() -> int:
+        configured = os.getenv('DOCUMENT_RENDER_WORKERS')
+        if configured:
+            return max(1, int(configured))
+        return max(1, min(4, os.cpu_count() or 1))
+
+    @classmethod
+    def _executor(cls, size: int) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._pool is None or cls._pool_size != size:
+                if cls._pool is not None:
+                    cls._pool.shutdown(wait=False)
+                # Spawned, not forked: the pool is started from request and
+                # background threads, and a forked child would inherit locks
+                # (logging, the DB pool) held by threads that do not exist there
+                cls._pool = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context('spawn'))
+                cls._pool_size = size
+            return cls._pool
+
+    @classmethod
+    def shutdown(cls) -> None:
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait=False)
+                cls._pool = None
+
+    @classmethod
+    def render_one(cls, render: Callable[[Any], Any], job: Any) -> Any:
+        """
+        Render a single document on the worker pool and return the result.
+
+        Pool workers outlive the request, so their fonts, stylesheets and
+        fetched resources stay cached between documents. Falls back to
+        rendering inline with one worker or a broken pool; errors raised by
+        ``render`` propagate.
+        """
+        size = cls._pool_size if cls._pool is not None else cls.pool_size()
+        if size <= 1:
+            return render(job)
+
+        try:
+            return cls._executor(size).submit(render, job).result()
+        except BrokenProcessPool as e:
+            logger.warning(f"Render pool failed ({e}); rendering inline")
+            cls.shutdown()
+            return render(job)
+
+    @classmethod
+    def render_many(cls, render: Callable[[Any], Any], jobs: Iterable[Any],
+                    max_workers: Optional[int] = None) -> List[Any]:
+        """
+        Render a batch of documents, in input order.
+
+        Uses the process pool when there is more than one job and more than
+        one worker; a job that raises yields ``None`` in its slot.
+        """
+        jobs = list(jobs)
+        workers = min(max_workers or cls.pool_size(), len(jobs))
+
+        if workers <= 1:
+            return [_safe_render(render, job) for job in jobs]
+
+        try:
+            executor = cls._executor(workers)
+            return list(executor.map(_safe_render, [render] * len(jobs), jobs))
+        except Exception as e:
+            # A broken pool (e.g. killed worker) must not fail the batch
+            logger.warning(f"Render pool failed ({e}); rendering batch inline")
+            cls.shutdown()
+            return [_safe_render(render, job) for job in jobs]
+
+
+def _safe_render(render: Callable[[Any], Any], job: Any) -> Any:
+    try:
+        return render(job)
+    except Exception as e:
+        logger.error(f"Document render failed: {e}", exc_info=True)
+        return None
+
+
+atexit.register(DocumentRenderService.shutdown)
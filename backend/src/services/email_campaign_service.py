@@ -0,0 +1,400 @@
+"""Custom email campaigns to applicants, streamed through the email outbox.
+
+A campaign walks the matching ``course_applications`` in keyset pages
+(``id > last_application_id``), so memory stays flat however large the
+intake is. For each page it:
+
+- drops addresses already seen (case-insensitive, within the page and,
+  through the ``(campaign_id, email)`` unique key, across pages),
+- fills the once-rendered template with each recipient's name and queues
+  the emails in the outbox (category ``campaign:<id>``), and
+- moves the checkpoint forward in the same transaction.
+
+Only the worker holding the campaign lease queues pages. The lease is
+renewed on every page; if a worker dies, ``resume_campaigns`` (run every
+``EMAIL_CAMPAIGN_RESUME_SECONDS`` by each worker) picks the campaign up
+from its checkpoint. Delivery, retries and rate limits are the outbox's
+job, and the outbox table is where progress, throughput and failures are
+read from, so any worker can report on any campaign.
+"""
+
+import atexit
+import html
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import and_, func, insert, or_, select, update
+
+from ..models.user_models import db
+from ..models.course_application import CourseApplication
+from ..models.email_campaign_models import CampaignStatus, EmailCampaign, EmailCampaignRecipient
+from ..models.email_outbox_models import EmailOutbox, OutboxStatus
+from ..utils.email_templates import custom_application_email
+from .email_outbox_service import email_outbox
+
+logger = logging.getLogger(__name__)
+
+# Stand-in for the recipient's name while the template is rendered once
+_NAME_SLOT = '\x00recipient_name\x00'
+
+
+def _setting(name, default):
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class EmailCampaignService:
+    """Creates, runs, resumes and reports on custom email campaigns."""
+
+    PAGE_SIZE = _setting('EMAIL_CAMPAIGN_PAGE_SIZE', 500)
+    LEASE_SECONDS = _setting('EMAIL_CAMPAIGN_LEASE_SECONDS', 120)
+    FAILED_DETAIL_LIMIT = 500
+
+    # ------------------------------------------------------------------
+    # Creating
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _recipient_filters(filters: Dict) -> List:
+        conditions = []
+        if not filters.get('include_all'):
+            if filters.get('course_id'):
+                conditions.append(CourseApplication.course_id == filters['course_id'])
+            if filters.get('status_filter'):
+                conditions.append(CourseApplication.status == filters['status_filter'])
+        return conditions
+
+    @classmethod
+    def count_recipients(cls, filters: Dict) -> int:
+        """Distinct (case-insensitive) addresses matching the filters"""
+        return db.session.scalar(
+            select(func.count(func.distinct(func.lower(CourseApplication.email))))
+            .where(*cls._recipient_filters(filters))
+        ) or 0
+
+    @classmethod
+    def create(cls, subject: str, message: str, created_by: Optional[int] = None,
+               course_id=None, status_filter=None, include_all=False) -> Optional[EmailCampaign]:
+        """Record a campaign; returns None when no application matches."""
+        filters = {'course_id': course_id, 'status_filter': status_filter, 'include_all': bool(include_all)}
+        total = cls.count_recipients(filters)
+        if not total:
+            return None
+
+        campaign = EmailCampaign(
+            id=str(uuid.uuid4()),
+            created_by=created_by,
+            subject=subject,
+            message=message,
+            filters=json.dumps(filters),
+            status=CampaignStatus.PENDING,
+            total_recipients=total,
+        )
+        db.session.add(campaign)
+        db.session.commit()
+        return campaign
+
+    @staticmethod
+    def renderer(campaign: EmailCampaign) -> Callable[[str], str]:
+        """Render the template once; the returned function fills in a name."""
+        template = custom_application_email(recipient_name=_NAME_SLOT, subject=campaign.subject,
+                                            message=campaign.message)
+        head, _, tail = template.partition(_NAME_SLOT)
+        return lambda name: f'{head}{html.escape(name)}{tail}'
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def _claimable(cls, now: datetime):
+        return or_(
+            EmailCampaign.status == CampaignStatus.PENDING,
+            and_(EmailCampaign.status == CampaignStatus.RUNNING,
+                 or_(EmailCampaign.heartbeat_at.is_(None),
+                     EmailCampaign.heartbeat_at < now - timedelta(seconds=cls.LEASE_SECONDS))),
+        )
+
+    @classmethod
+    def claim(cls, campaign_id: str) -> Optional[str]:
+        """Take the campaign's lease; returns the lease token, or None if another worker holds it."""
+        now = datetime.utcnow()
+        token = str(uuid.uuid4())
+        result = db.session.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign_id, cls._claimable(now))
+            .values(status=CampaignStatus.RUNNING, lease_token=token, heartbeat_at=now,
+                    started_at=func.coalesce(EmailCampaign.started_at, now), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return token if result.rowcount else None
+
+    @classmethod
+    def _queue_page(cls, campaign: Dict, token: str, rows: List, render) -> Optional[List[int]]:
+        """Queue one page and move the checkpoint; returns outbox ids, or None if the lease was lost."""
+        fresh = {}
+        for application_id, email, full_name in rows:
+            key = (email or '').strip().lower()
+            if key and key not in fresh:
+                fresh[key] = (application_id, full_name or 'Applicant')
+
+        if fresh:
+            seen = set(db.session.scalars(
+                select(EmailCampaignRecipient.email)
+                .where(EmailCampaignRecipient.campaign_id == campaign['id'],
+                       EmailCampaignRecipient.email.in_(list(fresh)))
+            ))
+            for key in seen:
+                fresh.pop(key)
+
+        outbox_ids = email_outbox.enqueue_many([
+            {'to_email': email, 'to_name': name, 'subject': campaign['subject'], 'html_content': render(name)}
+            for email, (_, name) in fresh.items()
+        ], category=campaign['category'], commit=False)
+        if fresh:
+            db.session.execute(insert(EmailCampaignRecipient), [
+                {'campaign_id': campaign['id'], 'email': email, 'recipient_name': name,
+                 'application_id': application_id, 'outbox_id': outbox_id}
+                for (email, (application_id, name)), outbox_id in zip(fresh.items(), outbox_ids)
+            ])
+
+        checkpoint = db.session.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign['id'], EmailCampaign.lease_token == token)
+            .values(last_application_id=rows[-1][0],
+                    scanned=EmailCampaign.scanned + len(rows),
+                    queued=EmailCampaign.queued + len(fresh),
+                    duplicates=EmailCampaign.duplicates + len(rows) - len(fresh),
+                    heartbeat_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        if not checkpoint.rowcount:
+            db.session.rollback()
+            return None
+        db.session.commit()
+        return outbox_ids
+
+    @classmethod
+    def run(cls, campaign_id: str, page_size: Optional[int] = None, dispatch: bool = True) -> bool:
+        """
+        Queue the campaign from its checkpoint to the end. Returns False if
+        another worker holds the lease or the lease was lost mid-way.
+        """
+        token = cls.claim(campaign_id)
+        if not token:
+            return False
+
+        page_size = page_size or cls.PAGE_SIZE
+        campaign = db.session.get(EmailCampaign, campaign_id)
+        render = cls.renderer(campaign)
+        conditions = cls._recipient_filters(campaign.get_filters())
+        cursor = campaign.last_application_id
+        # Plain values, so the per-page commits don't reload the row
+        details = {'id': campaign.id, 'subject': campaign.subject, 'category': campaign.outbox_category}
+        logger.info(f"Email campaign {campaign_id}: queueing from application {cursor}")
+
+        try:
+            while True:
+                rows = db.session.execute(
+                    select(CourseApplication.id, CourseApplication.email, CourseApplication.full_name)
+                    .where(CourseApplication.id > cursor, *conditions)
+                    .order_by(CourseApplication.id)
+                    .limit(page_size)
+                ).all()
+                if not rows:
+                    break
+
+                outbox_ids = cls._queue_page(details, token, rows, render)
+                if outbox_ids is None:
+                    logger.warning(f"Email campaign {campaign_id}: lease lost, stopping")
+                    return False
+                cursor = rows[-1][0]
+
+                if dispatch and outbox_ids:
+                    try:
+                        email_outbox.dispatch(ids=outbox_ids)
+                    except Exception as e:
+                        # Rows stay pending for the periodic dispatcher
+                        db.session.rollback()
+                        logger.error(f"Email campaign {campaign_id}: dispatch failed: {e}")
+
+                if len(rows) < page_size:
+                    break
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Email campaign {campaign_id} failed: {e}")
+            db.session.execute(
+                update(EmailCampaign)
+                .where(EmailCampaign.id == campaign_id, EmailCampaign.lease_token == token)
+                .values(status=CampaignStatus.FAILED, lease_token=None, last_error=str(e))
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            return False
+
+        now = datetime.utcnow()
+        db.session.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign_id, EmailCampaign.lease_token == token)
+            .values(status=CampaignStatus.QUEUED, lease_token=None, queued_at=now, heartbeat_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        logger.info(f"Email campaign {campaign_id}: all recipients queued")
+        return True
+
+    @classmethod
+    def resume_campaigns(cls) -> int:
+        """Run every campaign that is pending or whose worker stopped renewing its lease."""
+        ids = list(db.session.scalars(
+            select(EmailCampaign.id).where(cls._claimable(datetime.utcnow())).order_by(EmailCampaign.created_at)
+        ))
+        resumed = 0
+        for campaign_id in ids:
+            if cls.run(campaign_id):
+                resumed += 1
+        return resumed
+
+    @classmethod
+    def resume(cls, campaign_id: str) -> bool:
+        """Make a failed campaign claimable again; it restarts from its checkpoint."""
+        result = db.session.execute(
+            update(EmailCampaign)
+            .where(EmailCampaign.id == campaign_id, EmailCampaign.status == CampaignStatus.FAILED)
+            .values(status=CampaignStatus.PENDING, last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return bool(result.rowcount)
+
+    @staticmethod
+    def retry_failed(campaign_id: str) -> int:
+        """Put the campaign's failed emails back in the outbox queue; returns how many."""
+        campaign = db.session.get(EmailCampaign, campaign_id)
+        if not campaign:
+            return 0
+        result = db.session.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.category == campaign.outbox_category, EmailOutbox.status == OutboxStatus.FAILED)
+            .values(status=OutboxStatus.PENDING, attempts=0, next_attempt_at=datetime.utcnow(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount and campaign.status == CampaignStatus.COMPLETED:
+            campaign.status = CampaignStatus.QUEUED
+            campaign.completed_at = None
+        db.session.commit()
+        return result.rowcount
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def failed_recipients(cls, campaign: EmailCampaign, limit: Optional[int] = None) -> List[Dict]:
+        rows = db.session.execute(
+            select(EmailCampaignRecipient.email, EmailCampaignRecipient.recipient_name,
+                   EmailCampaignRecipient.application_id, EmailOutbox.last_error)
+            .join(EmailOutbox, EmailOutbox.id == EmailCampaignRecipient.outbox_id)
+            .where(EmailCampaignRecipient.campaign_id == campaign.id, EmailOutbox.status == OutboxStatus.FAILED)
+            .order_by(EmailCampaignRecipient.id)
+            .limit(limit or cls.FAILED_DETAIL_LIMIT)
+        ).all()
+        return [{'email': email, 'recipient_name': name, 'application_id': application_id,
+                 'error': error or 'Delivery failed'}
+                for email, name, application_id, error in rows]
+
+    @classmethod
+    def stats(cls, campaign_id: str) -> Optional[Dict]:
+        """Progress, delivery counts, throughput and failures, read from the database."""
+        campaign = db.session.get(EmailCampaign, campaign_id)
+        if not campaign:
+            return None
+
+        counts = email_outbox.status_counts(campaign.outbox_category)
+        first_sent, last_sent = db.session.execute(
+            select(func.min(EmailOutbox.sent_at), func.max(EmailOutbox.sent_at))
+            .where(EmailOutbox.category == campaign.outbox_category, EmailOutbox.status == OutboxStatus.SENT)
+        ).one()
+
+        in_flight = counts[OutboxStatus.PENDING] + counts[OutboxStatus.SENDING]
+        if campaign.status == CampaignStatus.QUEUED and not in_flight:
+            campaign.status = CampaignStatus.COMPLETED
+            campaign.completed_at = last_sent or datetime.utcnow()
+            db.session.commit()
+
+        throughput = None
+        if counts[OutboxStatus.SENT] and campaign.started_at:
+            elapsed = max((last_sent - campaign.started_at).total_seconds(), 1)
+            throughput = round(counts[OutboxStatus.SENT] * 60 / elapsed, 1)
+
+        return dict(
+            campaign.to_dict(),
+            delivery=counts,
+            sent_count=counts[OutboxStatus.SENT],
+            failed_count=counts[OutboxStatus.FAILED],
+            pending_count=in_flight,
+            first_sent_at=first_sent.isoformat() if first_sent else None,
+            last_sent_at=last_sent.isoformat() if last_sent else None,
+            emails_per_minute=throughput,
+            failed_emails=cls.failed_recipients(campaign) if counts[OutboxStatus.FAILED] else [],
+        )
+
+    @staticmethod
+    def recent(limit: int = 20) -> List[EmailCampaign]:
+        return EmailCampaign.query.order_by(EmailCampaign.created_at.desc()).limit(limit).all()
+
+
+_resume_scheduler = BackgroundScheduler(timezone="UTC")
+_resumer_started = False
+
+
+def _resume_with_app(app):
+    with app.app_context():
+        try:
+            EmailCampaignService.resume_campaigns()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Email campaign resume failed: {e}")
+
+
+def start_email_campaign_resumer(app):
+    """
+    Start the periodic job that picks up pending or abandoned campaigns.
+
+    Campaigns are claimed through a lease, so every worker can run it; set
+    ``EMAIL_CAMPAIGN_RESUME_SECONDS=0`` to disable it in a worker.
+    """
+    global _resumer_started
+
+    if _resumer_started:
+        return
+
+    interval = int(app.config.get(
+        "EMAIL_CAMPAIGN_RESUME_SECONDS",
+        os.getenv("EMAIL_CAMPAIGN_RESUME_SECONDS", 60),
+    ))
+    if interval <= 0:
+        logger.info("Email campaign resumer is disabled")
+        return
+
+    _resume_scheduler.add_job(
+        func=lambda: _resume_with_app(app),
+        trigger=IntervalTrigger(seconds=interval),
+        id="email_campaign_resume_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    _resume_scheduler.start()
+    atexit.register(_resume_scheduler.shutdown, wait=False)
+    _resumer_started = True
+    logger.info(f"✅ Email campaign resumer started (every {interval}s)")
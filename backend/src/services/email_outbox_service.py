@@ -0,0 +1,416 @@
+"""Email outbox and batched Brevo dispatcher.
+
+Callers enqueue emails into ``email_outbox`` instead of sending inline. The
+dispatcher claims due rows, packs them into Brevo ``messageVersions``
+requests (one version per recipient) and records each row's outcome:
+
+- Requests are limited to ``BREVO_BATCH_MAX_VERSIONS`` versions and
+  ``BREVO_BATCH_MAX_BYTES`` of content, and paced by a token bucket at
+  ``BREVO_MAX_REQUESTS_PER_SECOND``. ``BREVO_MAX_EMAILS_PER_HOUR`` caps the
+  number of emails sent in any rolling hour, counted from the table so
+  every worker shares the budget.
+- Rate limiting (429) puts the claimed rows back untouched and pauses the
+  run for ``Retry-After``. Server and transport errors back off per
+  recipient (``attempts``, ``next_attempt_at``) until
+  ``EMAIL_OUTBOX_MAX_ATTEMPTS``.
+- Any other 4xx rejects the whole request, so the batch is split in halves
+  until the offending recipient is isolated and marked failed.
+
+Rows are claimed with a token, so several dispatchers can run at once; a
+claim older than ``STALE_CLAIM_SECONDS`` is released on the next run.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import func, insert, update
+
+from ..models.user_models import db
+from ..models.email_outbox_models import EmailOutbox, OutboxStatus
+from ..utils.brevo_email_service import BrevoApiError, BrevoBatchClient
+
+logger = logging.getLogger(__name__)
+
+MAX_VERSIONS_PER_REQUEST = 1000
+MAX_REQUEST_BYTES = 4 * 1024 * 1024
+STALE_CLAIM_SECONDS = 600
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 6 * 3600
+
+
+def _setting(name, default, cast=int):
+    return cast(os.getenv(name, default))
+
+
+_CLAIMED_COLUMNS = (
+    EmailOutbox.id, EmailOutbox.to_email, EmailOutbox.to_name, EmailOutbox.subject, EmailOutbox.html_content,
+    EmailOutbox.text_content, EmailOutbox.headers, EmailOutbox.sender_name, EmailOutbox.attempts,
+)
+
+
+class TokenBucket:
+    """Blocking token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self._sleep(wait)
+                self._tokens = 1.0
+                self._updated = self._clock()
+            self._tokens -= 1
+            return wait
+
+
+class _RateLimited(Exception):
+    def __init__(self, retry_after):
+        self.retry_after = retry_after
+
+
+class EmailOutboxDispatcher:
+    """Enqueues outbox rows and delivers them through Brevo batch requests."""
+
+    def __init__(self, client: Optional[BrevoBatchClient] = None, bucket: Optional[TokenBucket] = None):
+        self._client = client
+        self.bucket = bucket or TokenBucket(_setting('BREVO_MAX_REQUESTS_PER_SECOND', 5, float))
+        self.max_versions = _setting('BREVO_BATCH_MAX_VERSIONS', MAX_VERSIONS_PER_REQUEST)
+        self.max_bytes = _setting('BREVO_BATCH_MAX_BYTES', MAX_REQUEST_BYTES)
+        self.max_per_hour = _setting('BREVO_MAX_EMAILS_PER_HOUR', 0)
+        self.max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+        self._dispatch_lock = threading.Lock()
+
+    @property
+    def client(self) -> Optional[BrevoBatchClient]:
+        if self._client is None:
+            self._client = BrevoBatchClient.from_env()
+        return self._client
+
+    @property
+    def is_configured(self) -> bool:
+        return self.client is not None
+
+    # ------------------------------------------------------------------
+    # Enqueueing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _row(message: Dict, category: Optional[str], now: datetime) -> Dict:
+        headers = message.get('headers')
+        return {
+            'to_email': message['to_email'],
+            'to_name': message.get('to_name'),
+            'subject': message['subject'],
+            'html_content': message.get('html_content'),
+            'text_content': message.get('text_content'),
+            'headers': json.dumps(headers, sort_keys=True) if headers else None,
+            'sender_name': message.get('sender_name'),
+            'category': message.get('category', category),
+            'status': OutboxStatus.PENDING,
+            'attempts': 0,
+            'next_attempt_at': message.get('send_after') or now,
+            'created_at': now,
+        }
+
+    def enqueue(self, to_email: str, subject: str, html_content: Optional[str] = None,
+                text_content: Optional[str] = None, commit: bool = True, **options) -> int:
+        """Queue one email; returns the outbox row id."""
+        return self.enqueue_many([dict(options, to_email=to_email, subject=subject,
+                                       html_content=html_content, text_content=text_content)],
+                                 commit=commit)[0]
+
+    def enqueue_many(self, messages: Iterable[Dict], category: Optional[str] = None,
+                     commit: bool = True) -> List[int]:
+        """Queue many emails with one multi-row insert; returns their ids in order.
+
+        Each message is a dict with ``to_email``, ``subject`` and ``html_content``
+        and/or ``text_content``; optionally ``to_name``, ``headers``,
+        ``sender_name``, ``category`` and ``send_after``.
+        """
+        now = datetime.utcnow()
+        rows = [self._row(message, category, now) for message in messages]
+        if not rows:
+            return []
+        ids = list(db.session.scalars(insert(EmailOutbox).returning(EmailOutbox.id, sort_by_parameter_order=True), rows))
+        if commit:
+            db.session.commit()
+        return ids
+
+    @staticmethod
+    def status_counts(category: Optional[str] = None, ids: Optional[List[int]] = None) -> Dict[str, int]:
+        query = db.session.query(EmailOutbox.status, func.count(EmailOutbox.id))
+        if category is not None:
+            query = query.filter(EmailOutbox.category == category)
+        if ids is not None:
+            query = query.filter(EmailOutbox.id.in_(ids))
+        counts = {status: 0 for status in (OutboxStatus.PENDING, OutboxStatus.SENDING,
+                                           OutboxStatus.SENT, OutboxStatus.FAILED)}
+        counts.update(dict(query.group_by(EmailOutbox.status).all()))
+        return counts
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _release_stale_claims(now: datetime) -> None:
+        db.session.execute(update(EmailOutbox).where(
+            EmailOutbox.status == OutboxStatus.SENDING,
+            EmailOutbox.claimed_at < now - timedelta(seconds=STALE_CLAIM_SECONDS),
+        ).values(status=OutboxStatus.PENDING, claim_token=None, claimed_at=None))
+
+    def _hourly_allowance(self, now: datetime) -> Optional[int]:
+        if self.max_per_hour <= 0:
+            return None
+        sent = db.session.query(func.count(EmailOutbox.id)).filter(
+            EmailOutbox.status == OutboxStatus.SENT,
+            EmailOutbox.sent_at >= now - timedelta(hours=1),
+        ).scalar()
+        return max(self.max_per_hour - sent, 0)
+
+    def _claim(self, limit: int, now: datetime, ids: Optional[List[int]]) -> List:
+        candidates = db.session.query(EmailOutbox.id).filter(
+            EmailOutbox.status == OutboxStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now,
+        )
+        if ids is not None:
+            candidates = candidates.filter(EmailOutbox.id.in_(ids))
+        candidate_ids = [row_id for (row_id,) in candidates.order_by(EmailOutbox.id).limit(limit)
+                         .with_for_update(skip_locked=True)]
+        if not candidate_ids:
+            db.session.commit()
+            return []
+
+        token = str(uuid.uuid4())
+        db.session.execute(update(EmailOutbox).where(
+            EmailOutbox.id.in_(candidate_ids),
+            EmailOutbox.status == OutboxStatus.PENDING,
+        ).values(status=OutboxStatus.SENDING, claim_token=token, claimed_at=now))
+        db.session.commit()
+        # Plain rows rather than entities, so later commits don't expire and reload them
+        return db.session.query(*_CLAIMED_COLUMNS).filter(
+            EmailOutbox.claim_token == token
+        ).order_by(EmailOutbox.id).all()
+
+    # ------------------------------------------------------------------
+    # Packing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _version(row) -> Dict:
+        recipient = {'email': row.to_email}
+        if row.to_name:
+            recipient['name'] = row.to_name
+        version = {'to': [recipient], 'subject': row.subject}
+        if row.html_content:
+            version['htmlContent'] = row.html_content
+        if row.text_content:
+            version['textContent'] = row.text_content
+        return version
+
+    @staticmethod
+    def _size(row) -> int:
+        return len(row.subject) + len(row.html_content or '') + len(row.text_content or '') + len(row.to_email) + 64
+
+    def pack(self, rows: List) -> List[List]:
+        """Group rows by sender name and headers, then cut each group into request-sized batches."""
+        groups = OrderedDict()
+        for row in rows:
+            groups.setdefault((row.sender_name, row.headers), []).append(row)
+
+        batches = []
+        for group in groups.values():
+            batch, size = [], 0
+            for row in group:
+                row_size = self._size(row)
+                if batch and (len(batch) >= self.max_versions or size + row_size > self.max_bytes):
+                    batches.append(batch)
+                    batch, size = [], 0
+                batch.append(row)
+                size += row_size
+            if batch:
+                batches.append(batch)
+        return batches
+
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+
+    def _mark_sent(self, rows: List, message_ids: List[Optional[str]], now: datetime) -> None:
+        db.session.execute(update(EmailOutbox), [{
+            'id': row.id, 'status': OutboxStatus.SENT, 'message_id': message_id, 'sent_at': now,
+            'attempts': row.attempts + 1, 'last_error': None, 'claim_token': None,
+        } for row, message_id in zip(rows, message_ids)])
+
+    def _mark_failed(self, rows: List, error: str, now: datetime, retryable: bool) -> Dict[str, int]:
+        outcome = {'retrying': 0, 'failed': 0}
+        params = []
+        for row in rows:
+            attempts = row.attempts + 1
+            if retryable and attempts < self.max_attempts:
+                delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+                params.append({'id': row.id, 'status': OutboxStatus.PENDING, 'attempts': attempts,
+                               'next_attempt_at': now + timedelta(seconds=delay), 'last_error': error,
+                               'claim_token': None})
+                outcome['retrying'] += 1
+            else:
+                params.append({'id': row.id, 'status': OutboxStatus.FAILED, 'attempts': attempts,
+                               'last_error': error, 'claim_token': None})
+                outcome['failed'] += 1
+        db.session.execute(update(EmailOutbox), params)
+        return outcome
+
+    @staticmethod
+    def _release(rows: List, next_attempt_at: datetime) -> None:
+        """Return claimed rows to the queue without counting an attempt."""
+        if rows:
+            db.session.execute(update(EmailOutbox).where(EmailOutbox.id.in_([row.id for row in rows])).values(
+                status=OutboxStatus.PENDING, next_attempt_at=next_attempt_at, claim_token=None, claimed_at=None,
+            ))
+
+    def _send_batch(self, batch: List, stats: Dict[str, int], done: set) -> None:
+        self.bucket.acquire()
+        stats['requests'] += 1
+        now = datetime.utcnow()
+        try:
+            message_ids = self.client.send_versions(
+                [self._version(row) for row in batch],
+                sender_name=batch[0].sender_name,
+                headers=json.loads(batch[0].headers) if batch[0].headers else None,
+            )
+        except BrevoApiError as e:
+            if e.status_code == 429:
+                raise _RateLimited(e.retry_after)
+            if not e.retryable and len(batch) > 1:
+                # One bad recipient rejects the whole request; bisect to find it
+                middle = len(batch) // 2
+                self._send_batch(batch[:middle], stats, done)
+                self._send_batch(batch[middle:], stats, done)
+                return
+            outcome = self._mark_failed(batch, e.message, now, retryable=e.retryable)
+        except requests.RequestException as e:
+            outcome = self._mark_failed(batch, f"{type(e).__name__}: {e}", now, retryable=True)
+        else:
+            self._mark_sent(batch, message_ids, now)
+            outcome = {'sent': len(batch)}
+        db.session.commit()
+        done.update(row.id for row in batch)
+        for key, value in outcome.items():
+            stats[key] += value
+
+    def dispatch(self, limit: int = 5000, ids: Optional[List[int]] = None) -> Dict[str, int]:
+        """Send due outbox rows (optionally only ``ids``); returns per-outcome counts."""
+        stats = {'sent': 0, 'retrying': 0, 'failed': 0, 'requests': 0, 'deferred': 0}
+        if not self.is_configured:
+            logger.warning("Brevo batch sending not configured - outbox left pending")
+            return stats
+
+        with self._dispatch_lock:
+            now = datetime.utcnow()
+            self._release_stale_claims(now)
+            allowance = self._hourly_allowance(now)
+            if allowance is not None:
+                limit = min(limit, allowance)
+            if limit <= 0:
+                db.session.commit()
+                return stats
+
+            batches = self.pack(self._claim(limit, now, ids))
+            done = set()
+            for index, batch in enumerate(batches):
+                try:
+                    self._send_batch(batch, stats, done)
+                except _RateLimited as e:
+                    db.session.rollback()
+                    retry_after = e.retry_after or 60
+                    unsent = [row for pending in batches[index:] for row in pending if row.id not in done]
+                    self._release(unsent, datetime.utcnow() + timedelta(seconds=retry_after))
+                    db.session.commit()
+                    stats['deferred'] += len(unsent)
+                    logger.warning(f"Brevo rate limit hit; deferring {len(unsent)} emails by {retry_after}s")
+                    break
+                except Exception:
+                    db.session.rollback()
+                    unsent = [row for pending in batches[index:] for row in pending if row.id not in done]
+                    self._release(unsent, datetime.utcnow())
+                    db.session.commit()
+                    raise
+
+        if stats['requests']:
+            logger.info(f"Email outbox dispatch: {stats}")
+        return stats
+
+
+email_outbox = EmailOutboxDispatcher()
+
+_dispatch_scheduler = BackgroundScheduler(timezone="UTC")
+_dispatcher_started = False
+
+
+def _dispatch_with_app(app):
+    with app.app_context():
+        try:
+            email_outbox.dispatch()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Email outbox dispatch failed: {e}")
+
+
+def start_email_outbox_dispatcher(app):
+    """
+    Start the periodic outbox dispatch job for this worker.
+
+    Rows are claimed with a token, so running a dispatcher in every worker is
+    safe; set ``EMAIL_OUTBOX_DISPATCH_SECONDS=0`` to disable it in a worker.
+    """
+    global _dispatcher_started
+
+    if _dispatcher_started:
+        return
+
+    interval = int(app.config.get(
+        "EMAIL_OUTBOX_DISPATCH_SECONDS",
+        os.getenv("EMAIL_OUTBOX_DISPATCH_SECONDS", 10),
+    ))
+    if interval <= 0:
+        logger.info("Email outbox dispatcher is disabled")
+        return
+
+    _dispatch_scheduler.add_job(
+        func=lambda: _dispatch_with_app(app),
+        trigger=IntervalTrigger(seconds=interval),
+        id="email_outbox_dispatch_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    _dispatch_scheduler.start()
+    atexit.register(_dispatch_scheduler.shutdown, wait=False)
+    _dispatcher_started = True
+    logger.info(f"✅ Email outbox dispatcher started (every {interval}s)")
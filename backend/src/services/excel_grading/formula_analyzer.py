@@ -7,7 +7,8 @@ reference types (absolute/relative), error handling, formula complexity.
 
 import re
 import logging
-from typing import Dict, Any, List, Set, Tuple
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Set, Tuple
 from collections import Counter
 
 logger = logging.getLogger(__name__)
@@ -212,14 +213,135 @@ EXPERT_FUNCTIONS = {
     'LINEST', 'LOGEST', 'FORECAST.ETS',
 }
 
-# Regex to extract function names from formulas
-_FUNC_RE = re.compile(r'([A-Z][A-Z0-9_.]+)\s*\(', re.IGNORECASE)
+# ──────────────────────────────────────────────────────────────────────
+# Tokenizer
+# ──────────────────────────────────────────────────────────────────────
+
+# A1-style cell reference; shared by the tokenizer and the R1C1 key builder
+# so both agree on what is a reference.
+_REF = r'(\$?)([A-Za-z]{1,3})(\$?)(\d+)(?![\w(!])'
+
+_TOKEN_RE = re.compile(r"""
+      (?P<string>"(?:[^"]|"")*")
+    | (?P<sheet>'(?:[^']|'')+'!|[A-Za-z_][\w.]*!)
+    | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A|SPILL!|CALC!|GETTING_DATA))
+    | (?P<struct>\[(?:[^\[\]]|\[[^\[\]]*\])*\])
+    | (?P<func>[A-Za-z_][A-Za-z0-9_.]*)(?=\s*\()
+    | (?P<ref>""" + _REF + r""")
+    | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+    | (?P<name>[A-Za-z_\\][\w.]*)
+    | (?P<paren>[()])
+    | (?P<other>[^"'\[\w()\#$]+|.)
+""", re.VERBOSE | re.DOTALL)
+
+# Strings and quoted sheet names are matched first so references inside
+# them are left alone.
+_KEY_RE = re.compile(r"""("(?:[^"]|"")*"|'(?:[^']|'')+'!)|(?<![\w.$])""" + _REF)
+_CELL_RE = re.compile(r'\$?([A-Z]{1,3})\$?(\d+)$')
+_MAGIC_NUMBER_RE = re.compile(r'\d{2,}')
+
+# Prefixes openpyxl keeps on functions newer than Excel 2010
+_FUNCTION_PREFIXES = ('_XLFN._XLWS.', '_XLFN.', '_XLWS.')
+
+TOKEN_CACHE_SIZE = 8192
+
+
+@lru_cache(maxsize=None)
+def _column_number(letters: str) -> int:
+    number = 0
+    for ch in letters.upper():
+        number = number * 26 + (ord(ch) - 64)
+    return number
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def tokenize_formula(formula: str) -> Tuple[Tuple[str, str], ...]:
+    """Split a formula into (kind, text) tokens; cached by formula text."""
+    return tuple((match.lastgroup, match.group()) for match in _TOKEN_RE.finditer(formula))
+
+
+def r1c1_key(formula: str, cell: str) -> str:
+    """
+    Rewrite a formula's references relative to its own cell (R1C1 style).
+
+    ``=A2*$B$1`` in C2 and ``=A3*$B$1`` in C3 both become
+    ``=R[0]C[-2]*R1C2``, so a formula filled down a column has one key.
+    Formulas whose cell cannot be parsed are keyed by their text.
+    """
+    parts = _KEY_RE.split(formula)
+    if len(parts) == 1:
+        return formula
+    origin = _CELL_RE.match(cell or '')
+    if not origin:
+        return formula
+    base_col, base_row = _column_number(origin.group(1)), int(origin.group(2))
+
+    # split() yields: text, then per match (quoted, $col, letters, $row, row, text)
+    out = [parts[0]]
+    for i in range(1, len(parts), 6):
+        quoted, col_abs, letters, row_abs, row, tail = parts[i:i + 6]
+        if quoted is not None:
+            out.append(quoted)
+        else:
+            col = _column_number(letters)
+            out.append(f"R{row}" if row_abs else f"R[{int(row) - base_row}]")
+            out.append(f"C{col}" if col_abs else f"C[{col - base_col}]")
+        out.append(tail)
+    return ''.join(out)
+
+
+class FormulaProfile(NamedTuple):
+    """Per-formula facts; identical for every formula sharing an R1C1 key."""
+    functions: Tuple[str, ...]
+    absolute_refs: int
+    mixed_refs: int
+    relative_refs: int
+    nesting: int
+    has_magic_number: bool
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def profile_formula(formula: str) -> FormulaProfile:
+    """Analyze one formula from its tokens."""
+    functions = []
+    absolute = mixed = relative = 0
+    depth = max_depth = 0
+    magic = False
+
+    for kind, text in tokenize_formula(formula):
+        if kind == 'func':
+            name = text.upper()
+            for prefix in _FUNCTION_PREFIXES:
+                if name.startswith(prefix):
+                    name = name[len(prefix):]
+                    break
+            functions.append(name)
+        elif kind == 'ref':
+            dollars = text.count('$')
+            if dollars == 2:
+                absolute += 1
+            elif dollars == 1:
+                mixed += 1
+            else:
+                relative += 1
+        elif kind == 'paren':
+            if text == '(':
+                depth += 1
+                max_depth = max(max_depth, depth)
+            else:
+                depth -= 1
+        elif kind == 'number' and not magic:
+            magic = _MAGIC_NUMBER_RE.search(text) is not None
+
+    return FormulaProfile(tuple(functions), absolute, mixed, relative, max_depth, magic)
 
-# Absolute reference patterns
-_ABS_COL_RE = re.compile(r'\$[A-Z]+\d+')
-_ABS_ROW_RE = re.compile(r'[A-Z]+\$\d+')
-_ABS_BOTH_RE = re.compile(r'\$[A-Z]+\$\d+')
-_RELATIVE_RE = re.compile(r'(?<!\$)[A-Z]+(?<!\$)\d+')
+
+class FormulaGroup(NamedTuple):
+    """Formulas sharing one R1C1 key: the first occurrence and how many there are."""
+    key: str
+    formula: Dict[str, Any]
+    count: int
+    profile: FormulaProfile
 
 
 class FormulaAnalyzer:
@@ -232,7 +354,9 @@ class FormulaAnalyzer:
         """
         self.analysis_data = analysis_data
         self.all_formulas: List[Dict[str, Any]] = []
+        self.formula_groups: List[FormulaGroup] = []
         self._collect_formulas()
+        self._group_formulas()
 
     def _collect_formulas(self):
         """Gather all formulas from all sheets."""
@@ -240,6 +364,27 @@ class FormulaAnalyzer:
             for f in sheet.get('formulas', []):
                 self.all_formulas.append(f)
 
+    def _group_formulas(self):
+        """
+        Group formulas by their R1C1 key.
+
+        A formula filled down thousands of rows becomes one group, so each
+        logical formula is tokenized and profiled once and its results are
+        weighted by the group size.
+        """
+        firsts: Dict[str, Dict[str, Any]] = {}
+        counts: Counter = Counter()
+        for f in self.all_formulas:
+            key = r1c1_key(f.get('formula', ''), f.get('cell', ''))
+            if key not in firsts:
+                firsts[key] = f
+            counts[key] += 1
+
+        self.formula_groups = [
+            FormulaGroup(key, f, counts[key], profile_formula(f.get('formula', '')))
+            for key, f in firsts.items()
+        ]
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -264,12 +409,13 @@ class FormulaAnalyzer:
         advanced = self._find_advanced_functions(functions_used)
         expert = self._find_expert_functions(functions_used)
         refs = self._analyze_references()
-        errors = self._check_error_handling()
+        errors = self._check_error_handling(functions_used)
         complexity = self._compute_complexity(functions_used, categories, advanced, refs)
         issues = self._find_issues()
 
         return {
             'formula_count': len(self.all_formulas),
+            'unique_formula_count': len(self.formula_groups),
             'functions_used': sorted(functions_used.keys()),
             'function_frequency': dict(functions_used.most_common(30)),
             'function_categories': categories,
@@ -290,13 +436,11 @@ class FormulaAnalyzer:
     # ------------------------------------------------------------------
 
     def _extract_all_functions(self) -> Counter:
-        """Extract and count all function names from formulas."""
+        """Count function calls across all formulas."""
         counter: Counter = Counter()
-        for f in self.all_formulas:
-            formula_text = f.get('formula', '')
-            matches = _FUNC_RE.findall(formula_text)
-            for m in matches:
-                counter[m.upper()] += 1
+        for group in self.formula_groups:
+            for fn in group.profile.functions:
+                counter[fn] += group.count
         return counter
 
     def _categorize_functions(self, func_counts: Counter) -> Dict[str, List[str]]:
@@ -318,21 +462,9 @@ class FormulaAnalyzer:
 
     def _analyze_references(self) -> Dict[str, Any]:
         """Analyze absolute vs relative references."""
-        absolute_count = 0
-        relative_count = 0
-        mixed_count = 0
-
-        for f in self.all_formulas:
-            text = f.get('formula', '')
-            abs_both = len(_ABS_BOTH_RE.findall(text))
-            abs_col = len(_ABS_COL_RE.findall(text)) - abs_both
-            abs_row = len(_ABS_ROW_RE.findall(text)) - abs_both
-            absolute_count += abs_both
-            mixed_count += abs_col + abs_row
-
-            # Approximate relative (not preceded by $)
-            all_refs = len(re.findall(r'[A-Z]+\d+', text))
-            relative_count += max(0, all_refs - abs_both - abs_col - abs_row)
+        absolute_count = sum(g.profile.absolute_refs * g.count for g in self.formula_groups)
+        mixed_count = sum(g.profile.mixed_refs * g.count for g in self.formula_groups)
+        relative_count = sum(g.profile.relative_refs * g.count for g in self.formula_groups)
 
         total = absolute_count + relative_count + mixed_count or 1
         return {
@@ -344,15 +476,9 @@ class FormulaAnalyzer:
             'uses_mixed_references': mixed_count > 0,
         }
 
-    def _check_error_handling(self) -> Dict[str, Any]:
+    def _check_error_handling(self, func_counts: Counter) -> Dict[str, Any]:
         """Check if formulas use error handling functions."""
-        error_funcs = FUNCTION_CATEGORIES['error_handling']
-        used = set()
-        for f in self.all_formulas:
-            text = f.get('formula', '').upper()
-            for fn in error_funcs:
-                if fn in text:
-                    used.add(fn)
+        used = {fn for fn in func_counts if fn in FUNCTION_CATEGORIES['error_handling']}
 
         # Also check for existing cell errors in the workbook
         cell_errors = []
@@ -395,40 +521,18 @@ class FormulaAnalyzer:
         if refs.get('uses_mixed_references'):
             score += 7
 
-        # Nesting depth approximation (0-20)
-        max_nesting = 0
-        for f in self.all_formulas:
-            text = f.get('formula', '')
-            depth = self._estimate_nesting(text)
-            max_nesting = max(max_nesting, depth)
+        # Nesting depth (0-20)
+        max_nesting = max((g.profile.nesting for g in self.formula_groups), default=0)
         score += min(20, max_nesting * 4)
 
         return min(100, score)
 
-    def _estimate_nesting(self, formula: str) -> int:
-        """Estimate nesting depth by counting nested parentheses."""
-        max_depth = 0
-        depth = 0
-        for ch in formula:
-            if ch == '(':
-                depth += 1
-                max_depth = max(max_depth, depth)
-            elif ch == ')':
-                depth -= 1
-        return max_depth
-
     def _find_issues(self) -> List[Dict[str, str]]:
         """Detect common formula issues."""
         issues = []
 
         # Check for hard-coded numbers in formulas (magic numbers)
-        magic_number_count = 0
-        for f in self.all_formulas:
-            text = f.get('formula', '')
-            # Numbers not part of cell refs or function names
-            nums = re.findall(r'(?<![A-Z$])(\d{2,})(?!\d*[A-Z])', text)
-            if nums:
-                magic_number_count += 1
+        magic_number_count = sum(g.count for g in self.formula_groups if g.profile.has_magic_number)
 
         if magic_number_count > 5:
             issues.append({
@@ -444,12 +548,14 @@ class FormulaAnalyzer:
                     'description': f"Cell {err['cell']} in sheet '{err['sheet']}' has error: {err['error']}",
                 })
 
-        # Check for very long formulas (possible inefficiency)
-        for f in self.all_formulas:
+        # Check for very long formulas (possible inefficiency), once per filled-down group
+        for group in self.formula_groups:
+            f = group.formula
             if len(f.get('formula', '')) > 500:
+                repeated = f" (repeated in {group.count - 1} other cells)" if group.count > 1 else ''
                 issues.append({
                     'type': 'complex_formula',
-                    'description': f"Cell {f['cell']} in sheet '{f['sheet']}' has a very long formula ({len(f['formula'])} chars). Consider breaking into helper columns.",
+                    'description': f"Cell {f['cell']} in sheet '{f['sheet']}' has a very long formula ({len(f['formula'])} chars){repeated}. Consider breaking into helper columns.",
                 })
 
         return issues
@@ -369,6 +369,130 @@ _CONCEPT_VOCABULARY: List[Tuple[str, str, str, float, str]] = [
 ]
 
 
+# ──────────────────────────────────────────────────────────────────────
+# Compiled keyword matching
+#
+# Concept extraction used to run one ``keyword in text`` search per
+# vocabulary entry, each a full pass over the instructions whenever the
+# keyword is absent — which is most of them.  ``KeywordMatcher`` compiles
+# the vocabulary once into a single trie-shaped regex and finds every
+# occurrence in one pass.  The short cue lists below stay plain ``in``
+# checks: over a task's few hundred characters they are cheaper than
+# any regex scan.
+# ──────────────────────────────────────────────────────────────────────
+
+class KeywordMatcher:
+    """
+    Finds every occurrence of a fixed set of lower-case keywords in one pass.
+
+    The keywords are compiled into a character trie rendered as a regex
+    (``pivot(?: chart| table|chart|table)`` …) inside a lookahead, so the
+    scan visits each start position once and reports the longest keyword
+    beginning there.  Shorter keywords at the same position are exactly
+    the keywords that prefix the longest one, which is precomputed, so
+    overlapping and nested matches ("scenario manager" / "scenario") are
+    all reported — the same results as testing each keyword with ``in``.
+    """
+
+    def __init__(self, keywords):
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+        self._pattern = re.compile('(?=(' + self._trie_pattern(self.keywords) + '))')
+        # Longest match at a position → every keyword matching there, longest first
+        self._at_position: Dict[str, Tuple[str, ...]] = {
+            keyword: tuple(sorted(
+                (other for other in self.keywords if keyword.startswith(other)),
+                key=len, reverse=True,
+            ))
+            for keyword in self.keywords
+        }
+
+    @staticmethod
+    def _trie_pattern(keywords: List[str]) -> str:
+        trie: Dict[str, Any] = {}
+        for keyword in keywords:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[''] = True
+
+        def render(node: Dict[str, Any]) -> str:
+            branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # A keyword ends here: the longer continuation is optional (and tried first)
+            return '(?:' + body + ')?' if '' in node else body
+
+        return render(trie) if keywords else '(?!)'
+
+    def finditer(self, text_lower: str):
+        """Yield ``(start, end, keyword)`` for every occurrence, in text order."""
+        for match in self._pattern.finditer(text_lower):
+            start = match.start()
+            for keyword in self._at_position[match.group(1)]:
+                yield start, start + len(keyword), keyword
+
+    def found(self, text_lower: str) -> set:
+        """The set of keywords occurring anywhere in ``text_lower``."""
+        at_position = self._at_position
+        present = set()
+        # findall stays in C; only distinct longest matches need expanding
+        for longest in set(self._pattern.findall(text_lower)):
+            present.update(at_position[longest])
+        return present
+
+
+_CONCEPT_MATCHER = KeywordMatcher(entry[0] for entry in _CONCEPT_VOCABULARY)
+_VOCABULARY_POSITION = {entry[0]: i for i, entry in enumerate(_CONCEPT_VOCABULARY)}
+
+# Task classification cues, checked in priority order
+_TASK_TYPE_CUES: List[Tuple[str, Tuple[str, ...]]] = [
+    ('theoretical',     ('explain', 'justify', 'describe', 'reflection', 'compare', 'benefit')),
+    ('practical_build', ('create', 'build', 'design', 'construct', 'implement')),
+    ('definition',      ('define', 'specify', 'identify', 'outline')),
+    ('calculation',     ('calculate', 'compute', 'formula', 'function')),
+    ('formatting',      ('format', 'style', 'layout')),
+]
+# Each advanced concept adds to a task's complexity estimate
+_ADVANCED_CUES = ('data model', 'calculated item', 'calculated field',
+                  'relationship', 'vba', 'power query', 'lambda', 'dynamic array')
+# Theoretical questions are generally lighter in grading weight
+_LIGHT_CUES = ('explain', 'justify', 'reflection')
+
+_PART_RE = re.compile(
+    r'(?:^|\n)\s*(?:Part|Section|Phase)\s+(\d+)\s*[:\-—–]\s*(.+?)(?=\n|$)',
+    re.IGNORECASE | re.MULTILINE,
+)
+_TASK_RE = re.compile(
+    r'(?:^|\n)\s*(\d+)\s*[.)]\s*(.+?)(?=\n\s*\d+\s*[.)]|\n\s*(?:Part|Section)\s+\d|\Z)',
+    re.IGNORECASE | re.DOTALL,
+)
+_WHITESPACE_RE = re.compile(r'\s+')
+_QUOTED_RE = re.compile(r"['\"]([^'\"]+)['\"]")
+_FORMULA_RE = re.compile(r'=\s*[A-Za-z]+\([^)]*\)')
+_NAMED_RE = re.compile(r'named?\s+["\']?(\w[\w\s]+\w)["\']?')
+_STEP_RE = re.compile(r'\d+[.)]\s')
+_TASK_NUMBER_RE = re.compile(r'(?:^|\s)(\d+)\s*[.)]')
+
+
+def find_concept_mentions(text: str) -> List[Dict[str, Any]]:
+    """
+    Every vocabulary keyword occurrence in ``text`` with its position.
+
+    Positions index into ``text.lower()``, which for practically all
+    instruction text lines up with ``text`` itself.
+    """
+    return [
+        {
+            'keyword': keyword,
+            'concept_id': _CONCEPT_VOCABULARY[_VOCABULARY_POSITION[keyword]][1],
+            'start': start,
+            'end': end,
+        }
+        for start, end, keyword in _CONCEPT_MATCHER.finditer(text.lower())
+    ]
+
+
 class RubricGenerator:
     """
     Generates a structured rubric from assignment instructions.
@@ -471,12 +595,7 @@ class RubricGenerator:
         parts = []
 
         # Pattern: "Part N:" or "Part N —" or "Section N:" etc.
-        part_pattern = re.compile(
-            r'(?:^|\n)\s*(?:Part|Section|Phase)\s+(\d+)\s*[:\-—–]\s*(.+?)(?=\n|$)',
-            re.IGNORECASE | re.MULTILINE,
-        )
-
-        for match in part_pattern.finditer(text):
+        for match in _PART_RE.finditer(text):
             part_num = int(match.group(1))
             part_title = match.group(2).strip()
             part_start = match.end()
@@ -511,16 +630,11 @@ class RubricGenerator:
         tasks = []
 
         # Pattern: "N." or "N)" at start of line, followed by task text
-        task_pattern = re.compile(
-            r'(?:^|\n)\s*(\d+)\s*[.)]\s*(.+?)(?=\n\s*\d+\s*[.)]|\n\s*(?:Part|Section)\s+\d|\Z)',
-            re.IGNORECASE | re.DOTALL,
-        )
-
-        for match in task_pattern.finditer(text):
+        for match in _TASK_RE.finditer(text):
             task_num = int(match.group(1))
             task_text = match.group(2).strip()
             # Clean up multi-line continuations
-            task_text = re.sub(r'\s+', ' ', task_text)
+            task_text = _WHITESPACE_RE.sub(' ', task_text)
 
             # Determine task type
             task_type = self._classify_task(task_text)
@@ -544,28 +658,29 @@ class RubricGenerator:
 
     def _extract_concepts(self, text: str) -> List[Dict[str, Any]]:
         """Extract Excel concepts mentioned in the text using vocabulary."""
-        text_lower = text.lower()
+        matched = _CONCEPT_MATCHER.found(text.lower())
         found_concepts: Dict[str, Dict[str, Any]] = {}
 
-        for keyword, concept_id, category, weight, label in _CONCEPT_VOCABULARY:
-            if keyword in text_lower:
-                if concept_id not in found_concepts:
-                    found_concepts[concept_id] = {
-                        'id': concept_id,
-                        'category': category,
-                        'weight': weight,
-                        'label': label,
-                        'keywords_matched': [keyword],
-                    }
-                else:
-                    # Already found — add keyword but don't duplicate
-                    if keyword not in found_concepts[concept_id]['keywords_matched']:
-                        found_concepts[concept_id]['keywords_matched'].append(keyword)
-                    # Boost weight slightly for multiple keyword matches
-                    found_concepts[concept_id]['weight'] = min(
-                        found_concepts[concept_id]['weight'] + 0.5,
-                        6.0,
-                    )
+        # Vocabulary order decides concept order and which keyword comes first
+        for position in sorted(_VOCABULARY_POSITION[keyword] for keyword in matched):
+            keyword, concept_id, category, weight, label = _CONCEPT_VOCABULARY[position]
+            if concept_id not in found_concepts:
+                found_concepts[concept_id] = {
+                    'id': concept_id,
+                    'category': category,
+                    'weight': weight,
+                    'label': label,
+                    'keywords_matched': [keyword],
+                }
+            else:
+                # Already found — add keyword but don't duplicate
+                if keyword not in found_concepts[concept_id]['keywords_matched']:
+                    found_concepts[concept_id]['keywords_matched'].append(keyword)
+                # Boost weight slightly for multiple keyword matches
+                found_concepts[concept_id]['weight'] = min(
+                    found_concepts[concept_id]['weight'] + 0.5,
+                    6.0,
+                )
 
         return list(found_concepts.values())
 
@@ -628,9 +743,10 @@ class RubricGenerator:
         elif tasks:
             # ── Task-based criteria (no parts detected) ────────
             for task in tasks:
+                task_text = task['text'].lower()
                 task_concepts = [
                     c for c in concepts
-                    if any(kw in task['text'].lower() for kw in c.get('keywords_matched', []))
+                    if any(kw in task_text for kw in c.get('keywords_matched', []))
                 ]
                 category = self._primary_category(task_concepts) or self._category_from_task_type(task['type'])
 
@@ -740,16 +856,9 @@ class RubricGenerator:
         """Classify a task into a type category."""
         text = task_text.lower()
 
-        if any(kw in text for kw in ['explain', 'justify', 'describe', 'reflection', 'compare', 'benefit']):
-            return 'theoretical'
-        if any(kw in text for kw in ['create', 'build', 'design', 'construct', 'implement']):
-            return 'practical_build'
-        if any(kw in text for kw in ['define', 'specify', 'identify', 'outline']):
-            return 'definition'
-        if any(kw in text for kw in ['calculate', 'compute', 'formula', 'function']):
-            return 'calculation'
-        if any(kw in text for kw in ['format', 'style', 'layout']):
-            return 'formatting'
+        for task_type, keywords in _TASK_TYPE_CUES:
+            if any(kw in text for kw in keywords):
+                return task_type
         return 'general'
 
     def _extract_expected_elements(self, task_text: str) -> List[str]:
@@ -758,17 +867,17 @@ class RubricGenerator:
         text = task_text.lower()
 
         # Look for quoted terms (column names, labels, etc.)
-        quoted = re.findall(r"['\"]([^'\"]+)['\"]", task_text)
+        quoted = _QUOTED_RE.findall(task_text)
         for q in quoted:
             if len(q) < 60:
                 elements.append(q)
 
         # Look for specific formulas or expressions
-        formula_match = re.findall(r'=\s*[A-Za-z]+\([^)]*\)', task_text)
+        formula_match = _FORMULA_RE.findall(task_text)
         elements.extend(formula_match[:5])
 
         # Look for "named X" patterns
-        named_pattern = re.findall(r'named?\s+["\']?(\w[\w\s]+\w)["\']?', text)
+        named_pattern = _NAMED_RE.findall(text)
         for n in named_pattern:
             if len(n) < 40:
                 elements.append(f"Named: {n.strip()}")
@@ -787,18 +896,16 @@ class RubricGenerator:
             score += 0.5
 
         # Multiple sub-steps
-        step_count = len(re.findall(r'\d+[.)]\s', text))
+        step_count = len(_STEP_RE.findall(text))
         score += min(step_count * 0.3, 1.5)
 
         # Advanced concepts
-        advanced = ['data model', 'calculated item', 'calculated field',
-                     'relationship', 'vba', 'power query', 'lambda', 'dynamic array']
-        for kw in advanced:
+        for kw in _ADVANCED_CUES:
             if kw in text:
                 score += 0.5
 
         # Theoretical questions are generally lighter in grading weight
-        if any(kw in text for kw in ['explain', 'justify', 'reflection']):
+        if any(kw in text for kw in _LIGHT_CUES):
             score = max(score - 0.3, 1.0)
 
         return min(score, 5.0)
@@ -819,7 +926,7 @@ class RubricGenerator:
         # Find the task number range for this part
         # The first task after the part header, up to the next part
         part_text = part.get('text', '')
-        task_nums_in_text = [int(m) for m in re.findall(r'(?:^|\s)(\d+)\s*[.)]', part_text)]
+        task_nums_in_text = [int(m) for m in _TASK_NUMBER_RE.findall(part_text)]
 
         if task_nums_in_text:
             return [t for t in tasks if t['number'] in task_nums_in_text]
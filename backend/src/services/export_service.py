@@ -0,0 +1,535 @@
+"""
+Streaming export engine for admin CSV / Excel downloads.
+
+Exports used to load every matching row with ``.all()``, build a pandas
+DataFrame (or a full in-memory CSV string) and only then send it, so memory
+grew with the result set and large exports timed out.  Rows are now read
+with a server-side cursor (``yield_per``) and written incrementally:
+
+* CSV is streamed to the client in chunks as rows are read.
+* Excel uses openpyxl's write-only workbook, which keeps only the current
+  row in memory, and is written to a temporary file that is then streamed.
+* Summary statistics come from one aggregate query instead of repeated
+  Python scans over the loaded rows.
+
+Exports above ``EXPORT_SYNC_ROW_LIMIT`` rows (or when ``async=true`` is
+passed) run as a background task; the file is written under
+``uploads/exports`` and downloaded once the task completes.
+
+Each export kind is a builder registered in ``EXPORT_BUILDERS`` that turns a
+dict of JSON-able filter params into an :class:`ExportSpec`.  Builders are
+re-run inside the background thread so no query or session object crosses
+threads.
+"""
+
+import csv
+import io
+import logging
+import os
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import Response, send_file, stream_with_context
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import joinedload
+
+from ..models.user_models import db
+from ..models.course_application import CourseApplication
+from ..models.internship_models import (
+    InternshipApplication,
+    InternshipOfferLetter,
+    InternshipTaskAssignment,
+    ApplicationStatusEnum,
+    ApplicantTypeEnum,
+    AssignmentStatusEnum,
+)
+from .background_service import background_service
+
+logger = logging.getLogger(__name__)
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+EXPORT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads', 'exports'
+)
+
+
+@dataclass
+class ExportSpec:
+    """Everything the engine needs to write one export."""
+
+    headers: List[str]
+    query: Any
+    row: Callable[[Any], List[Any]]
+    filename: str
+    sheet_title: str = 'Export'
+    # Optional callable returning ``[(metric, value), ...]`` for a summary sheet
+    summary: Optional[Callable[[], List[Tuple[str, Any]]]] = None
+    default_format: str = 'csv'
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+# ============================================================================
+# Builders
+# ============================================================================
+
+def _fmt_datetime(value, fmt='%Y-%m-%d'):
+    return value.strftime(fmt) if value else ''
+
+
+def build_course_applications_export(params: Dict[str, Any]) -> ExportSpec:
+    """Course applications (``GET /api/v1/applications/export``)."""
+    course_id = params.get('course_id')
+    status = params.get('status')
+    cohort_label = params.get('cohort_label')
+    application_window_id_raw = params.get('application_window_id')
+
+    query = CourseApplication.query
+    if course_id:
+        query = query.filter_by(course_id=course_id)
+    if status:
+        query = query.filter_by(status=status)
+    if application_window_id_raw and str(application_window_id_raw).lower() == 'none':
+        query = query.filter(CourseApplication.application_window_id.is_(None))
+    elif application_window_id_raw:
+        try:
+            query = query.filter_by(application_window_id=int(application_window_id_raw))
+        except (ValueError, TypeError):
+            pass
+    elif cohort_label:
+        query = query.filter_by(cohort_label=cohort_label)
+
+    def summary():
+        def count_where(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+        totals = query.order_by(None).with_entities(
+            func.count(CourseApplication.id),
+            count_where(CourseApplication.status == 'pending'),
+            count_where(CourseApplication.status == 'approved'),
+            count_where(CourseApplication.status == 'rejected'),
+            count_where(CourseApplication.status == 'waitlisted'),
+            count_where(CourseApplication.is_high_risk.is_(True)),
+        ).one()
+        labels = ["Total", "Pending", "Approved", "Rejected", "Waitlisted", "High Risk"]
+        return [(label, int(value or 0)) for label, value in zip(labels, totals)]
+
+    def row(a):
+        return [
+            a.id, a.full_name, a.email, a.phone, a.country, a.city,
+            a.age_range, a.gender, a.education_level, a.current_status,
+            a.field_of_study, a.excel_skill_level, a.has_computer,
+            a.internet_access_type, a.preferred_learning_mode,
+            a.committed_to_complete, a.agrees_to_assessments,
+            a.risk_score, a.is_high_risk, a.application_score,
+            a.readiness_score, a.commitment_score, a.final_rank_score,
+            a.status, a.cohort_label or "", a.referral_source,
+            _fmt_datetime(a.created_at, '%Y-%m-%d %H:%M'),
+        ]
+
+    stamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+    return ExportSpec(
+        headers=[
+            "ID", "Full Name", "Email", "Phone", "Country", "City", "Age Range",
+            "Gender", "Education", "Current Status", "Field of Study",
+            "Excel Skill", "Has Computer", "Internet Type", "Learning Mode",
+            "Committed", "Agrees to Assessments", "Risk Score", "High Risk",
+            "Application Score", "Readiness Score", "Commitment Score",
+            "Final Rank", "Status", "Cohort", "Referral Source", "Applied At",
+        ],
+        query=query.order_by(CourseApplication.final_rank_score.desc(), CourseApplication.id.asc()),
+        row=row,
+        filename=f"applications_course_{course_id}_{stamp}",
+        sheet_title='Applications',
+        summary=summary,
+        default_format='xlsx',
+    )
+
+
+def build_internship_applications_export(params: Dict[str, Any]) -> ExportSpec:
+    """Internship applications (``GET /api/v1/internships/admin/applications/export``)."""
+    query = InternshipApplication.query.options(
+        joinedload(InternshipApplication.track),
+        joinedload(InternshipApplication.cohort),
+        joinedload(InternshipApplication.reviewer),
+    )
+
+    status_filter = params.get('status')
+    if status_filter:
+        try:
+            query = query.filter(InternshipApplication.status == ApplicationStatusEnum(status_filter))
+        except ValueError:
+            pass
+    if params.get('track_id'):
+        query = query.filter(InternshipApplication.track_id == params['track_id'])
+    if params.get('cohort_id'):
+        query = query.filter(InternshipApplication.cohort_id == params['cohort_id'])
+    applicant_type = params.get('applicant_type')
+    if applicant_type:
+        try:
+            query = query.filter(InternshipApplication.applicant_type == ApplicantTypeEnum(applicant_type))
+        except ValueError:
+            pass
+    search = params.get('search')
+    if search:
+        search_term = f"%{search}%"
+        query = query.filter(or_(
+            InternshipApplication.full_name.ilike(search_term),
+            InternshipApplication.email.ilike(search_term),
+            InternshipApplication.reference_code.ilike(search_term),
+        ))
+    for key, op in (('start_date', '__ge__'), ('end_date', '__le__')):
+        if params.get(key):
+            try:
+                bound = datetime.fromisoformat(params[key])
+            except ValueError:
+                continue
+            query = query.filter(getattr(InternshipApplication.created_at, op)(bound))
+
+    def row(app):
+        return [
+            app.reference_code,
+            app.full_name,
+            app.email,
+            app.phone,
+            app.applicant_type.value if app.applicant_type else '',
+            app.track.name if app.track else '',
+            app.cohort.cohort_code if app.cohort else '',
+            app.status.value if app.status else '',
+            app.motivation_letter[:200] if app.motivation_letter else '',
+            app.portfolio_url or '',
+            app.github_url or '',
+            app.linkedin_url or '',
+            f"{app.reviewer.first_name} {app.reviewer.last_name}" if app.reviewer else '',
+            app.reviewer_notes or '',
+            _fmt_datetime(app.interview_date, '%Y-%m-%d %H:%M'),
+            app.interview_notes or '',
+            _fmt_datetime(app.created_at),
+            _fmt_datetime(app.updated_at),
+        ]
+
+    return ExportSpec(
+        headers=[
+            'Reference Code', 'Full Name', 'Email', 'Phone', 'Applicant Type',
+            'Track', 'Cohort', 'Status', 'Motivation Letter',
+            'Portfolio URL', 'GitHub URL', 'LinkedIn URL',
+            'Reviewer', 'Reviewer Notes', 'Interview Date', 'Interview Notes',
+            'Applied Date', 'Last Updated',
+        ],
+        query=query.order_by(InternshipApplication.created_at.desc(), InternshipApplication.id.asc()),
+        row=row,
+        filename='applications_export',
+        sheet_title='Applications',
+    )
+
+
+def build_internship_interns_export(params: Dict[str, Any]) -> ExportSpec:
+    """
+    Accepted interns (``GET /api/v1/internships/admin/interns/export``).
+
+    Offer letters and task statistics are joined in as grouped subqueries
+    rather than queried per intern.
+    """
+    task_stats = db.session.query(
+        InternshipTaskAssignment.intern_id.label('intern_id'),
+        func.count(InternshipTaskAssignment.id).label('total'),
+        func.sum(case(
+            (InternshipTaskAssignment.status == AssignmentStatusEnum.APPROVED, 1), else_=0
+        )).label('approved'),
+        func.avg(InternshipTaskAssignment.score).label('avg_score'),
+    ).group_by(InternshipTaskAssignment.intern_id).subquery()
+
+    query = db.session.query(
+        InternshipApplication,
+        InternshipOfferLetter.offer_number,
+        InternshipOfferLetter.status,
+        task_stats.c.total,
+        task_stats.c.approved,
+        task_stats.c.avg_score,
+    ).outerjoin(
+        InternshipOfferLetter, InternshipOfferLetter.application_id == InternshipApplication.id
+    ).outerjoin(
+        task_stats, task_stats.c.intern_id == InternshipApplication.id
+    ).options(
+        joinedload(InternshipApplication.track),
+        joinedload(InternshipApplication.cohort),
+    ).filter(InternshipApplication.status == ApplicationStatusEnum.ACCEPTED)
+
+    if params.get('cohort_id'):
+        query = query.filter(InternshipApplication.cohort_id == params['cohort_id'])
+    if params.get('track_id'):
+        query = query.filter(InternshipApplication.track_id == params['track_id'])
+
+    def row(result):
+        intern, offer_number, offer_status, total, approved, avg_score = result
+        total = int(total or 0)
+        approved = int(approved or 0)
+        return [
+            intern.reference_code,
+            intern.full_name,
+            intern.email,
+            intern.phone,
+            intern.track.name if intern.track else '',
+            intern.cohort.cohort_code if intern.cohort else '',
+            intern.status.value if intern.status else '',
+            offer_number or '',
+            offer_status or '',
+            total,
+            approved,
+            round(approved / total * 100) if total > 0 else 0,
+            round(float(avg_score), 1) if avg_score else '',
+            _fmt_datetime(intern.created_at),
+            _fmt_datetime(intern.updated_at),
+        ]
+
+    return ExportSpec(
+        headers=[
+            'Reference Code', 'Full Name', 'Email', 'Phone',
+            'Track', 'Cohort', 'Status', 'Offer Number', 'Offer Status',
+            'Total Tasks', 'Completed', 'Progress %', 'Avg Score',
+            'Applied Date', 'Last Updated',
+        ],
+        query=query.order_by(InternshipApplication.full_name.asc(), InternshipApplication.id.asc()),
+        row=row,
+        filename='interns_export',
+        sheet_title='Interns',
+    )
+
+
+EXPORT_BUILDERS: Dict[str, Callable[[Dict[str, Any]], ExportSpec]] = {
+    'course_applications': build_course_applications_export,
+    'internship_applications': build_internship_applications_export,
+    'internship_interns': build_internship_interns_export,
+}
+
+
+# ============================================================================
+# Engine
+# ============================================================================
+
+class ExportService:
+    """Writes :class:`ExportSpec` results as streamed CSV or write-only XLSX."""
+
+    FORMATS = ('csv', 'xlsx')
+
+    @staticmethod
+    def batch_size() -> int:
+        """Rows fetched per round-trip from the server-side cursor."""
+        return int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+
+    @staticmethod
+    def sync_row_limit() -> int:
+        """Exports larger than this are handed off to a background task."""
+        return int(os.getenv('EXPORT_SYNC_ROW_LIMIT', 20000))
+
+    @staticmethod
+    def build(kind: str, params: Dict[str, Any]) -> ExportSpec:
+        builder = EXPORT_BUILDERS.get(kind)
+        if builder is None:
+            raise ValueError(f"Unknown export kind: {kind}")
+        return builder(params)
+
+    @classmethod
+    def iter_rows(cls, spec: ExportSpec) -> Iterator[List[Any]]:
+        """Yield formatted rows, reading the query through a server-side cursor."""
+        for record in spec.query.yield_per(cls.batch_size()):
+            yield spec.row(record)
+
+    @classmethod
+    def count(cls, spec: ExportSpec) -> int:
+        return spec.query.order_by(None).count()
+
+    # ------------------------------------------------------------------
+    # Writers
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def iter_csv(cls, spec: ExportSpec) -> Iterator[str]:
+        """Yield the CSV document in chunks of ``batch_size`` rows."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(spec.headers)
+
+        pending = 0
+        chunk_rows = cls.batch_size()
+        for values in cls.iter_rows(spec):
+            writer.writerow(values)
+            pending += 1
+            if pending >= chunk_rows:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+        yield buffer.getvalue()
+
+    @classmethod
+    def write_csv(cls, spec: ExportSpec, path: str) -> int:
+        rows = 0
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(spec.headers)
+            for values in cls.iter_rows(spec):
+                writer.writerow(values)
+                rows += 1
+        return rows
+
+    @classmethod
+    def write_xlsx(cls, spec: ExportSpec, path: str) -> int:
+        """Write a write-only (constant memory) workbook; returns the row count."""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(spec.sheet_title)
+        sheet.append(spec.headers)
+
+        rows = 0
+        for values in cls.iter_rows(spec):
+            sheet.append(values)
+            rows += 1
+
+        if spec.summary is not None:
+            stats_sheet = workbook.create_sheet('Statistics')
+            stats_sheet.append(['Metric', 'Count'])
+            for metric, value in spec.summary():
+                stats_sheet.append([metric, value])
+
+        workbook.save(path)
+        return rows
+
+    @classmethod
+    def write_file(cls, spec: ExportSpec, fmt: str, path: str) -> int:
+        if fmt == 'xlsx':
+            return cls.write_xlsx(spec, path)
+        return cls.write_csv(spec, path)
+
+    # ------------------------------------------------------------------
+    # HTTP helpers
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def resolve_format(cls, spec: ExportSpec, requested: Optional[str]) -> str:
+        fmt = (requested or spec.default_format).lower()
+        return fmt if fmt in cls.FORMATS else spec.default_format
+
+    @classmethod
+    def csv_response(cls, spec: ExportSpec) -> Response:
+        return Response(
+            stream_with_context(cls.iter_csv(spec)),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment;filename={spec.filename}.csv'},
+        )
+
+    @classmethod
+    def xlsx_response(cls, spec: ExportSpec) -> Response:
+        fd, path = tempfile.mkstemp(suffix='.xlsx', prefix='export_')
+        os.close(fd)
+        try:
+            cls.write_xlsx(spec, path)
+        except Exception:
+            os.remove(path)
+            raise
+
+        response = send_file(
+            path,
+            download_name=f"{spec.filename}.xlsx",
+            as_attachment=True,
+            mimetype=XLSX_MIMETYPE,
+        )
+        response.call_on_close(lambda: os.path.exists(path) and os.remove(path))
+        return response
+
+    @classmethod
+    def export(cls, kind: str, params: Dict[str, Any], fmt: Optional[str] = None,
+               force_async: bool = False, requested_by=None) -> Tuple[Optional[Response], Optional[Dict[str, Any]]]:
+        """
+        Run an export for the current request.
+
+        Returns ``(response, None)`` when the file is produced inline, or
+        ``(None, job)`` when it was queued as a background task; ``job``
+        carries ``task_id``, ``row_count`` and ``format``. A queued task is
+        owned by ``requested_by``, the only user who may poll or download it.
+        """
+        spec = cls.build(kind, params)
+        fmt = cls.resolve_format(spec, fmt)
+
+        row_count = None
+        if not force_async:
+            row_count = cls.count(spec)
+        if force_async or row_count > cls.sync_row_limit():
+            task_id = background_service.create_task(
+                run_export_job, kind, params, fmt, requested_by, owner_id=requested_by
+            )
+            logger.info(f"Queued {kind} export as background task {task_id} ({row_count} rows)")
+            return None, {'task_id': task_id, 'row_count': row_count, 'format': fmt}
+
+        if fmt == 'xlsx':
+            return cls.xlsx_response(spec), None
+        return cls.csv_response(spec), None
+
+    @staticmethod
+    def job_file_response(task: Dict[str, Any]) -> Optional[Response]:
+        """Send the file produced by a completed export task, if it still exists."""
+        result = task.get('result') or {}
+        stored_name = result.get('stored_name')
+        if not stored_name:
+            return None
+        path = os.path.join(EXPORT_DIR, os.path.basename(stored_name))
+        if not os.path.exists(path):
+            return None
+        mimetype = XLSX_MIMETYPE if result.get('format') == 'xlsx' else 'text/csv'
+        return send_file(
+            path,
+            download_name=result.get('filename'),
+            as_attachment=True,
+            mimetype=mimetype,
+        )
+
+    @staticmethod
+    def cleanup_expired_files(max_age_hours: Optional[float] = None) -> int:
+        """Delete finished export files older than ``EXPORT_RETENTION_HOURS``."""
+        if max_age_hours is None:
+            max_age_hours = float(os.getenv('EXPORT_RETENTION_HOURS', 6))
+        if not os.path.isdir(EXPORT_DIR):
+            return 0
+
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for name in os.listdir(EXPORT_DIR):
+            path = os.path.join(EXPORT_DIR, name)
+            try:
+                if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError as e:
+                logger.warning(f"Could not remove expired export {name}: {e}")
+        return removed
+
+
+def run_export_job(kind: str, params: Dict[str, Any], fmt: str, requested_by=None) -> Dict[str, Any]:
+    """Background task body: write the export to ``EXPORT_DIR``."""
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    ExportService.cleanup_expired_files()
+
+    spec = ExportService.build(kind, params)
+    stored_name = f"{kind}_{uuid.uuid4().hex}.{fmt}"
+    path = os.path.join(EXPORT_DIR, stored_name)
+    try:
+        row_count = ExportService.write_file(spec, fmt, path)
+    except Exception:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    logger.info(f"Wrote {kind} export with {row_count} rows to {stored_name}")
+    return {
+        'kind': kind,
+        'format': fmt,
+        'row_count': row_count,
+        'stored_name': stored_name,
+        'filename': f"{spec.filename}.{fmt}",
+        'requested_by': requested_by,
+    }
@@ -0,0 +1,395 @@
+"""
+Forum Full-Text Search – Afritec Bridge LMS
+
+Ranked, paginated search over forums and threads backed by the database's
+native full-text engine:
+ - PostgreSQL: weighted ``tsvector`` expression indexes (GIN), queried with
+   ``to_tsquery`` / ``ts_rank`` / ``ts_headline``
+ - SQLite: FTS5 virtual tables queried with ``MATCH`` / ``bm25`` /
+   ``highlight`` / ``snippet``
+ - Anything else: ``ilike`` scan, paginated, without ranking
+
+PostgreSQL maintains its expression indexes itself.  The SQLite FTS5 tables
+are standalone, so routes call ``index_post`` / ``remove_post`` (and the
+forum equivalents) after create, edit and delete.
+"""
+
+import html
+import logging
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, func, literal_column, or_, select, text
+
+from ..models.user_models import db
+from ..models.student_models import StudentForum, ForumPost
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+
+# The database marks matches with private-use characters; they become
+# <mark> tags only after the user text around them has been HTML-escaped.
+_MATCH_START = '\ue000'
+_MATCH_STOP = '\ue001'
+
+# Search terms are reduced to plain word tokens before being turned into a
+# full-text query, so user input can never inject FTS operators.
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_MAX_TERMS = 8
+
+# FTS5 tables live outside db.metadata so db.create_all() never touches them.
+_fts_metadata = MetaData()
+_posts_fts = Table(
+    'forum_posts_fts', _fts_metadata,
+    Column('rowid', Integer), Column('title', Text), Column('content', Text),
+)
+_forums_fts = Table(
+    'student_forums_fts', _fts_metadata,
+    Column('rowid', Integer), Column('title', Text), Column('description', Text),
+)
+
+# PostgreSQL expression indexes. Queries below use the exact same expressions
+# so the planner can match them against the GIN index.
+_PG_POST_VECTOR = (
+    "(setweight(to_tsvector('english', coalesce(forum_posts.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(forum_posts.content, '')), 'B'))"
+)
+_PG_FORUM_VECTOR = (
+    "(setweight(to_tsvector('english', coalesce(student_forums.title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(student_forums.description, '')), 'B'))"
+)
+_PG_INDEX_DDL = [
+    "CREATE INDEX IF NOT EXISTS ix_forum_posts_search ON forum_posts USING GIN ("
+    + _PG_POST_VECTOR + ") WHERE parent_post_id IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_student_forums_search ON student_forums USING GIN ("
+    + _PG_FORUM_VECTOR + ")",
+]
+_SQLITE_FTS_DDL = {
+    'forum_posts_fts': (
+        "CREATE VIRTUAL TABLE forum_posts_fts USING fts5("
+        "title, content, tokenize='porter unicode61')"
+    ),
+    'student_forums_fts': (
+        "CREATE VIRTUAL TABLE student_forums_fts USING fts5("
+        "title, description, tokenize='porter unicode61')"
+    ),
+}
+
+
+class ForumSearchService:
+    """Full-text index maintenance and ranked search for forums and threads."""
+
+    _backend: Optional[str] = None
+
+    # ─────────────────────────────────────────────────────────
+    # INDEX MAINTENANCE
+    # ─────────────────────────────────────────────────────────
+
+    @classmethod
+    def backend(cls) -> str:
+        """Return 'postgresql', 'sqlite' or 'like' for the bound engine."""
+        if cls._backend is None:
+            dialect = db.engine.dialect.name
+            cls._backend = dialect if dialect in ('postgresql', 'sqlite') else 'like'
+        return cls._backend
+
+    @classmethod
+    def ensure_index(cls) -> None:
+        """Create the full-text indexes if missing. Safe to call on every startup."""
+        backend = cls.backend()
+        try:
+            if backend == 'postgresql':
+                with db.engine.begin() as conn:
+                    for ddl in _PG_INDEX_DDL:
+                        conn.execute(text(ddl))
+            elif backend == 'sqlite':
+                with db.engine.begin() as conn:
+                    existing = {
+                        row[0] for row in conn.execute(text(
+                            "SELECT name FROM sqlite_master WHERE type = 'table' "
+                            "AND name IN ('forum_posts_fts', 'student_forums_fts')"
+                        ))
+                    }
+                    created = False
+                    for name, ddl in _SQLITE_FTS_DDL.items():
+                        if name not in existing:
+                            conn.execute(text(ddl))
+                            created = True
+                if created:
+                    cls.rebuild()
+            logger.info(f"Forum search index ready ({backend})")
+        except Exception as e:
+            # e.g. SQLite built without FTS5 – degrade to ilike search
+            logger.warning(f"Forum full-text index unavailable, falling back to ilike: {e}")
+            cls._backend = 'like'
+
+    @classmethod
+    def rebuild(cls) -> None:
+        """Repopulate the SQLite FTS5 tables from the source tables."""
+        if cls.backend() != 'sqlite':
+            return
+        with db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM forum_posts_fts"))
+            conn.execute(text(
+                "INSERT INTO forum_posts_fts(rowid, title, content) "
+                "SELECT id, title, content FROM forum_posts WHERE parent_post_id IS NULL"
+            ))
+            conn.execute(text("DELETE FROM student_forums_fts"))
+            conn.execute(text(
+                "INSERT INTO student_forums_fts(rowid, title, description) "
+                "SELECT id, title, description FROM student_forums"
+            ))
+
+    @classmethod
+    def index_post(cls, post: ForumPost) -> None:
+        """Insert or refresh a thread in the index. Replies are not indexed."""
+        if cls.backend() != 'sqlite' or post.parent_post_id is not None:
+            return
+        cls._upsert('forum_posts_fts', post.id, {'title': post.title, 'content': post.content})
+
+    @classmethod
+    def remove_post(cls, post_id: int) -> None:
+        if cls.backend() != 'sqlite':
+            return
+        cls._delete('forum_posts_fts', post_id)
+
+    @classmethod
+    def index_forum(cls, forum: StudentForum) -> None:
+        if cls.backend() != 'sqlite':
+            return
+        cls._upsert('student_forums_fts', forum.id, {'title': forum.title, 'description': forum.description})
+
+    @classmethod
+    def remove_forum(cls, forum_id: int) -> None:
+        if cls.backend() != 'sqlite':
+            return
+        cls._delete('student_forums_fts', forum_id)
+
+    @staticmethod
+    def _upsert(table: str, rowid: int, values: Dict[str, Optional[str]]) -> None:
+        columns = ', '.join(values)
+        params = ', '.join(f':{name}' for name in values)
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text(f"DELETE FROM {table} WHERE rowid = :rowid"), {'rowid': rowid})
+                conn.execute(
+                    text(f"INSERT INTO {table}(rowid, {columns}) VALUES (:rowid, {params})"),
+                    {'rowid': rowid, **{k: v or '' for k, v in values.items()}},
+                )
+        except Exception as e:
+            logger.error(f"Failed to update {table} for row {rowid}: {e}")
+
+    @staticmethod
+    def _delete(table: str, rowid: int) -> None:
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(text(f"DELETE FROM {table} WHERE rowid = :rowid"), {'rowid': rowid})
+        except Exception as e:
+            logger.error(f"Failed to remove row {rowid} from {table}: {e}")
+
+    # ─────────────────────────────────────────────────────────
+    # QUERYING
+    # ─────────────────────────────────────────────────────────
+
+    @staticmethod
+    def tokenize(query: str) -> List[str]:
+        return _TOKEN_RE.findall(query.lower())[:_MAX_TERMS]
+
+    @classmethod
+    def search_threads(
+        cls,
+        query: str,
+        page: int = 1,
+        per_page: int = 20,
+        sort_by: str = 'relevance',
+        forum_id: Optional[int] = None,
+        category: Optional[str] = None,
+        course_ids: Optional[Sequence[int]] = None,
+    ) -> Tuple[List[Dict], int]:
+        """
+        Search active, approved threads.
+
+        ``course_ids`` restricts results to general forums plus forums of the
+        given courses (None means unrestricted). Returns ``(hits, total)``
+        where each hit has ``id``, ``rank``, ``title_highlight`` and ``snippet``.
+        """
+        terms = cls.tokenize(query)
+        if not terms:
+            return [], 0
+
+        filters = [
+            ForumPost.is_active == True,
+            ForumPost.is_approved == True,
+            ForumPost.parent_post_id.is_(None),
+            StudentForum.is_active == True,
+        ]
+        if forum_id:
+            filters.append(ForumPost.forum_id == forum_id)
+        if category:
+            filters.append(StudentForum.category == category)
+        if course_ids is not None:
+            filters.append(or_(StudentForum.course_id.is_(None), StudentForum.course_id.in_(course_ids)))
+
+        backend = cls.backend()
+        if backend == 'postgresql':
+            tsquery = func.to_tsquery('english', cls._pg_tsquery(terms))
+            vector = literal_column(_PG_POST_VECTOR)
+            rank = func.ts_rank(vector, tsquery)
+            columns = [
+                ForumPost.id,
+                rank.label('rank'),
+                func.ts_headline(
+                    'english', ForumPost.title, tsquery,
+                    f'StartSel={_MATCH_START},StopSel={_MATCH_STOP},HighlightAll=TRUE'
+                ).label('title_highlight'),
+                func.ts_headline(
+                    'english', ForumPost.content, tsquery,
+                    f'StartSel={_MATCH_START},StopSel={_MATCH_STOP},MaxWords=35,MinWords=15'
+                ).label('snippet'),
+            ]
+            filters.append(vector.op('@@')(tsquery))
+            relevance_order = [rank.desc()]
+            base = select(*columns).select_from(ForumPost)
+        elif backend == 'sqlite':
+            fts = literal_column('forum_posts_fts')
+            rank = func.bm25(fts, 5.0, 1.0)
+            columns = [
+                ForumPost.id,
+                rank.label('rank'),
+                func.highlight(fts, 0, _MATCH_START, _MATCH_STOP).label('title_highlight'),
+                func.snippet(fts, 1, _MATCH_START, _MATCH_STOP, '…', 24).label('snippet'),
+            ]
+            filters.append(text("forum_posts_fts MATCH :fts_query").bindparams(fts_query=cls._fts5_query(terms)))
+            # bm25() is lower-is-better
+            relevance_order = [rank.asc()]
+            base = select(*columns).select_from(_posts_fts).join(ForumPost, ForumPost.id == _posts_fts.c.rowid)
+        else:
+            columns = [
+                ForumPost.id,
+                literal_column('0').label('rank'),
+                literal_column('NULL').label('title_highlight'),
+                literal_column('NULL').label('snippet'),
+            ]
+            filters.extend(
+                or_(ForumPost.title.ilike(f'%{term}%'), ForumPost.content.ilike(f'%{term}%'))
+                for term in terms
+            )
+            relevance_order = []
+            base = select(*columns).select_from(ForumPost)
+
+        base = base.join(StudentForum, StudentForum.id == ForumPost.forum_id).where(*filters)
+
+        if sort_by == 'date':
+            order = [ForumPost.created_at.desc()]
+        elif sort_by == 'popularity':
+            order = [ForumPost.like_count.desc(), ForumPost.view_count.desc()]
+        else:
+            order = relevance_order + [ForumPost.created_at.desc()]
+        order.append(ForumPost.id.desc())
+
+        total = db.session.execute(
+            select(func.count()).select_from(base.with_only_columns(ForumPost.id).subquery())
+        ).scalar() or 0
+
+        rows = db.session.execute(
+            base.order_by(*order).limit(per_page).offset((page - 1) * per_page)
+        ).all()
+
+        return [cls._hit(row) for row in rows], total
+
+    @classmethod
+    def search_forums(
+        cls,
+        query: str,
+        limit: int = 10,
+        category: Optional[str] = None,
+        course_ids: Optional[Sequence[int]] = None,
+    ) -> List[Dict]:
+        """Return the best-matching active forums (same hit shape as threads)."""
+        terms = cls.tokenize(query)
+        if not terms:
+            return []
+
+        filters = [StudentForum.is_active == True]
+        if category:
+            filters.append(StudentForum.category == category)
+        if course_ids is not None:
+            filters.append(or_(StudentForum.course_id.is_(None), StudentForum.course_id.in_(course_ids)))
+
+        backend = cls.backend()
+        if backend == 'postgresql':
+            tsquery = func.to_tsquery('english', cls._pg_tsquery(terms))
+            vector = literal_column(_PG_FORUM_VECTOR)
+            rank = func.ts_rank(vector, tsquery)
+            stmt = select(
+                StudentForum.id,
+                rank.label('rank'),
+                func.ts_headline(
+                    'english', StudentForum.title, tsquery,
+                    f'StartSel={_MATCH_START},StopSel={_MATCH_STOP},HighlightAll=TRUE'
+                ).label('title_highlight'),
+                func.ts_headline(
+                    'english', func.coalesce(StudentForum.description, ''), tsquery,
+                    f'StartSel={_MATCH_START},StopSel={_MATCH_STOP},MaxWords=35,MinWords=15'
+                ).label('snippet'),
+            ).where(vector.op('@@')(tsquery), *filters).order_by(rank.desc(), StudentForum.id.desc())
+        elif backend == 'sqlite':
+            fts = literal_column('student_forums_fts')
+            rank = func.bm25(fts, 5.0, 1.0)
+            stmt = select(
+                StudentForum.id,
+                rank.label('rank'),
+                func.highlight(fts, 0, _MATCH_START, _MATCH_STOP).label('title_highlight'),
+                func.snippet(fts, 1, _MATCH_START, _MATCH_STOP, '…', 24).label('snippet'),
+            ).select_from(_forums_fts).join(
+                StudentForum, StudentForum.id == _forums_fts.c.rowid
+            ).where(
+                text("student_forums_fts MATCH :fts_query").bindparams(fts_query=cls._fts5_query(terms)),
+                *filters
+            ).order_by(rank.asc(), StudentForum.id.desc())
+        else:
+            stmt = select(
+                StudentForum.id,
+                literal_column('0').label('rank'),
+                literal_column('NULL').label('title_highlight'),
+                literal_column('NULL').label('snippet'),
+            ).where(
+                *filters,
+                *(
+                    or_(StudentForum.title.ilike(f'%{term}%'), StudentForum.description.ilike(f'%{term}%'))
+                    for term in terms
+                )
+            ).order_by(StudentForum.id.desc())
+
+        rows = db.session.execute(stmt.limit(limit)).all()
+        return [cls._hit(row) for row in rows]
+
+    @staticmethod
+    def _pg_tsquery(terms: List[str]) -> str:
+        # Every term must match; the last one is treated as a prefix so
+        # results keep up with search-as-you-type.
+        parts = list(terms[:-1]) + [f'{terms[-1]}:*']
+        return ' & '.join(parts)
+
+    @staticmethod
+    def _fts5_query(terms: List[str]) -> str:
+        parts = [f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*']
+        return ' '.join(parts)
+
+    @staticmethod
+    def _hit(row) -> Dict:
+        return {
+            'id': row.id,
+            'rank': float(row.rank) if row.rank is not None else 0.0,
+            'title_highlight': _highlighted(row.title_highlight),
+            'snippet': _highlighted(row.snippet),
+        }
+
+
+def _highlighted(value: Optional[str]) -> Optional[str]:
+    """Escape a highlighted fragment, then turn the match markers into <mark> tags."""
+    if value is None:
+        return None
+    return html.escape(value).replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_STOP, HIGHLIGHT_STOP)
@@ -0,0 +1,150 @@
+"""Buffered view counters for forum threads and forums.
+
+Viewing a thread used to commit ``view_count + 1`` on every GET, turning a
+read into a row-locking write on popular threads.  Views are now counted in
+memory and flushed periodically as aggregated
+``UPDATE ... SET view_count = view_count + n`` statements, one per distinct
+increment value.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Dict
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import update, func
+
+from ..models.user_models import db
+from ..models.student_models import StudentForum, ForumPost
+
+logger = logging.getLogger(__name__)
+
+
+class ForumViewCounter:
+    """Per-process buffer of pending view increments keyed by model and id."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {
+            ForumPost: defaultdict(int),
+            StudentForum: defaultdict(int),
+        }
+
+    def record_thread_view(self, thread_id: int) -> None:
+        self._record(ForumPost, thread_id)
+
+    def record_forum_view(self, forum_id: int) -> None:
+        self._record(StudentForum, forum_id)
+
+    def pending_thread_views(self, thread_id: int) -> int:
+        """Views counted in this process but not yet written to the database."""
+        with self._lock:
+            return self._pending[ForumPost].get(thread_id, 0)
+
+    def pending_forum_views(self, forum_id: int) -> int:
+        with self._lock:
+            return self._pending[StudentForum].get(forum_id, 0)
+
+    def _record(self, model, object_id: int) -> None:
+        with self._lock:
+            self._pending[model][object_id] += 1
+
+    def _drain(self) -> Dict[type, Dict[int, int]]:
+        with self._lock:
+            drained = {model: dict(counts) for model, counts in self._pending.items() if counts}
+            for counts in self._pending.values():
+                counts.clear()
+        return drained
+
+    def _restore(self, drained: Dict[type, Dict[int, int]]) -> None:
+        with self._lock:
+            for model, counts in drained.items():
+                for object_id, n in counts.items():
+                    self._pending[model][object_id] += n
+
+    def flush(self) -> int:
+        """
+        Write buffered views to the database.
+
+        Ids sharing the same increment are grouped into a single
+        ``UPDATE ... WHERE id IN (...)``, so a flush costs one statement per
+        distinct increment value rather than one per viewed row.  On failure
+        the drained counts are put back so no views are lost.
+
+        Returns the number of rows updated.
+        """
+        drained = self._drain()
+        if not drained:
+            return 0
+
+        updated = 0
+        try:
+            for model, counts in drained.items():
+                by_increment = defaultdict(list)
+                for object_id, n in counts.items():
+                    by_increment[n].append(object_id)
+
+                for n, ids in by_increment.items():
+                    result = db.session.execute(
+                        update(model)
+                        .where(model.id.in_(ids))
+                        .values(view_count=func.coalesce(model.view_count, 0) + n)
+                        .execution_options(synchronize_session=False)
+                    )
+                    updated += result.rowcount or 0
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self._restore(drained)
+            logger.error(f"Failed to flush forum view counts: {str(e)}")
+            return 0
+
+        logger.debug(f"Flushed forum view counts for {updated} row(s)")
+        return updated
+
+
+forum_view_counter = ForumViewCounter()
+
+_flush_scheduler = BackgroundScheduler(timezone="UTC")
+_flusher_started = False
+
+
+def _flush_with_app(app):
+    with app.app_context():
+        forum_view_counter.flush()
+
+
+def start_forum_view_flusher(app):
+    """
+    Start the periodic view-count flush job for this worker.
+
+    The buffer lives in process memory, so every worker runs its own flusher
+    regardless of ``ENABLE_SCHEDULERS``; pending views are also flushed when
+    the worker exits.
+    """
+    global _flusher_started
+
+    if _flusher_started:
+        return
+
+    interval = int(app.config.get(
+        "FORUM_VIEW_FLUSH_SECONDS",
+        os.getenv("FORUM_VIEW_FLUSH_SECONDS", 15),
+    ))
+
+    _flush_scheduler.add_job(
+        func=lambda: _flush_with_app(app),
+        trigger=IntervalTrigger(seconds=interval),
+        id="forum_view_flush_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    _flush_scheduler.start()
+    atexit.register(_flush_with_app, app)
+    _flusher_started = True
+    logger.info(f"✅ Forum view-count flusher started (every {interval}s)")
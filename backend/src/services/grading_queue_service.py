@@ -0,0 +1,262 @@
+"""
+Grading queue for assignment submissions.
+
+Shared by the standard and enhanced grading routes:
+
+- One filter builder for the instructor's submissions (course, cohort,
+  module, lesson, assignment, student, search text, date range).
+- Per-status counts (pending, resubmitted, modification_requested, graded,
+  overdue, all) from a single aggregate query over the filtered set.
+- Keyset pagination on ``(submitted_at, id)``, so the cost of a page does
+  not grow with its depth.
+- Student, grader, assignment and course loaded with the page rather than
+  lazily per row, and cohort labels fetched for the whole page at once.
+"""
+
+import base64
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_, text
+from sqlalchemy.orm import contains_eager, joinedload
+
+from ..models.user_models import db, User
+from ..models.course_models import Assignment, AssignmentSubmission, Course, Enrollment
+
+logger = logging.getLogger(__name__)
+
+QUEUE_STATUSES = ('pending', 'resubmitted', 'modification_requested', 'graded', 'overdue')
+
+# Matches the queue order (newest first, rows without a submission time last)
+_KEYSET_INDEX_DDL = {
+    'postgresql': (
+        "CREATE INDEX IF NOT EXISTS ix_assignment_submissions_submitted_at_id "
+        "ON assignment_submissions (submitted_at DESC NULLS LAST, id DESC)"
+    ),
+    'default': (
+        "CREATE INDEX IF NOT EXISTS ix_assignment_submissions_submitted_at_id "
+        "ON assignment_submissions (submitted_at DESC, id DESC)"
+    ),
+}
+
+
+class GradingQueueService:
+    """Filtering, status counts and keyset paging for the grading queue."""
+
+    @staticmethod
+    def ensure_index() -> None:
+        """Create the keyset index if missing. Safe to call on every startup."""
+        try:
+            ddl = _KEYSET_INDEX_DDL.get(db.engine.dialect.name, _KEYSET_INDEX_DDL['default'])
+            with db.engine.begin() as conn:
+                conn.execute(text(ddl))
+        except Exception as e:
+            logger.warning(f"Could not create grading queue index: {e}")
+
+    # ------------------------------------------------------------------
+    # Filtering
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def status_condition(status: str, now: Optional[datetime] = None):
+        """SQL condition for a queue status; None for 'all' or unknown statuses."""
+        now = now or datetime.utcnow()
+        if status == 'pending':
+            # Regular pending submissions (not resubmissions, not modification requested)
+            return and_(
+                AssignmentSubmission.grade.is_(None),
+                AssignmentSubmission.is_resubmission == False,
+                Assignment.modification_requested == False,
+            )
+        if status == 'resubmitted':
+            return and_(
+                AssignmentSubmission.is_resubmission == True,
+                AssignmentSubmission.grade.is_(None),
+            )
+        if status == 'modification_requested':
+            # Assignments with modification requests (but no new submission yet)
+            return and_(
+                Assignment.modification_requested == True,
+                AssignmentSubmission.is_resubmission == False,
+            )
+        if status == 'graded':
+            return AssignmentSubmission.grade.isnot(None)
+        if status == 'overdue':
+            return and_(
+                Assignment.due_date < now,
+                AssignmentSubmission.grade.is_(None),
+            )
+        return None
+
+    @staticmethod
+    def filtered_query(instructor_id: int, course_id: Optional[int] = None,
+                       cohort_id: Optional[int] = None, module_id: Optional[int] = None,
+                       lesson_id: Optional[int] = None, assignment_id: Optional[int] = None,
+                       student_id: Optional[int] = None, search_query: Optional[str] = None,
+                       date_start: Optional[str] = None, date_end: Optional[str] = None):
+        """The instructor's submissions matching every filter except status."""
+        query = (
+            db.session.query(AssignmentSubmission)
+            .join(AssignmentSubmission.assignment)
+            .join(Assignment.course)
+            .filter(Course.instructor_id == instructor_id)
+        )
+
+        if course_id:
+            query = query.filter(Assignment.course_id == course_id)
+
+        # Cohort filter: students enrolled through the given application window
+        if cohort_id:
+            cohort_student_ids = db.session.query(Enrollment.student_id).filter(
+                Enrollment.application_window_id == cohort_id,
+                Enrollment.status.in_(['active', 'completed'])
+            )
+            if course_id:
+                cohort_student_ids = cohort_student_ids.filter(Enrollment.course_id == course_id)
+            query = query.filter(AssignmentSubmission.student_id.in_(cohort_student_ids))
+
+        if module_id:
+            query = query.filter(Assignment.module_id == module_id)
+        if lesson_id:
+            query = query.filter(Assignment.lesson_id == lesson_id)
+        if assignment_id:
+            query = query.filter(AssignmentSubmission.assignment_id == assignment_id)
+        if student_id:
+            query = query.filter(AssignmentSubmission.student_id == student_id)
+
+        if search_query:
+            pattern = f'%{search_query}%'
+            student_match = db.session.query(User.id).filter(or_(
+                User.first_name.ilike(pattern),
+                User.last_name.ilike(pattern),
+                User.email.ilike(pattern),
+            ))
+            query = query.filter(or_(
+                AssignmentSubmission.student_id.in_(student_match),
+                Assignment.title.ilike(pattern),
+                AssignmentSubmission.content.ilike(pattern),
+            ))
+
+        if date_start:
+            query = query.filter(AssignmentSubmission.submitted_at >= datetime.fromisoformat(date_start))
+        if date_end:
+            query = query.filter(AssignmentSubmission.submitted_at <= datetime.fromisoformat(date_end))
+
+        return query
+
+    @classmethod
+    def status_counts(cls, query, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Counts for every queue status over ``query``, in one aggregate query."""
+        now = now or datetime.utcnow()
+        columns = [func.count(AssignmentSubmission.id).label('all')]
+        for status in QUEUE_STATUSES:
+            condition = cls.status_condition(status, now)
+            columns.append(func.coalesce(func.sum(case((condition, 1), else_=0)), 0).label(status))
+
+        row = query.order_by(None).with_entities(*columns).one()
+        return {key: int(value or 0) for key, value in row._mapping.items()}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def with_related(query):
+        """Load student, grader, assignment and course together with the page."""
+        return query.options(
+            contains_eager(AssignmentSubmission.assignment).contains_eager(Assignment.course),
+            joinedload(AssignmentSubmission.student).load_only(
+                User.id, User.first_name, User.last_name, User.email
+            ),
+            joinedload(AssignmentSubmission.grader).load_only(
+                User.id, User.first_name, User.last_name
+            ),
+        )
+
+    @staticmethod
+    def enrollments_for(submissions: Iterable[AssignmentSubmission]) -> Dict[Tuple[int, int], Enrollment]:
+        """Enrollments keyed by (student_id, course_id) for a page of submissions."""
+        pairs = {(s.student_id, s.assignment.course_id) for s in submissions}
+        if not pairs:
+            return {}
+
+        student_ids = {student for student, _ in pairs}
+        course_ids = {course for _, course in pairs}
+        enrollments = Enrollment.query.filter(
+            Enrollment.student_id.in_(student_ids),
+            Enrollment.course_id.in_(course_ids),
+        ).order_by(Enrollment.id).all()
+
+        result: Dict[Tuple[int, int], Enrollment] = {}
+        for enrollment in enrollments:
+            key = (enrollment.student_id, enrollment.course_id)
+            if key in pairs:
+                result.setdefault(key, enrollment)
+        return result
+
+    # ------------------------------------------------------------------
+    # Keyset pagination
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def encode_cursor(submitted_at: Optional[datetime], submission_id: int) -> str:
+        payload = {'t': submitted_at.isoformat() if submitted_at else None, 'id': submission_id}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+        """Decode a cursor; raises ``ValueError`` if it is malformed."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            submitted_at = datetime.fromisoformat(payload['t']) if payload.get('t') else None
+            return submitted_at, int(payload['id'])
+        except Exception as e:
+            raise ValueError(f"Invalid cursor: {e}")
+
+    @classmethod
+    def keyset_page(cls, query, descending: bool = True, cursor: Optional[str] = None,
+                    limit: int = 20) -> Tuple[List[AssignmentSubmission], Optional[str]]:
+        """
+        Page ``query`` ordered by ``(submitted_at, id)`` without OFFSET.
+
+        Returns ``(submissions, next_cursor)``; ``next_cursor`` is None on
+        the last page.
+        """
+        submitted_at = AssignmentSubmission.submitted_at
+        row_id = AssignmentSubmission.id
+
+        if cursor:
+            last_at, last_id = cls.decode_cursor(cursor)
+            if last_at is None:
+                # Rows without a submission time sort last (desc) / first (asc)
+                query = query.filter(
+                    and_(submitted_at.is_(None), row_id < last_id) if descending
+                    else or_(submitted_at.isnot(None), row_id > last_id)
+                )
+            elif descending:
+                query = query.filter(or_(
+                    submitted_at < last_at,
+                    and_(submitted_at == last_at, row_id < last_id),
+                    submitted_at.is_(None),
+                ))
+            else:
+                query = query.filter(or_(
+                    submitted_at > last_at,
+                    and_(submitted_at == last_at, row_id > last_id),
+                ))
+
+        if descending:
+            query = query.order_by(submitted_at.desc().nulls_last(), row_id.desc())
+        else:
+            query = query.order_by(submitted_at.asc().nulls_first(), row_id.asc())
+
+        rows = query.limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+
+        next_cursor = None
+        if has_next and rows:
+            next_cursor = cls.encode_cursor(rows[-1].submitted_at, rows[-1].id)
+        return rows, next_cursor
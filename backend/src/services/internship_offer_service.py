@@ -18,7 +18,6 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
 from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
 
 from src.models.user_models import db, User, Role
 from src.models.internship_models import (
@@ -26,10 +25,441 @@ from src.models.internship_models import (
     InternshipOfferLetter,
     ApplicationStatusEnum,
 )
+from src.services.document_render_service import DocumentRenderService
 
 logger = logging.getLogger(__name__)
 
 
+# ── Offer letter rendering ──
+# The letter is drawn in two parts: a static background (borders, logo,
+# signature, labels) that is identical for every offer and is rendered once
+# per process, and a small overlay with the per-offer values.  Rendering
+# works on a plain snapshot dict so batches can be handed to worker
+# processes (see DocumentRenderService.render_many).
+
+OFFER_LAYER_VERSION = "1"
+
+NAVY = colors.HexColor("#0f172a")
+TEAL = colors.HexColor("#14b8a6")
+LIGHT_TEAL = colors.HexColor("#5eead4")
+ORANGE = colors.HexColor("#f97316")
+WHITE = colors.white
+LIGHT_GRAY = colors.HexColor("#94a3b8")
+SLATE = colors.HexColor("#cbd5e1")
+
+_STATIC_IMAGES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static", "images"
+)
+
+# Shared layout, in points
+_WIDTH, _HEIGHT = A4
+_LINE_HEIGHT = 6 * mm
+_BODY_START_Y = _HEIGHT - 95 * mm
+_BODY_LINES = 5
+_BOX_WIDTH = 140 * mm
+_BOX_HEIGHT = 32 * mm
+_DETAILS_Y = _BODY_START_Y - _BODY_LINES * _LINE_HEIGHT - 30 * mm
+_DETAIL_Y_START = _DETAILS_Y + _BOX_HEIGHT - 10 * mm
+_COL1_X = _WIDTH / 2 - 55 * mm
+_COL2_X = _WIDTH / 2 + 10 * mm
+_CREDS_Y = _DETAILS_Y - 28 * mm
+_CREDS_BOX_HEIGHT = 22 * mm
+_SIG_Y = 48 * mm
+_SIG_BOX_H = 22 * mm
+_QR_SIZE = 24 * mm
+_QR_X = _WIDTH - 46 * mm
+_QR_Y = _SIG_Y + _SIG_BOX_H + 4 * mm
+
+_DETAIL_LABELS = ("Program Track", "Program Type", "Duration", "Location", "Start Date")
+_STATIC_DETAIL_VALUES = {
+    "Program Type": "Full-Time Internship",
+    "Duration": "As per cohort schedule",
+    "Location": "Remote / Hybrid",
+}
+
+
+def _draw_offer_background(pdf_canvas: canvas.Canvas) -> None:
+    """Draw everything on the offer letter that does not vary per offer."""
+    width, height = _WIDTH, _HEIGHT
+
+    # ── Full-page navy background ──
+    pdf_canvas.setFillColor(NAVY)
+    pdf_canvas.rect(0, 0, width, height, fill=1, stroke=0)
+
+    # ── Decorative gradient circles ──
+    pdf_canvas.setFillColorRGB(0.12, 0.23, 0.54, alpha=0.25)
+    pdf_canvas.circle(width * 0.12, height * 0.88, 55 * mm, fill=1, stroke=0)
+    pdf_canvas.setFillColorRGB(0.08, 0.72, 0.65, alpha=0.12)
+    pdf_canvas.circle(width * 0.88, height * 0.15, 48 * mm, fill=1, stroke=0)
+
+    # ── Outer border (teal) ──
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(2.5)
+    pdf_canvas.roundRect(10 * mm, 10 * mm, width - 20 * mm, height - 20 * mm, 6 * mm, fill=0, stroke=1)
+
+    # ── Inner border (orange) ──
+    pdf_canvas.setStrokeColor(ORANGE)
+    pdf_canvas.setLineWidth(1.2)
+    pdf_canvas.roundRect(13 * mm, 13 * mm, width - 26 * mm, height - 26 * mm, 4 * mm, fill=0, stroke=1)
+
+    # ── Corner tech nodes ──
+    def draw_corner_node(cx, cy, color):
+        pdf_canvas.setFillColor(color)
+        pdf_canvas.circle(cx, cy, 2.5 * mm, fill=1, stroke=0)
+        pdf_canvas.setStrokeColor(color)
+        pdf_canvas.setLineWidth(1.5)
+        pdf_canvas.circle(cx, cy, 3.5 * mm, fill=0, stroke=1)
+
+    draw_corner_node(16 * mm, height - 16 * mm, TEAL)
+    draw_corner_node(width - 16 * mm, height - 16 * mm, ORANGE)
+    draw_corner_node(16 * mm, 16 * mm, TEAL)
+    draw_corner_node(width - 16 * mm, 16 * mm, ORANGE)
+
+    # ── Company Header ──
+    # Logo area (left)
+    logo_center_x = 38 * mm
+    logo_center_y = height - 32 * mm
+
+    # Draw logo image with circular clip + decorative rings
+    logo_path = os.path.join(_STATIC_IMAGES_DIR, "logo.jpg")
+    if os.path.exists(logo_path):
+        # Circular clip – crop logo to a circle
+        pdf_canvas.saveState()
+        p = pdf_canvas.beginPath()
+        p.circle(logo_center_x, logo_center_y, 11 * mm)
+        pdf_canvas.clipPath(p, stroke=0)
+        pdf_canvas.drawImage(
+            logo_path,
+            logo_center_x - 12 * mm,
+            logo_center_y - 12 * mm,
+            width=24 * mm,
+            height=24 * mm,
+            preserveAspectRatio=True,
+            mask="auto",
+        )
+        pdf_canvas.restoreState()
+
+        # Inner decorative ring (teal, right at clip edge)
+        pdf_canvas.setStrokeColor(TEAL)
+        pdf_canvas.setLineWidth(2.5)
+        pdf_canvas.circle(logo_center_x, logo_center_y, 11.5 * mm, fill=0, stroke=1)
+
+        # Outer decorative ring (orange)
+        pdf_canvas.setStrokeColor(ORANGE)
+        pdf_canvas.setLineWidth(1.2)
+        pdf_canvas.circle(logo_center_x, logo_center_y, 13.5 * mm, fill=0, stroke=1)
+
+        # Small accent dots on the outer ring (at 45° angles)
+        pdf_canvas.setFillColor(TEAL)
+        for angle_deg in [45, 135, 225, 315]:
+            rad = math.radians(angle_deg)
+            dx = 13.5 * mm * math.cos(rad)
+            dy = 13.5 * mm * math.sin(rad)
+            pdf_canvas.circle(
+                logo_center_x + dx,
+                logo_center_y + dy,
+                0.6 * mm,
+                fill=1,
+                stroke=0,
+            )
+    else:
+        # Fallback: concentric placeholder circles
+        pdf_canvas.setStrokeColor(TEAL)
+        pdf_canvas.setLineWidth(2)
+        pdf_canvas.circle(logo_center_x, logo_center_y, 12 * mm, fill=0, stroke=1)
+        pdf_canvas.setStrokeColor(ORANGE)
+        pdf_canvas.setLineWidth(1)
+        pdf_canvas.circle(logo_center_x, logo_center_y, 10 * mm, fill=0, stroke=1)
+
+    # Company name below logo
+    pdf_canvas.setFont("Helvetica-Bold", 11)
+    pdf_canvas.setFillColor(TEAL)
+    pdf_canvas.drawCentredString(logo_center_x, logo_center_y - 17 * mm, "✦ AFRITECH BRIDGE ✦")
+    pdf_canvas.setFont("Helvetica", 7)
+    pdf_canvas.setFillColor(LIGHT_TEAL)
+    pdf_canvas.drawCentredString(logo_center_x, logo_center_y - 20.5 * mm, "Empowering Africa Through Technology")
+
+    # Title (right-aligned)
+    pdf_canvas.setFont("Helvetica-Bold", 10)
+    pdf_canvas.setFillColor(TEAL)
+    pdf_canvas.drawRightString(width - 20 * mm, height - 28 * mm, "INTERNSHIP OFFER LETTER")
+
+    # ── Divider ──
+    divider_y = height - 50 * mm
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(1)
+    pdf_canvas.line(20 * mm, divider_y, width - 50 * mm, divider_y)
+    pdf_canvas.setStrokeColor(ORANGE)
+    pdf_canvas.line(width - 48 * mm, divider_y, width - 20 * mm, divider_y)
+    # Divider dots
+    for i in range(3):
+        x = width / 2 - 4 * mm + i * 4 * mm
+        pdf_canvas.setFillColor(ORANGE if i == 1 else TEAL)
+        pdf_canvas.circle(x, divider_y, 1.2 * mm, fill=1, stroke=0)
+
+    # ── Subject Line ──
+    pdf_canvas.setFont("Helvetica-Bold", 16)
+    pdf_canvas.setFillColor(WHITE)
+    pdf_canvas.drawCentredString(width / 2, height - 59 * mm, "OFFER OF INTERNSHIP")
+
+    # Name underline
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(1.5)
+    pdf_canvas.line(width / 2 - 60 * mm, height - 82 * mm, width / 2, height - 82 * mm)
+    pdf_canvas.setStrokeColor(ORANGE)
+    pdf_canvas.line(width / 2, height - 82 * mm, width / 2 + 60 * mm, height - 82 * mm)
+
+    # ── Offer Body (salutation is drawn per offer) ──
+    pdf_canvas.setFont("Helvetica", 10)
+    pdf_canvas.setFillColor(SLATE)
+    body_text = (
+        "",
+        "We are delighted to offer you a position in our internship program at",
+        "AfriTech Bridge. After careful review of your application and interview",
+        "performance, we were impressed by your skills, passion, and potential.",
+    )
+    for i, line in enumerate(body_text, start=1):
+        pdf_canvas.drawCentredString(width / 2, _BODY_START_Y - i * _LINE_HEIGHT, line)
+
+    # ── Offer Details Box ──
+    pdf_canvas.setFillColorRGB(0.12, 0.23, 0.54, alpha=0.35)
+    pdf_canvas.roundRect(
+        width / 2 - _BOX_WIDTH / 2, _DETAILS_Y, _BOX_WIDTH, _BOX_HEIGHT, 4 * mm, fill=1, stroke=0
+    )
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(1.5)
+    pdf_canvas.roundRect(
+        width / 2 - _BOX_WIDTH / 2, _DETAILS_Y, _BOX_WIDTH, _BOX_HEIGHT, 4 * mm, fill=0, stroke=1
+    )
+
+    pdf_canvas.setFont("Helvetica-Bold", 8)
+    pdf_canvas.setFillColor(TEAL)
+    pdf_canvas.drawCentredString(width / 2, _DETAILS_Y + _BOX_HEIGHT - 5 * mm, "─── OFFER DETAILS ───")
+
+    pdf_canvas.setFont("Helvetica-Bold", 8.5)
+    pdf_canvas.setFillColor(LIGHT_GRAY)
+    for i, label in enumerate(_DETAIL_LABELS):
+        pdf_canvas.drawString(_COL1_X, _DETAIL_Y_START - i * 5.5 * mm, label)
+    pdf_canvas.setFont("Helvetica", 8.5)
+    pdf_canvas.setFillColor(WHITE)
+    for i, label in enumerate(_DETAIL_LABELS):
+        if label in _STATIC_DETAIL_VALUES:
+            pdf_canvas.drawString(_COL2_X, _DETAIL_Y_START - i * 5.5 * mm, _STATIC_DETAIL_VALUES[label])
+
+    # ── Login Credentials Box ──
+    pdf_canvas.setFillColorRGB(0.08, 0.72, 0.65, alpha=0.08)
+    pdf_canvas.roundRect(
+        width / 2 - _BOX_WIDTH / 2, _CREDS_Y, _BOX_WIDTH, _CREDS_BOX_HEIGHT, 4 * mm, fill=1, stroke=0
+    )
+    pdf_canvas.setStrokeColor(ORANGE)
+    pdf_canvas.setLineWidth(1)
+    pdf_canvas.roundRect(
+        width / 2 - _BOX_WIDTH / 2, _CREDS_Y, _BOX_WIDTH, _CREDS_BOX_HEIGHT, 4 * mm, fill=0, stroke=1
+    )
+
+    pdf_canvas.setFont("Helvetica-Bold", 8)
+    pdf_canvas.setFillColor(ORANGE)
+    pdf_canvas.drawCentredString(width / 2, _CREDS_Y + _CREDS_BOX_HEIGHT - 5 * mm, "─── YOUR LOGIN CREDENTIALS ───")
+
+    pdf_canvas.setFont("Helvetica-Bold", 9)
+    pdf_canvas.setFillColor(LIGHT_TEAL)
+    pdf_canvas.drawString(_COL1_X, _CREDS_Y + _CREDS_BOX_HEIGHT - 11 * mm, "Username:")
+
+    pdf_canvas.setFont("Helvetica-Bold", 9)
+    pdf_canvas.setFillColor(LIGHT_TEAL)
+    pdf_canvas.drawString(_COL1_X, _CREDS_Y + _CREDS_BOX_HEIGHT - 17 * mm, "Password:")
+    pdf_canvas.setFont("Courier-Bold", 9)
+    pdf_canvas.setFillColor(WHITE)
+    # Mask password with dots for security in PDF
+    pdf_canvas.drawString(_COL2_X, _CREDS_Y + _CREDS_BOX_HEIGHT - 17 * mm, "● ● ● ● ● ● ● ● ● ● ● ●")
+
+    # ── Closing ──
+    closing_y = _CREDS_Y - 6 * mm
+    pdf_canvas.setFont("Helvetica", 10)
+    pdf_canvas.setFillColor(SLATE)
+    closing_lines = (
+        "We look forward to having you on board! Log in using the credentials above",
+        "within 7 days to access your tasks, track progress, and connect with your mentor.",
+    )
+    for i, line in enumerate(closing_lines):
+        pdf_canvas.drawCentredString(width / 2, closing_y - i * _LINE_HEIGHT, line)
+
+    # ── Signature Section ──
+    sig_y = _SIG_Y
+    sig_box_h = _SIG_BOX_H
+    sig_box_w = 80 * mm
+
+    pdf_canvas.setFillColorRGB(0.12, 0.23, 0.54, alpha=0.3)
+    pdf_canvas.roundRect(
+        width / 2 - sig_box_w / 2, sig_y, sig_box_w, sig_box_h, 4 * mm, fill=1, stroke=0
+    )
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(1.5)
+    pdf_canvas.roundRect(
+        width / 2 - sig_box_w / 2, sig_y, sig_box_w, sig_box_h, 4 * mm, fill=0, stroke=1
+    )
+
+    pdf_canvas.setFont("Helvetica-Bold", 7)
+    pdf_canvas.setFillColor(TEAL)
+    pdf_canvas.drawCentredString(width / 2, sig_y + sig_box_h - 3.5 * mm, "────────── AUTHORIZED SIGNATURE ──────────")
+
+    # Signature line
+    sig_line_y = sig_y + sig_box_h - 10 * mm
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(1.2)
+    pdf_canvas.line(width / 2 - 28 * mm, sig_line_y, width / 2 - 2 * mm, sig_line_y)
+    pdf_canvas.setStrokeColor(ORANGE)
+    pdf_canvas.line(width / 2 + 2 * mm, sig_line_y, width / 2 + 28 * mm, sig_line_y)
+
+    # Try to load signature image
+    signature_path = os.path.join(_STATIC_IMAGES_DIR, "sign.jpg")
+    if os.path.exists(signature_path):
+        try:
+            # Draw light background so signature is visible on dark navy
+            sig_img_x = width / 2 - 12 * mm
+            sig_img_y = sig_line_y + 1 * mm
+            sig_img_w = 24 * mm
+            sig_img_h = 6 * mm
+            pdf_canvas.setFillColor(colors.HexColor('#f8fafc'))
+            pdf_canvas.roundRect(
+                sig_img_x - 0.5 * mm, sig_img_y - 0.5 * mm,
+                sig_img_w + 1 * mm, sig_img_h + 1 * mm,
+                1.5 * mm, fill=1, stroke=0
+            )
+            pdf_canvas.drawImage(
+                signature_path,
+                sig_img_x, sig_img_y,
+                width=sig_img_w, height=sig_img_h,
+                preserveAspectRatio=True,
+                mask="auto",
+            )
+        except Exception:
+            pass
+
+    pdf_canvas.setFont("Helvetica-Bold", 10)
+    pdf_canvas.setFillColor(WHITE)
+    pdf_canvas.drawCentredString(width / 2, sig_y + 7 * mm, "Desire Bikorimana")
+    pdf_canvas.setFont("Helvetica-Bold", 7)
+    pdf_canvas.setFillColor(ORANGE)
+    pdf_canvas.drawCentredString(width / 2, sig_y + 4 * mm, "Founder & Chief Executive Officer")
+    pdf_canvas.setFont("Helvetica", 6.5)
+    pdf_canvas.setFillColor(LIGHT_GRAY)
+    pdf_canvas.drawCentredString(width / 2, sig_y + 1.5 * mm, "AfriTech Bridge")
+
+    # ── QR Code frame (the code itself is drawn per offer) ──
+    pdf_canvas.setFillColor(WHITE)
+    pdf_canvas.roundRect(_QR_X, _QR_Y, _QR_SIZE, _QR_SIZE, 3 * mm, fill=1, stroke=0)
+    pdf_canvas.setStrokeColor(TEAL)
+    pdf_canvas.setLineWidth(1.5)
+    pdf_canvas.roundRect(_QR_X, _QR_Y, _QR_SIZE, _QR_SIZE, 3 * mm, fill=0, stroke=1)
+
+    pdf_canvas.setFont("Helvetica-Bold", 6)
+    pdf_canvas.setFillColor(TEAL)
+    pdf_canvas.drawCentredString(_QR_X + _QR_SIZE / 2, _QR_Y - 4 * mm, "SCAN TO VERIFY")
+    pdf_canvas.setFont("Helvetica", 5.5)
+    pdf_canvas.setFillColor(LIGHT_GRAY)
+    pdf_canvas.drawCentredString(_QR_X + _QR_SIZE / 2, _QR_Y - 7 * mm, "study.afritechbridge.online/verify-offer")
+
+    # ── Footer ──
+    pdf_canvas.setFont("Helvetica", 7)
+    pdf_canvas.setFillColor(SLATE)
+    pdf_canvas.drawCentredString(
+        width / 2, 18 * mm,
+        "Empowering the next generation of African tech leaders"
+    )
+
+
+def _draw_offer_details(pdf_canvas: canvas.Canvas, snapshot: Dict[str, Any]) -> None:
+    """Draw the per-offer values on top of the static background."""
+    import qrcode
+
+    width, height = _WIDTH, _HEIGHT
+
+    # ── Header references ──
+    pdf_canvas.setFont("Helvetica", 7.5)
+    pdf_canvas.setFillColor(SLATE)
+    pdf_canvas.drawRightString(width - 20 * mm, height - 32 * mm, f"Reference: {snapshot['reference_code']}")
+    pdf_canvas.drawRightString(width - 20 * mm, height - 36 * mm, f"Offer No: {snapshot['offer_number']}")
+
+    # ── Subject Line ──
+    pdf_canvas.setFont("Helvetica", 10)
+    pdf_canvas.setFillColor(LIGHT_GRAY)
+    pdf_canvas.drawCentredString(width / 2, height - 65 * mm, f"for the {snapshot['track_name']} Program")
+
+    # ── Candidate Name ──
+    pdf_canvas.setFont("Helvetica-Bold", 24)
+    pdf_canvas.setFillColor(WHITE)
+    pdf_canvas.drawCentredString(width / 2, height - 79 * mm, snapshot['full_name'])
+
+    # ── Salutation ──
+    pdf_canvas.setFont("Helvetica", 10)
+    pdf_canvas.setFillColor(SLATE)
+    pdf_canvas.drawCentredString(width / 2, _BODY_START_Y, f"Dear {snapshot['first_name']},")
+
+    # ── Offer details values ──
+    detail_values = {
+        "Program Track": snapshot['track_label'],
+        "Start Date": snapshot['start_date'],
+    }
+    pdf_canvas.setFont("Helvetica", 8.5)
+    pdf_canvas.setFillColor(WHITE)
+    for i, label in enumerate(_DETAIL_LABELS):
+        if label in detail_values:
+            pdf_canvas.drawString(_COL2_X, _DETAIL_Y_START - i * 5.5 * mm, detail_values[label])
+
+    # ── Username ──
+    pdf_canvas.setFont("Courier-Bold", 9)
+    pdf_canvas.setFillColor(WHITE)
+    pdf_canvas.drawString(_COL2_X, _CREDS_Y + _CREDS_BOX_HEIGHT - 11 * mm, snapshot['username'])
+
+    # ── QR Code for Verification ──
+    verification_url = (
+        f"https://study.afritechbridge.online/verify-offer/{snapshot['verification_hash']}"
+    )
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=1)
+    qr.add_data(verification_url)
+    qr.make(fit=True)
+
+    # Drawn as vector modules (one rect per horizontal run) rather than an
+    # embedded PNG; the white frame comes from the background layer.
+    matrix = qr.get_matrix()
+    module = (_QR_SIZE - 3 * mm) / len(matrix)
+    origin_x = _QR_X + 1.5 * mm
+    top_y = _QR_Y + 1.5 * mm + module * len(matrix)
+    path = pdf_canvas.beginPath()
+    for row_index, row in enumerate(matrix):
+        y = top_y - (row_index + 1) * module
+        col = 0
+        while col < len(row):
+            if row[col]:
+                run_start = col
+                while col < len(row) and row[col]:
+                    col += 1
+                path.rect(origin_x + run_start * module, y, (col - run_start) * module, module)
+            else:
+                col += 1
+    pdf_canvas.setFillColor(NAVY)
+    pdf_canvas.drawPath(path, fill=1, stroke=0)
+
+    # ── Footer ──
+    pdf_canvas.setFont("Helvetica-Bold", 6)
+    pdf_canvas.setFillColor(TEAL)
+    pdf_canvas.drawCentredString(
+        width / 2, 14 * mm,
+        f"© 2026 AfriTech Bridge  |  Offer No: {snapshot['offer_number']}  |  Issued: {snapshot['issued']}"
+    )
+
+
+def render_offer_pdf(snapshot: Dict[str, Any]) -> bytes:
+    """Render an offer letter from :meth:`InternshipOfferService.offer_snapshot` data."""
+    layer = DocumentRenderService.static_layer(
+        f"internship-offer-v{OFFER_LAYER_VERSION}", _draw_offer_background, pagesize=A4
+    )
+    return DocumentRenderService.render_on_layer(
+        layer, lambda pdf_canvas: _draw_offer_details(pdf_canvas, snapshot), pagesize=A4
+    )
+
+
 class InternshipOfferService:
     """Service for generating, verifying, and managing internship offer letters."""
 
@@ -41,11 +471,16 @@ class InternshipOfferService:
     def _generate_offer_number() -> str:
         """Generate a unique offer number: OFR-2026-0001"""
         year = datetime.utcnow().year
-        # Count existing offers this year for sequential numbering
-        count = InternshipOfferLetter.query.filter(
-            InternshipOfferLetter.offer_number.like(f"{InternshipOfferService.OFFER_PREFIX}-{year}-%")
-        ).count()
-        return f"{InternshipOfferService.OFFER_PREFIX}-{year}-{count + 1:04d}"
+        prefix = f"{InternshipOfferService.OFFER_PREFIX}-{year}-"
+        # Continue from the highest number issued this year (a count would
+        # reuse numbers after an offer is removed from a batch). Compared as
+        # integers: past 9999 the suffix grows a digit and sorts lower as text.
+        latest = db.session.query(db.func.max(db.cast(
+            db.func.substr(InternshipOfferLetter.offer_number, len(prefix) + 1), db.Integer
+        ))).filter(
+            InternshipOfferLetter.offer_number.like(f"{prefix}%")
+        ).scalar()
+        return f"{prefix}{(latest or 0) + 1:04d}"
 
     @staticmethod
     def _generate_share_token() -> str:
@@ -76,6 +511,23 @@ class InternshipOfferService:
         pdf_buffer.seek(0)
         return hashlib.sha256(pdf_buffer.getvalue()).hexdigest()
 
+    @staticmethod
+    def offer_snapshot(application: InternshipApplication, offer: InternshipOfferLetter) -> Dict[str, Any]:
+        """Plain (picklable) copy of every per-offer value drawn on the letter."""
+        name_parts = application.full_name.split()
+        return {
+            "reference_code": application.reference_code,
+            "offer_number": offer.offer_number,
+            "full_name": application.full_name,
+            "first_name": name_parts[0] if name_parts else application.full_name,
+            "track_name": application.track.name,
+            "track_label": application.track.name if application.track else "—",
+            "start_date": application.cohort.start_date.strftime("%d %B %Y") if application.cohort else "TBD",
+            "username": offer.generated_username,
+            "verification_hash": offer.verification_hash,
+            "issued": datetime.utcnow().strftime('%d %B %Y'),
+        }
+
     @staticmethod
     def generate_offer_pdf(application: InternshipApplication, offer: InternshipOfferLetter) -> Optional[BytesIO]:
         """
@@ -89,405 +541,102 @@ class InternshipOfferService:
             BytesIO buffer containing the PDF, or None on failure
         """
         try:
-            buffer = BytesIO()
-            pdf_canvas = canvas.Canvas(buffer, pagesize=A4)
-            width, height = A4
-
-            # ── Brand Colors ──
-            navy = colors.HexColor("#0f172a")
-            brand_blue = colors.HexColor("#1e3a8a")
-            teal = colors.HexColor("#14b8a6")
-            light_teal = colors.HexColor("#5eead4")
-            orange = colors.HexColor("#f97316")
-            light_orange = colors.HexColor("#fb923c")
-            white = colors.white
-            light_gray = colors.HexColor("#94a3b8")
-            slate = colors.HexColor("#cbd5e1")
-
-            # ── Full-page navy background ──
-            pdf_canvas.setFillColor(navy)
-            pdf_canvas.rect(0, 0, width, height, fill=1, stroke=0)
-
-            # ── Decorative gradient circles ──
-            pdf_canvas.setFillColorRGB(0.12, 0.23, 0.54, alpha=0.25)
-            pdf_canvas.circle(width * 0.12, height * 0.88, 55 * mm, fill=1, stroke=0)
-            pdf_canvas.setFillColorRGB(0.08, 0.72, 0.65, alpha=0.12)
-            pdf_canvas.circle(width * 0.88, height * 0.15, 48 * mm, fill=1, stroke=0)
-
-            # ── Outer border (teal) ──
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(2.5)
-            pdf_canvas.roundRect(10 * mm, 10 * mm, width - 20 * mm, height - 20 * mm, 6 * mm, fill=0, stroke=1)
-
-            # ── Inner border (orange) ──
-            pdf_canvas.setStrokeColor(orange)
-            pdf_canvas.setLineWidth(1.2)
-            pdf_canvas.roundRect(13 * mm, 13 * mm, width - 26 * mm, height - 26 * mm, 4 * mm, fill=0, stroke=1)
-
-            # ── Corner tech nodes ──
-            def draw_corner_node(cx, cy, color):
-                pdf_canvas.setFillColor(color)
-                pdf_canvas.circle(cx, cy, 2.5 * mm, fill=1, stroke=0)
-                pdf_canvas.setStrokeColor(color)
-                pdf_canvas.setLineWidth(1.5)
-                pdf_canvas.circle(cx, cy, 3.5 * mm, fill=0, stroke=1)
-
-            draw_corner_node(16 * mm, height - 16 * mm, teal)
-            draw_corner_node(width - 16 * mm, height - 16 * mm, orange)
-            draw_corner_node(16 * mm, 16 * mm, teal)
-            draw_corner_node(width - 16 * mm, 16 * mm, orange)
-
-            # ── Company Header ──
-            # Logo area (left)
-            logo_center_x = 38 * mm
-            logo_center_y = height - 32 * mm
-
-            # Draw logo image with circular clip + decorative rings
-            logo_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                "static", "images", "logo.jpg"
-            )
-            if os.path.exists(logo_path):
-                # Circular clip – crop logo to a circle
-                pdf_canvas.saveState()
-                p = pdf_canvas.beginPath()
-                p.circle(logo_center_x, logo_center_y, 11 * mm)
-                pdf_canvas.clipPath(p, stroke=0)
-                pdf_canvas.drawImage(
-                    logo_path,
-                    logo_center_x - 12 * mm,
-                    logo_center_y - 12 * mm,
-                    width=24 * mm,
-                    height=24 * mm,
-                    preserveAspectRatio=True,
-                    mask="auto",
-                )
-                pdf_canvas.restoreState()
-
-                # Inner decorative ring (teal, right at clip edge)
-                pdf_canvas.setStrokeColor(teal)
-                pdf_canvas.setLineWidth(2.5)
-                pdf_canvas.circle(logo_center_x, logo_center_y, 11.5 * mm, fill=0, stroke=1)
-
-                # Outer decorative ring (orange)
-                pdf_canvas.setStrokeColor(orange)
-                pdf_canvas.setLineWidth(1.2)
-                pdf_canvas.circle(logo_center_x, logo_center_y, 13.5 * mm, fill=0, stroke=1)
-
-                # Small accent dots on the outer ring (at 45° angles)
-                pdf_canvas.setFillColor(teal)
-                for angle_deg in [45, 135, 225, 315]:
-                    rad = math.radians(angle_deg)
-                    dx = 13.5 * mm * math.cos(rad)
-                    dy = 13.5 * mm * math.sin(rad)
-                    pdf_canvas.circle(
-                        logo_center_x + dx,
-                        logo_center_y + dy,
-                        0.6 * mm,
-                        fill=1,
-                        stroke=0,
-                    )
-            else:
-                # Fallback: concentric placeholder circles
-                pdf_canvas.setStrokeColor(teal)
-                pdf_canvas.setLineWidth(2)
-                pdf_canvas.circle(logo_center_x, logo_center_y, 12 * mm, fill=0, stroke=1)
-                pdf_canvas.setStrokeColor(orange)
-                pdf_canvas.setLineWidth(1)
-                pdf_canvas.circle(logo_center_x, logo_center_y, 10 * mm, fill=0, stroke=1)
-
-            # Company name below logo
-            pdf_canvas.setFont("Helvetica-Bold", 11)
-            pdf_canvas.setFillColor(teal)
-            pdf_canvas.drawCentredString(logo_center_x, logo_center_y - 17 * mm, "✦ AFRITECH BRIDGE ✦")
-            pdf_canvas.setFont("Helvetica", 7)
-            pdf_canvas.setFillColor(light_teal)
-            pdf_canvas.drawCentredString(logo_center_x, logo_center_y - 20.5 * mm, "Empowering Africa Through Technology")
-
-            # Title (right-aligned)
-            pdf_canvas.setFont("Helvetica-Bold", 10)
-            pdf_canvas.setFillColor(teal)
-            pdf_canvas.drawRightString(width - 20 * mm, height - 28 * mm, "INTERNSHIP OFFER LETTER")
-            pdf_canvas.setFont("Helvetica", 7.5)
-            pdf_canvas.setFillColor(slate)
-            pdf_canvas.drawRightString(width - 20 * mm, height - 32 * mm, f"Reference: {application.reference_code}")
-            pdf_canvas.drawRightString(width - 20 * mm, height - 36 * mm, f"Offer No: {offer.offer_number}")
-
-            # ── Divider ──
-            divider_y = height - 50 * mm
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(1)
-            pdf_canvas.line(20 * mm, divider_y, width - 50 * mm, divider_y)
-            pdf_canvas.setStrokeColor(orange)
-            pdf_canvas.line(width - 48 * mm, divider_y, width - 20 * mm, divider_y)
-            # Divider dots
-            for i in range(3):
-                x = width / 2 - 4 * mm + i * 4 * mm
-                pdf_canvas.setFillColor(orange if i == 1 else teal)
-                pdf_canvas.circle(x, divider_y, 1.2 * mm, fill=1, stroke=0)
-
-            # ── Subject Line ──
-            pdf_canvas.setFont("Helvetica-Bold", 16)
-            pdf_canvas.setFillColor(white)
-            pdf_canvas.drawCentredString(width / 2, height - 59 * mm, "OFFER OF INTERNSHIP")
-            pdf_canvas.setFont("Helvetica", 10)
-            pdf_canvas.setFillColor(light_gray)
-            pdf_canvas.drawCentredString(width / 2, height - 65 * mm, f"for the {application.track.name} Program")
-
-            # ── Candidate Name ──
-            pdf_canvas.setFont("Helvetica-Bold", 24)
-            pdf_canvas.setFillColor(white)
-            pdf_canvas.drawCentredString(width / 2, height - 79 * mm, application.full_name)
-
-            # Name underline
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(1.5)
-            pdf_canvas.line(width / 2 - 60 * mm, height - 82 * mm, width / 2, height - 82 * mm)
-            pdf_canvas.setStrokeColor(orange)
-            pdf_canvas.line(width / 2, height - 82 * mm, width / 2 + 60 * mm, height - 82 * mm)
-
-            # ── Offer Body ──
-            body_start_y = height - 95 * mm
-            line_height = 6 * mm
-
-            pdf_canvas.setFont("Helvetica", 10)
-            pdf_canvas.setFillColor(slate)
-
-            body_text = (
-                f"Dear {application.full_name.split()[0]},",
-                "",
-                "We are delighted to offer you a position in our internship program at",
-                "AfriTech Bridge. After careful review of your application and interview",
-                "performance, we were impressed by your skills, passion, and potential.",
-            )
-
-            for i, line in enumerate(body_text):
-                pdf_canvas.drawCentredString(width / 2, body_start_y - i * line_height, line)
-
-            # ── Offer Details Box ──
-            details_y = body_start_y - len(body_text) * line_height - 30 * mm
-            box_height = 32 * mm
-            box_width = 140 * mm
-
-            pdf_canvas.setFillColorRGB(0.12, 0.23, 0.54, alpha=0.35)
-            pdf_canvas.roundRect(
-                width / 2 - box_width / 2, details_y, box_width, box_height, 4 * mm, fill=1, stroke=0
-            )
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(1.5)
-            pdf_canvas.roundRect(
-                width / 2 - box_width / 2, details_y, box_width, box_height, 4 * mm, fill=0, stroke=1
-            )
-
-            pdf_canvas.setFont("Helvetica-Bold", 8)
-            pdf_canvas.setFillColor(teal)
-            pdf_canvas.drawCentredString(width / 2, details_y + box_height - 5 * mm, "─── OFFER DETAILS ───")
-
-            detail_items = [
-                ("Program Track", application.track.name if application.track else "—"),
-                ("Program Type", "Full-Time Internship"),
-                ("Duration", "As per cohort schedule"),
-                ("Location", "Remote / Hybrid"),
-                ("Start Date", application.cohort.start_date.strftime("%d %B %Y") if application.cohort else "TBD"),
-            ]
-
-            col1_x = width / 2 - 55 * mm
-            col2_x = width / 2 + 10 * mm
-            detail_y_start = details_y + box_height - 10 * mm
-
-            pdf_canvas.setFont("Helvetica-Bold", 8.5)
-            pdf_canvas.setFillColor(light_gray)
-            for i, (label, value) in enumerate(detail_items[:3]):
-                y = detail_y_start - i * 5.5 * mm
-                pdf_canvas.drawString(col1_x, y, label)
-            pdf_canvas.setFont("Helvetica", 8.5)
-            pdf_canvas.setFillColor(white)
-            for i, (label, value) in enumerate(detail_items[:3]):
-                y = detail_y_start - i * 5.5 * mm
-                pdf_canvas.drawString(col2_x, y, value)
-
-            pdf_canvas.setFont("Helvetica-Bold", 8.5)
-            pdf_canvas.setFillColor(light_gray)
-            for i, (label, value) in enumerate(detail_items[3:]):
-                y = detail_y_start - (i + 3) * 5.5 * mm
-                pdf_canvas.drawString(col1_x, y, label)
-            pdf_canvas.setFont("Helvetica", 8.5)
-            pdf_canvas.setFillColor(white)
-            for i, (label, value) in enumerate(detail_items[3:]):
-                y = detail_y_start - (i + 3) * 5.5 * mm
-                pdf_canvas.drawString(col2_x, y, value)
-
-            # ── Login Credentials Box ──
-            creds_y = details_y - 28 * mm
-            creds_box_height = 22 * mm
-
-            pdf_canvas.setFillColorRGB(0.08, 0.72, 0.65, alpha=0.08)
-            pdf_canvas.roundRect(
-                width / 2 - box_width / 2, creds_y, box_width, creds_box_height, 4 * mm, fill=1, stroke=0
-            )
-            pdf_canvas.setStrokeColor(orange)
-            pdf_canvas.setLineWidth(1)
-            pdf_canvas.roundRect(
-                width / 2 - box_width / 2, creds_y, box_width, creds_box_height, 4 * mm, fill=0, stroke=1
-            )
+            buffer = BytesIO(render_offer_pdf(InternshipOfferService.offer_snapshot(application, offer)))
+            logger.info(f"Offer letter PDF generated: {offer.offer_number} ({buffer.getbuffer().nbytes} bytes)")
+            return buffer
 
-            pdf_canvas.setFont("Helvetica-Bold", 8)
-            pdf_canvas.setFillColor(orange)
-            pdf_canvas.drawCentredString(width / 2, creds_y + creds_box_height - 5 * mm, "─── YOUR LOGIN CREDENTIALS ───")
-
-            pdf_canvas.setFont("Helvetica-Bold", 9)
-            pdf_canvas.setFillColor(light_teal)
-            pdf_canvas.drawString(col1_x, creds_y + creds_box_height - 11 * mm, "Username:")
-            pdf_canvas.setFont("Courier-Bold", 9)
-            pdf_canvas.setFillColor(white)
-            pdf_canvas.drawString(col2_x, creds_y + creds_box_height - 11 * mm, offer.generated_username)
-
-            pdf_canvas.setFont("Helvetica-Bold", 9)
-            pdf_canvas.setFillColor(light_teal)
-            pdf_canvas.drawString(col1_x, creds_y + creds_box_height - 17 * mm, "Password:")
-            pdf_canvas.setFont("Courier-Bold", 9)
-            pdf_canvas.setFillColor(white)
-            # Mask password with dots for security in PDF
-            pdf_canvas.drawString(col2_x, creds_y + creds_box_height - 17 * mm, "● ● ● ● ● ● ● ● ● ● ● ●")
-
-            # ── Closing ──
-            closing_y = creds_y - 6 * mm
-            pdf_canvas.setFont("Helvetica", 10)
-            pdf_canvas.setFillColor(slate)
-            closing_lines = (
-                "We look forward to having you on board! Log in using the credentials above",
-                "within 7 days to access your tasks, track progress, and connect with your mentor.",
-            )
-            for i, line in enumerate(closing_lines):
-                pdf_canvas.drawCentredString(width / 2, closing_y - i * line_height, line)
+        except Exception as e:
+            logger.error(f"Offer PDF generation error: {str(e)}", exc_info=True)
+            return None
 
-            # ── Signature Section ──
-            sig_y = 48 * mm
-            sig_box_h = 22 * mm
-            sig_box_w = 80 * mm
+    @staticmethod
+    def _prepare_offer(application: InternshipApplication, admin_user: User) -> Tuple[InternshipOfferLetter, Optional[str], Optional[User]]:
+        """
+        Link or create the intern's user account and add the offer record.
 
-            pdf_canvas.setFillColorRGB(0.12, 0.23, 0.54, alpha=0.3)
-            pdf_canvas.roundRect(
-                width / 2 - sig_box_w / 2, sig_y, sig_box_w, sig_box_h, 4 * mm, fill=1, stroke=0
-            )
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(1.5)
-            pdf_canvas.roundRect(
-                width / 2 - sig_box_w / 2, sig_y, sig_box_w, sig_box_h, 4 * mm, fill=0, stroke=1
-            )
+        Returns (offer, password, created_user); password and created_user
+        are None when an existing account was linked.  Nothing is committed.
+        """
+        # ── Create or find existing user account ──
+        # Check if a user already exists with this email
+        intern_user = User.query.filter_by(email=application.email).first()
+        created_user = None
 
-            pdf_canvas.setFont("Helvetica-Bold", 7)
-            pdf_canvas.setFillColor(teal)
-            pdf_canvas.drawCentredString(width / 2, sig_y + sig_box_h - 3.5 * mm, "────────── AUTHORIZED SIGNATURE ──────────")
-
-            # Signature line
-            sig_line_y = sig_y + sig_box_h - 10 * mm
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(1.2)
-            pdf_canvas.line(width / 2 - 28 * mm, sig_line_y, width / 2 - 2 * mm, sig_line_y)
-            pdf_canvas.setStrokeColor(orange)
-            pdf_canvas.line(width / 2 + 2 * mm, sig_line_y, width / 2 + 28 * mm, sig_line_y)
-
-            # Try to load signature image
-            signature_path = os.path.join(
-                os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
-                "static", "images", "sign.jpg"
+        if intern_user:
+            # User already exists — link them and skip account creation
+            logger.info(
+                f"User already exists for email {application.email} (id={intern_user.id}) — linking existing account"
             )
-            if os.path.exists(signature_path):
-                try:
-                    # Draw light background so signature is visible on dark navy
-                    sig_img_x = width / 2 - 12 * mm
-                    sig_img_y = sig_line_y + 1 * mm
-                    sig_img_w = 24 * mm
-                    sig_img_h = 6 * mm
-                    pdf_canvas.setFillColor(colors.HexColor('#f8fafc'))
-                    pdf_canvas.roundRect(
-                        sig_img_x - 0.5 * mm, sig_img_y - 0.5 * mm,
-                        sig_img_w + 1 * mm, sig_img_h + 1 * mm,
-                        1.5 * mm, fill=1, stroke=0
-                    )
-                    pdf_canvas.drawImage(
-                        signature_path,
-                        sig_img_x, sig_img_y,
-                        width=sig_img_w, height=sig_img_h,
-                        preserveAspectRatio=True,
-                        mask="auto",
-                    )
-                except Exception:
-                    pass
-
-            pdf_canvas.setFont("Helvetica-Bold", 10)
-            pdf_canvas.setFillColor(white)
-            pdf_canvas.drawCentredString(width / 2, sig_y + 7 * mm, "Desire Bikorimana")
-            pdf_canvas.setFont("Helvetica-Bold", 7)
-            pdf_canvas.setFillColor(orange)
-            pdf_canvas.drawCentredString(width / 2, sig_y + 4 * mm, "Founder & Chief Executive Officer")
-            pdf_canvas.setFont("Helvetica", 6.5)
-            pdf_canvas.setFillColor(light_gray)
-            pdf_canvas.drawCentredString(width / 2, sig_y + 1.5 * mm, "AfriTech Bridge")
-
-            # ── QR Code for Verification ──
-            import qrcode
-            qr_size = 24 * mm
-            qr_x = width - 46 * mm
-            qr_y = sig_y + sig_box_h + 4 * mm
-
-            verification_url = (
-                f"https://study.afritechbridge.online/verify-offer/{offer.verification_hash}"
+            username = intern_user.username
+            password = None  # Don't regenerate password for existing users
+        else:
+            # Create new user account
+            username = InternshipOfferService._generate_username(application.full_name)
+            password = InternshipOfferService._generate_password()
+
+            # Check for username uniqueness
+            existing_user = User.query.filter_by(username=username).first()
+            if existing_user:
+                username = f"{username}.{secrets.token_hex(2)}"
+
+            # Look up intern role by name instead of hardcoding ID
+            intern_role = Role.query.filter_by(name='intern').first()
+            intern_role_id = intern_role.id if intern_role else Role.query.filter_by(name='student').first().id or 4
+
+            intern_user = User(
+                username=username,
+                email=application.email,
+                first_name=application.full_name.split()[0] if application.full_name.split() else application.full_name,
+                last_name=" ".join(application.full_name.split()[1:]) if len(application.full_name.split()) > 1 else "",
+                role_id=intern_role_id,
+                is_active=True,
+                must_change_password=True,  # Force password change on first login
             )
-            qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=10, border=1)
-            qr.add_data(verification_url)
-            qr.make(fit=True)
-            qr_img = qr.make_image(fill_color="#0f172a", back_color="white")
+            intern_user.set_password(password)
+            db.session.add(intern_user)
+            db.session.flush()
+            created_user = intern_user
+
+        # Link the application to the user (existing or newly created)
+        application.user_id = intern_user.id
+        db.session.flush()
+
+        # ── Create offer record ──
+        offer_number = InternshipOfferService._generate_offer_number()
+        share_token = InternshipOfferService._generate_share_token()
+        verification_hash = hashlib.sha256(
+            f"{offer_number}:{application.id}:{application.reference_code}:{secrets.token_hex(8)}".encode()
+        ).hexdigest()
+
+        offer = InternshipOfferLetter(
+            application_id=application.id,
+            offer_number=offer_number,
+            generated_username=username,
+            generated_password_hash=intern_user.password_hash,
+            verification_hash=verification_hash,
+            share_token=share_token,
+            status="sent",
+            created_by_id=admin_user.id,
+        )
+        db.session.add(offer)
+        db.session.flush()
 
-            qr_buffer = BytesIO()
-            qr_img.save(qr_buffer, format="PNG")
-            qr_buffer.seek(0)
+        return offer, password, created_user
 
-            pdf_canvas.setFillColor(white)
-            pdf_canvas.roundRect(qr_x, qr_y, qr_size, qr_size, 3 * mm, fill=1, stroke=0)
-            pdf_canvas.drawImage(
-                ImageReader(qr_buffer),
-                qr_x + 1.5 * mm, qr_y + 1.5 * mm,
-                width=qr_size - 3 * mm, height=qr_size - 3 * mm,
-                preserveAspectRatio=True, mask="auto",
-            )
-            pdf_canvas.setStrokeColor(teal)
-            pdf_canvas.setLineWidth(1.5)
-            pdf_canvas.roundRect(qr_x, qr_y, qr_size, qr_size, 3 * mm, fill=0, stroke=1)
-
-            pdf_canvas.setFont("Helvetica-Bold", 6)
-            pdf_canvas.setFillColor(teal)
-            pdf_canvas.drawCentredString(qr_x + qr_size / 2, qr_y - 4 * mm, "SCAN TO VERIFY")
-            pdf_canvas.setFont("Helvetica", 5.5)
-            pdf_canvas.setFillColor(light_gray)
-            pdf_canvas.drawCentredString(qr_x + qr_size / 2, qr_y - 7 * mm, "study.afritechbridge.online/verify-offer")
-
-            # ── Footer ──
-            pdf_canvas.setFont("Helvetica", 7)
-            pdf_canvas.setFillColor(slate)
-            pdf_canvas.drawCentredString(
-                width / 2, 18 * mm,
-                "Empowering the next generation of African tech leaders"
-            )
-            pdf_canvas.setFont("Helvetica-Bold", 6)
-            pdf_canvas.setFillColor(teal)
-            pdf_canvas.drawCentredString(
-                width / 2, 14 * mm,
-                f"© 2026 AfriTech Bridge  |  Offer No: {offer.offer_number}  |  Issued: {datetime.utcnow().strftime('%d %B %Y')}"
-            )
+    @staticmethod
+    def _store_offer_pdf(application: InternshipApplication, offer: InternshipOfferLetter, pdf_buffer: BytesIO, offer_dir: str) -> None:
+        """Record the tamper-proof hash and write the PDF to ``offer_dir``."""
+        # ── Compute tamper-proof hash ──
+        offer.pdf_hash = InternshipOfferService._compute_pdf_hash(pdf_buffer)
 
-            # ── Finalize ──
-            pdf_canvas.showPage()
-            pdf_canvas.save()
-            buffer.seek(0)
+        # ── Save PDF to disk ──
+        os.makedirs(offer_dir, exist_ok=True)
+        pdf_filename = f"{offer.offer_number}_{application.reference_code}.pdf"
+        pdf_path = os.path.join(offer_dir, pdf_filename)
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_buffer.getvalue())
 
-            logger.info(f"Offer letter PDF generated: {offer.offer_number} ({buffer.getbuffer().nbytes} bytes)")
-            return buffer
-
-        except Exception as e:
-            logger.error(f"Offer PDF generation error: {str(e)}", exc_info=True)
-            return None
+        offer.pdf_path = pdf_path
 
     @staticmethod
     def create_offer(application: InternshipApplication, admin_user: User, offer_dir: str) -> Tuple[bool, str, Optional[InternshipOfferLetter], Optional[str]]:
@@ -516,96 +665,20 @@ class InternshipOfferService:
             if existing:
                 return False, "An offer letter has already been issued for this application", existing, None
 
-            # ── Create or find existing user account ──
-            # Check if a user already exists with this email
-            intern_user = User.query.filter_by(email=application.email).first()
-
-            if intern_user:
-                # User already exists — link them and skip account creation
-                logger.info(
-                    f"User already exists for email {application.email} (id={intern_user.id}) — linking existing account"
-                )
-                username = intern_user.username
-                password = None  # Don't regenerate password for existing users
-            else:
-                # Create new user account
-                username = InternshipOfferService._generate_username(application.full_name)
-                password = InternshipOfferService._generate_password()
-
-                # Check for username uniqueness
-                existing_user = User.query.filter_by(username=username).first()
-                if existing_user:
-                    username = f"{username}.{secrets.token_hex(2)}"
-
-                # Look up intern role by name instead of hardcoding ID
-                intern_role = Role.query.filter_by(name='intern').first()
-                intern_role_id = intern_role.id if intern_role else Role.query.filter_by(name='student').first().id or 4
-
-                intern_user = User(
-                    username=username,
-                    email=application.email,
-                    first_name=application.full_name.split()[0] if application.full_name.split() else application.full_name,
-                    last_name=" ".join(application.full_name.split()[1:]) if len(application.full_name.split()) > 1 else "",
-                    role_id=intern_role_id,
-                    is_active=True,
-                    must_change_password=True,  # Force password change on first login
-                )
-                intern_user.set_password(password)
-                db.session.add(intern_user)
-                db.session.flush()
-
-            # Link the application to the user (existing or newly created)
-            application.user_id = intern_user.id
-            db.session.flush()
-
-            # ── Create offer record ──
-            offer_number = InternshipOfferService._generate_offer_number()
-            share_token = InternshipOfferService._generate_share_token()
-            verification_hash = hashlib.sha256(
-                f"{offer_number}:{application.id}:{application.reference_code}:{secrets.token_hex(8)}".encode()
-            ).hexdigest()
-
-            offer = InternshipOfferLetter(
-                application_id=application.id,
-                offer_number=offer_number,
-                generated_username=username,
-                generated_password_hash=intern_user.password_hash,
-                verification_hash=verification_hash,
-                share_token=share_token,
-                status="sent",
-                created_by_id=admin_user.id,
-            )
-            db.session.add(offer)
-            db.session.flush()
+            offer, password, _ = InternshipOfferService._prepare_offer(application, admin_user)
 
             # ── Generate PDF ──
             pdf_buffer = InternshipOfferService.generate_offer_pdf(application, offer)
             if not pdf_buffer:
                 db.session.rollback()
-                return False, "Failed to generate offer letter PDF", None
-
-            # ── Compute tamper-proof hash ──
-            pdf_hash = InternshipOfferService._compute_pdf_hash(pdf_buffer)
-            offer.pdf_hash = pdf_hash
+                return False, "Failed to generate offer letter PDF", None, None
 
-            # ── Save PDF to disk ──
-            os.makedirs(offer_dir, exist_ok=True)
-            pdf_filename = f"{offer.offer_number}_{application.reference_code}.pdf"
-            pdf_path = os.path.join(offer_dir, pdf_filename)
-            with open(pdf_path, "wb") as f:
-                f.write(pdf_buffer.getvalue())
-
-            offer.pdf_path = pdf_path
+            InternshipOfferService._store_offer_pdf(application, offer, pdf_buffer, offer_dir)
             db.session.commit()
 
             logger.info(
                 f"Offer letter created: {offer.offer_number} for {application.full_name} "
-                f"(user={username}, pdf_hash={pdf_hash[:16]}...)"
-            )
-
-            logger.info(
-                f"Offer letter created: {offer.offer_number} for {application.full_name} "
-                f"(user={username}, pdf_hash={pdf_hash[:16]}...)"
+                f"(user={offer.generated_username}, pdf_hash={offer.pdf_hash[:16]}...)"
             )
 
             return True, "Offer letter generated successfully", offer, password
@@ -615,6 +688,95 @@ class InternshipOfferService:
             logger.error(f"Error creating offer letter: {str(e)}", exc_info=True)
             return False, f"Failed to create offer letter: {str(e)}", None, None
 
+    @staticmethod
+    def create_offers_batch(applications, admin_user: User, offer_dir: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Create offer letters for many accepted applications in one transaction.
+
+        Offer records and accounts are created first, then every PDF is
+        rendered through the document render pool, and the batch is committed
+        once.  An application whose records cannot be created or whose PDF
+        fails to render is rolled back individually without affecting the
+        others.
+
+        Args:
+            applications: Accepted InternshipApplication records without an offer
+            admin_user: The admin User who is issuing the offers
+            offer_dir: Directory path to save PDF files
+
+        Returns:
+            Dict keyed by application id with ``success``, ``message``,
+            ``offer`` and ``password`` entries
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        prepared = []
+
+        try:
+            for application in applications:
+                previous_user_id = application.user_id
+                savepoint = db.session.begin_nested()
+                try:
+                    offer, password, created_user = InternshipOfferService._prepare_offer(application, admin_user)
+                    savepoint.commit()
+                except Exception as e:
+                    savepoint.rollback()
+                    logger.error(f"Error preparing offer for application {application.id}: {str(e)}", exc_info=True)
+                    results[application.id] = {
+                        'success': False,
+                        'message': f"Failed to create offer letter: {str(e)}",
+                        'offer': None,
+                        'password': None,
+                    }
+                    continue
+                prepared.append((application, offer, password, created_user, previous_user_id))
+
+            snapshots = [InternshipOfferService.offer_snapshot(a, o) for a, o, _, _, _ in prepared]
+            rendered = DocumentRenderService.render_many(render_offer_pdf, snapshots)
+
+            for (application, offer, password, created_user, previous_user_id), pdf_bytes in zip(prepared, rendered):
+                if pdf_bytes is None:
+                    db.session.delete(offer)
+                    application.user_id = previous_user_id
+                    if created_user is not None:
+                        # Flush the relink first, or deleting the account nulls the application's user_id
+                        db.session.flush()
+                        db.session.delete(created_user)
+                    results[application.id] = {
+                        'success': False,
+                        'message': "Failed to generate offer letter PDF",
+                        'offer': None,
+                        'password': None,
+                    }
+                    continue
+
+                InternshipOfferService._store_offer_pdf(application, offer, BytesIO(pdf_bytes), offer_dir)
+                results[application.id] = {
+                    'success': True,
+                    'message': "Offer letter generated successfully",
+                    'offer': offer,
+                    'password': password,
+                }
+
+            db.session.commit()
+            logger.info(
+                f"Batch offer letters created: "
+                f"{sum(1 for r in results.values() if r['success'])}/{len(prepared)}"
+            )
+            return results
+
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error creating offer letters in batch: {str(e)}", exc_info=True)
+            return {
+                application.id: {
+                    'success': False,
+                    'message': f"Failed to create offer letter: {str(e)}",
+                    'offer': None,
+                    'password': None,
+                }
+                for application in applications
+            }
+
     @staticmethod
     def verify_offer_pdf(offer: InternshipOfferLetter) -> Tuple[bool, str]:
         """
@@ -0,0 +1,417 @@
+"""Coalesced lesson progress heartbeats.
+
+While a student reads or watches, the learning page posts progress every few
+seconds.  Each post used to load the lesson, its module, the enrollment and
+the completion row, commit an update and often recompute the stored
+component scores.  Heartbeats are now merged in memory per
+(student, lesson) and flushed periodically:
+
+  - progress fields only ever grow, so pending values merge with ``max`` and
+    the flush applies ``max(stored, pending)`` in SQL, which keeps flushes
+    from several workers (or a concurrent full save) from regressing a row;
+  - positional fields (video position, duration, speed, mixed video state)
+    keep the latest value;
+  - one flush is an ``INSERT`` batch for new rows and an executemany
+    ``UPDATE`` for existing ones, in a single transaction.  If that batch
+    fails, each lesson is written in its own transaction so one bad row
+    cannot hold back the others; a row that keeps failing on its own is
+    dropped after ``MAX_FLUSH_FAILURES`` flushes.
+
+The lesson score is computed in memory from the quiz/assignment facts
+loaded when a lesson is first seen (``LessonCompletion.assessment_state``),
+so the expensive path — auto-completion, next-lesson unlock, enrollment
+progress — only runs for the heartbeat that actually crosses the
+completion threshold.  Stored component scores are refreshed at flush time
+when reading or engagement has moved into a new ``SCORE_BUCKET``.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import bindparam, case, func, insert, tuple_, update
+
+from ..models.user_models import db
+from ..models.student_models import LessonCompletion
+
+logger = logging.getLogger(__name__)
+
+# Fields that only ever increase
+MONOTONIC_FIELDS = ('reading_progress', 'engagement_score', 'scroll_progress', 'video_progress', 'time_spent')
+# Fields where the latest heartbeat wins
+LATEST_FIELDS = ('video_current_time', 'video_duration', 'playback_speed', 'mixed_video_progress')
+
+COMPLETION_THRESHOLD = 80.0
+# Reading/engagement step (in points) that triggers a stored component-score refresh
+SCORE_BUCKET = 10.0
+# How long cached quiz/assignment facts are trusted before the lesson is re-checked
+ASSESSMENT_TTL_SECONDS = 60
+# Entries with nothing pending are dropped after this much inactivity
+IDLE_SECONDS = 600
+# Flushes a lesson's pending values may fail on their own before they are dropped
+MAX_FLUSH_FAILURES = 3
+
+Key = Tuple[int, int]
+
+
+def _bucket(reading: float, engagement: float) -> Tuple[int, int]:
+    return int(math.floor(reading / SCORE_BUCKET)), int(math.floor(engagement / SCORE_BUCKET))
+
+
+def normalize_heartbeat(data: Dict[str, Any]) -> Dict[str, Any]:
+    """The progress fields of a heartbeat payload, coerced to their column types."""
+    values: Dict[str, Any] = {}
+    for field in MONOTONIC_FIELDS:
+        if data.get(field) is not None:
+            values[field] = int(data[field]) if field == 'time_spent' else float(data[field])
+    for field in LATEST_FIELDS:
+        if field in data:
+            values[field] = data[field]
+    if data.get('video_completed'):
+        values['video_completed'] = True
+    return values
+
+
+def merge_heartbeats(older: Dict[str, Any], newer: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine two normalized heartbeats: max for progress, latest for positions."""
+    merged = dict(older)
+    for field, value in newer.items():
+        if field in MONOTONIC_FIELDS and field in merged:
+            merged[field] = max(merged[field], value)
+        elif field == 'video_completed':
+            merged[field] = merged.get(field, False) or value
+        else:
+            merged[field] = value
+    return merged
+
+
+class _Entry:
+    """What this worker knows about one student's progress in one lesson."""
+
+    __slots__ = ('pending', 'reading', 'engagement', 'completed', 'video_completed',
+                 'assessment', 'loaded_at', 'scored_bucket', 'rescore', 'last_seen', 'failures')
+
+    def __init__(self, row: Optional[LessonCompletion], assessment: Dict[str, Any]):
+        self.pending: Dict[str, Any] = {}
+        self.reading = (row.reading_progress or 0.0) if row else 0.0
+        self.engagement = (row.engagement_score or 0.0) if row else 0.0
+        self.completed = bool(row and row.completed)
+        self.video_completed = bool(row and row.video_completed)
+        self.assessment = assessment
+        self.loaded_at = time.monotonic()
+        self.scored_bucket = _bucket(self.reading, self.engagement)
+        self.rescore = False
+        self.last_seen = self.loaded_at
+        self.failures = 0
+
+
+class LessonProgressBuffer:
+    """Per-process buffer of pending lesson progress keyed by (student, lesson)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Key, _Entry] = {}
+
+    def is_tracking(self, student_id: int, lesson_id: int) -> bool:
+        """Whether the lesson is loaded here with assessment facts that are still fresh."""
+        with self._lock:
+            entry = self._entries.get((student_id, lesson_id))
+            return entry is not None and time.monotonic() - entry.loaded_at < ASSESSMENT_TTL_SECONDS
+
+    def track(self, student_id: int, lesson_id: int) -> None:
+        """
+        Load the stored progress and assessment facts for a lesson.
+
+        Callers check the lesson exists and the student is enrolled first.
+        Anything already pending for the lesson is kept.
+        """
+        row = LessonCompletion.query.filter_by(student_id=student_id, lesson_id=lesson_id).first()
+        probe = row or LessonCompletion(student_id=student_id, lesson_id=lesson_id)
+        entry = _Entry(row, probe.assessment_state())
+
+        with self._lock:
+            previous = self._entries.get((student_id, lesson_id))
+            if previous is not None:
+                entry.pending = previous.pending
+                entry.reading = max(entry.reading, previous.reading)
+                entry.engagement = max(entry.engagement, previous.engagement)
+                entry.scored_bucket = previous.scored_bucket
+                entry.rescore = previous.rescore
+                entry.failures = previous.failures
+            self._entries[(student_id, lesson_id)] = entry
+
+    def forget(self, student_id: int, lesson_id: int) -> None:
+        """Drop what is known about a lesson; the next heartbeat reloads it."""
+        with self._lock:
+            self._entries.pop((student_id, lesson_id), None)
+
+    def record(self, student_id: int, lesson_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge one heartbeat into the buffer.
+
+        Returns the merged progress, the in-memory lesson score and
+        ``needs_evaluation`` — true when this heartbeat takes an incomplete
+        lesson to the completion threshold or first completes a video, in
+        which case the caller should ``take`` the pending values and run
+        the full progress update.  The lesson must be tracked.
+        """
+        values = normalize_heartbeat(data)
+        with self._lock:
+            entry = self._entries[(student_id, lesson_id)]
+            entry.pending = merge_heartbeats(entry.pending, values)
+            entry.reading = max(entry.reading, values.get('reading_progress', 0.0))
+            entry.engagement = max(entry.engagement, values.get('engagement_score', 0.0))
+            entry.last_seen = time.monotonic()
+            if _bucket(entry.reading, entry.engagement) != entry.scored_bucket:
+                entry.rescore = True
+
+            lesson_score = LessonCompletion.score_from_progress(entry.reading, entry.engagement, entry.assessment)
+            video_finished = values.get('video_completed', False) and not entry.video_completed
+            needs_evaluation = not entry.completed and (lesson_score >= COMPLETION_THRESHOLD or video_finished)
+
+            return {
+                'progress': dict(entry.pending, reading_progress=entry.reading, engagement_score=entry.engagement),
+                'lesson_score': lesson_score,
+                'completed': entry.completed,
+                'needs_evaluation': needs_evaluation,
+            }
+
+    def take(self, student_id: int, lesson_id: int) -> Dict[str, Any]:
+        """Remove and return the pending heartbeat values for one lesson."""
+        with self._lock:
+            entry = self._entries.get((student_id, lesson_id))
+            if entry is None:
+                return {}
+            pending, entry.pending = entry.pending, {}
+            return pending
+
+    def absorb(self, student_id: int, lesson_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Fold pending heartbeats into a full progress update about to be saved.
+
+        Progress fields take the larger value; everything sent in ``data``
+        wins otherwise, so a buffered video position never overwrites a
+        newer explicit save.
+        """
+        pending = self.take(student_id, lesson_id)
+        if not pending:
+            return data
+        merged = dict(data)
+        for field, value in pending.items():
+            if field in MONOTONIC_FIELDS and data.get(field) is not None:
+                merged[field] = max(value, int(data[field]) if field == 'time_spent' else float(data[field]))
+            elif field == 'video_completed':
+                merged[field] = bool(data.get(field)) or value
+            elif field not in data:
+                merged[field] = value
+        return merged
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    def _drain(self, keys: Optional[Iterable[Key]] = None) -> Dict[Key, Tuple[Dict[str, Any], bool]]:
+        now = time.monotonic()
+        with self._lock:
+            wanted = self._entries.keys() if keys is None else [k for k in keys if k in self._entries]
+            drained = {}
+            for key in list(wanted):
+                entry = self._entries[key]
+                if entry.pending:
+                    drained[key] = (entry.pending, entry.rescore)
+                    entry.pending = {}
+                    if entry.rescore:
+                        entry.rescore = False
+                        entry.scored_bucket = _bucket(entry.reading, entry.engagement)
+                elif keys is None and now - entry.last_seen > IDLE_SECONDS:
+                    del self._entries[key]
+        return drained
+
+    def _restore(self, drained: Dict[Key, Tuple[Dict[str, Any], bool]], count_failure: bool = False) -> None:
+        with self._lock:
+            for key, (pending, rescore) in drained.items():
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if count_failure:
+                    entry.failures += 1
+                    if entry.failures >= MAX_FLUSH_FAILURES:
+                        logger.error(f"Dropping lesson progress for student {key[0]}, lesson {key[1]} "
+                                     f"after {entry.failures} failed flushes")
+                        entry.pending = {}
+                        entry.failures = 0
+                        continue
+                entry.pending = merge_heartbeats(pending, entry.pending)
+                entry.rescore = entry.rescore or rescore
+
+    def _written(self, keys: Iterable[Key]) -> None:
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.failures = 0
+
+    @staticmethod
+    def _update_statement():
+        table = LessonCompletion.__table__
+        values = {}
+        for field in MONOTONIC_FIELDS:
+            column = table.c[field]
+            param = bindparam(f'p_{field}', type_=column.type)
+            # max(stored, pending); NULL and absent values count as no progress
+            values[field] = case(
+                (func.coalesce(column, 0) < param, param),
+                else_=func.coalesce(column, 0),
+            )
+        for field in LATEST_FIELDS + ('video_completed',):
+            values[field] = func.coalesce(bindparam(f'p_{field}', type_=table.c[field].type), table.c[field])
+        values['updated_at'] = bindparam('p_now')
+        values['last_accessed'] = bindparam('p_now')
+        return update(table).where(table.c.id == bindparam('p_id')).values(**values)
+
+    @staticmethod
+    def _column_values(pending: Dict[str, Any]) -> Dict[str, Any]:
+        """Pending positional fields as stored; mixed video state is kept as JSON text."""
+        values = {field: pending[field] for field in LATEST_FIELDS if field in pending}
+        if 'mixed_video_progress' in values:
+            values['mixed_video_progress'] = json.dumps(values['mixed_video_progress'])
+        return values
+
+    def _write(self, drained: Dict[Key, Tuple[Dict[str, Any], bool]], now: datetime) -> int:
+        """Stage the drained values in the session; returns the number of new rows."""
+        existing = {
+            (row.student_id, row.lesson_id): row.id
+            for row in db.session.query(
+                LessonCompletion.id, LessonCompletion.student_id, LessonCompletion.lesson_id
+            ).filter(tuple_(LessonCompletion.student_id, LessonCompletion.lesson_id).in_(list(drained)))
+        }
+
+        inserts = []
+        updates = []
+        for (student_id, lesson_id), (pending, _) in drained.items():
+            if (student_id, lesson_id) in existing:
+                params = {'p_id': existing[(student_id, lesson_id)], 'p_now': now}
+                for field in MONOTONIC_FIELDS:
+                    params[f'p_{field}'] = pending.get(field, 0)
+                latest = self._column_values(pending)
+                for field in LATEST_FIELDS:
+                    params[f'p_{field}'] = latest.get(field)
+                params['p_video_completed'] = pending.get('video_completed')
+                updates.append(params)
+            else:
+                row = {field: pending.get(field, 0) for field in MONOTONIC_FIELDS}
+                row.update(self._column_values(pending))
+                row.update(student_id=student_id, lesson_id=lesson_id, completed=False,
+                           video_completed=pending.get('video_completed', False),
+                           updated_at=now, last_accessed=now)
+                inserts.append(row)
+
+        if inserts:
+            db.session.execute(insert(LessonCompletion.__table__), inserts)
+        if updates:
+            db.session.execute(self._update_statement(), updates)
+
+        rescore = [key for key, (_, needs) in drained.items() if needs]
+        if rescore:
+            for completion in LessonCompletion.query.filter(
+                tuple_(LessonCompletion.student_id, LessonCompletion.lesson_id).in_(rescore)
+            ):
+                completion.calculate_and_store_component_scores(commit=False)
+        return len(inserts)
+
+    def _flush_one_by_one(self, drained: Dict[Key, Tuple[Dict[str, Any], bool]], now: datetime) -> int:
+        """Write each lesson in its own transaction after a failed batch."""
+        failed = {}
+        for key, value in drained.items():
+            try:
+                self._write({key: value}, now)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                failed[key] = value
+                logger.error(f"Failed to flush lesson progress for student {key[0]}, lesson {key[1]}: {str(e)}")
+
+        written = len(drained) - len(failed)
+        self._written(key for key in drained if key not in failed)
+        # When nothing could be written the database itself is the problem,
+        # not the rows, so they are kept without counting a failure
+        self._restore(failed, count_failure=written > 0 or len(drained) == 1)
+        return written
+
+    def flush(self, keys: Optional[Iterable[Key]] = None) -> int:
+        """
+        Write buffered heartbeats to the database.
+
+        ``keys`` limits the flush to specific (student, lesson) pairs, e.g.
+        before a lesson's progress is read back.  If the batch fails, the
+        lessons are retried one at a time; values that still fail are
+        merged back so they are retried on the next flush.
+
+        Returns the number of rows written.
+        """
+        drained = self._drain(keys)
+        if not drained:
+            return 0
+
+        now = datetime.utcnow()
+        try:
+            inserted = self._write(drained, now)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Batched lesson progress flush failed, writing lessons one at a time: {str(e)}")
+            return self._flush_one_by_one(drained, now)
+
+        self._written(drained)
+        logger.debug(f"Flushed lesson progress for {len(drained)} lesson(s), {inserted} new")
+        return len(drained)
+
+lesson_progress_buffer = LessonProgressBuffer()
+
+_flush_scheduler = BackgroundScheduler(timezone="UTC")
+_flusher_started = False
+
+
+def _flush_with_app(app):
+    with app.app_context():
+        lesson_progress_buffer.flush()
+
+
+def start_lesson_progress_flusher(app):
+    """
+    Start the periodic heartbeat flush job for this worker.
+
+    Like the forum view counter, the buffer lives in process memory, so every
+    worker runs its own flusher; pending progress is also flushed when the
+    worker exits.
+    """
+    global _flusher_started
+
+    if _flusher_started:
+        return
+
+    interval = int(app.config.get(
+        "LESSON_PROGRESS_FLUSH_SECONDS",
+        os.getenv("LESSON_PROGRESS_FLUSH_SECONDS", 5),
+    ))
+
+    _flush_scheduler.add_job(
+        func=lambda: _flush_with_app(app),
+        trigger=IntervalTrigger(seconds=interval),
+        id="lesson_progress_flush_job",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    _flush_scheduler.start()
+    atexit.register(_flush_with_app, app)
+    _flusher_started = True
+    logger.info(f"✅ Lesson progress flusher started (every {interval}s)")
@@ -42,6 +42,19 @@ def _user_wants_notification(user_id: int, category: str) -> bool:
     return pref.is_category_enabled(category)
 
 
+def _users_wanting_notification(user_ids, category: str) -> set:
+    """The subset of ``user_ids`` with this category enabled, in one query."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    prefs = NotificationPreference.query.filter(NotificationPreference.user_id.in_(user_ids)).all()
+    opted_out = {
+        p.user_id for p in prefs
+        if not p.in_app_enabled or not p.is_category_enabled(category)
+    }
+    return user_ids - opted_out
+
+
 def _create_notification(
     user_id: int,
     notification_type: str,
@@ -65,12 +78,17 @@ def _create_notification(
     task_type: str = None,
     metadata: dict = None,
     expires_days: int = 90,
+    check_preferences: bool = True,
 ) -> Notification | None:
-    """Low-level factory — callers should prefer the domain-specific helpers below."""
+    """Low-level factory — callers should prefer the domain-specific helpers below.
+
+    Pass ``check_preferences=False`` when the caller has already filtered
+    recipients with ``_users_wanting_notification``.
+    """
     category = _category_for_type(notification_type)
 
     # Respect user preferences
-    if not _user_wants_notification(user_id, category):
+    if check_preferences and not _user_wants_notification(user_id, category):
         return None
 
     n = Notification(
@@ -211,6 +229,48 @@ def notify_assignment_graded(
     return n
 
 
+def notify_assignments_graded(graded: list, actor_id: int = None):
+    """Notify many students of graded assignments with a single commit.
+
+    ``graded`` holds ``(submission, assignment, grade, feedback)`` tuples;
+    preferences for all recipients are read in one query.
+    """
+    wanted = _users_wanting_notification(
+        (submission.student_id for submission, _, _, _ in graded),
+        _category_for_type(NotificationType.GRADE_ASSIGNMENT),
+    )
+    count = 0
+    for submission, assignment, grade, feedback in graded:
+        if submission.student_id not in wanted:
+            continue
+        points_possible = assignment.points_possible or 100
+        percentage = round((grade / points_possible) * 100, 1)
+        course_title = assignment.course.title if assignment.course else 'Unknown Course'
+        _create_notification(
+            user_id=submission.student_id,
+            notification_type=NotificationType.GRADE_ASSIGNMENT,
+            title=f"Assignment Graded: {assignment.title}",
+            message=f"You scored {grade}/{points_possible} ({percentage}%) on \"{assignment.title}\" in {course_title}.",
+            priority=NotificationPriority.HIGH,
+            action_url=f"/student/assessments",
+            actor_id=actor_id,
+            course_id=assignment.course_id,
+            assignment_id=assignment.id,
+            submission_id=submission.id,
+            metadata={
+                'grade': grade,
+                'points_possible': points_possible,
+                'percentage': percentage,
+                'feedback_preview': (feedback[:200] + '…') if feedback and len(feedback) > 200 else feedback,
+                'course_title': course_title,
+            },
+            check_preferences=False,
+        )
+        count += 1
+    _bulk_commit()
+    return count
+
+
 def notify_project_graded(
     submission,
     project,
@@ -6,13 +6,14 @@ Can be rendered in browser or printed as PDF for student records.
 """
 
 from datetime import datetime
-from weasyprint import HTML
 import base64
 import hashlib
 import io
 import os
 import qrcode
 
+from .document_render_service import DocumentRenderService
+
 
 # ── Embedded logo (base64 + URL) ─────────────────────────────────────────────
 _logo_path = os.path.join(os.path.dirname(__file__), "..", "..", "static", "images", "logo.jpg")
@@ -929,8 +930,8 @@ def generate_payment_slip_pdf(
         original_price=original_price,
     )
 
-    # Convert HTML to PDF
-    pdf_bytes = HTML(string=html_content).write_pdf()
+    # Convert HTML to PDF on a render pool worker (stylesheet, fonts and logo fetches stay cached there)
+    pdf_bytes = DocumentRenderService.render_one(_render_slip_pdf, html_content)
 
     # Generate filename
     if not receipt_number:
@@ -939,3 +940,8 @@ def generate_payment_slip_pdf(
     filename = f"Payment_Slip_{receipt_number}.pdf"
 
     return pdf_bytes, filename
+
+
+def _render_slip_pdf(html_content):
+    # Module level so the spawned render pool can import it
+    return DocumentRenderService.render_html_pdf(html_content)
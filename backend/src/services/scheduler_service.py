@@ -76,6 +76,9 @@ class BackgroundTaskScheduler:
         # Update user activity stats every 6 hours
         schedule.every(6).hours.do(self._update_activity_stats)
         
+        # Rebuild the admin student summary projection nightly at 4 AM
+        schedule.every().day.at("04:00").do(self._rebuild_student_summaries)
+        
         logger.info("Background tasks scheduled successfully")
     
     def _run_scheduler(self):
@@ -209,6 +212,20 @@ class BackgroundTaskScheduler:
         except Exception as e:
             logger.error(f"Failed to update activity stats: {str(e)}")
     
+    def _rebuild_student_summaries(self):
+        """Recompute every row of the student summary projection"""
+        logger.info("Rebuilding student summaries...")
+        
+        try:
+            with self.app.app_context():
+                from ..services.student_summary_service import StudentSummaryService
+                
+                rebuilt = StudentSummaryService.rebuild()
+                logger.info(f"Rebuilt {rebuilt} student summaries")
+                
+        except Exception as e:
+            logger.error(f"Failed to rebuild student summaries: {str(e)}")
+    
     def _send_admin_notification(self, subject: str, message: str):
         """Send notification to admin users"""
         try:
@@ -248,7 +265,8 @@ class BackgroundTaskScheduler:
             'daily_cleanup': self._daily_cleanup_check,
             'weekly_cleanup': self._weekly_cleanup,
             'send_warnings': self._send_inactivity_warnings,
-            'update_stats': self._update_activity_stats
+            'update_stats': self._update_activity_stats,
+            'rebuild_student_summaries': self._rebuild_student_summaries
         }
         
         if task_name not in tasks:
@@ -0,0 +1,321 @@
+"""
+Student summary projection.
+
+``student_summary`` holds one row of derived metrics per student (enrollment
+counts, average progress and score, lessons, quiz submissions, certificates,
+application contact numbers) so the admin student list, export and
+performance report can filter and sort on them in SQL.
+
+Keeping it current:
+
+- A session ``after_flush`` hook marks the summary row of every student
+  whose enrollments, lesson completions, module scores, submissions,
+  certificates or applications were written in that flush as stale and
+  bumps its version, inserting a marker row if there was none. The upsert
+  runs in the writer's transaction, so it commits or rolls back with the
+  change.
+- Readers call ``ensure_current()``, which recomputes the missing and stale
+  rows with a handful of grouped queries per chunk of students. A
+  recomputed row is only stored if its version is still the one read
+  before computing, so a reader working from an older snapshot cannot
+  overwrite a newer invalidation; the row stays stale for the next read.
+- ``rebuild()`` recomputes every row; the background scheduler runs it
+  nightly to correct anything written outside the ORM.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+
+from sqlalchemy import bindparam, case, delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from ..models.user_models import db, User, Role
+from ..models.course_application import CourseApplication
+from ..models.course_models import Enrollment, Submission
+from ..models.student_models import Certificate, LessonCompletion, ModuleProgress, StudentSummary
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 500
+
+HIGH_PERFORMANCE_SCORE = 80
+MEDIUM_PERFORMANCE_SCORE = 50
+
+# Columns whose change alters a student's summary; None means any insert or delete
+_TRACKED_COLUMNS = {
+    Enrollment: ('student_id', 'status', 'progress', 'application_id'),
+    LessonCompletion: ('student_id', 'completed'),
+    ModuleProgress: ('student_id', 'cumulative_score'),
+    Submission: ('student_id',),
+    Certificate: ('student_id',),
+}
+
+
+def performance_level(avg_score: float) -> str:
+    if avg_score >= HIGH_PERFORMANCE_SCORE:
+        return 'high'
+    if avg_score >= MEDIUM_PERFORMANCE_SCORE:
+        return 'medium'
+    return 'low'
+
+
+def _changed(obj, columns: Iterable[str]) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in columns)
+
+
+def _previous(obj, name: str):
+    """Value of ``name`` before this flush, for rows that moved between students."""
+    deleted = inspect(obj).attrs[name].history.deleted
+    return deleted[0] if deleted else None
+
+
+def _mark_stale(session, flush_context):
+    student_ids: Set[int] = set()
+    emails: Set[str] = set()
+    application_ids: Set[int] = set()
+
+    for obj in session.new | session.deleted:
+        if type(obj) in _TRACKED_COLUMNS:
+            student_ids.add(obj.student_id)
+        elif isinstance(obj, CourseApplication):
+            emails.add(obj.email)
+            application_ids.add(obj.id)
+
+    for obj in session.dirty:
+        model = type(obj)
+        if model in _TRACKED_COLUMNS:
+            if _changed(obj, _TRACKED_COLUMNS[model]):
+                student_ids.update(i for i in (obj.student_id, _previous(obj, 'student_id')) if i)
+        elif isinstance(obj, CourseApplication):
+            if _changed(obj, ('email', 'phone', 'whatsapp_number')):
+                emails.update(e for e in (obj.email, _previous(obj, 'email')) if e)
+                application_ids.add(obj.id)
+        elif isinstance(obj, User):
+            # The application fallback is matched on email
+            if _changed(obj, ('email',)):
+                student_ids.add(obj.id)
+
+    connection = session.connection()
+    conditions = []
+    if emails:
+        conditions.append(User.email.in_(emails))
+    application_ids.discard(None)
+    if application_ids:
+        conditions.append(User.id.in_(
+            select(Enrollment.student_id).where(Enrollment.application_id.in_(application_ids))
+        ))
+    if conditions:
+        student_ids.update(connection.execute(select(User.id).where(or_(*conditions))).scalars())
+    student_ids.discard(None)
+    if student_ids:
+        _invalidate(connection, sorted(student_ids))
+
+
+def _invalidate(connection, student_ids: List[int]):
+    """Mark the rows of ``student_ids`` stale and bump their versions, creating them if missing."""
+    table = StudentSummary.__table__
+    dialects = {'postgresql': postgresql, 'sqlite': sqlite}
+    dialect = dialects.get(connection.dialect.name)
+    if dialect is None:
+        # No portable upsert: a row being built concurrently for the first time may miss this write
+        # until the nightly rebuild
+        connection.execute(update(table).where(table.c.student_id.in_(student_ids)).values(
+            is_stale=True, version=table.c.version + 1
+        ))
+        return
+    stmt = dialect.insert(table).values([{'student_id': sid, 'is_stale': True, 'version': 1} for sid in student_ids])
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[table.c.student_id],
+        set_={'is_stale': True, 'version': table.c.version + 1},
+    ))
+
+
+event.listen(db.session, 'after_flush', _mark_stale)
+
+
+class StudentSummaryService:
+    """Builds and reads the ``student_summary`` projection."""
+
+    @staticmethod
+    def _student_role_id():
+        return db.session.query(Role.id).filter_by(name='student').scalar()
+
+    @staticmethod
+    def compute(student_ids: List[int]) -> List[Dict]:
+        """Summary rows for ``student_ids``, from one grouped query per source table."""
+        rows = {sid: {
+            'student_id': sid,
+            'total_enrollments': 0,
+            'active_enrollments': 0,
+            'completed_enrollments': 0,
+            'terminated_enrollments': 0,
+            'avg_progress': 0.0,
+            'avg_score': 0.0,
+            'scored_modules': 0,
+            'lessons_completed': 0,
+            'quiz_submissions': 0,
+            'certificates': 0,
+            'application_phone': None,
+            'application_whatsapp': None,
+        } for sid in student_ids}
+        if not rows:
+            return []
+
+        enrollments = db.session.query(
+            Enrollment.student_id,
+            func.count(Enrollment.id),
+            func.sum(case((Enrollment.status == 'active', 1), else_=0)),
+            func.sum(case((Enrollment.status == 'completed', 1), else_=0)),
+            func.sum(case((Enrollment.status == 'terminated', 1), else_=0)),
+            func.sum(func.coalesce(Enrollment.progress, 0)),
+        ).filter(Enrollment.student_id.in_(student_ids)).group_by(Enrollment.student_id)
+        for sid, total, active, completed, terminated, progress in enrollments:
+            rows[sid].update(
+                total_enrollments=total,
+                active_enrollments=int(active or 0),
+                completed_enrollments=int(completed or 0),
+                terminated_enrollments=int(terminated or 0),
+                avg_progress=round(float(progress or 0) / total * 100, 1),
+            )
+
+        scores = db.session.query(
+            ModuleProgress.student_id, func.count(ModuleProgress.id), func.sum(ModuleProgress.cumulative_score)
+        ).filter(
+            ModuleProgress.student_id.in_(student_ids),
+            ModuleProgress.cumulative_score.isnot(None),
+        ).group_by(ModuleProgress.student_id)
+        for sid, count, total in scores:
+            rows[sid].update(scored_modules=count, avg_score=round(float(total or 0) / count, 1))
+
+        counts = (
+            ('lessons_completed', LessonCompletion, [LessonCompletion.completed == True]),
+            ('quiz_submissions', Submission, []),
+            ('certificates', Certificate, []),
+        )
+        for key, model, conditions in counts:
+            query = db.session.query(model.student_id, func.count(model.id)).filter(
+                model.student_id.in_(student_ids), *conditions
+            ).group_by(model.student_id)
+            for sid, count in query:
+                rows[sid][key] = count
+
+        # Most recent application: linked through an enrollment, else matched by email
+        application_for = dict(db.session.query(
+            Enrollment.student_id, func.max(CourseApplication.id)
+        ).join(
+            CourseApplication, Enrollment.application_id == CourseApplication.id
+        ).filter(Enrollment.student_id.in_(student_ids)).group_by(Enrollment.student_id).all())
+
+        unlinked = dict(db.session.query(User.id, User.email).filter(
+            User.id.in_([sid for sid in student_ids if sid not in application_for])
+        ).all())
+        if unlinked:
+            latest_by_email = dict(db.session.query(
+                CourseApplication.email, func.max(CourseApplication.id)
+            ).filter(CourseApplication.email.in_(set(unlinked.values()))).group_by(CourseApplication.email).all())
+            for sid, email in unlinked.items():
+                if email in latest_by_email:
+                    application_for[sid] = latest_by_email[email]
+
+        if application_for:
+            contacts = {app_id: (phone, whatsapp) for app_id, phone, whatsapp in db.session.query(
+                CourseApplication.id, CourseApplication.phone, CourseApplication.whatsapp_number
+            ).filter(CourseApplication.id.in_(set(application_for.values())))}
+            for sid, app_id in application_for.items():
+                rows[sid]['application_phone'], rows[sid]['application_whatsapp'] = contacts.get(app_id, (None, None))
+
+        now = datetime.utcnow()
+        for row in rows.values():
+            row['performance_level'] = performance_level(row['avg_score'])
+            row['refreshed_at'] = now
+        return list(rows.values())
+
+    @staticmethod
+    def _store(rows: List[Dict], versions: Dict[int, int]) -> int:
+        """Write computed ``rows``, skipping any whose version moved on since ``versions`` was read.
+
+        Students without a row in ``versions`` are inserted; a concurrent
+        insert of the same student raises IntegrityError. Returns the number
+        of rows stored.
+        """
+        table = StudentSummary.__table__
+        new_rows = [row for row in rows if row['student_id'] not in versions]
+        if new_rows:
+            db.session.execute(insert(table), new_rows)
+
+        existing = [dict(row, is_stale=False, b_student_id=row['student_id'],
+                         b_version=versions[row['student_id']])
+                    for row in rows if row['student_id'] in versions]
+        if not existing:
+            return len(new_rows)
+        columns = [key for key in existing[0] if key not in ('student_id', 'b_student_id', 'b_version')]
+        result = db.session.execute(
+            update(table).where(
+                table.c.student_id == bindparam('b_student_id'),
+                table.c.version == bindparam('b_version'),
+            ).values({name: bindparam(name) for name in columns}),
+            existing,
+        )
+        return len(new_rows) + result.rowcount
+
+    @classmethod
+    def refresh(cls, student_ids: Iterable[int]) -> int:
+        """Recompute the summary rows of ``student_ids``. Does not commit.
+
+        Returns the number of rows stored; rows invalidated again while they
+        were being computed are left stale.
+        """
+        student_ids = sorted(set(student_ids))
+        stored = 0
+        for start in range(0, len(student_ids), CHUNK_SIZE):
+            chunk = student_ids[start:start + CHUNK_SIZE]
+            versions = dict(db.session.query(StudentSummary.student_id, StudentSummary.version).filter(
+                StudentSummary.student_id.in_(chunk)
+            ).all())
+            stored += cls._store(cls.compute(chunk), versions)
+        return stored
+
+    @classmethod
+    def ensure_current(cls, role_id=None) -> int:
+        """Recompute summary rows that are missing or stale. Returns the number stored."""
+        role_id = role_id or cls._student_role_id()
+        if role_id is None:
+            return 0
+        pending = [sid for (sid,) in db.session.query(User.id).outerjoin(
+            StudentSummary, StudentSummary.student_id == User.id
+        ).filter(
+            User.role_id == role_id,
+            or_(StudentSummary.student_id.is_(None), StudentSummary.is_stale.is_(True)),
+        )]
+        if not pending:
+            return 0
+        try:
+            stored = cls.refresh(pending)
+            db.session.commit()
+        except IntegrityError:
+            # Another request or a write created the same rows first
+            db.session.rollback()
+            logger.debug("Student summary rows were refreshed concurrently")
+            return 0
+        return stored
+
+    @classmethod
+    def rebuild(cls) -> int:
+        """Recompute every student's row and drop rows of non-students. Commits per chunk."""
+        role_id = cls._student_role_id()
+        if role_id is None:
+            return 0
+        db.session.execute(delete(StudentSummary.__table__).where(
+            StudentSummary.student_id.notin_(select(User.id).where(User.role_id == role_id))
+        ))
+        db.session.commit()
+
+        student_ids = [sid for (sid,) in db.session.query(User.id).filter(User.role_id == role_id).order_by(User.id)]
+        for start in range(0, len(student_ids), CHUNK_SIZE):
+            cls.refresh(student_ids[start:start + CHUNK_SIZE])
+            db.session.commit()
+        logger.info(f"Rebuilt student summary for {len(student_ids)} students")
+        return len(student_ids)
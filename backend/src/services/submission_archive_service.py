@@ -0,0 +1,340 @@
+"""
+Streaming ZIP archives of submission files.
+
+Submission files live on Google Drive.  Archives are written to the response
+while they are being built: files are fetched on a bounded thread pool and
+each one is added to the ZIP as soon as its download finishes, so the first
+bytes reach the client after the first file instead of after the last, and
+the worker never holds the whole archive in memory.
+
+Downloaded blobs are kept in a local disk cache keyed by Drive file ID and
+``modifiedTime``; re-downloading an assignment (or one student's files after
+a bulk download) reads from disk.  A changed file on Drive gets a new
+``modifiedTime`` and therefore a new cache entry.  The cache lives under
+``DRIVE_BLOB_CACHE_DIR`` (default ``uploads/drive_cache``) and is trimmed to
+``DRIVE_BLOB_CACHE_MAX_MB`` (default 2048), least recently used first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import Response
+from werkzeug.utils import secure_filename
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'uploads', 'drive_cache'
+)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Already-compressed formats are stored rather than deflated again
+STORED_EXTENSIONS = {
+    '.zip', '.xlsx', '.xlsm', '.docx', '.pptx', '.pdf', '.png', '.jpg', '.jpeg',
+    '.gif', '.webp', '.mp4', '.mp3', '.gz', '.7z', '.rar',
+}
+
+# Files used within this window are never evicted (they may be mid-stream)
+EVICTION_GRACE_SECONDS = 600
+
+
+@dataclass
+class ArchiveEntry:
+    arcname: str
+    file_id: Optional[str]
+    source: str = ''
+
+
+class DriveBlobCache:
+    """Drive file contents on local disk, keyed by file ID and modifiedTime."""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or os.getenv('DRIVE_BLOB_CACHE_DIR', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else (
+            int(os.getenv('DRIVE_BLOB_CACHE_MAX_MB', '2048')) * 1024 * 1024
+        )
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def _safe_id(file_id: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_-]', '_', file_id)
+
+    def path_for(self, file_id: str, modified_time: str) -> str:
+        version = hashlib.sha1(modified_time.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.root, f"{self._safe_id(file_id)}-{version}.blob")
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _download(self, drive, file_id: str) -> str:
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                drive.download_to_file(file_id, fh)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def fetch(self, drive, file_id: str, modified_time: Optional[str]) -> Tuple[str, bool]:
+        """
+        Return (path, temporary) for a file's content, downloading on a miss.
+
+        Without a ``modified_time`` the file cannot be versioned, so it is
+        downloaded to a temporary file the caller must delete.
+        """
+        if not modified_time:
+            return self._download(drive, file_id), True
+
+        path = self.path_for(file_id, modified_time)
+        if os.path.isfile(path):
+            os.utime(path)
+            return path, False
+
+        with self._lock_for(path):
+            if not os.path.isfile(path):
+                os.replace(self._download(drive, file_id), path)
+                self._remove_old_versions(file_id, keep=path)
+                logger.debug(f"Cached Drive blob {file_id} ({os.path.getsize(path)} bytes)")
+        with self._locks_guard:
+            self._locks.pop(path, None)
+
+        self.evict()
+        return path, False
+
+    def _remove_old_versions(self, file_id: str, keep: str) -> None:
+        prefix = f"{self._safe_id(file_id)}-"
+        for name in os.listdir(self.root):
+            full = os.path.join(self.root, name)
+            if name.startswith(prefix) and name.endswith('.blob') and full != keep:
+                try:
+                    os.remove(full)
+                except OSError:
+                    pass
+
+    def evict(self) -> int:
+        """Delete least recently used blobs until the cache fits ``max_bytes``."""
+        try:
+            blobs = []
+            for name in os.listdir(self.root):
+                if name.endswith('.blob'):
+                    stat = os.stat(os.path.join(self.root, name))
+                    blobs.append((stat.st_mtime, stat.st_size, name))
+        except OSError:
+            return 0
+
+        total = sum(size for _, size, _ in blobs)
+        removed = 0
+        cutoff = time.time() - EVICTION_GRACE_SECONDS
+        for mtime, size, name in sorted(blobs):
+            if total <= self.max_bytes or mtime > cutoff:
+                break
+            try:
+                os.remove(os.path.join(self.root, name))
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+class _ZipSink:
+    """Write-only, unseekable sink so zipfile output can be drained as it is produced."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class SubmissionArchiveService:
+    """Build streaming ZIP downloads for one submission or a whole assignment."""
+
+    _blob_cache: Optional[DriveBlobCache] = None
+
+    @classmethod
+    def blob_cache(cls) -> DriveBlobCache:
+        if cls._blob_cache is None:
+            cls._blob_cache = DriveBlobCache()
+        return cls._blob_cache
+
+    @staticmethod
+    def max_workers() -> int:
+        return max(1, int(os.getenv('SUBMISSION_ZIP_WORKERS', '4')))
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def submission_files(submission) -> List[Dict]:
+        """File metadata stored on an assignment (file_url) or project (file_path) submission."""
+        raw = getattr(submission, 'file_url', None) or getattr(submission, 'file_path', None)
+        if not raw:
+            return []
+        try:
+            files_data = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return []
+        return files_data if isinstance(files_data, list) else []
+
+    @classmethod
+    def submission_entries(cls, submission, folder: str = '') -> List[ArchiveEntry]:
+        from ..utils.google_drive_service import GoogleDriveService
+
+        entries = []
+        for file_info in cls.submission_files(submission):
+            if not isinstance(file_info, dict):
+                continue
+            filename = (
+                file_info.get('filename') or file_info.get('original_filename')
+                or file_info.get('name') or 'unknown_file'
+            )
+            url = file_info.get('url') or file_info.get('view_link') or ''
+            file_id = (
+                file_info.get('file_id') or file_info.get('fileId')
+                or (GoogleDriveService.extract_file_id_from_url(url) if 'drive.google.com' in url else None)
+            )
+            arcname = os.path.basename(filename.replace('\\', '/')) or 'unknown_file'
+            entries.append(ArchiveEntry(
+                arcname=f"{folder}/{arcname}" if folder else arcname,
+                file_id=file_id,
+                source=url or filename,
+            ))
+        return entries
+
+    @classmethod
+    def assignment_entries(cls, submissions: Iterable) -> List[ArchiveEntry]:
+        """Entries for many submissions, one folder per student."""
+        entries = []
+        for submission in submissions:
+            student = submission.student
+            name = f"{student.first_name}_{student.last_name}" if student else 'student'
+            folder = secure_filename(f"{name}_{submission.student_id}") or str(submission.student_id)
+            entries.extend(cls.submission_entries(submission, folder=folder))
+        return entries
+
+    @staticmethod
+    def _unique_names(entries: List[ArchiveEntry]) -> List[ArchiveEntry]:
+        seen = set()
+        for entry in entries:
+            base, ext = os.path.splitext(entry.arcname)
+            candidate, n = entry.arcname, 1
+            while candidate.lower() in seen:
+                n += 1
+                candidate = f"{base} ({n}){ext}"
+            entry.arcname = candidate
+            seen.add(candidate.lower())
+        return entries
+
+    # ------------------------------------------------------------------
+    # Streaming
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _fetch(drive, cache: DriveBlobCache, entry: ArchiveEntry) -> Tuple[str, bool]:
+        metadata = drive.get_file_metadata(entry.file_id, fields='id,modifiedTime')
+        return cache.fetch(drive, entry.file_id, metadata.get('modifiedTime'))
+
+    @classmethod
+    def stream_zip(cls, entries: List[ArchiveEntry], drive=None,
+                   cache: Optional[DriveBlobCache] = None,
+                   max_workers: Optional[int] = None) -> Iterator[bytes]:
+        """
+        Yield a ZIP archive of ``entries`` chunk by chunk.
+
+        Entries are written in download-completion order.  Files that cannot
+        be fetched are listed in ``MISSING_FILES.txt`` inside the archive.
+        """
+        if drive is None:
+            from ..utils.google_drive_service import google_drive_service
+            drive = google_drive_service
+        cache = cache or cls.blob_cache()
+        entries = cls._unique_names(list(entries))
+
+        missing = [(entry, 'not stored on Google Drive') for entry in entries if not entry.file_id]
+        fetchable = [entry for entry in entries if entry.file_id]
+        if fetchable and not drive.is_configured:
+            missing.extend((entry, 'Google Drive is not configured') for entry in fetchable)
+            fetchable = []
+
+        sink = _ZipSink()
+        archive = zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED)
+        pool = ThreadPoolExecutor(
+            max_workers=min(max_workers or cls.max_workers(), max(1, len(fetchable))),
+            thread_name_prefix='submission-zip',
+        )
+        try:
+            futures = {pool.submit(cls._fetch, drive, cache, entry): entry for entry in fetchable}
+            for future in as_completed(futures):
+                entry = futures[future]
+                try:
+                    path, temporary = future.result()
+                except Exception as e:
+                    logger.warning(f"Failed to fetch {entry.arcname} ({entry.file_id}) for ZIP: {e}")
+                    missing.append((entry, str(e)))
+                    continue
+
+                try:
+                    info = zipfile.ZipInfo(entry.arcname, date_time=datetime.now().timetuple()[:6])
+                    info.external_attr = 0o644 << 16
+                    info.file_size = os.path.getsize(path)
+                    ext = os.path.splitext(entry.arcname)[1].lower()
+                    info.compress_type = zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                    with open(path, 'rb') as src, archive.open(info, 'w') as dst:
+                        while True:
+                            chunk = src.read(COPY_CHUNK_SIZE)
+                            if not chunk:
+                                break
+                            dst.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                finally:
+                    if temporary:
+                        os.remove(path)
+                data = sink.drain()
+                if data:
+                    yield data
+
+            if missing:
+                lines = [f"{entry.arcname}\t{entry.source}\t{reason}" for entry, reason in missing]
+                archive.writestr('MISSING_FILES.txt', "\n".join(lines) + "\n")
+            archive.close()
+            yield sink.drain()
+        finally:
+            # Client disconnects close the generator early: stop pending downloads
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def zip_response(cls, entries: List[ArchiveEntry], download_name: str) -> Response:
+        response = Response(cls.stream_zip(entries), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
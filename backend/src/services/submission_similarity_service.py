@@ -0,0 +1,126 @@
+"""
+Per-assignment similar-submission indexes for AI grading suggestions.
+
+Each assignment's submissions are tokenized once into a
+``SubmissionSimilarityIndex`` held in process memory.  On every lookup the
+index is brought up to date with one query for rows that are new
+(``id`` above the highest seen) or resubmitted (``submitted_at`` after the
+latest seen), so only changed submissions are re-tokenized.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import or_
+
+from ..models.user_models import db
+from ..models.course_models import AssignmentSubmission
+from ..utils.submission_similarity import SubmissionSimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_ASSIGNMENTS = 64
+
+
+class _AssignmentIndex:
+    def __init__(self):
+        self.index = SubmissionSimilarityIndex()
+        self.max_id = 0
+        self.max_submitted_at: Optional[datetime] = None
+        self.lock = threading.Lock()
+
+
+_indexes: "OrderedDict[int, _AssignmentIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+class SubmissionSimilarityService:
+    """Cached, incrementally updated similarity indexes keyed by assignment."""
+
+    @staticmethod
+    def _entry(assignment_id: int) -> _AssignmentIndex:
+        with _indexes_lock:
+            entry = _indexes.get(assignment_id)
+            if entry is None:
+                entry = _indexes[assignment_id] = _AssignmentIndex()
+                while len(_indexes) > MAX_CACHED_ASSIGNMENTS:
+                    _indexes.popitem(last=False)
+            else:
+                _indexes.move_to_end(assignment_id)
+            return entry
+
+    @staticmethod
+    def _sync(entry: _AssignmentIndex, assignment_id: int) -> None:
+        """Index submissions added or resubmitted since the last sync. Caller holds ``entry.lock``."""
+        query = db.session.query(
+            AssignmentSubmission.id,
+            AssignmentSubmission.content,
+            AssignmentSubmission.submitted_at,
+        ).filter(AssignmentSubmission.assignment_id == assignment_id)
+
+        changed = AssignmentSubmission.id > entry.max_id
+        if entry.max_submitted_at is not None:
+            changed = or_(changed, AssignmentSubmission.submitted_at > entry.max_submitted_at)
+        rows = query.filter(changed).all()
+
+        for submission_id, content, submitted_at in rows:
+            entry.index.add(submission_id, content)
+            entry.max_id = max(entry.max_id, submission_id)
+            if submitted_at and (entry.max_submitted_at is None or submitted_at > entry.max_submitted_at):
+                entry.max_submitted_at = submitted_at
+        if rows:
+            logger.debug(f"Similarity index for assignment {assignment_id}: {len(rows)} submissions (re)indexed")
+
+    @staticmethod
+    def invalidate(assignment_id: Optional[int] = None) -> None:
+        with _indexes_lock:
+            if assignment_id is None:
+                _indexes.clear()
+            else:
+                _indexes.pop(assignment_id, None)
+
+    @staticmethod
+    def _describe(neighbours, submissions: Dict[int, Any]) -> List[Dict[str, Any]]:
+        # Rows deleted since they were indexed are simply skipped
+        return [
+            {
+                'submission_id': other_id,
+                'student_id': submissions[other_id].student_id,
+                'grade': submissions[other_id].grade,
+                'similarity_score': round(similarity, 4),
+            }
+            for other_id, similarity in neighbours
+            if other_id in submissions
+        ]
+
+    @classmethod
+    def similar_submissions(cls, submission: AssignmentSubmission, threshold: float = 0.3,
+                            limit: int = 5) -> List[Dict[str, Any]]:
+        """Submissions to the same assignment most similar to ``submission``."""
+        return cls.similar_for_assignment(
+            submission.assignment_id, [submission.id], threshold, limit
+        ).get(submission.id, [])
+
+    @classmethod
+    def similar_for_assignment(cls, assignment_id: int, submission_ids: Optional[Iterable[int]] = None,
+                               threshold: float = 0.3, limit: int = 5) -> Dict[int, List[Dict[str, Any]]]:
+        """Similar submissions for many submissions of one assignment in a single batch."""
+        entry = cls._entry(assignment_id)
+        with entry.lock:
+            cls._sync(entry, assignment_id)
+            keys = list(submission_ids) if submission_ids is not None else entry.index.keys()
+            neighbours = entry.index.similar_to(keys, threshold=threshold, k=limit)
+
+        other_ids = {other_id for pairs in neighbours.values() for other_id, _ in pairs}
+        submissions = {
+            row.id: row for row in db.session.query(
+                AssignmentSubmission.id, AssignmentSubmission.student_id, AssignmentSubmission.grade
+            ).filter(AssignmentSubmission.id.in_(other_ids))
+        } if other_ids else {}
+        return {
+            submission_id: cls._describe(pairs, submissions)
+            for submission_id, pairs in neighbours.items()
+        }
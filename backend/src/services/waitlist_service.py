@@ -10,12 +10,15 @@ Handles:
 
 import hashlib
 import logging
+import uuid
 from datetime import datetime, timezone
 from typing import List, Dict, Tuple, Optional
 
+from sqlalchemy import case, cast, func, insert, literal, update
+
 from ..models.user_models import db, User
 from ..models.course_models import Course, ApplicationWindow, Enrollment
-from ..models.course_application import CourseApplication
+from ..models.course_application import CourseApplication, ApplicationMigrationLog
 
 logger = logging.getLogger(__name__)
 
@@ -157,55 +160,34 @@ class WaitlistService:
         if target_window.course_id != application.course_id:
             return False, "Target cohort belongs to a different course", {}
 
-        # Check capacity
-        if target_window.max_students:
-            current_count = target_window.get_enrollment_count()
-            waitlisted_migrating = CourseApplication.query.filter_by(
-                migrated_to_window_id=target_window_id,
-                status='pending'
-            ).count()
-            if (current_count + waitlisted_migrating) >= target_window.max_students:
+        try:
+            # Check capacity under the target window lock
+            target_window = WaitlistService._lock_window(target_window_id)
+            available_spots = WaitlistService.get_available_seats(target_window)
+            if available_spots is not None and available_spots <= 0:
+                db.session.rollback()
                 return False, "Target cohort is at capacity", {}
 
-        try:
-            # Track original cohort
-            original_window_id = application.application_window_id
-
-            # Update application
-            application.original_window_id = original_window_id
-            application.migrated_to_window_id = target_window_id
-            application.application_window_id = target_window_id
-            application.migrated_at = datetime.utcnow()
-            application.migration_notes = notes
-            application.status = 'pending'  # Reset to pending for new cohort review
-
-            # Update cohort snapshot
-            application.cohort_label = target_window.cohort_label
-            application.cohort_start_date = target_window.cohort_start
-            application.cohort_end_date = target_window.cohort_end
-
-            # Add admin note
-            timestamp = datetime.utcnow().isoformat()
-            migration_note = f"[{timestamp}] Migrated from cohort {original_window_id} to {target_window_id}"
-            if notes:
-                migration_note += f": {notes}"
-            application.admin_notes = f"{application.admin_notes or ''}\n{migration_note}".strip()
+            # Re-check under the row lock; the application may have been reviewed since it was read
+            status, original_window_id = db.session.query(
+                CourseApplication.status, CourseApplication.application_window_id
+            ).filter(CourseApplication.id == application_id).with_for_update().one()
+            if status != 'waitlisted':
+                db.session.rollback()
+                return False, f"Application is not waitlisted (current status: {status})", {}
 
+            migrated = WaitlistService._apply_migration(
+                [(application_id, original_window_id)], target_window, admin_id, notes
+            )
             db.session.commit()
+            db.session.expire(application)
 
             logger.info(
-                f"Application {application_id} migrated from window {original_window_id} "
+                f"Application {application_id} migrated from window {migrated[0]['original_window_id']} "
                 f"to window {target_window_id} by admin {admin_id}"
             )
 
-            return True, "Application migrated successfully", {
-                "application_id": application.id,
-                "original_window_id": original_window_id,
-                "target_window_id": target_window_id,
-                "new_status": application.status,
-                "cohort_label": target_window.cohort_label,
-                "requires_payment": _cohort_requires_payment(target_window),
-            }
+            return True, "Application migrated successfully", migrated[0]
 
         except Exception as e:
             db.session.rollback()
@@ -216,6 +198,96 @@ class WaitlistService:
     # BULK MIGRATION
     # ─────────────────────────────────────────────────────────
 
+    @staticmethod
+    def _lock_window(window_id: int) -> ApplicationWindow:
+        """Re-read a cohort window holding its row lock until commit (no-op on SQLite)."""
+        return ApplicationWindow.query.filter_by(id=window_id).populate_existing().with_for_update().one()
+
+    @staticmethod
+    def get_available_seats(window: ApplicationWindow) -> Optional[int]:
+        """
+        Seats left in a cohort: capacity minus active/completed enrollments and
+        applications already migrated in and awaiting review. None if uncapped.
+        """
+        if not window.max_students:
+            return None
+        enrolled = db.session.query(func.count(Enrollment.id)).filter(
+            Enrollment.application_window_id == window.id,
+            Enrollment.status.in_(['active', 'completed'])
+        ).scalar_subquery()
+        migrating = db.session.query(func.count(CourseApplication.id)).filter(
+            CourseApplication.migrated_to_window_id == window.id,
+            CourseApplication.status == 'pending'
+        ).scalar_subquery()
+        occupied = db.session.query(enrolled + migrating).scalar() or 0
+        return max(window.max_students - occupied, 0)
+
+    @staticmethod
+    def _apply_migration(
+        rows: List[Tuple[int, Optional[int]]],
+        target_window: ApplicationWindow,
+        admin_id: Optional[int],
+        notes: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Move waitlisted applications, given as (id, current window id) pairs, to
+        the target cohort with one UPDATE and one multi-row audit insert.
+        Raises ValueError, before writing any audit row, if some of them are
+        no longer waitlisted. Does not commit.
+        """
+        now = datetime.utcnow()
+        application_ids = [application_id for application_id, _ in rows]
+
+        # Same admin note the per-application migration wrote, built in SQL
+        migration_note = (
+            literal(f"[{now.isoformat()}] Migrated from cohort ")
+            + func.coalesce(cast(CourseApplication.application_window_id, db.String), 'None')
+            + literal(f" to {target_window.id}" + (f": {notes}" if notes else ""))
+        )
+        result = db.session.execute(
+            update(CourseApplication)
+            .where(CourseApplication.id.in_(application_ids), CourseApplication.status == 'waitlisted')
+            .values(
+                original_window_id=CourseApplication.application_window_id,
+                migrated_to_window_id=target_window.id,
+                application_window_id=target_window.id,
+                migrated_at=now,
+                migration_notes=notes,
+                status='pending',  # Reset to pending for new cohort review
+                cohort_label=target_window.cohort_label,
+                cohort_start_date=target_window.cohort_start,
+                cohort_end_date=target_window.cohort_end,
+                admin_notes=case(
+                    (func.coalesce(CourseApplication.admin_notes, '') == '', migration_note),
+                    else_=CourseApplication.admin_notes + literal("\n") + migration_note,
+                ),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(rows):
+            raise ValueError(f"{len(rows) - result.rowcount} of {len(rows)} applications are no longer waitlisted")
+
+        batch_id = str(uuid.uuid4())
+        db.session.execute(insert(ApplicationMigrationLog), [{
+            "application_id": application_id,
+            "from_window_id": original_window_id,
+            "to_window_id": target_window.id,
+            "migrated_by": admin_id,
+            "batch_id": batch_id,
+            "notes": notes,
+            "migrated_at": now,
+        } for application_id, original_window_id in rows])
+
+        requires_payment = _cohort_requires_payment(target_window)
+        return [{
+            "application_id": application_id,
+            "original_window_id": original_window_id,
+            "target_window_id": target_window.id,
+            "new_status": "pending",
+            "cohort_label": target_window.cohort_label,
+            "requires_payment": requires_payment,
+        } for application_id, original_window_id in rows]
+
     @staticmethod
     def bulk_migrate_waitlist_to_next_cohort(
         course_id: int,
@@ -230,6 +302,8 @@ class WaitlistService:
         to the next available cohort.
         
         If target_window_id is None, automatically finds the next open/upcoming cohort.
+        The target window row is locked while seats are counted and the
+        applications are moved, so concurrent migrations cannot overbook it.
         
         Returns: (success, message, data)
         """
@@ -243,49 +317,64 @@ class WaitlistService:
             if not target_window:
                 return False, "No next cohort available for migration", {}
 
-        # Get waitlisted applications
-        applications = WaitlistService.get_waitlisted_applications(course_id, source_window_id)
+        if target_window.course_id != int(course_id):
+            return False, "Target cohort belongs to a different course", {}
 
-        if not applications:
-            return True, "No waitlisted applications to migrate", {"migrated": 0, "total": 0}
+        waitlisted = db.session.query(
+            CourseApplication.id, CourseApplication.application_window_id
+        ).filter(
+            CourseApplication.course_id == course_id,
+            CourseApplication.status == 'waitlisted',
+            CourseApplication.is_draft == False  # noqa: E712
+        )
+        if source_window_id:
+            waitlisted = waitlisted.filter(CourseApplication.application_window_id == source_window_id)
+        waitlisted = waitlisted.order_by(
+            CourseApplication.final_rank_score.desc(),
+            CourseApplication.created_at.asc()
+        )
 
-        if max_count:
-            applications = applications[:max_count]
+        try:
+            target_window = WaitlistService._lock_window(target_window.id)
+            available_spots = WaitlistService.get_available_seats(target_window)
 
-        # Check capacity
-        available_spots = None
-        if target_window.max_students:
-            current_count = target_window.get_enrollment_count()
-            available_spots = target_window.max_students - current_count
-            if available_spots <= 0:
+            limits = [n for n in (max_count, available_spots) if n is not None]
+            if limits and min(limits) <= 0:
+                has_waitlisted = waitlisted.first() is not None
+                db.session.rollback()
+                if not has_waitlisted:
+                    return True, "No waitlisted applications to migrate", {"migrated": 0, "total": 0}
                 return False, "Target cohort is at full capacity", {"capacity": target_window.max_students}
-            applications = applications[:available_spots]
+            if limits:
+                waitlisted = waitlisted.limit(min(limits))
 
-        migrated = []
-        failed = []
-        requires_payment = _cohort_requires_payment(target_window)
+            rows = [tuple(row) for row in waitlisted.with_for_update().all()]
+            if not rows:
+                db.session.rollback()
+                return True, "No waitlisted applications to migrate", {"migrated": 0, "total": 0}
 
-        for app in applications:
-            success, msg, data = WaitlistService.migrate_application_to_cohort(
-                application_id=app.id,
-                target_window_id=target_window.id,
-                admin_id=admin_id,
-                notes=notes
-            )
-            if success:
-                migrated.append(data)
-            else:
-                failed.append({"application_id": app.id, "error": msg})
+            migrated = WaitlistService._apply_migration(rows, target_window, admin_id, notes)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error migrating waitlist of course {course_id} to window {target_window.id}: {str(e)}")
+            return False, f"Migration failed: {str(e)}", {}
 
-        return True, f"Migrated {len(migrated)} of {len(applications)} applications", {
+        logger.info(
+            f"Migrated {len(migrated)} waitlisted applications of course {course_id} "
+            f"to window {target_window.id} by admin {admin_id}"
+        )
+
+        return True, f"Migrated {len(migrated)} of {len(rows)} applications", {
             "migrated_count": len(migrated),
-            "failed_count": len(failed),
-            "total_waitlisted": len(applications),
+            "failed_count": 0,
+            "total_waitlisted": len(rows),
             "target_window_id": target_window.id,
             "target_cohort_label": target_window.cohort_label,
-            "requires_payment": requires_payment,
+            "requires_payment": _cohort_requires_payment(target_window),
+            "available_spots": available_spots,
             "migrated": migrated,
-            "failed": failed,
+            "failed": [],
         }
 
     # ─────────────────────────────────────────────────────────
@@ -11,6 +11,8 @@ from datetime import datetime, timedelta
 import hashlib
 import json
 
+from .submission_similarity import SubmissionSimilarityIndex
+
 logger = logging.getLogger(__name__)
 
 class AIGradingHelper:
@@ -437,24 +439,14 @@ class AIGradingHelper:
         if not target_text:
             return []
         
-        similar = []
-        for submission in all_submissions:
-            if submission['id'] == target_submission['id']:
-                continue
-            
-            similarity = cls.calculate_similarity_score(
-                target_text, 
-                submission.get('submission_text', '')
-            )
-            
-            if similarity >= threshold:
-                similar.append({
-                    **submission,
-                    'similarity_score': similarity
-                })
-        
-        # Sort by similarity score descending
-        return sorted(similar, key=lambda x: x['similarity_score'], reverse=True)[:5]
+        candidates = [s for s in all_submissions if s['id'] != target_submission['id']]
+        index = SubmissionSimilarityIndex()
+        index.add_many((position, s.get('submission_text', '')) for position, s in enumerate(candidates))
+        
+        return [
+            {**candidates[position], 'similarity_score': similarity}
+            for position, similarity in index.query(target_text, threshold=threshold, k=5)
+        ]
     
     @classmethod
     def estimate_grading_time(cls, submission_data: Dict[str, Any]) -> int:
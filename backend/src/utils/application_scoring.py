@@ -4,6 +4,30 @@ Evaluates applications across multiple dimensions for fair and comprehensive ran
 """
 import json
 
+# Points per answer, shared by the per-application functions below and the
+# vectorized bulk scorer in services/application_scoring_service.py
+INTERNET_RISK = {"limited_access": 15, "public_wifi": 10, "mobile_data": 5}
+SKILL_RISK = {"never_used": 20, "beginner": 10, "intermediate": 3}
+SKILL_READINESS = {"expert": 30, "advanced": 25, "intermediate": 18, "beginner": 10, "never_used": 0}
+EDUCATION_READINESS = {"phd": 20, "masters": 18, "bachelors": 15, "diploma": 12, "high_school": 8, "other": 5}
+SKILL_APPLICATION = {
+    "expert": 25,
+    "advanced": 22,
+    "intermediate": 18,
+    "beginner": 12,
+    "never_used": 5  # Still award some points for honesty
+}
+EDUCATION_APPLICATION = {"phd": 15, "masters": 14, "bachelors": 12, "diploma": 10, "high_school": 7, "other": 4}
+EMPLOYED_STATUSES = ["employed", "self_employed", "freelancer"]
+LIVE_LEARNING_MODES = ["live_sessions", "hybrid"]
+MOTIVATION_BANDS = [(500, 30), (300, 25), (150, 18), (50, 10)]
+STATEMENT_BANDS = [(200, 20), (100, 15), (50, 10)]  # learning outcomes, career impact
+AFRICAN_COUNTRIES = [
+    "nigeria", "kenya", "ghana", "south africa", "egypt", "ethiopia",
+    "tanzania", "uganda", "morocco", "algeria", "tunisia", "rwanda",
+    "senegal", "ivory coast", "cameroon", "zimbabwe", "zambia", "botswana"
+]
+
 
 def _get_skill_level(application):
     """
@@ -56,6 +80,14 @@ def _skill_level_to_legacy_enum(skill_level_str):
     return 'never_used'
 
 
+def _banded_points(length, bands):
+    """Points for the first (min_length, points) band that length reaches"""
+    for min_length, points in bands:
+        if length >= min_length:
+            return points
+    return 0
+
+
 def calculate_risk(application):
     """
     Calculate risk score based on technical barriers and readiness.
@@ -71,22 +103,13 @@ def calculate_risk(application):
     # Internet Access Quality - 25 points
     if not application.has_internet:
         risk += 25
-    elif application.internet_access_type == "limited_access":
-        risk += 15
-    elif application.internet_access_type == "public_wifi":
-        risk += 10
-    elif application.internet_access_type == "mobile_data":
-        risk += 5
+    else:
+        risk += INTERNET_RISK.get(application.internet_access_type, 0)
 
     # Subject/Digital Skills - 20 points (use new generic fields with fallback)
     skill_level, _ = _get_skill_level(application)
     legacy_level = _skill_level_to_legacy_enum(skill_level)
-    if legacy_level == "never_used":
-        risk += 20
-    elif legacy_level == "beginner":
-        risk += 10
-    elif legacy_level == "intermediate":
-        risk += 3
+    risk += SKILL_RISK.get(legacy_level, 0)
     
     # Learning Experience - 15 points
     if not application.online_learning_experience:
@@ -121,14 +144,7 @@ def calculate_readiness_score(application):
     # Subject Skills & Experience (30 points)
     skill_level, tasks = _get_skill_level(application)
     legacy_level = _skill_level_to_legacy_enum(skill_level)
-    excel_skill_map = {
-        "expert": 30,
-        "advanced": 25,
-        "intermediate": 18,
-        "beginner": 10,
-        "never_used": 0
-    }
-    score += excel_skill_map.get(legacy_level, 0)
+    score += SKILL_READINESS.get(legacy_level, 0)
     
     # Previous Subject Tasks (10 points bonus)
     if tasks:
@@ -136,22 +152,14 @@ def calculate_readiness_score(application):
         score += min(len(tasks) * 2, 10)
     
     # Education & Background (20 points)
-    education_map = {
-        "phd": 20,
-        "masters": 18,
-        "bachelors": 15,
-        "diploma": 12,
-        "high_school": 8,
-        "other": 5
-    }
-    score += education_map.get(application.education_level or "other", 0)
+    score += EDUCATION_READINESS.get(application.education_level or "other", 0)
     
     # Learning Experience (10 points)
     if application.online_learning_experience:
         score += 10
     
     # Professional Status (10 points)
-    if application.current_status in ["employed", "self_employed", "freelancer"]:
+    if application.current_status in EMPLOYED_STATUSES:
         score += 10
     elif application.current_status == "student":
         score += 7
@@ -176,35 +184,15 @@ def calculate_commitment_score(application):
     
     # Motivation Quality (30 points)
     if application.motivation:
-        length = len(application.motivation.strip())
-        if length >= 500:
-            score += 30
-        elif length >= 300:
-            score += 25
-        elif length >= 150:
-            score += 18
-        elif length >= 50:
-            score += 10
+        score += _banded_points(len(application.motivation.strip()), MOTIVATION_BANDS)
     
     # Learning Outcomes Clarity (20 points)
     if application.learning_outcomes:
-        length = len(application.learning_outcomes.strip())
-        if length >= 200:
-            score += 20
-        elif length >= 100:
-            score += 15
-        elif length >= 50:
-            score += 10
+        score += _banded_points(len(application.learning_outcomes.strip()), STATEMENT_BANDS)
     
     # Career Impact Vision (20 points)
     if application.career_impact:
-        length = len(application.career_impact.strip())
-        if length >= 200:
-            score += 20
-        elif length >= 100:
-            score += 15
-        elif length >= 50:
-            score += 10
+        score += _banded_points(len(application.career_impact.strip()), STATEMENT_BANDS)
     
     # Time Availability (10 points)
     if application.available_time:
@@ -238,25 +226,10 @@ def calculate_application_score(application):
     # Subject Skills (25 points) — use new generic fields with fallback
     skill_level, _ = _get_skill_level(application)
     legacy_level = _skill_level_to_legacy_enum(skill_level)
-    excel_map = {
-        "expert": 25,
-        "advanced": 22,
-        "intermediate": 18,
-        "beginner": 12,
-        "never_used": 5  # Still award some points for honesty
-    }
-    score += excel_map.get(legacy_level, 0)
+    score += SKILL_APPLICATION.get(legacy_level, 0)
     
     # Education Level (15 points)
-    education_map = {
-        "phd": 15,
-        "masters": 14,
-        "bachelors": 12,
-        "diploma": 10,
-        "high_school": 7,
-        "other": 4
-    }
-    score += education_map.get(application.education_level or "other", 0)
+    score += EDUCATION_APPLICATION.get(application.education_level or "other", 0)
     
     # Motivation & Goals (20 points)
     if application.motivation and len(application.motivation) >= 150:
@@ -273,7 +246,7 @@ def calculate_application_score(application):
         score += 5
     
     # Preferred Learning Mode Bonus (5 points)
-    if application.preferred_learning_mode in ["live_sessions", "hybrid"]:
+    if application.preferred_learning_mode in LIVE_LEARNING_MODES:
         score += 5
     elif application.preferred_learning_mode == "self_paced":
         score += 3
@@ -305,12 +278,7 @@ def calculate_final_rank(application):
     
     # Boost for African countries (if specified)
     if application.country:
-        african_countries = [
-            "nigeria", "kenya", "ghana", "south africa", "egypt", "ethiopia",
-            "tanzania", "uganda", "morocco", "algeria", "tunisia", "rwanda",
-            "senegal", "ivory coast", "cameroon", "zimbabwe", "zambia", "botswana"
-        ]
-        if any(country in application.country.lower() for country in african_countries):
+        if any(country in application.country.lower() for country in AFRICAN_COUNTRIES):
             final_score += 5
     
     application.final_rank_score = round(max(0, final_score), 2)
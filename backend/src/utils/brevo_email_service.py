@@ -2,6 +2,7 @@
 import os
 import logging
 import base64
+import requests
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
 
@@ -209,5 +210,94 @@ class BrevoEmailService:
             logger.error(f"❌ Unexpected error sending batch emails: {str(e)}")
             return False
 
+
+DEFAULT_BREVO_API_URL = 'https://api.brevo.com/v3'
+
+
+class BrevoApiError(Exception):
+    """Non-success response from the Brevo REST API"""
+
+    def __init__(self, status_code, message, retry_after=None):
+        super().__init__(f"Brevo API returned {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        """Rate limiting and server errors are worth retrying; other 4xx are not"""
+        return self.status_code == 429 or self.status_code >= 500
+
+
+class BrevoBatchClient:
+    """Minimal REST client for ``messageVersions`` batch sends.
+
+    Talks to the API directly rather than through sib_api_v3_sdk, whose
+    message version model has no per-version content, and lets the base URL
+    point at a local fake endpoint (``BREVO_API_URL``).
+    """
+
+    def __init__(self, api_key, sender_email, sender_name=None, base_url=DEFAULT_BREVO_API_URL, timeout=30):
+        self.api_key = api_key
+        self.sender_email = sender_email
+        self.sender_name = sender_name or 'Your App'
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @classmethod
+    def from_env(cls):
+        """Client configured from the BREVO_* environment, or None if unset"""
+        api_key = os.environ.get('BREVO_API_KEY')
+        sender_email = os.environ.get('BREVO_SENDER_EMAIL')
+        if not api_key or not sender_email:
+            return None
+        return cls(
+            api_key=api_key,
+            sender_email=sender_email,
+            sender_name=os.environ.get('BREVO_SENDER_NAME', 'Your App'),
+            base_url=os.environ.get('BREVO_API_URL', DEFAULT_BREVO_API_URL),
+        )
+
+    def send_versions(self, versions, sender_name=None, headers=None):
+        """Send one request carrying ``versions``; returns message ids in version order.
+
+        Each version is a dict with ``to``, ``subject`` and ``htmlContent`` and/or
+        ``textContent``. The first version's content doubles as the base message.
+        Raises BrevoApiError on a non-2xx response and requests.RequestException
+        on transport errors.
+        """
+        first = versions[0]
+        payload = {
+            'sender': {'email': self.sender_email, 'name': sender_name or self.sender_name},
+            'subject': first['subject'],
+            'messageVersions': versions,
+        }
+        if first.get('htmlContent'):
+            payload['htmlContent'] = first['htmlContent']
+        if first.get('textContent'):
+            payload['textContent'] = first['textContent']
+        if headers:
+            payload['headers'] = headers
+
+        response = self.session.post(
+            f"{self.base_url}/smtp/email",
+            json=payload,
+            headers={'api-key': self.api_key, 'accept': 'application/json'},
+            timeout=self.timeout,
+        )
+        if response.status_code >= 300:
+            retry_after = response.headers.get('Retry-After')
+            try:
+                retry_after = float(retry_after) if retry_after is not None else None
+            except ValueError:
+                retry_after = None
+            raise BrevoApiError(response.status_code, response.text[:500], retry_after)
+
+        body = response.json() if response.content else {}
+        message_ids = body.get('messageIds') or ([body['messageId']] if body.get('messageId') else [])
+        return message_ids + [None] * (len(versions) - len(message_ids))
+
+
 # Global instance
 brevo_service = BrevoEmailService()
\ No newline at end of file
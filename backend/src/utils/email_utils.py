@@ -155,96 +155,6 @@ def _send_single_bcc_email(to_list, bcc_list, subject, template, body, retries,
     """Send a single BCC email (legacy compatibility)"""
     return send_email_with_bcc(to_list, bcc_list, subject, template, body, retries, retry_delay, async_send=False)
 
-def send_emails_batch(emails_data, subject, retries=3):
-    """
-    Send multiple emails with rate limiting and detailed error tracking
-    Enhanced with Brevo API for improved reliability
-    
-    Args:
-        emails_data: List of {email, template, recipient_name} dicts
-        subject: Email subject
-        retries: Number of retry attempts
-    
-    Returns:
-        Tuple of (successful_emails, failed_emails_with_details)
-    """
-    if not brevo_service.is_configured:
-        logger.warning("Brevo service not configured - falling back to individual sends")
-        return _send_emails_batch_fallback(emails_data, subject, retries)
-    
-    # Use Brevo batch service for better performance
-    try:
-        # Transform data format for Brevo service
-        brevo_emails_data = []
-        for email_data in emails_data:
-            brevo_emails_data.append({
-                'email': email_data['email'],
-                'name': email_data.get('recipient_name', email_data['email'].split('@')[0]),
-                'html_content': email_data['template'],
-                'text_content': email_data.get('body', '')
-            })
-        
-        # Use Brevo batch sending
-        successful_emails, failed_emails = brevo_service.send_batch_emails(
-            brevo_emails_data, subject, retries=retries
-        )
-        
-        return successful_emails, failed_emails
-        
-    except Exception as e:
-        logger.error(f"Error in batch email sending: {e}")
-        return _send_emails_batch_fallback(emails_data, subject, retries)
-
-def _send_emails_batch_fallback(emails_data, subject, retries=3):
-    """Fallback batch email sending using individual sends"""
-    successful_emails = []
-    failed_emails = []
-    
-    global last_email_time
-    
-    for email_data in emails_data:
-        email = email_data['email']
-        template = email_data['template']
-        recipient_name = email_data.get('recipient_name', 'Applicant')
-        
-        try:
-            # Rate limiting
-            with email_lock:
-                current_time = time.time()
-                time_since_last = current_time - last_email_time
-                if time_since_last < EMAIL_RATE_LIMIT:
-                    sleep_time = EMAIL_RATE_LIMIT - time_since_last
-                    time.sleep(sleep_time)
-                last_email_time = time.time()
-            
-            success = _send_email_sync(email, subject, template, retries=retries)
-            
-            if success:
-                successful_emails.append(email)
-                logger.info(f"✅ Email sent successfully to {email} ({recipient_name})")
-            else:
-                failed_emails.append({
-                    'email': email,
-                    'recipient_name': recipient_name,
-                    'error': 'Email sending failed after retries',
-                    'retry_count': retries
-                })
-                logger.error(f"❌ Failed to send email to {email} ({recipient_name})")
-                
-        except Exception as e:
-            failed_emails.append({
-                'email': email,
-                'recipient_name': recipient_name,
-                'error': str(e),
-                'retry_count': 0
-            })
-            logger.error(f"❌ Exception sending email to {email}: {str(e)}")
-            
-        # Small delay between emails
-        time.sleep(0.1)
-    
-    return successful_emails, failed_emails
-
 def send_password_reset_email(user, reset_url):
     """
     Send a password reset email to the user
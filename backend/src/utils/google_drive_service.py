@@ -2,13 +2,19 @@
 # Handles file upload, download, sharing permissions, and organization
 
 import os
+import re
 import json
 import logging
 import tempfile
-from typing import Optional, Dict, List, Tuple, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, List, Tuple, Any, Callable, BinaryIO
 from io import BytesIO
 from datetime import datetime, timedelta
 
+from flask import has_app_context
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
 # Google API imports
 from google.auth.transport.requests import Request
 from google.oauth2.service_account import Credentials
@@ -16,8 +22,133 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseUpload, MediaFileUpload
 from googleapiclient.errors import HttpError
 
+from ..models.user_models import db
+from ..models.file_models import DriveFolder
+
 logger = logging.getLogger(__name__)
 
+# Files larger than one chunk are sent as chunked resumable uploads
+UPLOAD_CHUNK_SIZE = int(os.getenv('GOOGLE_DRIVE_UPLOAD_CHUNK_MB', '8')) * 1024 * 1024
+UPLOAD_CONCURRENCY = int(os.getenv('GOOGLE_DRIVE_UPLOAD_CONCURRENCY', '4'))
+
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+class DriveFolderCache:
+    """
+    Google Drive folder IDs keyed by (parent folder ID, folder name).
+
+    Lookups hit an in-process dict first and then the ``drive_folders`` table,
+    which is shared by every worker.  ``get_or_create`` is single-flight per
+    key: concurrent callers in one process wait for a single Drive
+    lookup/creation instead of racing to create the same folder.
+    """
+
+    def __init__(self, persistent: bool = True):
+        self.persistent = persistent
+        self._ids: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+
+    @staticmethod
+    def _key(parent_id: Optional[str], name: str) -> Tuple[str, str]:
+        return (parent_id or '', name)
+
+    def _key_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key: Tuple[str, str]) -> Optional[str]:
+        if not self.persistent or not has_app_context():
+            return None
+        try:
+            # Own connection, so the caller's session is never flushed or rolled back
+            with db.engine.connect() as conn:
+                return conn.execute(
+                    db.select(DriveFolder.folder_id).where(
+                        DriveFolder.parent_id == key[0], DriveFolder.name == key[1]
+                    )
+                ).scalar()
+        except SQLAlchemyError as e:
+            logger.warning(f"Drive folder cache lookup failed for {key}: {e}")
+            return None
+
+    def _store(self, key: Tuple[str, str], folder_id: str) -> str:
+        """Persist a folder ID; returns the ID another worker stored first, if any."""
+        if not self.persistent or not has_app_context():
+            return folder_id
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(db.insert(DriveFolder).values(
+                    parent_id=key[0], name=key[1], folder_id=folder_id, created_at=datetime.utcnow()
+                ))
+            return folder_id
+        except IntegrityError:
+            return self._load(key) or folder_id
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not persist Drive folder {key}: {e}")
+            return folder_id
+
+    def get(self, parent_id: Optional[str], name: str) -> Optional[str]:
+        key = self._key(parent_id, name)
+        with self._lock:
+            folder_id = self._ids.get(key)
+        if folder_id:
+            return folder_id
+        folder_id = self._load(key)
+        if folder_id:
+            with self._lock:
+                self._ids[key] = folder_id
+        return folder_id
+
+    def get_or_create(self, parent_id: Optional[str], name: str, resolve: Callable[[], str]) -> str:
+        """
+        Return the cached folder ID, calling ``resolve`` (find or create the
+        folder on Drive) at most once per key across concurrent callers.
+        """
+        folder_id = self.get(parent_id, name)
+        if folder_id:
+            return folder_id
+
+        key = self._key(parent_id, name)
+        with self._key_lock(key):
+            folder_id = self.get(parent_id, name)
+            if folder_id:
+                return folder_id
+            folder_id = self._store(key, resolve())
+            with self._lock:
+                self._ids[key] = folder_id
+            return folder_id
+
+    def invalidate(self, folder_id: str) -> None:
+        """Forget a folder (e.g. deleted on Drive) and everything cached below it."""
+        stale = {folder_id}
+        with self._lock:
+            changed = True
+            while changed:
+                changed = False
+                for key, cached_id in list(self._ids.items()):
+                    if cached_id in stale or key[0] in stale:
+                        if cached_id not in stale:
+                            stale.add(cached_id)
+                            changed = True
+                        self._ids.pop(key, None)
+
+        if not self.persistent or not has_app_context():
+            return
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(db.delete(DriveFolder).where(
+                    db.or_(DriveFolder.folder_id.in_(stale), DriveFolder.parent_id.in_(stale))
+                ))
+        except SQLAlchemyError as e:
+            logger.warning(f"Could not invalidate cached Drive folder {folder_id}: {e}")
+
+
+# Shared by every GoogleDriveService instance in the process
+drive_folder_cache = DriveFolderCache()
+
+
 class GoogleDriveService:
     """
     Google Drive service for managing file uploads, downloads, and permissions
@@ -30,12 +161,40 @@ class GoogleDriveService:
         'https://www.googleapis.com/auth/drive.file',
     ]
     
-    def __init__(self):
-        """Initialize the Google Drive service with authentication"""
-        self.service = None
+    def __init__(self, client_factory: Optional[Callable[[], Any]] = None,
+                 folder_cache: Optional[DriveFolderCache] = None):
+        """
+        Initialize the Google Drive service with authentication
+
+        Args:
+            client_factory: Builds a Drive v3 client; when given, environment
+                credentials are skipped (used with a fake client in tests)
+            folder_cache: Folder ID cache (defaults to the process-wide cache)
+        """
         self.credentials = None
         self.is_configured = False
-        self._initialize_service()
+        self.folder_cache = folder_cache or drive_folder_cache
+        self._client_factory = client_factory
+        self._local = threading.local()
+        if client_factory is not None:
+            self.is_configured = True
+        else:
+            self._initialize_service()
+
+    @property
+    def service(self):
+        """
+        Drive client for the current thread.
+
+        googleapiclient clients share one httplib2 connection and are not
+        thread-safe, so each upload worker thread builds its own.
+        """
+        if not self.is_configured:
+            return None
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._client_factory()
+        return client
     
     def _initialize_service(self):
         """Initialize Google Drive service with service account credentials.
@@ -76,8 +235,11 @@ class GoogleDriveService:
                     scopes=self.SCOPES,
                 )
             
-            # Build the service
-            self.service = build('drive', 'v3', credentials=self.credentials)
+            # Build the service (one client per thread, see ``service``)
+            self._client_factory = lambda: build(
+                'drive', 'v3', credentials=self.credentials, cache_discovery=False
+            )
+            self._local.client = self._client_factory()
             self.is_configured = True
             
             logger.info("Google Drive service initialized successfully")
@@ -85,13 +247,16 @@ class GoogleDriveService:
         except Exception as e:
             logger.warning(f"Failed to initialize Google Drive service - features will be disabled: {str(e)}")
             self.is_configured = False
-            self.service = None
+            self._client_factory = None
             self.credentials = None
     
     def _get_or_create_folder(self, folder_name: str, parent_folder_id: Optional[str] = None) -> str:
         """
         Get or create a folder in Google Drive
         
+        Folder IDs are cached by (parent, name), so only the first upload into
+        a folder pays for the Drive search/creation.
+        
         Args:
             folder_name: Name of the folder
             parent_folder_id: ID of parent folder (optional)
@@ -101,16 +266,42 @@ class GoogleDriveService:
         """
         if not self.is_configured:
             raise ValueError("Google Drive service is not configured")
-            
+
+        created = []
+
+        def resolve() -> str:
+            folder_id, was_created = self._find_or_create_folder(folder_name, parent_folder_id)
+            if was_created:
+                created.append(folder_id)
+            return folder_id
+
+        folder_id = self.folder_cache.get_or_create(parent_folder_id, folder_name, resolve)
+
+        # Another worker cached the same folder first; drop the empty duplicate
+        for duplicate_id in created:
+            if duplicate_id != folder_id:
+                logger.info(f"Removing duplicate folder '{folder_name}': {duplicate_id}")
+                self.delete_file(duplicate_id)
+
+        return folder_id
+
+    def _find_or_create_folder(self, folder_name: str, parent_folder_id: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Search Drive for a folder and create it if missing.
+        
+        Returns:
+            Tuple of (folder_id, created)
+        """
         try:
             # Search for existing folder
-            query = f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            query = f"name='{folder_name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=false"
             if parent_folder_id:
                 query += f" and '{parent_folder_id}' in parents"
             
             results = self.service.files().list(
                 q=query,
                 spaces='drive',
+                fields='files(id)',
                 supportsAllDrives=True,
                 includeItemsFromAllDrives=True
             ).execute()
@@ -121,12 +312,12 @@ class GoogleDriveService:
                 # Folder exists, return its ID
                 folder_id = items[0]['id']
                 logger.info(f"Found existing folder '{folder_name}': {folder_id}")
-                return folder_id
+                return folder_id, False
             
             # Create new folder
             folder_metadata = {
                 'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
+                'mimeType': FOLDER_MIME_TYPE
             }
             
             if parent_folder_id:
@@ -134,13 +325,14 @@ class GoogleDriveService:
             
             folder = self.service.files().create(
                 body=folder_metadata,
+                fields='id',
                 supportsAllDrives=True,
                 supportsTeamDrives=True
             ).execute()
             folder_id = folder.get('id')
             
             logger.info(f"Created new folder '{folder_name}': {folder_id}")
-            return folder_id
+            return folder_id, True
             
         except HttpError as e:
             logger.error(f"Error managing folder '{folder_name}': {e}")
@@ -184,7 +376,7 @@ class GoogleDriveService:
                     assignment_folder_id
                 )
                 
-                logger.info(f"Created organized folder structure: Assignment_{assignment_id}/Student_{student_id}")
+                logger.debug(f"Resolved folder structure: Assignment_{assignment_id}/Student_{student_id}")
                 return student_folder_id
                 
             except HttpError as folder_error:
@@ -204,7 +396,7 @@ class GoogleDriveService:
                 raise ValueError("No valid folder ID available for file upload")
     
     def upload_file(self, 
-                   file_data: BytesIO, 
+                   file_data: BinaryIO, 
                    filename: str, 
                    mime_type: str,
                    assignment_id: int,
@@ -214,7 +406,7 @@ class GoogleDriveService:
         Upload a file to Google Drive
         
         Args:
-            file_data: File data as BytesIO
+            file_data: Seekable binary stream (BytesIO or the request's file stream)
             filename: Name of the file
             mime_type: MIME type of the file
             assignment_id: Assignment ID for organization
@@ -226,11 +418,85 @@ class GoogleDriveService:
         """
         if not self.is_configured:
             raise ValueError("Google Drive service is not configured")
-            
+
+        # Set up folder structure
+        folder_id = self._setup_folder_structure(assignment_id, student_id)
         try:
-            # Set up folder structure
+            return self._upload_to_folder(folder_id, file_data, filename, mime_type,
+                                          assignment_id, student_id, metadata)
+        except HttpError as e:
+            if e.resp.status != 404 or folder_id == os.getenv('GOOGLE_DRIVE_ROOT_FOLDER_ID'):
+                raise
+            # Cached folder was deleted on Drive: forget it and rebuild once
+            logger.warning(f"Cached folder {folder_id} no longer exists, re-resolving")
+            self.folder_cache.invalidate(folder_id)
+            file_data.seek(0)
             folder_id = self._setup_folder_structure(assignment_id, student_id)
+            return self._upload_to_folder(folder_id, file_data, filename, mime_type,
+                                          assignment_id, student_id, metadata)
+
+    def upload_files(self,
+                     files: List[Tuple[BinaryIO, str, str]],
+                     assignment_id: int,
+                     student_id: int,
+                     metadata: Optional[Dict] = None,
+                     max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Upload several files for one submission in parallel
+        
+        The folder structure is resolved once; uploads then run on at most
+        ``GOOGLE_DRIVE_UPLOAD_CONCURRENCY`` threads.
+        
+        Args:
+            files: List of (file_data, filename, mime_type) tuples
+            assignment_id: Assignment ID for organization
+            student_id: Student ID for organization
+            metadata: Additional metadata applied to every file (optional)
+            max_workers: Override for the concurrency limit
             
+        Returns:
+            List of file information dicts in input order; a failed upload is
+            reported as {'original_filename': ..., 'error': ...}
+        """
+        if not self.is_configured:
+            raise ValueError("Google Drive service is not configured")
+        if not files:
+            return []
+
+        folder_id = self._setup_folder_structure(assignment_id, student_id)
+
+        def upload(item):
+            file_data, filename, mime_type = item
+            try:
+                return self._upload_to_folder(folder_id, file_data, filename, mime_type,
+                                              assignment_id, student_id, metadata)
+            except Exception as e:
+                return {'original_filename': filename, 'error': str(e)}
+
+        workers = max(1, min(max_workers or UPLOAD_CONCURRENCY, len(files)))
+        if workers == 1:
+            return [upload(item) for item in files]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='drive-upload') as pool:
+            return list(pool.map(upload, files))
+
+    @staticmethod
+    def _stream_size(file_data: BinaryIO) -> int:
+        position = file_data.tell()
+        file_data.seek(0, os.SEEK_END)
+        size = file_data.tell()
+        file_data.seek(position)
+        return size
+
+    def _upload_to_folder(self,
+                          folder_id: str,
+                          file_data: BinaryIO,
+                          filename: str,
+                          mime_type: str,
+                          assignment_id: int,
+                          student_id: int,
+                          metadata: Optional[Dict] = None) -> Dict[str, Any]:
+        """Upload one file into an already resolved folder"""
+        try:
             # Generate unique filename with timestamp
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             unique_filename = f"{timestamp}_{filename}"
@@ -248,35 +514,40 @@ class GoogleDriveService:
                 })
             }
             
-            # Upload file
+            # Small files go up in a single request; larger ones are streamed
+            # from the (disk-spooled) stream in resumable chunks
+            resumable = self._stream_size(file_data) > UPLOAD_CHUNK_SIZE
             media = MediaIoBaseUpload(
                 file_data,
                 mimetype=mime_type,
-                resumable=False  # Disable resumable upload for service accounts
+                chunksize=UPLOAD_CHUNK_SIZE,
+                resumable=resumable
             )
             
             # Create file with specific ownership settings
-            file = self.service.files().create(
+            request = self.service.files().create(
                 body=file_metadata,
                 media_body=media,
                 fields='id,name,size,createdTime,webViewLink,webContentLink,mimeType',
                 supportsAllDrives=True,  # Support shared drives
                 supportsTeamDrives=True  # Legacy support
-            ).execute()
+            )
+            if resumable:
+                file_info = None
+                while file_info is None:
+                    status, file_info = request.next_chunk(num_retries=3)
+                    if status:
+                        logger.debug(f"Upload progress for '{unique_filename}': {int(status.progress() * 100)}%")
+            else:
+                file_info = request.execute()
             
             # Make file accessible to anyone with the link (for LMS access)
-            self._set_file_permissions(file['id'])
+            self._set_file_permissions(file_info['id'])
             
-            # Get updated file info with public link
-            file_info = self.service.files().get(
-                fileId=file['id'],
-                fields='id,name,size,createdTime,webViewLink,webContentLink,mimeType'
-            ).execute()
-            
-            logger.info(f"Successfully uploaded file '{unique_filename}' with ID: {file['id']}")
+            logger.info(f"Successfully uploaded file '{unique_filename}' with ID: {file_info['id']}")
             
             return {
-                'file_id': file['id'],
+                'file_id': file_info['id'],
                 'filename': unique_filename,
                 'original_filename': filename,
                 'size': int(file_info.get('size', 0)),
@@ -488,6 +759,69 @@ class GoogleDriveService:
             logger.error(f"Error downloading file {file_id}: {e}")
             return None
 
+    @staticmethod
+    def extract_file_id_from_url(url: str) -> Optional[str]:
+        """
+        Extract a Google Drive file ID from a view/download URL
+        
+        Args:
+            url: e.g. https://drive.google.com/file/d/<id>/view or ...?id=<id>
+            
+        Returns:
+            str: File ID, or None if the URL has none
+        """
+        if not url:
+            return None
+        match = re.search(r'/d/([a-zA-Z0-9_-]+)', url) or re.search(r'[?&]id=([a-zA-Z0-9_-]+)', url)
+        return match.group(1) if match else None
+
+    def get_file_metadata(self, file_id: str, fields: str = 'id,name,size,mimeType,modifiedTime') -> Dict[str, Any]:
+        """
+        Fetch raw Drive metadata for a file (raises HttpError on failure)
+        
+        Args:
+            file_id: Google Drive file ID
+            fields: Drive fields selector
+        """
+        if not self.is_configured:
+            raise ValueError("Google Drive service is not configured")
+        return self.service.files().get(
+            fileId=file_id, fields=fields, supportsAllDrives=True
+        ).execute()
+
+    def download_to_file(self, file_id: str, fh: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> int:
+        """
+        Stream a file's content from Google Drive into a file object in chunks
+        
+        Args:
+            file_id: Google Drive file ID
+            fh: Writable binary file object
+            chunk_size: Bytes per download request
+            
+        Returns:
+            int: Number of bytes written (raises HttpError on failure)
+        """
+        if not self.is_configured:
+            raise ValueError("Google Drive service is not configured")
+
+        from googleapiclient.http import MediaIoBaseDownload
+
+        request = self.service.files().get_media(fileId=file_id, supportsAllDrives=True)
+        start = fh.tell()
+        downloader = MediaIoBaseDownload(fh, request, chunksize=chunk_size)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk(num_retries=3)
+        return fh.tell() - start
+
+    def download_file(self, file_id: str) -> Optional[bytes]:
+        """
+        Download file content from Google Drive as bytes
+        
+        Prefer ``download_to_file`` for large files.
+        """
+        return self.download_file_content(file_id)
+
     def test_connection(self) -> bool:
         """
         Test the Google Drive connection
@@ -0,0 +1,174 @@
+"""
+Sparse bag-of-words index for finding similar submissions.
+
+Each submission is stored once as a binary term vector (its set of
+lower-cased, whitespace-split words, exactly what
+``AIGradingHelper.calculate_similarity_score`` compares).  Term vectors are
+kept as CSR arrays, so the overlap between one query and every indexed
+submission is a single sparse matrix-vector product, and Jaccard similarity
+follows from the overlap and the two set sizes:
+
+    |A & B| / (|A| + |B| - |A & B|)
+
+Scores are identical to the pairwise computation; only the work changes.
+Submissions can be added or replaced after the index is built.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Upper bound on the temporary (nnz x queries) block used by batch queries
+_BATCH_CELLS = 8_000_000
+
+
+def tokenize(text: Optional[str]) -> set:
+    """The word set a submission is compared on."""
+    return set(text.lower().split()) if text else set()
+
+
+class SubmissionSimilarityIndex:
+    """Binary term vectors for a set of submissions, keyed by submission ID."""
+
+    def __init__(self):
+        self._vocabulary: Dict[str, int] = {}
+        self._rows: List[np.ndarray] = []    # sorted term ids per row
+        self._keys: List[Hashable] = []
+        self._row_of: Dict[Hashable, int] = {}
+        self._live: List[bool] = []
+        self._matrix: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._row_of
+
+    def keys(self) -> List[Hashable]:
+        return list(self._row_of)
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(self, key: Hashable, text: Optional[str]) -> None:
+        """Index ``text`` under ``key``, replacing any earlier text for it."""
+        previous = self._row_of.pop(key, None)
+        if previous is not None:
+            self._live[previous] = False
+
+        terms = self._term_ids(tokenize(text), grow=True)
+        self._row_of[key] = len(self._rows)
+        self._rows.append(terms)
+        self._keys.append(key)
+        self._live.append(True)
+        self._matrix = None
+
+    def add_many(self, items: Iterable[Tuple[Hashable, Optional[str]]]) -> None:
+        for key, text in items:
+            self.add(key, text)
+
+    def remove(self, key: Hashable) -> None:
+        row = self._row_of.pop(key, None)
+        if row is not None:
+            self._live[row] = False
+            self._matrix = None
+
+    def _term_ids(self, words: Iterable[str], grow: bool) -> np.ndarray:
+        vocabulary = self._vocabulary
+        if grow:
+            ids = [vocabulary.setdefault(word, len(vocabulary)) for word in words]
+        else:
+            ids = [vocabulary[word] for word in words if word in vocabulary]
+        return np.sort(np.fromiter(ids, dtype=np.int32, count=len(ids)))
+
+    def _compact(self) -> None:
+        """Drop rows left behind by replaced or removed submissions."""
+        live_rows = [row for row, live in enumerate(self._live) if live]
+        self._rows = [self._rows[row] for row in live_rows]
+        self._keys = [self._keys[row] for row in live_rows]
+        self._live = [True] * len(live_rows)
+        self._row_of = {key: row for row, key in enumerate(self._keys)}
+
+    def _csr(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """(indptr, indices, row sizes, live mask), rebuilt after changes."""
+        if self._matrix is None:
+            if len(self._rows) > 2 * len(self._row_of) + 64:
+                self._compact()
+            sizes = np.fromiter((len(r) for r in self._rows), dtype=np.int64, count=len(self._rows))
+            indptr = np.zeros(len(self._rows) + 1, dtype=np.int64)
+            np.cumsum(sizes, out=indptr[1:])
+            indices = np.concatenate(self._rows) if self._rows else np.zeros(0, dtype=np.int32)
+            live = np.array(self._live, dtype=bool)
+            self._matrix = (indptr, indices, sizes, live)
+        return self._matrix
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _overlaps(self, query_columns: np.ndarray) -> np.ndarray:
+        """Row-wise dot products of the index with one or more query columns.
+
+        ``query_columns`` is a dense (vocabulary x queries) 0/1 matrix; the
+        result is (rows x queries).
+        """
+        indptr, indices, _, _ = self._csr()
+        rows = len(indptr) - 1
+        if not rows or not len(indices):
+            return np.zeros((rows, query_columns.shape[1]), dtype=np.int32)
+
+        # A trailing zero row keeps every row start a valid reduceat offset
+        hits = np.zeros((len(indices) + 1, query_columns.shape[1]), dtype=query_columns.dtype)
+        hits[:-1] = query_columns[indices]                  # nnz x queries
+        sums = np.add.reduceat(hits, indptr[:-1], axis=0)
+        sums[indptr[:-1] == indptr[1:]] = 0                 # reduceat yields a single element for empty rows
+        return sums
+
+    def _top(self, overlaps: np.ndarray, query_size: int, exclude_row: Optional[int],
+             threshold: float, k: int) -> List[Tuple[Hashable, float]]:
+        _, _, sizes, live = self._csr()
+        if not query_size:
+            return []
+
+        union = sizes + query_size - overlaps
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where((union > 0) & (sizes > 0), overlaps / union, 0.0)
+        scores[~live] = -1.0
+        if exclude_row is not None:
+            scores[exclude_row] = -1.0
+
+        candidates = np.flatnonzero(scores >= threshold)
+        # Highest score first; ties keep index order like a stable sort would
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))][:k]
+        return [(self._keys[row], float(scores[row])) for row in candidates]
+
+    def query(self, text: Optional[str], threshold: float = 0.3, k: int = 5,
+              exclude: Optional[Hashable] = None) -> List[Tuple[Hashable, float]]:
+        """Up to ``k`` ``(key, similarity)`` pairs at or above ``threshold``."""
+        words = tokenize(text)
+        terms = self._term_ids(words, grow=False)
+        column = np.zeros((len(self._vocabulary), 1), dtype=np.int32)
+        column[terms, 0] = 1
+        overlaps = self._overlaps(column)[:, 0]
+        return self._top(overlaps, len(words), self._row_of.get(exclude), threshold, k)
+
+    def similar_to(self, keys: Sequence[Hashable], threshold: float = 0.3,
+                   k: int = 5) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+        """Top-k neighbours for indexed submissions, in as few products as memory allows."""
+        rows = [(key, self._row_of[key]) for key in keys if key in self._row_of]
+        if not rows:
+            return {}
+        indptr, indices, sizes, _ = self._csr()
+
+        chunk = max(1, _BATCH_CELLS // max(1, len(indices)))
+        results: Dict[Hashable, List[Tuple[Hashable, float]]] = {}
+        for start in range(0, len(rows), chunk):
+            block = rows[start:start + chunk]
+            columns = np.zeros((len(self._vocabulary), len(block)), dtype=np.int32)
+            for position, (_, row) in enumerate(block):
+                columns[indices[indptr[row]:indptr[row + 1]], position] = 1
+            overlaps = self._overlaps(columns)
+            for position, (key, row) in enumerate(block):
+                results[key] = self._top(overlaps[:, position], int(sizes[row]), row, threshold, k)
+        return results
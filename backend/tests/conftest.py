@@ -0,0 +1,58 @@
+"""
+Shared fixtures for the backend tests.
+
+Puts the backend on ``sys.path``, imports every model module so foreign
+keys resolve in ``create_all()``, and provides ``app``: a bare Flask app
+bound to an in-memory SQLite database, with its app context pushed for the
+duration of the test, and ``count_queries`` for query-count assertions.
+"""
+
+import importlib
+import os
+import pkgutil
+import sys
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+
+import src.models
+from src.models.user_models import db
+
+for _module in pkgutil.iter_modules(src.models.__path__):
+    importlib.import_module(f'src.models.{_module.name}')
+
+
+@pytest.fixture
+def app():
+    flask_app = Flask(__name__)
+    flask_app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(flask_app)
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def _count_queries():
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_execute)
+
+
+@pytest.fixture
+def count_queries(app):
+    """``with count_queries() as statements:`` collects the SQL executed inside the block"""
+    return _count_queries
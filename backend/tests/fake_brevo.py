@@ -0,0 +1,95 @@
+"""
+Local stand-in for the Brevo transactional email endpoint.
+
+Accepts ``POST /smtp/email``, records each request body and answers with
+scripted responses (default: 201 with one message id per message version).
+Point the app at it with ``BREVO_API_URL=http://127.0.0.1:<port>``:
+
+    python tests/fake_brevo.py --port 8025
+"""
+
+import argparse
+import itertools
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeBrevo:
+    """Threaded fake Brevo server. Use as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.requests = []
+        self.responses = []      # queued (status, body, headers) tuples, used in order
+        self.reject = set()      # recipient emails that make a request fail with 400
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def respond(self, status, body=None, headers=None):
+        self.responses.append((status, body or {}, headers or {}))
+
+    def recipients(self, request):
+        return [to['email'] for version in request.get('messageVersions', []) for to in version['to']]
+
+    def _reply(self, payload):
+        with self._lock:
+            self.requests.append(payload)
+            if self.responses:
+                return self.responses.pop(0)
+            rejected = self.reject.intersection(self.recipients(payload))
+            if rejected:
+                return 400, {'code': 'invalid_parameter', 'message': f'Invalid email {sorted(rejected)[0]}'}, {}
+            versions = payload.get('messageVersions') or [payload]
+            return 201, {'messageIds': [f'<msg-{next(self._ids)}@fake-brevo>' for _ in versions]}, {}
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip('/') != '/smtp/email' or not self.headers.get('api-key'):
+                    self.send_response(401 if self.path.rstrip('/') == '/smtp/email' else 404)
+                    self.end_headers()
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                status, body, headers = fake._reply(json.loads(self.rfile.read(length) or b'{}'))
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8025)
+    args = parser.parse_args()
+    with FakeBrevo(port=args.port) as fake:
+        print(f'Fake Brevo listening on {fake.url} (Ctrl+C to stop)')
+        try:
+            fake.thread.join()
+        except KeyboardInterrupt:
+            pass
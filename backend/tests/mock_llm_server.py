@@ -0,0 +1,137 @@
+"""
+Local stand-in for an OpenAI/OpenRouter-compatible LLM endpoint.
+
+Accepts ``POST /chat/completions``, records each request body and answers
+with scripted responses (default: 200 echoing the last user message) after
+an optional ``delay``. Requests with ``"stream": true`` get the content as
+server-sent events in ``chunk_size`` pieces. Tracks the peak number of
+concurrent requests, and how many chunks each stream delivered before the
+client hung up:
+
+    python tests/mock_llm_server.py --port 8026 --delay 0.5
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockLLMServer:
+    """Threaded mock chat-completions server. Use as a context manager."""
+
+    def __init__(self, host='127.0.0.1', port=0, delay=0.0):
+        self.delay = delay
+        self.requests = []
+        self.responses = []      # queued (status, body, headers) tuples, used in order
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chunk_size = 16
+        self.chunk_delay = 0.0
+        self.streams = []        # (chunks sent, chunks total) per streamed response
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}/chat/completions'
+
+    def respond(self, status, body=None, headers=None):
+        self.responses.append((status, body or {}, headers or {}))
+
+    def completion(self, content):
+        return {'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                'usage': {'total_tokens': len(content.split())}}
+
+    def _reply(self, payload):
+        with self._lock:
+            self.requests.append(payload)
+            if self.responses:
+                return self.responses.pop(0)
+        messages = payload.get('messages') or [{}]
+        return 200, self.completion(f"echo: {messages[-1].get('content', '')}"), {}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip('/') != '/chat/completions':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                with mock._lock:
+                    mock.in_flight += 1
+                    mock.max_in_flight = max(mock.max_in_flight, mock.in_flight)
+                try:
+                    if mock.delay:
+                        time.sleep(mock.delay)
+                    status, body, headers = mock._reply(payload)
+                finally:
+                    with mock._lock:
+                        mock.in_flight -= 1
+                if payload.get('stream') and status == 200 and body.get('choices'):
+                    self._stream(body['choices'][0]['message']['content'])
+                    return
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, content):
+                chunks = [content[i:i + mock.chunk_size] for i in range(0, len(content), mock.chunk_size)]
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                sent = 0
+                try:
+                    self.wfile.write(b': MOCK PROCESSING\n\n')
+                    for chunk in chunks:
+                        event = {'choices': [{'delta': {'content': chunk}}]}
+                        self.wfile.write(f'data: {json.dumps(event)}\n\n'.encode())
+                        self.wfile.flush()
+                        sent += 1
+                        if mock.chunk_delay:
+                            time.sleep(mock.chunk_delay)
+                    self.wfile.write(b'data: [DONE]\n\n')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with mock._lock:
+                        mock.streams.append((sent, len(chunks)))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8026)
+    parser.add_argument('--delay', type=float, default=0.0)
+    args = parser.parse_args()
+    with MockLLMServer(port=args.port, delay=args.delay) as mock:
+        print(f'Mock LLM listening on {mock.url} (Ctrl+C to stop)')
+        try:
+            mock.thread.join()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,146 @@
+"""
+Tests for the aggregated admin analytics dashboard.
+
+Checks the grouped-query results against hand-counted fixtures, that the
+query count does not grow with the length of history, and the per-period
+snapshot cache.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Course, Enrollment
+from src.models.student_models import LessonCompletion
+from src.services import admin_analytics_service
+from src.services.admin_analytics_service import AdminAnalyticsService
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def empty_snapshot_cache():
+    AdminAnalyticsService.invalidate()
+
+
+def make_user(role, name, created_at, is_active=True):
+    user = User(username=name, email=f'{name}@example.com', role_id=role.id, password_hash='x',
+                first_name=name.title(), last_name='Test', created_at=created_at, is_active=is_active)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+@pytest.fixture
+def data(app):
+    student_role, instructor_role = Role(name='student'), Role(name='instructor')
+    db.session.add_all([student_role, instructor_role])
+    db.session.flush()
+
+    instructor = make_user(instructor_role, 'teacher', datetime(2025, 1, 10))
+    students = [
+        make_user(student_role, 'old', datetime(2025, 3, 5)),
+        make_user(student_role, 'aug', datetime(2026, 8, 31, 23, 0), is_active=False),
+        make_user(student_role, 'sep', datetime(2026, 9, 1, 1, 0)),
+        make_user(student_role, 'oct', NOW - timedelta(days=2)),
+    ]
+
+    paid = Course(title='Paid', description='d', instructor_id=instructor.id, is_published=True, enrollment_type='paid')
+    free = Course(title='Free', description='d', instructor_id=instructor.id, is_published=False)
+    db.session.add_all([paid, free])
+    db.session.flush()
+
+    db.session.add_all([
+        Enrollment(student_id=students[0].id, course_id=paid.id, enrollment_date=datetime(2026, 6, 1),
+                   status='completed', completed_at=datetime(2026, 9, 20), payment_status='completed'),
+        Enrollment(student_id=students[1].id, course_id=paid.id, enrollment_date=datetime(2026, 9, 25),
+                   status='active', payment_status='pending'),
+        Enrollment(student_id=students[2].id, course_id=free.id, enrollment_date=NOW - timedelta(days=1),
+                   status='terminated'),
+    ])
+
+    # Student 0 active in weeks 1 and 2 ago, student 1 only in the latest week
+    db.session.add_all([
+        LessonCompletion(student_id=students[0].id, lesson_id=1, completed=True, completed_at=NOW - timedelta(days=10)),
+        LessonCompletion(student_id=students[0].id, lesson_id=2, completed=True, completed_at=NOW - timedelta(days=3)),
+        LessonCompletion(student_id=students[1].id, lesson_id=1, completed=False, completed_at=NOW - timedelta(days=2)),
+    ])
+    db.session.commit()
+    return students
+
+
+def test_dashboard_sections_match_fixture(data):
+    dashboard = AdminAnalyticsService.build_dashboard('30days', now=NOW)
+    kpi = dashboard['kpi']
+
+    assert kpi['total_users'] == 5 and kpi['active_users'] == 4
+    assert kpi['period_new_users'] == 1
+    assert kpi['period_new_enrollments'] == 2
+    assert kpi['total_courses'] == 2 and kpi['published_courses'] == 1
+    assert kpi['completion_rate'] == round(1 / 3 * 100, 1)
+
+    # Calendar months: Aug 31 and Sep 1 land in different buckets
+    growth = {row['month']: row for row in dashboard['user_growth']}
+    assert list(growth) == ['Jun 2026', 'Jul 2026', 'Aug 2026', 'Sep 2026', 'Oct 2026']
+    assert growth['Jun 2026']['users'] == 2
+    assert growth['Aug 2026'] == {'month': 'Aug 2026', 'users': 3, 'active': 2, 'new': 1}
+    assert growth['Oct 2026']['users'] == 5 and growth['Oct 2026']['active'] == 4
+
+    trends = {row['month']: row for row in dashboard['enrollment_trends']}
+    assert trends['Jun 2026']['enrollments'] == 1
+    assert trends['Sep 2026'] == {'month': 'Sep 2026', 'enrollments': 1, 'completions': 1}
+
+    popularity = {row['title']: row for row in dashboard['course_popularity']}
+    assert popularity['Paid']['enrollments'] == 2 and popularity['Paid']['completion_rate'] == 50.0
+
+    assert {r['name']: r['value'] for r in dashboard['completion_rates']} == {
+        'Completed': 1, 'In Progress': 1, 'Not Started': 0, 'Terminated': 1,
+    }
+    assert dashboard['payment_stats']['pending_payments'] == 1
+    assert dashboard['course_status'] == {'published': 1, 'draft': 1, 'paid': 1, 'free': 1}
+
+    latest, previous = dashboard['engagement_metrics'][-1], dashboard['engagement_metrics'][-2]
+    assert latest['lessons_completed'] == 1 and latest['active_students'] == 2
+    assert latest['retention_rate'] == 100.0
+    assert previous['active_students'] == 1
+
+    assert dashboard['top_active_students'][0]['username'] == 'old'
+    assert dashboard['recent_activity'][0]['type'] == 'enrollment'
+
+
+def test_query_count_is_independent_of_period(data, count_queries):
+    counts = {}
+    for period in ('7days', 'all'):
+        with count_queries() as statements:
+            AdminAnalyticsService.build_dashboard(period, now=NOW)
+        counts[period] = len(statements)
+
+    assert counts['7days'] == counts['all'] <= 15
+
+
+def test_snapshots_are_cached_per_period(data, monkeypatch):
+    builds = []
+    original = AdminAnalyticsService.build_dashboard.__func__
+
+    def counting(cls, period='30days', now=None):
+        builds.append(period)
+        return original(cls, period, now=NOW)
+
+    monkeypatch.setattr(AdminAnalyticsService, 'build_dashboard', classmethod(counting))
+
+    first = AdminAnalyticsService.get_dashboard('30days')
+    assert AdminAnalyticsService.get_dashboard('30days') is first
+    AdminAnalyticsService.get_dashboard('7days')
+    AdminAnalyticsService.get_dashboard('30days', force_refresh=True)
+    assert builds == ['30days', '7days', '30days']
+
+    # An expired-but-recent snapshot is served while it is rebuilt
+    monkeypatch.setattr(admin_analytics_service, 'CACHE_TTL', 0)
+    stale = AdminAnalyticsService.get_dashboard('7days')
+    assert stale['period'] == '7days'
+    deadline = time.monotonic() + 5
+    while admin_analytics_service._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert builds == ['30days', '7days', '30days', '7days']
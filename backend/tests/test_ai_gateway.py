@@ -0,0 +1,207 @@
+"""
+Tests for the asyncio AI gateway, run against a local mock LLM server.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from src.services.ai.ai_gateway import (
+    AIGateway, ProviderError, SharedTokenBucket, TokenBucket, gemini_generate, openrouter_chat,
+)
+from src.services.ai.ai_providers import AIProviderManager
+from src.services.ai.rate_limit_handler import RateLimitHandler
+from src.services.ai.shared_rate_limit import SharedRateLimitStore
+from mock_llm_server import MockLLMServer
+
+
+@pytest.fixture
+def mock_llm():
+    with MockLLMServer(delay=0.2) as mock:
+        yield mock
+
+
+@pytest.fixture
+def gateway():
+    gateway = AIGateway({'openrouter': {'rpm': 0, 'concurrency': 2}}, max_cooldown=0.2)
+    yield gateway
+    gateway.close()
+
+
+def chat(gateway, mock, prompt, key=None, retries=2):
+    payload = {'model': 'test', 'messages': [{'role': 'user', 'content': prompt}]}
+    return gateway.request_sync('openrouter', lambda: openrouter_chat(gateway, mock.url, {}, payload, 5),
+                                key=key, retries=retries)
+
+
+def test_sync_callers_share_the_concurrency_cap(gateway, mock_llm):
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda i: chat(gateway, mock_llm, f'p{i}'), range(6)))
+    elapsed = time.monotonic() - started
+
+    assert results == [f'echo: p{i}' for i in range(6)]
+    assert mock_llm.max_in_flight == 2
+    # Three rounds of two concurrent calls, not six serial ones
+    assert elapsed < 6 * mock_llm.delay
+    assert gateway.get_stats()['openrouter']['requests'] == 6
+
+
+def test_identical_in_flight_prompts_are_coalesced(gateway, mock_llm):
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: chat(gateway, mock_llm, 'same', key='same'), range(4)))
+
+    assert results == ['echo: same'] * 4
+    assert len(mock_llm.requests) == 1
+    assert gateway.get_stats()['openrouter']['coalesced'] == 3
+
+    # Once finished the key is released, so a later call goes out again
+    chat(gateway, mock_llm, 'same', key='same')
+    assert len(mock_llm.requests) == 2
+
+
+def test_rate_limit_pauses_the_provider_and_retries(gateway, mock_llm):
+    mock_llm.delay = 0
+    mock_llm.respond(429, {'error': 'slow down'}, {'Retry-After': '30'})
+    assert chat(gateway, mock_llm, 'hi') == 'echo: hi'
+    assert gateway.get_stats()['openrouter']['rate_limited'] == 1
+
+    # Exhausted retries surface a 429 that RateLimitHandler recognises
+    mock_llm.respond(429, {'error': 'slow down'})
+    mock_llm.respond(429, {'error': 'slow down'})
+    with pytest.raises(ProviderError) as excinfo:
+        chat(gateway, mock_llm, 'hi', retries=1)
+    assert excinfo.value.status_code == 429
+    assert RateLimitHandler()._is_rate_limit_error(excinfo.value, str(excinfo.value))
+
+    mock_llm.respond(400, {'error': 'bad request'})
+    with pytest.raises(ProviderError) as excinfo:
+        chat(gateway, mock_llm, 'hi')
+    assert excinfo.value.status_code == 400
+    assert len(mock_llm.requests) == 5  # 400s are not retried
+
+
+def test_gemini_client_errors_are_not_retried():
+    from google.api_core import exceptions as google_exceptions
+    from google.generativeai.types import BlockedPromptException
+
+    class Model:
+        def __init__(self, error=None):
+            self.error, self.calls = error, 0
+
+        async def generate_content_async(self, prompt, generation_config=None):
+            self.calls += 1
+            if self.error:
+                raise self.error
+            return self
+
+        @property
+        def text(self):
+            raise ValueError('The candidate was blocked')
+
+    gateway = AIGateway({'gemini': {'rpm': 0, 'concurrency': 2}}, max_cooldown=0.2)
+    try:
+        for error, status in ((google_exceptions.PermissionDenied('key revoked'), 403),
+                              (google_exceptions.InvalidArgument('bad schema'), 400),
+                              (BlockedPromptException('blocked'), 400),
+                              (None, 400)):
+            model = Model(error)
+            with pytest.raises(ProviderError) as excinfo:
+                gateway.request_sync('gemini', lambda: gemini_generate(model, 'hi', {}, 5), retries=2)
+            assert excinfo.value.status_code == status and not excinfo.value.retryable
+            assert model.calls == 1
+
+        model = Model(google_exceptions.ServiceUnavailable('overloaded'))
+        with patch('src.services.ai.ai_gateway.asyncio.sleep'), pytest.raises(ProviderError) as excinfo:
+            gateway.request_sync('gemini', lambda: gemini_generate(model, 'hi', {}, 5), retries=1)
+        assert excinfo.value.status_code == 503 and model.calls == 2
+    finally:
+        gateway.close()
+
+
+def test_token_bucket_paces_reservations_across_threads():
+    now = [0.0]
+    bucket = TokenBucket(60, clock=lambda: now[0])
+    waits = []
+    threads = [threading.Thread(target=lambda: waits.append(bucket.reserve())) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(waits) == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    now[0] = 10.0
+    bucket.pause(30)
+    assert bucket.reserve() == 30.0
+    assert bucket.pause_remaining() == 30.0
+
+
+def test_provider_manager_routes_openrouter_through_the_gateway(gateway, mock_llm):
+    with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'key', 'GEMINI_API_KEY': ''}):
+        manager = AIProviderManager()
+    manager.openrouter_base_url = mock_llm.url
+    manager.gateway = gateway
+
+    assert manager._make_openrouter_request('Write a lesson').startswith('echo: ')
+    assert mock_llm.requests[0]['messages'][-1]['content'] == 'Write a lesson'
+
+    # 401 stops without trying other tiers
+    mock_llm.respond(401, {'error': 'no key'})
+    assert manager._make_openrouter_request('Another lesson') is None
+    assert len(mock_llm.requests) == 2
+
+
+def test_workers_draw_from_one_shared_budget(tmp_path):
+    url = f"sqlite:///{tmp_path / 'limits.db'}"
+    now = [600.0]
+    # Two workers' buckets on the same store
+    first, second = (SharedTokenBucket('openrouter', 60, SharedRateLimitStore(url), clock=lambda: now[0])
+                     for _ in range(2))
+
+    assert [first.reserve(), second.reserve(), first.reserve(), second.reserve()] == [0.0, 1.0, 2.0, 3.0]
+    assert first.requests_last_minute() == second.requests_last_minute() == 4
+
+    # A 429 seen by one worker holds the other back too
+    first.pause(30)
+    assert second.pause_remaining() == 30.0
+    assert second.reserve() == 30.0
+
+    metrics = second.metrics(60)
+    assert metrics['shared'] and metrics['cooldown_remaining_seconds'] == 30.0
+    assert metrics['all_workers']['requests'] == 5
+    assert metrics['all_workers']['rate_limited'] == 1
+    assert metrics['all_workers']['total_wait_seconds'] == 36.0
+    assert metrics['total_wait_seconds'] == 34.0  # This worker's share
+
+
+def _reserve_in_worker(url, count):
+    bucket = SharedTokenBucket('gemini', 600, SharedRateLimitStore(url))
+    starts = []
+    for _ in range(count):
+        now = time.time()
+        starts.append(now + bucket.reserve())
+    return starts
+
+
+def test_schedule_is_shared_across_processes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'limits.db'}"
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        starts = sorted(s for worker in pool.map(_reserve_in_worker, [url] * 4, [5] * 4) for s in worker)
+
+    # 20 reservations at 600 RPM are spaced at least 0.1s apart, whichever worker made them
+    assert len(starts) == 20
+    assert min(b - a for a, b in zip(starts, starts[1:])) >= 0.1 - 1e-4
+
+
+def test_unreachable_store_falls_back_to_local_limits(tmp_path):
+    store = SharedRateLimitStore(f"sqlite:///{tmp_path / 'missing' / 'limits.db'}")
+    now = [0.0]
+    bucket = SharedTokenBucket('openrouter', 60, store, clock=lambda: now[0])
+    assert [bucket.reserve(), bucket.reserve()] == [0.0, 1.0]
+    bucket.pause(10)
+    assert bucket.pause_remaining() == 10.0
+    assert bucket.metrics(60)['shared'] is False
@@ -0,0 +1,122 @@
+"""
+Tests for applicant search on the SQLite FTS5 index: ranking, short
+terms, keyset paging and index maintenance.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Course
+from src.models.course_application import CourseApplication
+from src.services.application_search_service import ApplicationSearchService
+
+
+@pytest.fixture
+def app(app):
+    ApplicationSearchService._backend = None
+    yield app
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS course_applications_fts")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS course_applications_trgm")
+    ApplicationSearchService._backend = None
+
+
+@pytest.fixture
+def applications(app):
+    role = Role(name='admin')
+    db.session.add(role)
+    db.session.flush()
+    admin = User(username='admin', email='admin@example.com', role_id=role.id, password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=admin.id)
+    db.session.add(course)
+    db.session.flush()
+    rows = [
+        ('Ana Banda', 'ana@example.com', '+260977000111', 'I want to analyse sales data'),
+        ('Joseph Anan', 'joseph@example.com', '+260977000222', 'Teaching spreadsheets to farmers'),
+        ('Mary Phiri', 'mary@example.com', '+260966123456', 'Analytics for my small business'),
+        ('Peter Zulu', 'peter@example.com', '+260955000333', 'Learning to code'),
+    ]
+    applications = [
+        CourseApplication(course_id=course.id, full_name=name, email=email, phone=phone, motivation=motivation)
+        for name, email, phone, motivation in rows
+    ]
+    db.session.add_all(applications)
+    db.session.commit()
+    ApplicationSearchService.ensure_index()
+    assert ApplicationSearchService.backend() == 'sqlite'
+    return {application.full_name: application.id for application in applications}
+
+
+def search(term):
+    query, relevance = ApplicationSearchService.apply_search(CourseApplication.query, term)
+    return [row.full_name for row, _ in query.add_columns(relevance).order_by(
+        relevance.desc(), CourseApplication.id).all()]
+
+
+def test_identity_matches_outrank_free_text(applications):
+    assert search('ana banda') == ['Ana Banda']
+    assert search('anan') == ['Joseph Anan']
+    assert search('analyse') == ['Ana Banda']
+    assert search('0966123') == ['Mary Phiri']
+    assert search('nobody') == []
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('an', ['Ana Banda', 'Joseph Anan', 'Mary Phiri']),
+    ('a', ['Ana Banda', 'Joseph Anan', 'Mary Phiri']),
+    ('pe', ['Peter Zulu']),
+])
+def test_terms_too_short_for_trigrams_use_full_text_prefixes(applications, term, expected):
+    assert sorted(search(term)) == expected
+
+
+def test_keyset_pages_cover_every_match_once(applications):
+    query, relevance = ApplicationSearchService.apply_search(CourseApplication.query, 'a')
+    sort_expr = ApplicationSearchService.sort_expression('id')
+    seen, cursor = [], None
+    while True:
+        page, cursor = ApplicationSearchService.keyset_page(query, sort_expr, cursor=cursor, limit=1)
+        seen.extend(application.id for application in page)
+        if not cursor:
+            break
+    assert seen == sorted(seen, reverse=True) and len(seen) == len(set(seen)) == 3
+
+
+@pytest.mark.parametrize('descending', [True, False])
+def test_keyset_pages_on_timestamps_include_null_rows(applications, descending):
+    # Two rows share a timestamp and two have none
+    db.session.execute(text("UPDATE course_applications SET updated_at = NULL WHERE id IN (:a, :b)"),
+                       {'a': applications['Ana Banda'], 'b': applications['Peter Zulu']})
+    db.session.execute(text("UPDATE course_applications SET updated_at = '2026-01-05 10:00:00.000000' "
+                            "WHERE id IN (:a, :b)"),
+                       {'a': applications['Joseph Anan'], 'b': applications['Mary Phiri']})
+    db.session.commit()
+
+    sort_expr = ApplicationSearchService.sort_expression('updated_at')
+    seen, cursor = [], None
+    while True:
+        page, cursor = ApplicationSearchService.keyset_page(CourseApplication.query, sort_expr, descending,
+                                                            cursor=cursor, limit=1)
+        seen.extend(application.full_name for application in page)
+        if not cursor:
+            break
+    expected = ['Mary Phiri', 'Joseph Anan', 'Peter Zulu', 'Ana Banda']
+    assert seen == (expected if descending else expected[::-1])
+
+
+def test_index_follows_updates_and_deletes(applications):
+    peter = db.session.get(CourseApplication, applications['Peter Zulu'])
+    peter.motivation = 'Analysing crop yields'
+    db.session.commit()
+    ApplicationSearchService.index_application(peter)
+    assert sorted(search('analyse')) == ['Ana Banda', 'Peter Zulu']
+
+    CourseApplication.query.filter_by(id=peter.id).delete()
+    db.session.commit()
+    ApplicationSearchService.remove_applications([peter.id])
+    assert search('analyse') == ['Ana Banda']
+    for table in ('course_applications_fts', 'course_applications_trgm'):
+        assert db.session.execute(text(f"SELECT count(*) FROM {table}")).scalar() == 3
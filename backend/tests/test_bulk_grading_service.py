@@ -0,0 +1,154 @@
+"""
+Tests for single-transaction bulk grading with batched score propagation.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Assignment, AssignmentSubmission, Course, Enrollment, Lesson, Module
+from src.models.student_models import LessonCompletion, ModuleProgress
+from src.models.notification_models import Notification
+from src.services import bulk_grading_service
+from src.services.bulk_grading_service import BulkGradingService
+
+
+@pytest.fixture
+def emails(monkeypatch):
+    sent = []
+    monkeypatch.setattr(bulk_grading_service, 'send_grade_notification',
+                        lambda **kwargs: sent.append(('graded', kwargs['submission'].id)) or True)
+    monkeypatch.setattr(bulk_grading_service, 'send_grade_with_modification_notification',
+                        lambda **kwargs: sent.append(('modification', kwargs['submission'].id)) or True)
+    return sent
+
+
+@pytest.fixture
+def course(app):
+    role = Role(name='instructor')
+    db.session.add(role)
+    db.session.flush()
+    instructor = User(username='teacher', email='teacher@example.com', role_id=role.id, password_hash='x',
+                      first_name='Tea', last_name='Cher')
+    other = User(username='other', email='other@example.com', role_id=role.id, password_hash='x')
+    students = [User(username=f's{i}', email=f's{i}@example.com', role_id=role.id, password_hash='x',
+                     first_name=f'S{i}', last_name='Test') for i in range(6)]
+    db.session.add_all([instructor, other, *students])
+    db.session.flush()
+
+    course = Course(title='Course', description='d', instructor_id=instructor.id)
+    foreign = Course(title='Foreign', description='d', instructor_id=other.id)
+    db.session.add_all([course, foreign])
+    db.session.flush()
+    module = Module(title='M1', course_id=course.id)
+    db.session.add(module)
+    db.session.flush()
+    lesson = Lesson(title='L1', content_type='text', content_data='x', module_id=module.id)
+    db.session.add(lesson)
+    db.session.flush()
+
+    essay = Assignment(title='Essay', description='d', course_id=course.id, instructor_id=instructor.id,
+                       lesson_id=lesson.id, module_id=module.id, points_possible=50,
+                       due_date=datetime(2026, 10, 1))
+    hidden = Assignment(title='Hidden', description='d', course_id=foreign.id, instructor_id=other.id)
+    db.session.add_all([essay, hidden])
+    db.session.flush()
+
+    submissions = []
+    for i, student in enumerate(students):
+        enrollment = Enrollment(student_id=student.id, course_id=course.id)
+        db.session.add(enrollment)
+        db.session.flush()
+        db.session.add(ModuleProgress(student_id=student.id, module_id=module.id, enrollment_id=enrollment.id,
+                                      assignment_score=10.0))
+        submissions.append(AssignmentSubmission(assignment_id=essay.id, student_id=student.id, content='essay',
+                                                submitted_at=datetime(2026, 10, 1) + timedelta(days=i)))
+    # One student already has reading progress above what a grade would give
+    db.session.add(LessonCompletion(student_id=students[0].id, lesson_id=lesson.id, reading_progress=99.0,
+                                    engagement_score=10.0))
+    foreign_submission = AssignmentSubmission(assignment_id=hidden.id, student_id=students[0].id)
+    db.session.add_all(submissions + [foreign_submission])
+    db.session.commit()
+    return {'instructor': instructor, 'essay': essay, 'lesson': lesson, 'module': module,
+            'students': students, 'submissions': submissions, 'foreign': foreign_submission}
+
+
+def test_grades_commit_once_and_propagate(course, emails):
+    submissions = course['submissions']
+    items = [{'id': s.id, 'grade': 40, 'feedback': 'ok'} for s in submissions[:5]]
+    items.append({'id': submissions[5].id, 'grade': 10})           # below passing
+    items.append({'id': course['foreign'].id, 'grade': 40})        # not the instructor's course
+    items.append({'id': 999999, 'grade': 40})
+    items.append({'id': submissions[0].id})
+
+    commits = []
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', count_commit)
+    result = BulkGradingService.grade(course['instructor'].id, items)
+    event.remove(db.engine, 'commit', count_commit)
+
+    assert result['graded_count'] == 6
+    assert result['error_count'] == 3
+    assert result['modifications_requested'] == 1
+    # Grades + progress in one commit, notifications in a second
+    assert len(commits) == 2
+
+    db.session.expire_all()
+    grades = {s.id: s.grade for s in AssignmentSubmission.query.filter(
+        AssignmentSubmission.id.in_([s.id for s in submissions]))}
+    assert [grades[s.id] for s in submissions] == [40, 40, 40, 40, 40, 10]
+    assert AssignmentSubmission.query.get(course['foreign'].id).grade is None
+    assert Assignment.query.get(course['essay'].id).modification_requested is True
+
+    completions = {lc.student_id: lc for lc in LessonCompletion.query.filter_by(lesson_id=course['lesson'].id)}
+    assert len(completions) == 6
+    first = completions[course['students'][0].id]
+    assert first.reading_progress == 99.0 and first.engagement_score == 60.0 + 80.0 * 0.4
+    assert completions[course['students'][1].id].reading_progress == 70.0 + 80.0 * 0.3
+
+    scores = {mp.student_id: mp.assignment_score for mp in ModuleProgress.query}
+    assert scores[course['students'][1].id] == 80.0 and scores[course['students'][5].id] == 20.0
+
+    assert Notification.query.count() == 6
+    assert sorted(kind for kind, _ in emails) == ['graded'] * 5 + ['modification']
+
+
+def test_late_penalty_and_range_validation(course, emails):
+    submissions = course['submissions']
+    policy = {'grace_period_days': 1, 'per_day_penalty': 5, 'max_penalty': 12}
+    result = BulkGradingService.grade(course['instructor'].id, [
+        {'id': submissions[0].id, 'grade': 45},   # on time
+        {'id': submissions[3].id, 'grade': 45},   # 3 days late: 2 penalised days
+        {'id': submissions[5].id, 'grade': 45},   # 5 days late: capped
+    ], late_penalty_policy=policy)
+    assert [g['final_grade'] for g in result['graded_submissions']] == [45, 35, 33]
+
+    result = BulkGradingService.grade(course['instructor'].id, [{'id': submissions[1].id, 'grade': 51}],
+                                      validate_range=True)
+    assert result['graded_count'] == 0 and result['errors'] == [f"Submission {submissions[1].id}: Invalid grade value"]
+
+
+def test_started_task_is_owned_before_it_is_visible(course, monkeypatch):
+    from src.models.task_models import BackgroundTask
+    from src.services.background_service import background_service
+
+    inserted = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('INSERT INTO background_tasks'):
+            inserted.append(parameters)
+
+    instructor_id = course['instructor'].id
+    monkeypatch.setattr(background_service, '_execute_task', lambda *args: None)
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    task_id = BulkGradingService.start(instructor_id, [])
+    event.remove(db.engine, 'before_cursor_execute', capture)
+
+    # Set by the INSERT itself, not by a later UPDATE
+    assert len(inserted) == 1 and instructor_id in inserted[0]
+    assert db.session.get(BackgroundTask, task_id).user_id == instructor_id
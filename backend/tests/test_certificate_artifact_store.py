@@ -0,0 +1,127 @@
+"""
+Tests for the certificate artifact store.
+
+Rendering is stubbed out so the tests only cover storage behaviour:
+render-once, PNG reusing the stored PDF, pruning on re-issue and ETag-based
+conditional responses.
+"""
+
+import io
+import os
+from datetime import datetime
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Course
+from src.models.student_models import Certificate
+from src.services.certificate_service import CertificateService
+from src.services.certificate_artifact_store import (
+    CertificateArtifactStore,
+    LocalArtifactBackend,
+)
+
+
+@pytest.fixture
+def app(app, tmp_path, monkeypatch):
+    renders = {'pdf': 0, 'png': 0}
+
+    def fake_pdf(certificate):
+        renders['pdf'] += 1
+        return io.BytesIO(f"%PDF {certificate.certificate_number} {certificate.overall_score}".encode())
+
+    def fake_png(certificate, pdf_bytes=None):
+        renders['png'] += 1
+        assert pdf_bytes is not None and pdf_bytes.startswith(b'%PDF')
+        return io.BytesIO(b'PNG' + pdf_bytes)
+
+    monkeypatch.setattr(CertificateService, 'generate_certificate_pdf', staticmethod(fake_pdf))
+    monkeypatch.setattr(CertificateService, 'generate_certificate_image', staticmethod(fake_png))
+    CertificateArtifactStore.set_backend(LocalArtifactBackend(str(tmp_path)))
+    app.renders = renders
+    yield app
+    CertificateArtifactStore.set_backend(None)
+
+
+@pytest.fixture
+def certificate(app):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    user = User(username='grad', email='grad@example.com', role_id=role.id,
+                password_hash='x', first_name='Ada', last_name='Lovelace')
+    db.session.add(user)
+    db.session.flush()
+    course = Course(title='Excel Basics', description='d', instructor_id=user.id)
+    db.session.add(course)
+    db.session.flush()
+    cert = Certificate(student_id=user.id, course_id=course.id, enrollment_id=1,
+                       overall_score=91.5, issued_at=datetime(2026, 1, 5))
+    cert.generate_certificate_number()
+    db.session.add(cert)
+    db.session.commit()
+    return cert
+
+
+def test_pdf_is_rendered_once(app, certificate):
+    first = CertificateArtifactStore.get_or_create(certificate, 'pdf')
+    second = CertificateArtifactStore.get_or_create(certificate, 'pdf')
+
+    assert app.renders['pdf'] == 1
+    assert first.key == second.key
+    assert first.etag == second.etag
+    assert os.path.isfile(first.path)
+
+
+def test_png_reuses_stored_pdf(app, certificate):
+    CertificateArtifactStore.get_or_create(certificate, 'pdf')
+    png = CertificateArtifactStore.get_or_create(certificate, 'png')
+
+    assert app.renders == {'pdf': 1, 'png': 1}
+    assert png.mimetype == 'image/png'
+
+
+def test_reissue_changes_key_and_prunes_old_artifacts(app, certificate):
+    old_pdf = CertificateArtifactStore.get_or_create(certificate, 'pdf')
+    old_png = CertificateArtifactStore.get_or_create(certificate, 'png')
+
+    certificate.overall_score = 97.0
+    db.session.commit()
+    new_pdf = CertificateArtifactStore.get_or_create(certificate, 'pdf')
+
+    assert new_pdf.key != old_pdf.key
+    assert new_pdf.etag != old_pdf.etag
+    assert app.renders['pdf'] == 2
+    assert not os.path.exists(old_pdf.path)
+    assert not os.path.exists(old_png.path)
+
+
+def test_send_honours_if_none_match(app, certificate):
+    artifact = CertificateArtifactStore.get_or_create(certificate, 'pdf')
+
+    with app.test_request_context():
+        response = CertificateArtifactStore.send(artifact, 'cert.pdf')
+        assert response.status_code == 200
+        assert response.headers['ETag'] == f'"{artifact.etag}"'
+        response.close()
+
+    with app.test_request_context(headers={'If-None-Match': f'"{artifact.etag}"'}):
+        response = CertificateArtifactStore.send(artifact, 'cert.pdf')
+        assert response.status_code == 304
+        response.close()
+
+
+def test_send_uses_accel_redirect_when_configured(app, certificate, monkeypatch):
+    monkeypatch.setenv('CERTIFICATE_ACCEL_REDIRECT_PREFIX', '/protected-certificates/')
+    artifact = CertificateArtifactStore.get_or_create(certificate, 'pdf')
+
+    with app.test_request_context():
+        response = CertificateArtifactStore.send(artifact, 'cert.pdf')
+
+    assert response.headers['X-Accel-Redirect'] == f'/protected-certificates/{artifact.key}'
+    assert response.get_data() == b''
+
+    with app.test_request_context(headers={'If-None-Match': f'"{artifact.etag}"'}):
+        response = CertificateArtifactStore.send(artifact, 'cert.pdf')
+    assert response.status_code == 304
+    assert 'X-Accel-Redirect' not in response.headers
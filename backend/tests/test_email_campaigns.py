@@ -0,0 +1,133 @@
+"""
+Tests for resumable custom email campaigns streamed through the email outbox.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Course
+from src.models.course_application import CourseApplication
+from src.models.email_campaign_models import CampaignStatus, EmailCampaign, EmailCampaignRecipient
+from src.models.email_outbox_models import EmailOutbox
+from src.services import email_campaign_service
+from src.services.email_campaign_service import EmailCampaignService
+from src.services.email_outbox_service import EmailOutboxDispatcher, TokenBucket
+from src.utils.brevo_email_service import BrevoBatchClient
+from fake_brevo import FakeBrevo
+
+
+@pytest.fixture
+def brevo(app, monkeypatch):
+    with FakeBrevo() as fake:
+        client = BrevoBatchClient('key', 'lms@example.com', base_url=fake.url, timeout=5)
+        monkeypatch.setattr(email_campaign_service, 'email_outbox',
+                            EmailOutboxDispatcher(client=client, bucket=TokenBucket(0)))
+        yield fake
+
+
+@pytest.fixture
+def course(app):
+    role = Role(name='admin')
+    db.session.add(role)
+    db.session.flush()
+    admin = User(username='admin', email='admin@example.com', role_id=role.id, password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=admin.id)
+    db.session.add(course)
+    db.session.flush()
+    emails = ['a@example.com', 'b@example.com', 'A@Example.com', 'c@example.com', 'b@example.com',
+              'd@example.com', 'e@example.com']
+    db.session.add_all([CourseApplication(course_id=course.id, full_name=f'Ann <{i}>', email=email, phone='1',
+                                          motivation='m', status='pending' if i != 6 else 'rejected')
+                        for i, email in enumerate(emails)])
+    db.session.commit()
+    return admin.id, course.id
+
+
+def test_streams_pages_dedupes_and_reports_from_the_database(course, brevo):
+    admin_id, course_id = course
+    campaign = EmailCampaignService.create('News', 'Hello there', admin_id, course_id=course_id,
+                                           status_filter='pending')
+    assert campaign.total_recipients == 4
+    assert EmailCampaignService.create('News', 'x', admin_id, course_id=course_id + 1) is None
+
+    assert EmailCampaignService.run(campaign.id, page_size=2)
+
+    db.session.expire_all()
+    campaign = db.session.get(EmailCampaign, campaign.id)
+    assert campaign.status == CampaignStatus.QUEUED
+    assert (campaign.scanned, campaign.queued, campaign.duplicates) == (6, 4, 2)
+    recipients = [r.email for r in EmailCampaignRecipient.query.order_by(EmailCampaignRecipient.id)]
+    assert recipients == ['a@example.com', 'b@example.com', 'c@example.com', 'd@example.com']
+
+    # One outbox request per page, the template rendered once and personalised
+    versions = [v for request in brevo.requests for v in request['messageVersions']]
+    assert [v['to'][0]['email'] for v in versions] == recipients
+    assert 'Hello Ann &lt;0&gt;,' in versions[0]['htmlContent']
+    assert 'Hello Ann &lt;3&gt;,' in versions[2]['htmlContent']
+
+    stats = EmailCampaignService.stats(campaign.id)
+    assert stats['status'] == CampaignStatus.COMPLETED
+    assert (stats['sent_count'], stats['failed_count'], stats['pending_count']) == (4, 0, 0)
+    assert stats['emails_per_minute'] > 0 and stats['failed_emails'] == []
+
+    # Finished campaigns can't be claimed again
+    assert EmailCampaignService.claim(campaign.id) is None
+
+
+def test_resumes_from_the_checkpoint_after_a_worker_dies(course, brevo, monkeypatch):
+    admin_id, course_id = course
+    campaign_id = EmailCampaignService.create('News', 'Hi', admin_id, include_all=True).id
+
+    original = EmailCampaignService._queue_page.__func__
+    calls = []
+
+    def crash_on_second_page(cls, *args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise SystemExit('worker killed')
+        return original(cls, *args)
+
+    monkeypatch.setattr(EmailCampaignService, '_queue_page', classmethod(crash_on_second_page))
+    with pytest.raises(SystemExit):
+        EmailCampaignService.run(campaign_id, page_size=3, dispatch=False)
+    db.session.rollback()
+    monkeypatch.undo()
+
+    campaign = db.session.get(EmailCampaign, campaign_id)
+    assert campaign.status == CampaignStatus.RUNNING and campaign.last_application_id == 3
+    # The lease is still fresh, so nobody else takes over yet
+    assert EmailCampaignService.resume_campaigns() == 0
+
+    campaign.heartbeat_at = datetime.utcnow() - timedelta(seconds=EmailCampaignService.LEASE_SECONDS + 1)
+    db.session.commit()
+    assert EmailCampaignService.resume_campaigns() == 1
+
+    db.session.expire_all()
+    campaign = db.session.get(EmailCampaign, campaign_id)
+    assert campaign.status == CampaignStatus.QUEUED
+    assert (campaign.scanned, campaign.queued, campaign.duplicates) == (7, 5, 2)
+    assert EmailOutbox.query.filter_by(category=campaign.outbox_category).count() == 5
+
+
+def test_failed_recipients_are_reported_and_retried(course, brevo):
+    admin_id, course_id = course
+    brevo.reject.add('c@example.com')
+    campaign_id = EmailCampaignService.create('News', 'Hi', admin_id, course_id=course_id).id
+    EmailCampaignService.run(campaign_id)
+
+    stats = EmailCampaignService.stats(campaign_id)
+    assert stats['status'] == CampaignStatus.COMPLETED
+    assert (stats['sent_count'], stats['failed_count']) == (4, 1)
+    assert stats['failed_emails'][0]['email'] == 'c@example.com'
+    assert stats['failed_emails'][0]['application_id'] == 4
+
+    brevo.reject.clear()
+    assert EmailCampaignService.retry_failed(campaign_id) == 1
+    assert EmailCampaignService.stats(campaign_id)['status'] == CampaignStatus.QUEUED
+    email_campaign_service.email_outbox.dispatch()
+    stats = EmailCampaignService.stats(campaign_id)
+    assert (stats['status'], stats['sent_count'], stats['failed_count']) == (CampaignStatus.COMPLETED, 5, 0)
@@ -0,0 +1,110 @@
+"""
+Tests for the email outbox and its batched Brevo dispatcher, against a local fake Brevo endpoint.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user_models import db
+from src.models.email_outbox_models import EmailOutbox, OutboxStatus
+from src.services.email_outbox_service import EmailOutboxDispatcher, TokenBucket
+from src.utils.brevo_email_service import BrevoBatchClient
+from fake_brevo import FakeBrevo
+
+
+@pytest.fixture
+def brevo():
+    with FakeBrevo() as fake:
+        yield fake
+
+
+@pytest.fixture
+def dispatcher(app, brevo):
+    client = BrevoBatchClient('key', 'lms@example.com', 'LMS', base_url=brevo.url, timeout=5)
+    outbox = EmailOutboxDispatcher(client=client, bucket=TokenBucket(0))
+    outbox.max_versions = 3
+    return outbox
+
+
+def messages(count, **extra):
+    return [dict(extra, to_email=f'u{i}@example.com', to_name=f'User {i}', subject=f'Hello {i}',
+                 html_content=f'<p>Hi {i}</p>') for i in range(count)]
+
+
+def test_packs_recipients_into_message_version_batches(dispatcher, brevo):
+    ids = dispatcher.enqueue_many(messages(7), category='welcome')
+    dispatcher.enqueue('x@example.com', 'Notice', text_content='plain', headers={'List-Unsubscribe': '<mailto:u@x>'})
+
+    stats = dispatcher.dispatch()
+    assert stats['sent'] == 8 and stats['requests'] == 4
+
+    # Seven plain emails in batches of three, the one with custom headers on its own
+    assert [len(r['messageVersions']) for r in brevo.requests] == [3, 3, 1, 1]
+    first = brevo.requests[0]
+    assert first['sender'] == {'email': 'lms@example.com', 'name': 'LMS'}
+    assert first['messageVersions'][1] == {'to': [{'email': 'u1@example.com', 'name': 'User 1'}],
+                                           'subject': 'Hello 1', 'htmlContent': '<p>Hi 1</p>'}
+    assert brevo.requests[3]['headers'] == {'List-Unsubscribe': '<mailto:u@x>'}
+
+    rows = EmailOutbox.query.filter(EmailOutbox.id.in_(ids)).order_by(EmailOutbox.id).all()
+    assert {row.status for row in rows} == {OutboxStatus.SENT}
+    assert rows[4].message_id == '<msg-5@fake-brevo>' and rows[4].attempts == 1
+    assert dispatcher.status_counts('welcome') == {'pending': 0, 'sending': 0, 'sent': 7, 'failed': 0}
+    assert dispatcher.dispatch()['requests'] == 0
+
+
+def test_bad_recipient_is_isolated_and_server_errors_back_off(dispatcher, brevo):
+    brevo.reject.add('u2@example.com')
+    ids = dispatcher.enqueue_many(messages(3))
+    stats = dispatcher.dispatch()
+    assert (stats['sent'], stats['failed']) == (2, 1)
+    bad = EmailOutbox.query.get(ids[2])
+    assert bad.status == OutboxStatus.FAILED and 'u2@example.com' in bad.last_error
+
+    retry_ids = dispatcher.enqueue_many(messages(2))
+    brevo.respond(503, {'message': 'busy'})
+    assert dispatcher.dispatch()['retrying'] == 2
+    row = EmailOutbox.query.get(retry_ids[0])
+    assert row.status == OutboxStatus.PENDING and row.attempts == 1
+    assert row.next_attempt_at > datetime.utcnow() + timedelta(seconds=20)
+    assert dispatcher.dispatch()['requests'] == 0  # not due yet
+
+    EmailOutbox.query.filter(EmailOutbox.id.in_(retry_ids)).update(
+        {'next_attempt_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    assert dispatcher.dispatch()['sent'] == 2
+    assert EmailOutbox.query.get(retry_ids[1]).attempts == 2
+
+    dispatcher.max_attempts = 1
+    gone = dispatcher.enqueue('late@example.com', 'Late', html_content='x')
+    brevo.respond(500)
+    assert dispatcher.dispatch()['failed'] == 1
+    assert EmailOutbox.query.get(gone).status == OutboxStatus.FAILED
+
+
+def test_rate_limits_defer_without_spending_attempts(dispatcher, brevo):
+    ids = dispatcher.enqueue_many(messages(6))
+    brevo.respond(201, {'messageIds': ['a', 'b', 'c']})
+    brevo.respond(429, {'message': 'Too many requests'}, {'Retry-After': '120'})
+    stats = dispatcher.dispatch()
+    assert (stats['sent'], stats['deferred']) == (3, 3)
+    deferred = EmailOutbox.query.get(ids[5])
+    assert deferred.status == OutboxStatus.PENDING and deferred.attempts == 0
+    assert deferred.next_attempt_at > datetime.utcnow() + timedelta(seconds=100)
+
+    # The hourly cap is shared through the table
+    dispatcher.max_per_hour = 4
+    EmailOutbox.query.update({'next_attempt_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    assert dispatcher.dispatch()['sent'] == 1
+    assert dispatcher.status_counts(ids=ids)['pending'] == 2
+
+    sleeps = []
+    clock = iter([0.0, 0.0, 0.0, 0.0, 0.1, 0.1])
+    bucket = TokenBucket(2, capacity=1, clock=lambda: next(clock), sleep=sleeps.append)
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+    assert sleeps == [0.5, pytest.approx(0.4)]
+
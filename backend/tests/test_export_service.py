@@ -0,0 +1,88 @@
+"""
+Tests for the streaming export engine: chunked CSV, write-only XLSX with
+its statistics sheet, and the hand-off of large exports to a background
+task.
+"""
+
+import csv
+import io
+
+import pytest
+from openpyxl import load_workbook
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Course
+from src.models.course_application import CourseApplication
+from src.services import export_service
+from src.services.export_service import ExportService, run_export_job
+
+
+@pytest.fixture
+def course_id(app, monkeypatch):
+    monkeypatch.setenv('EXPORT_BATCH_SIZE', '4')
+    role = Role(name='admin')
+    db.session.add(role)
+    db.session.flush()
+    admin = User(username='admin', email='admin@example.com', role_id=role.id, password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=admin.id)
+    db.session.add(course)
+    db.session.flush()
+    statuses = ['pending', 'approved', 'rejected', 'waitlisted', 'approved']
+    db.session.add_all([
+        CourseApplication(course_id=course.id, full_name=f'Applicant {i}', email=f'a{i}@example.com',
+                          phone='1', motivation='m', status=statuses[i % 5], final_rank_score=float(i),
+                          is_high_risk=i % 3 == 0)
+        for i in range(10)
+    ])
+    db.session.commit()
+    return course.id
+
+
+def test_csv_is_streamed_in_batches(course_id, count_queries):
+    spec = ExportService.build('course_applications', {'course_id': course_id})
+    with count_queries() as statements:
+        chunks = list(ExportService.iter_csv(spec))
+
+    assert len(statements) == 1
+    # Header + 10 rows at 4 rows per chunk
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == spec.headers
+    assert [row[1] for row in rows[1:]] == [f'Applicant {i}' for i in range(9, -1, -1)]
+
+
+def test_xlsx_has_rows_and_statistics(course_id, tmp_path):
+    spec = ExportService.build('course_applications', {'course_id': course_id, 'status': 'approved'})
+    path = str(tmp_path / 'export.xlsx')
+    assert ExportService.write_xlsx(spec, path) == 4
+
+    workbook = load_workbook(path, read_only=True)
+    rows = list(workbook['Applications'].values)
+    assert list(rows[0]) == spec.headers and len(rows) == 5
+    assert dict(list(workbook['Statistics'].values)[1:]) == {
+        'Total': 4, 'Pending': 0, 'Approved': 4, 'Rejected': 0, 'Waitlisted': 0, 'High Risk': 2,
+    }
+
+
+def test_large_exports_run_as_background_tasks(course_id, tmp_path, monkeypatch):
+    monkeypatch.setenv('EXPORT_SYNC_ROW_LIMIT', '5')
+    monkeypatch.setattr(export_service, 'EXPORT_DIR', str(tmp_path))
+    queued = []
+    monkeypatch.setattr(export_service.background_service, 'create_task',
+                        lambda func, *args, owner_id=None: queued.append((func, args, owner_id)) or 'task-1')
+
+    response, job = ExportService.export('course_applications', {'course_id': course_id}, 'csv', requested_by=7)
+    assert response is None
+    assert job == {'task_id': 'task-1', 'row_count': 10, 'format': 'csv'}
+
+    func, args, owner_id = queued[0]
+    assert func is run_export_job and owner_id == 7
+    result = func(*args)
+    assert result['row_count'] == 10 and result['requested_by'] == 7
+    with open(tmp_path / result['stored_name'], newline='', encoding='utf-8') as fh:
+        assert len(list(csv.reader(fh))) == 11
+
+    response, job = ExportService.export('course_applications', {'course_id': course_id, 'status': 'approved'}, 'csv')
+    assert job is None and response.mimetype == 'text/csv'
@@ -0,0 +1,53 @@
+"""
+Tests for FormulaAnalyzer's R1C1 grouping and tokenizer-based analysis.
+"""
+
+
+from src.services.excel_grading.formula_analyzer import (
+    FormulaAnalyzer,
+    profile_formula,
+    r1c1_key,
+)
+
+
+def workbook(*formulas):
+    return {'sheets': [{
+        'name': 'Sheet1',
+        'formulas': [{'cell': cell, 'formula': text, 'sheet': 'Sheet1'} for cell, text in formulas],
+        'cell_errors': [],
+    }]}
+
+
+def test_filled_down_formulas_share_an_r1c1_key():
+    assert r1c1_key('=A2*$B$1+C$1', 'D2') == r1c1_key('=A900*$B$1+C$1', 'D900') == '=R[0]C[-3]*R1C2+R1C[-1]'
+    assert r1c1_key('=A2*$B$1', 'D2') != r1c1_key('=A2*$B$1', 'D3')
+    # References inside strings and quoted sheet names are not rewritten
+    assert r1c1_key('=IF(A2="B2",\'Q1 2026\'!C2,0)', 'D2') == '=IF(R[0]C[-3]="B2",\'Q1 2026\'!R[0]C[-1],0)'
+
+
+def test_profile_comes_from_tokens():
+    profile = profile_formula('=IFERROR(_xlfn.XLOOKUP(A2,$K$2:$K$9,L$2:L$9),"SUM(A1) 100")*100')
+
+    assert profile.functions == ('IFERROR', 'XLOOKUP')
+    assert (profile.absolute_refs, profile.mixed_refs, profile.relative_refs) == (2, 2, 1)
+    assert profile.nesting == 2
+    assert profile.has_magic_number
+
+
+def test_analysis_is_weighted_by_group_size():
+    formulas = [(f'E{r}', f'=IF(ISERROR(B{r}/C{r}),0,ROUND(B{r}/C{r}*$H$1,2))') for r in range(2, 1002)]
+    formulas += [(f'F{r}', f'=D{r}*12') for r in range(2, 1002)]
+    formulas.append(('G1', '=SUM(E2:E1001)'))
+
+    analyzer = FormulaAnalyzer(workbook(*formulas))
+    result = analyzer.analyze()
+
+    assert result['formula_count'] == 2001
+    assert result['unique_formula_count'] == 3
+    assert result['function_frequency']['ROUND'] == 1000
+    assert result['function_frequency']['SUM'] == 1
+    assert result['reference_analysis']['absolute_references'] == 1000
+    assert result['reference_analysis']['relative_references'] == 4000 + 1000 + 2
+    assert result['error_handling']['error_handling_functions_used'] == ['ISERROR']
+    assert [i['type'] for i in result['issues']] == ['magic_numbers']
+    assert result['issues'][0]['description'].startswith('1000 formulas')
@@ -0,0 +1,114 @@
+"""
+Tests for the forum full-text search index (SQLite FTS5 backend).
+
+Covers ranking and highlighting, access filtering, pagination and keeping
+the index in sync with thread create/edit/delete.
+"""
+
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.student_models import StudentForum, ForumPost
+from src.services.forum_search_service import ForumSearchService
+
+
+@pytest.fixture
+def app(app):
+    ForumSearchService._backend = None
+    yield app
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE IF EXISTS forum_posts_fts")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS student_forums_fts")
+    ForumSearchService._backend = None
+
+
+@pytest.fixture
+def forums(app):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    user = User(username='searcher', email='searcher@example.com', role_id=role.id, password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+
+    general = StudentForum(title='Python help', description='Ask python questions', created_by=user.id)
+    course = StudentForum(title='Course forum', description='Course only', created_by=user.id, course_id=99)
+    db.session.add_all([general, course])
+    db.session.flush()
+
+    db.session.add_all([
+        ForumPost(forum_id=general.id, author_id=user.id, title='Pandas dataframe merge',
+                  content='How do I merge two dataframes in pandas?'),
+        ForumPost(forum_id=general.id, author_id=user.id, title='Slow loops',
+                  content='Iterating rows with pandas is slow'),
+        ForumPost(forum_id=course.id, author_id=user.id, title='Course pandas question',
+                  content='pandas inside a course forum'),
+    ])
+    db.session.commit()
+    ForumSearchService.ensure_index()
+    return {'general': general, 'course': course, 'user': user}
+
+
+class TestForumSearch:
+
+    def test_sqlite_uses_fts5(self, forums):
+        assert ForumSearchService.backend() == 'sqlite'
+
+    def test_title_matches_rank_first_and_are_highlighted(self, forums):
+        hits, total = ForumSearchService.search_threads('merge', course_ids=[])
+        assert total == 1
+        assert '<mark>merge</mark>' in hits[0]['title_highlight']
+        assert '<mark>merge</mark>' in hits[0]['snippet']
+
+    def test_highlights_escape_user_html(self, forums):
+        post = ForumPost(forum_id=forums['general'].id, author_id=forums['user'].id,
+                         title='<b>Regex</b> trouble', content='<script>alert(1)</script> regex help')
+        db.session.add(post)
+        db.session.commit()
+        ForumSearchService.index_post(post)
+        hits, _ = ForumSearchService.search_threads('regex', course_ids=[])
+        assert hits[0]['title_highlight'] == '&lt;b&gt;<mark>Regex</mark>&lt;/b&gt; trouble'
+        assert '<script>' not in hits[0]['snippet'] and '&lt;script&gt;' in hits[0]['snippet']
+
+    def test_course_filter_hides_unenrolled_forums(self, forums):
+        _, unrestricted = ForumSearchService.search_threads('pandas')
+        _, restricted = ForumSearchService.search_threads('pandas', course_ids=[])
+        assert unrestricted == 3
+        assert restricted == 2
+
+    def test_pagination(self, forums):
+        page1, total = ForumSearchService.search_threads('pandas', page=1, per_page=2)
+        page2, _ = ForumSearchService.search_threads('pandas', page=2, per_page=2)
+        assert total == 3
+        assert len(page1) == 2 and len(page2) == 1
+        assert not {h['id'] for h in page1} & {h['id'] for h in page2}
+
+    def test_last_term_is_prefix_matched(self, forums):
+        _, total = ForumSearchService.search_threads('datafr')
+        assert total == 1
+
+    def test_operator_characters_are_ignored(self, forums):
+        _, total = ForumSearchService.search_threads('"merge* (')
+        assert total == 1
+
+    def test_index_follows_create_edit_delete(self, forums):
+        post = ForumPost(forum_id=forums['general'].id, author_id=forums['user'].id,
+                         title='Xylophone', content='music')
+        db.session.add(post)
+        db.session.commit()
+        ForumSearchService.index_post(post)
+        assert ForumSearchService.search_threads('xylophone')[1] == 1
+
+        post.title = 'Piano'
+        db.session.commit()
+        ForumSearchService.index_post(post)
+        assert ForumSearchService.search_threads('xylophone')[1] == 0
+        assert ForumSearchService.search_threads('piano')[1] == 1
+
+        ForumSearchService.remove_post(post.id)
+        assert ForumSearchService.search_threads('piano')[1] == 0
+
+    def test_forum_search(self, forums):
+        hits = ForumSearchService.search_forums('python')
+        assert [h['id'] for h in hits] == [forums['general'].id]
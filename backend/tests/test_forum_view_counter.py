@@ -0,0 +1,76 @@
+"""
+Tests for the buffered forum view counter: aggregated flushes and keeping
+the buffered views when a flush fails.
+"""
+
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.student_models import StudentForum, ForumPost
+from src.services.forum_view_counter import ForumViewCounter
+
+
+@pytest.fixture
+def threads(app):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    user = User(username='reader', email='reader@example.com', role_id=role.id, password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    forum = StudentForum(title='General', description='d', created_by=user.id, view_count=10)
+    db.session.add(forum)
+    db.session.flush()
+    posts = [ForumPost(forum_id=forum.id, author_id=user.id, title=f'T{i}', content='c', view_count=view_count)
+             for i, view_count in enumerate((5, None, 0))]
+    db.session.add_all(posts)
+    db.session.commit()
+    return forum.id, [post.id for post in posts]
+
+
+def view_counts(forum_id, post_ids):
+    db.session.expire_all()
+    return StudentForum.query.get(forum_id).view_count, [ForumPost.query.get(i).view_count for i in post_ids]
+
+
+def test_flush_writes_one_update_per_distinct_increment(threads, count_queries):
+    forum_id, (a, b, c) = threads
+    counter = ForumViewCounter()
+    for thread_id in (a, a, a, b, b, b, c):
+        counter.record_thread_view(thread_id)
+    counter.record_forum_view(forum_id)
+    counter.record_forum_view(forum_id)
+    assert counter.pending_thread_views(a) == 3 and counter.pending_forum_views(forum_id) == 2
+
+    with count_queries() as statements:
+        assert counter.flush() == 4
+
+    updates = [s for s in statements if s.lstrip().upper().startswith('UPDATE')]
+    # Threads a and b share the +3 statement; c gets +1; the forum +2
+    assert len(updates) == 3
+    assert all('view_count' in s and '+' in s for s in updates)
+    assert view_counts(forum_id, [a, b, c]) == (12, [8, 3, 1])
+    assert counter.pending_thread_views(a) == 0 and counter.flush() == 0
+
+
+def test_failed_flush_puts_the_views_back(threads, monkeypatch):
+    forum_id, (a, b, c) = threads
+    counter = ForumViewCounter()
+    counter.record_thread_view(a)
+    counter.record_thread_view(a)
+    counter.record_forum_view(forum_id)
+
+    def fail():
+        raise RuntimeError('database is locked')
+
+    with monkeypatch.context() as m:
+        m.setattr(db.session, 'commit', fail)
+        assert counter.flush() == 0
+    assert counter.pending_thread_views(a) == 2 and counter.pending_forum_views(forum_id) == 1
+    assert view_counts(forum_id, [a]) == (10, [5])
+
+    # Views recorded after the failure join the restored ones in the next flush
+    counter.record_thread_view(a)
+    assert counter.flush() == 2
+    assert view_counts(forum_id, [a]) == (11, [8])
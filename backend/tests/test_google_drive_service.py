@@ -0,0 +1,220 @@
+"""
+Tests for GoogleDriveService against an in-memory fake Drive v3 client.
+
+Covers the persistent folder-ID cache, single-flight folder creation,
+chunked resumable uploads, bounded parallel uploads and recovery when a
+cached folder has been deleted on Drive.
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from io import BytesIO
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from src.models.file_models import DriveFolder
+from src.utils import google_drive_service as drive_module
+from src.utils.google_drive_service import DriveFolderCache, GoogleDriveService
+
+
+ROOT_ID = 'root-folder'
+
+
+def _not_found(what):
+    return HttpError(httplib2.Response({'status': 404}), f'File not found: {what}'.encode())
+
+
+class _Request:
+    def __init__(self, drive, run, media=None):
+        self._drive = drive
+        self._run = run
+        self._media = media
+        self._offset = 0
+
+    def execute(self, **kwargs):
+        if self._media is not None:
+            self._drive.received.append(self._media.getbytes(0, self._media.size()))
+        return self._run()
+
+    def next_chunk(self, **kwargs):
+        chunk = self._media.getbytes(self._offset, self._media.chunksize())
+        self._drive.received.append(chunk)
+        self._drive.calls['chunk'] += 1
+        self._offset += len(chunk)
+        if self._offset < self._media.size():
+            return None, None
+        return None, self._run()
+
+
+class _Files:
+    def __init__(self, drive):
+        self._drive = drive
+
+    def list(self, q, **kwargs):
+        drive = self._drive
+
+        def run():
+            drive.calls['list'] += 1
+            time.sleep(drive.latency)
+            name = re.search(r"name='([^']*)'", q).group(1)
+            parent = re.search(r"'([^']*)' in parents", q)
+            parent = parent.group(1) if parent else None
+            with drive.lock:
+                matches = [fid for fid, (n, p) in drive.folders.items() if n == name and p == parent]
+            return {'files': [{'id': fid} for fid in matches]}
+        return _Request(drive, run)
+
+    def create(self, body, media_body=None, **kwargs):
+        drive = self._drive
+
+        def run():
+            parent = (body.get('parents') or [None])[0]
+            with drive.lock:
+                if parent and parent != ROOT_ID and parent not in drive.folders:
+                    raise _not_found(parent)
+                drive.in_flight += 1
+                drive.max_in_flight = max(drive.max_in_flight, drive.in_flight)
+            try:
+                time.sleep(drive.latency)
+                file_id = uuid.uuid4().hex
+                with drive.lock:
+                    if body.get('mimeType') == drive_module.FOLDER_MIME_TYPE:
+                        drive.calls['create_folder'] += 1
+                        drive.folders[file_id] = (body['name'], parent)
+                    else:
+                        drive.calls['create_file'] += 1
+                        drive.stored[file_id] = body['name']
+            finally:
+                with drive.lock:
+                    drive.in_flight -= 1
+            return {
+                'id': file_id, 'name': body['name'], 'size': str(media_body.size()) if media_body else '0',
+                'createdTime': '2026-01-01T00:00:00Z', 'mimeType': media_body.mimetype() if media_body else '',
+                'webViewLink': f'https://drive/view/{file_id}', 'webContentLink': f'https://drive/dl/{file_id}',
+            }
+        return _Request(drive, run, media_body)
+
+    def delete(self, fileId, **kwargs):
+        drive = self._drive
+
+        def run():
+            with drive.lock:
+                drive.folders.pop(fileId, None)
+                drive.stored.pop(fileId, None)
+            return {}
+        return _Request(drive, run)
+
+
+class _Permissions:
+    def create(self, fileId, body, **kwargs):
+        return _Request(None, lambda: {'id': 'perm'})
+
+
+class FakeDrive:
+    """Just enough of the Drive v3 client for GoogleDriveService uploads."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.folders = {}
+        self.stored = {}
+        self.received = []
+        self.calls = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def files(self):
+        return _Files(self)
+
+    def permissions(self):
+        return _Permissions()
+
+
+@pytest.fixture
+def app(app, monkeypatch):
+    monkeypatch.setenv('GOOGLE_DRIVE_ROOT_FOLDER_ID', ROOT_ID)
+    return app
+
+
+def make_service(drive, cache=None):
+    return GoogleDriveService(client_factory=lambda: drive, folder_cache=cache or DriveFolderCache())
+
+
+def test_folder_ids_are_cached_and_persisted(app):
+    drive = FakeDrive()
+    service = make_service(drive)
+
+    first = service.upload_file(BytesIO(b'a'), 'a.xlsx', 'application/octet-stream', 7, 42)
+    service.upload_file(BytesIO(b'b'), 'b.xlsx', 'application/octet-stream', 7, 42)
+    assert drive.calls['list'] == 3
+    assert drive.calls['create_folder'] == 3
+    assert DriveFolder.query.count() == 3
+
+    # A fresh process (empty in-memory cache) resolves the folders from the table
+    make_service(drive).upload_file(BytesIO(b'c'), 'c.xlsx', 'application/octet-stream', 7, 42)
+    assert drive.calls['list'] == 3
+    assert drive.calls['create_file'] == 3
+    assert first['folder_id'] in drive.folders
+
+
+def test_concurrent_folder_creation_is_single_flight(app):
+    drive = FakeDrive(latency=0.02)
+    service = make_service(drive, DriveFolderCache(persistent=False))
+    results = []
+
+    def worker():
+        results.append(service._get_or_create_folder('Assignment_1', ROOT_ID))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert drive.calls['create_folder'] == 1
+    assert len(set(results)) == 1
+
+
+def test_large_files_are_streamed_in_resumable_chunks(app, monkeypatch):
+    monkeypatch.setattr(drive_module, 'UPLOAD_CHUNK_SIZE', 256 * 1024)
+    drive = FakeDrive()
+    payload = os.urandom(600 * 1024)
+
+    result = make_service(drive).upload_file(BytesIO(payload), 'big.xlsx', 'application/octet-stream', 1, 2)
+
+    assert drive.calls['chunk'] == 3
+    assert b''.join(drive.received) == payload
+    assert result['size'] == len(payload)
+
+
+def test_upload_files_runs_with_bounded_concurrency(app):
+    drive = FakeDrive(latency=0.02)
+    files = [(BytesIO(f'file {i}'.encode()), f'f{i}.txt', 'text/plain') for i in range(6)]
+
+    results = make_service(drive).upload_files(files, 3, 9, max_workers=2)
+
+    assert [r['original_filename'] for r in results] == [f'f{i}.txt' for i in range(6)]
+    assert all('error' not in r for r in results)
+    assert drive.calls['create_file'] == 6
+    assert drive.calls['list'] == 3
+    assert 1 < drive.max_in_flight <= 2
+
+
+def test_deleted_cached_folder_is_resolved_again(app):
+    drive = FakeDrive()
+    service = make_service(drive)
+    first = service.upload_file(BytesIO(b'a'), 'a.txt', 'text/plain', 5, 6)
+
+    # Someone removes the student's folder directly in Drive
+    drive.folders.pop(first['folder_id'])
+    second = service.upload_file(BytesIO(b'b'), 'b.txt', 'text/plain', 5, 6)
+
+    assert second['folder_id'] != first['folder_id']
+    assert second['folder_id'] in drive.folders
+    assert DriveFolder.query.filter_by(folder_id=first['folder_id']).count() == 0
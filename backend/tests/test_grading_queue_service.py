@@ -0,0 +1,119 @@
+"""
+Tests for the grading queue: keyset pages, one-query status counts and a
+constant number of queries per page.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Assignment, AssignmentSubmission, Course, Enrollment
+from src.services.grading_queue_service import GradingQueueService, QUEUE_STATUSES
+
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+@pytest.fixture
+def queue(app):
+    role = Role(name='instructor')
+    db.session.add(role)
+    db.session.flush()
+    instructor = User(username='teacher', email='teacher@example.com', role_id=role.id, password_hash='x',
+                      first_name='Tea', last_name='Cher')
+    other = User(username='other', email='other@example.com', role_id=role.id, password_hash='x')
+    db.session.add_all([instructor, other])
+    db.session.flush()
+
+    students = []
+    for i in range(15):
+        student = User(username=f's{i}', email=f's{i}@example.com', role_id=role.id, password_hash='x',
+                       first_name=f'Student{i}', last_name='Test')
+        students.append(student)
+    db.session.add_all(students)
+    db.session.flush()
+
+    course = Course(title='Course', description='d', instructor_id=instructor.id)
+    foreign = Course(title='Foreign', description='d', instructor_id=other.id)
+    db.session.add_all([course, foreign])
+    db.session.flush()
+
+    past = Assignment(title='Past', description='d', course_id=course.id, instructor_id=instructor.id,
+                      due_date=NOW - timedelta(days=3))
+    future = Assignment(title='Future', description='d', course_id=course.id, instructor_id=instructor.id,
+                        due_date=NOW + timedelta(days=3), modification_requested=True)
+    hidden = Assignment(title='Hidden', description='d', course_id=foreign.id, instructor_id=other.id)
+    db.session.add_all([past, future, hidden])
+    db.session.flush()
+
+    for student in students:
+        db.session.add(Enrollment(student_id=student.id, course_id=course.id, cohort_label=f'C-{student.id}'))
+
+    submissions = []
+    for i in range(30):
+        student = students[i // 2]
+        submissions.append(AssignmentSubmission(
+            assignment_id=(past if i % 2 else future).id,
+            student_id=student.id,
+            # Ties on submitted_at and a few missing timestamps exercise the id tie-breaker
+            submitted_at=None if i % 11 == 0 else NOW - timedelta(hours=i // 3),
+            grade=80.0 if i % 3 == 0 else None,
+            is_resubmission=i % 5 == 0,
+        ))
+    submissions.append(AssignmentSubmission(assignment_id=hidden.id, student_id=students[0].id, submitted_at=NOW))
+    db.session.add_all(submissions)
+    db.session.commit()
+    return instructor
+
+
+@pytest.mark.parametrize('descending', [True, False])
+def test_keyset_pages_cover_every_row_once(queue, descending):
+    query = GradingQueueService.with_related(GradingQueueService.filtered_query(queue.id))
+    expected = query.order_by(None).count()
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = GradingQueueService.keyset_page(query, descending=descending, cursor=cursor, limit=7)
+        seen.extend(rows)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert len(seen) == expected == 30 and pages == 5
+    assert len({s.id for s in seen}) == expected
+
+    # Newest first with missing timestamps last (reversed when ascending)
+    keys = [((s.submitted_at is not None), s.submitted_at or NOW, s.id) for s in seen]
+    assert keys == sorted(keys, reverse=descending)
+
+
+def test_status_counts_match_per_status_filters(queue):
+    base = GradingQueueService.filtered_query(queue.id)
+    counts = GradingQueueService.status_counts(base, NOW)
+
+    assert counts['all'] == 30
+    for status in QUEUE_STATUSES:
+        condition = GradingQueueService.status_condition(status, NOW)
+        assert counts[status] == base.filter(condition).count(), status
+
+
+def test_query_count_per_page_is_constant(queue, count_queries):
+    query = GradingQueueService.with_related(GradingQueueService.filtered_query(queue.id))
+    per_page = {}
+    for limit in (2, 20):
+        with count_queries() as statements:
+            rows, _ = GradingQueueService.keyset_page(query, limit=limit)
+            enrollments = GradingQueueService.enrollments_for(rows)
+            for row in rows:
+                row.student.email, row.assignment.course.title
+                enrollments[(row.student_id, row.assignment.course_id)].cohort_label
+        per_page[limit] = len(statements)
+
+    assert per_page[2] == per_page[20] == 2
+
+
+def test_malformed_cursor_is_rejected(queue):
+    query = GradingQueueService.filtered_query(queue.id)
+    with pytest.raises(ValueError):
+        GradingQueueService.keyset_page(query, cursor='not-a-cursor')
@@ -0,0 +1,146 @@
+"""
+Tests for the single-pass JSON repairer, over the saved AI outputs in
+fixtures/ai_outputs and fuzzed variants of the valid ones.
+"""
+
+import json
+import os
+import random
+import re
+import time
+
+import pytest
+
+from src.services.ai.json_parser import JSONResponseParser
+from src.services.ai.json_repair import parse_repaired, repair_json
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'ai_outputs')
+CORPUS = sorted(name for name in os.listdir(CORPUS_DIR) if name.endswith('.txt'))
+LESSON_KEYS = {'title', 'description', 'learning_objectives', 'content_type', 'duration_minutes', 'content_data'}
+QUIZ_KEYS = {'title', 'description', 'time_limit', 'passing_score', 'questions'}
+
+
+def load(name):
+    with open(os.path.join(CORPUS_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def seeds():
+    """Corpus outputs that are valid JSON as saved"""
+    valid = []
+    for name in CORPUS:
+        try:
+            valid.append(json.loads(load(name)))
+        except json.JSONDecodeError:
+            pass
+    return valid
+
+
+def dump_loose(value, rng):
+    """Serialise with trailing commas, bare keys and Python literals sprinkled in"""
+    if isinstance(value, dict):
+        members = [f"{key if rng.random() < 0.3 and re.fullmatch(r'[a-z_]+', key) else json.dumps(key)}: "
+                   f"{dump_loose(item, rng)}" for key, item in value.items()]
+        return '{' + ', '.join(members) + (',' if rng.random() < 0.5 else '') + '}'
+    if isinstance(value, list):
+        return '[' + ', '.join(dump_loose(item, rng) for item in value) + (',' if rng.random() < 0.5 else '') + ']'
+    if isinstance(value, bool) or value is None:
+        return {True: 'True', False: 'False', None: 'None'}[value]
+    return json.dumps(value, ensure_ascii=False)
+
+
+@pytest.mark.parametrize('name, keys', [
+    ('lesson_content_clean.txt', LESSON_KEYS),
+    ('lesson_content_fenced_newlines.txt', LESSON_KEYS),
+    ('lesson_content_truncated.txt', LESSON_KEYS),
+    ('lesson_outline_preamble.txt', {'title', 'description', 'learning_objectives', 'duration_minutes', 'sections'}),
+    ('lessons_array.txt', {'lessons'}),
+    ('course_outline_clean.txt', {'title', 'description', 'modules'}),
+    ('quiz_clean.txt', QUIZ_KEYS),
+    ('quiz_trailing_commas.txt', QUIZ_KEYS),
+    ('quiz_unescaped_quotes.txt', QUIZ_KEYS),
+    ('quiz_truncated.txt', QUIZ_KEYS),
+    ('assignment_latex_paths.txt', {'title', 'description', 'instructions', 'rubric', 'points_possible'}),
+    ('chapter_theory_loose.txt', {'title', 'content', 'has_code', 'estimated_minutes', 'prerequisite', 'subsections'}),
+])
+def test_corpus_outputs_parse(name, keys):
+    assert set(JSONResponseParser.parse_json_response(load(name), name)) == keys
+
+
+def test_repairs_keep_the_content_intact():
+    quiz = parse_repaired(load('quiz_unescaped_quotes.txt'))
+    assert quiz['questions'][0]['question_text'] == 'What does =IF(C2>=50, "Pass", "Fail") return for a score of 72?'
+    assert quiz['questions'][0]['explanation'] == 'The condition is true, so IF returns "Pass".'
+    assert len(quiz['questions']) == 5
+
+    assignment = parse_repaired(load('assignment_latex_paths.txt'))
+    assert '\\(A = P(1 + r/n)^{nt}\\)' in assignment['instructions']
+    assert 'C:\\Users\\student\\Documents\\interest.xlsx' in assignment['instructions']
+    assert '\n\t- Put r in B3' in assignment['instructions']
+
+    chapter = parse_repaired(load('chapter_theory_loose.txt'))
+    assert chapter['has_code'] is True and chapter['prerequisite'] is None
+    assert [s['title'] for s in chapter['subsections']] == ['for loops', 'while loops', 'break and continue']
+
+    # Cut off inside the third question: the two complete ones are kept, the partial one is closed off
+    notes = []
+    truncated = parse_repaired(load('quiz_truncated.txt'), notes)
+    assert notes == ['repaired', 'truncated']
+    assert [len(q) for q in truncated['questions']] == [6, 6, 1]
+    assert truncated['questions'][2] == {'question_text': 'Which formul'}
+
+    assert repair_json('Here you go:\n```json\n{"a": [1, 2,],}\n```\nAnything else?') == '{"a":[1,2]}'
+    assert repair_json('{"a": "x" "b": 1, "c": tr') == '{"a":"x","b":1,"c":true}'
+    assert repair_json('{"a": 1, "b": ') == '{"a":1}'
+    assert repair_json('no JSON at all') is None
+
+
+def test_fuzzed_variants_of_valid_outputs():
+    rng = random.Random(50)
+    for value in seeds():
+        text = json.dumps(value, indent=2, ensure_ascii=False)
+        # Lossless damage: wrapping, raw newlines in strings, loose syntax
+        assert parse_repaired(f"Here is the JSON:\n```json\n{text}\n```\nHope it helps!") == value
+        assert parse_repaired(re.sub(r'(?<!\\)\\n', '\n', text)) == value
+        for _ in range(5):
+            assert parse_repaired(dump_loose(value, rng)) == value
+
+        # Truncation anywhere leaves valid JSON with a subset of the keys
+        step = max(1, len(text) // 60)
+        for cut in range(1, len(text), step):
+            partial = parse_repaired(text[:cut])
+            assert type(partial) is type(value)
+            if isinstance(value, dict):
+                assert set(partial) <= set(value)
+
+        # Random structural noise never breaks the repairer's output
+        noise = '{}[]",:\n\\ '
+        for _ in range(40):
+            chars = list(text)
+            for _ in range(rng.randint(1, 8)):
+                position = rng.randrange(len(chars))
+                if rng.random() < 0.5:
+                    del chars[position]
+                else:
+                    chars.insert(position, rng.choice(noise))
+            repaired = repair_json(''.join(chars))
+            if repaired is not None:
+                json.loads(repaired)
+
+
+@pytest.mark.parametrize('text', [
+    '{"a": "' + 'x"' * 100_000,
+    '{"a": "' + ' ' * 200_000 + '"',
+    '{"data": ' + 'A' * 200_000,
+    '{' + '"a": 1,' * 30_000,
+    '[' + '"x", ' * 50_000,
+    '{' * 100_000,
+    '"' * 200_000,
+])
+def test_pathological_inputs_stay_linear(text):
+    start = time.perf_counter()
+    try:
+        parse_repaired(text)
+    except ValueError:
+        pass
+    assert time.perf_counter() - start < 2
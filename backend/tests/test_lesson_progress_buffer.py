@@ -0,0 +1,128 @@
+"""
+Tests for coalesced lesson progress heartbeats.
+"""
+
+
+import pytest
+from sqlalchemy import event
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Course, Lesson, Module
+from src.models.student_models import LessonCompletion
+from src.services.lesson_progress_buffer import LessonProgressBuffer
+
+
+@pytest.fixture
+def lessons(app):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    student = User(username='s', email='s@example.com', role_id=role.id, password_hash='x')
+    db.session.add(student)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=student.id)
+    db.session.add(course)
+    db.session.flush()
+    module = Module(title='M', course_id=course.id)
+    db.session.add(module)
+    db.session.flush()
+    first = Lesson(title='L1', content_type='text', content_data='x', module_id=module.id)
+    second = Lesson(title='L2', content_type='text', content_data='x', module_id=module.id)
+    db.session.add_all([first, second])
+    db.session.flush()
+    db.session.add(LessonCompletion(student_id=student.id, lesson_id=second.id, reading_progress=40.0,
+                                    scroll_progress=90.0, time_spent=600, video_current_time=12.0))
+    db.session.commit()
+    return student.id, first.id, second.id
+
+
+def test_heartbeats_merge_and_flush_in_one_transaction(lessons):
+    student_id, first_id, second_id = lessons
+    buffer = LessonProgressBuffer()
+    buffer.track(student_id, first_id)
+    buffer.track(student_id, second_id)
+
+    for reading, scroll, position in [(10, 20, 5.0), (35, 15, 9.0), (30, 40, 7.5)]:
+        buffer.record(student_id, first_id, {'reading_progress': reading, 'scroll_progress': scroll,
+                                             'time_spent': reading * 2, 'video_current_time': position})
+    buffer.record(student_id, second_id, {'reading_progress': 55, 'scroll_progress': 50, 'time_spent': 30,
+                                          'mixed_video_progress': {'0': {'progress': 50}}})
+
+    commits = []
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    event.listen(db.engine, 'commit', count_commit)
+    assert buffer.flush() == 2
+    event.remove(db.engine, 'commit', count_commit)
+    assert len(commits) == 1
+
+    db.session.expire_all()
+    first = LessonCompletion.query.filter_by(student_id=student_id, lesson_id=first_id).one()
+    assert (first.reading_progress, first.scroll_progress, first.time_spent) == (35.0, 40.0, 70)
+    assert first.video_current_time == 7.5 and first.completed is False
+    # Reading moved into a new score bucket, so stored component scores were refreshed
+    assert first.score_last_updated is not None and first.reading_component_score == 35.0 * 0.7
+
+    second = LessonCompletion.query.filter_by(student_id=student_id, lesson_id=second_id).one()
+    # Stored values never regress; untouched positional fields are kept
+    assert (second.reading_progress, second.scroll_progress, second.time_spent) == (55.0, 90.0, 600)
+    assert second.video_current_time == 12.0
+    assert second.mixed_video_progress == '{"0": {"progress": 50}}'
+
+    assert buffer.flush() == 0
+
+
+def test_only_the_threshold_crossing_heartbeat_needs_evaluation(lessons):
+    student_id, first_id, _ = lessons
+    buffer = LessonProgressBuffer()
+    buffer.track(student_id, first_id)
+
+    state = buffer.record(student_id, first_id, {'reading_progress': 60, 'engagement_score': 50})
+    assert not state['needs_evaluation'] and state['lesson_score'] < 80
+    state = buffer.record(student_id, first_id, {'reading_progress': 50, 'engagement_score': 90})
+    assert not state['needs_evaluation']
+    assert state['progress']['reading_progress'] == 60.0
+
+    state = buffer.record(student_id, first_id, {'reading_progress': 95})
+    assert state['needs_evaluation'] and state['lesson_score'] == pytest.approx(92.5)
+    assert buffer.take(student_id, first_id) == {'reading_progress': 95.0, 'engagement_score': 90.0}
+
+    LessonCompletion.query.filter_by(student_id=student_id, lesson_id=first_id).delete()
+    db.session.add(LessonCompletion(student_id=student_id, lesson_id=first_id, completed=True,
+                                    reading_progress=100.0, engagement_score=100.0))
+    db.session.commit()
+    buffer.forget(student_id, first_id)
+    buffer.track(student_id, first_id)
+    assert not buffer.record(student_id, first_id, {'reading_progress': 100})['needs_evaluation']
+
+
+def test_explicit_save_absorbs_pending_heartbeats(lessons):
+    student_id, first_id, _ = lessons
+    buffer = LessonProgressBuffer()
+    buffer.track(student_id, first_id)
+    buffer.record(student_id, first_id, {'reading_progress': 70, 'video_current_time': 30.0, 'time_spent': 90})
+
+    merged = buffer.absorb(student_id, first_id, {'reading_progress': 65, 'video_current_time': 31.0})
+    assert merged == {'reading_progress': 70.0, 'video_current_time': 31.0, 'time_spent': 90}
+    assert buffer.flush() == 0
+
+
+def test_failing_row_does_not_hold_back_the_batch(lessons):
+    student_id, first_id, second_id = lessons
+    buffer = LessonProgressBuffer()
+    buffer.track(student_id, first_id)
+    buffer.track(student_id, second_id)
+    # A mixed video state that cannot be stored makes its own row fail
+    buffer.record(student_id, first_id, {'reading_progress': 20, 'mixed_video_progress': {'0': {1, 2}}})
+    buffer.record(student_id, second_id, {'reading_progress': 65})
+
+    assert buffer.flush() == 1
+    db.session.expire_all()
+    assert LessonCompletion.query.filter_by(student_id=student_id, lesson_id=second_id).one().reading_progress == 65.0
+    assert LessonCompletion.query.filter_by(student_id=student_id, lesson_id=first_id).first() is None
+
+    # The failing row is retried on later flushes, then dropped
+    assert buffer.flush() == 0 and buffer.flush() == 0
+    assert buffer.take(student_id, first_id) == {}
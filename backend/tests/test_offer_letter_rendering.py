@@ -0,0 +1,139 @@
+"""
+Tests for batch offer letter rendering: the spawned render pool, offer
+numbering and per-application failures in create_offers_batch.
+"""
+
+from datetime import datetime
+from io import BytesIO
+
+import pytest
+from PyPDF2 import PdfReader
+
+from src.models.user_models import db, User, Role
+from src.models.internship_models import (
+    ApplicantTypeEnum, ApplicationStatusEnum, InternshipApplication, InternshipOfferLetter, InternshipTrack,
+)
+from src.services import internship_offer_service as offer_module
+from src.services import payment_slip_service as payment_slip_module
+from src.services.document_render_service import DocumentRenderService
+from src.services.internship_offer_service import InternshipOfferService, render_offer_pdf
+from src.services.payment_slip_service import generate_payment_slip_pdf
+
+
+def snapshot(number):
+    return {
+        'reference_code': f'INT-{number}', 'offer_number': f'OFR-2026-{number:04d}',
+        'full_name': f'Intern {number}', 'first_name': 'Intern', 'track_name': 'Data', 'track_label': 'Data',
+        'start_date': '1 March 2026', 'username': f'intern.{number}', 'verification_hash': 'ab' * 32,
+        'issued': '1 February 2026',
+    }
+
+
+def pdf_text(pdf_bytes):
+    return PdfReader(BytesIO(pdf_bytes)).pages[0].extract_text()
+
+
+def test_render_many_uses_a_spawned_pool_and_keeps_order():
+    jobs = [snapshot(1), {'offer_number': 'broken'}, snapshot(3)]
+    try:
+        rendered = DocumentRenderService.render_many(render_offer_pdf, jobs, max_workers=2)
+        assert DocumentRenderService._pool._mp_context.get_start_method() == 'spawn'
+    finally:
+        DocumentRenderService.shutdown()
+
+    assert rendered[1] is None
+    assert 'OFR-2026-0001' in pdf_text(rendered[0]) and 'OFR-2026-0003' in pdf_text(rendered[2])
+    # The same letter comes out of the pool and the inline path
+    assert pdf_text(rendered[0]) == pdf_text(render_offer_pdf(snapshot(1)))
+
+
+def test_render_one_runs_on_the_pool_and_raises_render_errors(monkeypatch):
+    monkeypatch.setenv('DOCUMENT_RENDER_WORKERS', '2')
+    try:
+        assert 'OFR-2026-0005' in pdf_text(DocumentRenderService.render_one(render_offer_pdf, snapshot(5)))
+        assert DocumentRenderService._pool is not None
+        with pytest.raises(KeyError):
+            DocumentRenderService.render_one(render_offer_pdf, {'offer_number': 'broken'})
+    finally:
+        DocumentRenderService.shutdown()
+
+
+def test_payment_slips_render_through_the_pool(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(DocumentRenderService, 'render_one',
+                        classmethod(lambda cls, render, html: rendered.append((render, html)) or b'%PDF'))
+    pdf_bytes, filename = generate_payment_slip_pdf('Ada Mwale', 'ada@example.com', amount_paid=50,
+                                                    receipt_number='RCP-1')
+    assert (pdf_bytes, filename) == (b'%PDF', 'Payment_Slip_RCP-1.pdf')
+    assert rendered[0][0] is payment_slip_module._render_slip_pdf and 'Ada Mwale' in rendered[0][1]
+
+
+@pytest.fixture
+def applications(app):
+    student = Role(name='student')
+    db.session.add(student)
+    db.session.flush()
+    admin = User(username='admin', email='admin@example.com', role_id=student.id, password_hash='x')
+    track = InternshipTrack(name='Data', slug='data')
+    db.session.add_all([admin, track])
+    db.session.flush()
+    rows = [
+        InternshipApplication(
+            applicant_type=ApplicantTypeEnum.EXTERNAL, full_name=f'Intern {i}', email=f'intern{i}@example.com',
+            phone='1', track_id=track.id, motivation_letter='m', cv_file_path='cv.pdf', cv_original_name='cv.pdf',
+            status=ApplicationStatusEnum.ACCEPTED, reference_code=f'INT-{i}',
+        )
+        for i in range(4)
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return admin, rows
+
+
+def test_offer_numbers_continue_from_the_highest_integer_suffix(applications):
+    admin, rows = applications
+    year = datetime.utcnow().year
+    for application, number in zip(rows, ('9999', '10000')):
+        db.session.add(InternshipOfferLetter(
+            application_id=application.id, offer_number=f'OFR-{year}-{number}',
+            verification_hash=number, created_by_id=admin.id,
+        ))
+    db.session.commit()
+    assert InternshipOfferService._generate_offer_number() == f'OFR-{year}-10001'
+
+
+def test_batch_isolates_failing_applications(applications, tmp_path, monkeypatch):
+    admin, rows = applications
+    prepare = InternshipOfferService._prepare_offer
+
+    def flaky_prepare(application, admin_user):
+        if application.reference_code == 'INT-1':
+            # Fails after the account was flushed, so the savepoint must undo it
+            prepare(application, admin_user)
+            raise RuntimeError('mail server down')
+        return prepare(application, admin_user)
+
+    def flaky_render(render, snapshots, max_workers=None):
+        return [None if s['reference_code'] == 'INT-2' else render(s) for s in snapshots]
+
+    # INT-2 was already linked to an account before the batch
+    rows[2].user_id = admin.id
+    db.session.commit()
+    monkeypatch.setattr(InternshipOfferService, '_prepare_offer', staticmethod(flaky_prepare))
+    monkeypatch.setattr(offer_module.DocumentRenderService, 'render_many', staticmethod(flaky_render))
+
+    results = InternshipOfferService.create_offers_batch(rows, admin, str(tmp_path))
+
+    outcome = {application.reference_code: results[application.id] for application in rows}
+    assert [code for code, result in outcome.items() if result['success']] == ['INT-0', 'INT-3']
+    assert outcome['INT-1']['message'] == 'Failed to create offer letter: mail server down'
+    assert outcome['INT-2']['message'] == 'Failed to generate offer letter PDF'
+
+    db.session.expire_all()
+    offers = InternshipOfferLetter.query.order_by(InternshipOfferLetter.offer_number).all()
+    assert [offer.application_id for offer in offers] == [rows[0].id, rows[3].id]
+    assert all(offer.pdf_hash and (tmp_path / offer.pdf_path.split('/')[-1]).exists() for offer in offers)
+    assert db.session.get(InternshipApplication, rows[2].id).user_id == admin.id
+    assert {user.email for user in User.query.filter(User.email.like('intern%'))} == {
+        'intern0@example.com', 'intern3@example.com',
+    }
@@ -0,0 +1,80 @@
+"""
+Tests for the compiled vocabulary matcher behind RubricGenerator.
+"""
+
+import random
+
+from src.services.excel_grading.rubric_generator import (
+    _CONCEPT_VOCABULARY,
+    KeywordMatcher,
+    RubricGenerator,
+    find_concept_mentions,
+)
+
+KEYWORDS = [entry[0] for entry in _CONCEPT_VOCABULARY]
+FILLER = 'the of students should use workbook sheet then your explain create compute style vba'.split()
+
+
+def legacy_extract_concepts(text):
+    """The per-keyword ``in`` scan the generator used before the matcher."""
+    text_lower = text.lower()
+    found = {}
+    for keyword, concept_id, category, weight, label in _CONCEPT_VOCABULARY:
+        if keyword in text_lower:
+            if concept_id not in found:
+                found[concept_id] = {'id': concept_id, 'category': category, 'weight': weight,
+                                     'label': label, 'keywords_matched': [keyword]}
+            else:
+                if keyword not in found[concept_id]['keywords_matched']:
+                    found[concept_id]['keywords_matched'].append(keyword)
+                found[concept_id]['weight'] = min(found[concept_id]['weight'] + 0.5, 6.0)
+    return list(found.values())
+
+
+def random_text(rng, words):
+    picked = [rng.choice(KEYWORDS) if rng.random() < 0.4 else rng.choice(FILLER) for _ in range(words)]
+    # Keywords glued to neighbours still match, as substrings always did
+    joiners = [rng.choice([' ', ' ', '\n', '', '-']) for _ in picked]
+    text = ''.join(word + joiner for word, joiner in zip(picked, joiners))
+    return ''.join(ch.upper() if rng.random() < 0.1 else ch for ch in text)
+
+
+def test_concepts_match_substring_scan():
+    rng = random.Random(11)
+    generator = RubricGenerator()
+    for _ in range(300):
+        text = random_text(rng, rng.randint(0, 80))
+        assert generator._extract_concepts(text) == legacy_extract_concepts(text)
+
+
+def test_reports_overlapping_and_nested_positions():
+    matcher = KeywordMatcher(['scenario', 'scenario manager', 'manager', 'data table', 'one-variable data table'])
+    text = 'use the scenario manager and a one-variable data table'
+    assert list(matcher.finditer(text)) == [
+        (8, 24, 'scenario manager'),
+        (8, 16, 'scenario'),
+        (17, 24, 'manager'),
+        (31, 54, 'one-variable data table'),
+        (44, 54, 'data table'),
+    ]
+    assert matcher.found('nothing here') == set()
+    assert KeywordMatcher([]).found('anything') == set()
+
+    mentions = find_concept_mentions('Build a PivotTable, then a Pivot Chart.')
+    assert [(m['keyword'], m['start'], m['end']) for m in mentions if m['concept_id'] in ('pivot_table', 'pivot_chart')] == [
+        ('pivottable', 8, 18),
+        ('pivot chart', 27, 38),
+    ]
+
+
+def test_task_classification_and_complexity():
+    generator = RubricGenerator()
+    tasks = generator._detect_tasks(
+        "1. Explain why a Data Model beats VLOOKUP.\n"
+        "2. Create a PivotTable named 'Sales Summary' using the Power Query output.\n"
+        "3. Apply a consistent style to the report.\n"
+        "4. Submit the workbook."
+    )
+    assert [t['type'] for t in tasks] == ['theoretical', 'practical_build', 'formatting', 'general']
+    assert [t['complexity'] for t in tasks] == [1.2, 1.5, 1.0, 1.0]
+    assert tasks[1]['expected_elements'] == ['Sales Summary', 'Named: sales summary']
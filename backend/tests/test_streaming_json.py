@@ -0,0 +1,125 @@
+"""
+Tests for streamed JSON generation: the incremental parser and
+make_json_request against a local mock LLM server.
+"""
+
+import json
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.services.ai.ai_gateway import AIGateway
+from src.services.ai.ai_providers import AIProviderManager
+from src.services.ai.streaming_json import (
+    IncrementalJSONParser, ResponseSpec, StreamingJSONError, has_keys, min_text,
+)
+from mock_llm_server import MockLLMServer
+
+QUESTION = {'question_text': 'Q?', 'correct_answer': 'A', 'options': [{'key': 'A', 'text': 'a'}]}
+QUIZ_SPEC = ResponseSpec(required=['title', 'questions'], validators={'title': min_text(3)},
+                         item_validators={'questions': has_keys('question_text', 'correct_answer')},
+                         min_items={'questions': 3})
+
+
+def quiz_text(questions=3):
+    return json.dumps({'title': 'Loops quiz', 'time_limit': 20,
+                       'questions': [dict(QUESTION, question_text=f'Q{i}?') for i in range(questions)]})
+
+
+def test_parser_results_do_not_depend_on_chunking():
+    text = ('```json\nHere is the quiz:\n{"title": "A \\"quoted\\"\n title", "meta": {"tags": ["x", "}"]},\n'
+            ' "questions": [{"question_text": "Q0?", "correct_answer": "A"},\n'
+            '   {"question_text": "", "correct_answer": "B"},\n'
+            '   {"question_text": "Q2?", "correct_answer": "C"},], }\n```')
+    whole = IncrementalJSONParser(QUIZ_SPEC)
+    whole.feed(text)
+    by_char = IncrementalJSONParser(QUIZ_SPEC)
+    for char in text:
+        by_char.feed(char)
+
+    assert whole.result() == by_char.result()
+    assert whole.done
+    result = whole.result()
+    # Raw newline in a string and trailing commas are tolerated
+    assert result['title'] == 'A "quoted"\n title'
+    assert result['meta'] == {'tags': ['x', '}']}
+    # The question with empty text was dropped, so one more is needed
+    assert [q['question_text'] for q in result['questions']] == ['Q0?', 'Q2?']
+    assert whole.missing() == {'questions': 1}
+
+
+def test_truncated_stream_keeps_complete_fields_and_items():
+    text = quiz_text(3)
+    parser = IncrementalJSONParser(QUIZ_SPEC)
+    parser.feed(text[:text.index('Q2?') - 20])
+
+    assert not parser.done
+    assert parser.result()['title'] == 'Loops quiz'
+    assert len(parser.result()['questions']) == 2
+    assert parser.missing() == {'questions': 1}
+
+
+@pytest.mark.parametrize('text, message', [
+    ('{"title": "Quiz" "questions": []}', "expected ',' or '}'"),
+    ('{"title" "Quiz"}', "expected ':'"),
+    ('{title: "Quiz"}', 'expected a property name'),
+    ('{"questions": [{"a": 1]}', "']' closes '{'"),
+])
+def test_structural_errors_raise_where_they_occur(text, message):
+    parser = IncrementalJSONParser(QUIZ_SPEC)
+    with pytest.raises(StreamingJSONError, match=message):
+        parser.feed(text)
+
+
+@pytest.fixture
+def mock_llm():
+    with MockLLMServer() as mock:
+        yield mock
+
+
+@pytest.fixture
+def manager(mock_llm):
+    gateway = AIGateway({'openrouter': {'rpm': 0, 'concurrency': 2}, 'gemini': {'rpm': 0, 'concurrency': 1}})
+    with patch.dict(os.environ, {'OPENROUTER_API_KEY': 'key', 'GEMINI_API_KEY': ''}):
+        manager = AIProviderManager()
+    manager.openrouter_base_url = mock_llm.url
+    manager.gateway = gateway
+    yield manager
+    gateway.close()
+
+
+def test_make_json_request_regenerates_only_missing_items(manager, mock_llm):
+    text = quiz_text(3)
+    truncated = text[:text.index('Q2?') - 20]
+    mock_llm.respond(200, mock_llm.completion(truncated))
+    mock_llm.respond(200, mock_llm.completion(json.dumps({'questions': [dict(QUESTION, question_text='Q9?')]})))
+
+    parsed, provider = manager.make_json_request('Write a quiz', QUIZ_SPEC, 'quiz')
+
+    assert provider == 'openrouter'
+    assert [q['question_text'] for q in parsed['questions']] == ['Q0?', 'Q1?', 'Q9?']
+    assert parsed['title'] == 'Loops quiz'
+    assert all(request['stream'] for request in mock_llm.requests)
+    follow_up = mock_llm.requests[1]['messages'][-1]['content']
+    assert 'exactly 1 NEW items' in follow_up and '"questions"' in follow_up
+
+
+def test_structural_error_stops_the_stream_early(manager, mock_llm):
+    mock_llm.chunk_size = 8
+    mock_llm.chunk_delay = 0.01
+    broken = '{"title": "Loops quiz" "questions": [' + ', '.join([json.dumps(QUESTION)] * 40) + ']}'
+    mock_llm.respond(200, mock_llm.completion(broken))
+    mock_llm.respond(200, mock_llm.completion(quiz_text(3)))
+
+    parsed, _ = manager.make_json_request('Write a quiz', QUIZ_SPEC, 'quiz')
+
+    # The server records the stream once it notices the client has gone
+    deadline = time.monotonic() + 5
+    while not mock_llm.streams and time.monotonic() < deadline:
+        time.sleep(0.01)
+    sent, total = mock_llm.streams[0]
+    assert sent < total / 4
+    # Nothing was usable, so the whole response was generated again
+    assert parsed['title'] == 'Loops quiz' and len(parsed['questions']) == 3
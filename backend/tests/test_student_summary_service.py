@@ -0,0 +1,163 @@
+"""
+Tests for the student summary projection behind the admin student list.
+"""
+
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_application import CourseApplication
+from src.models.course_models import Course, Enrollment, Lesson, Module, Submission
+from src.models.student_models import Certificate, LessonCompletion, ModuleProgress, StudentSummary
+from src.services.student_summary_service import StudentSummaryService
+
+
+def application(course_id, email, phone, whatsapp=None):
+    return CourseApplication(course_id=course_id, full_name='Applicant', email=email, phone=phone,
+                             whatsapp_number=whatsapp, motivation='m')
+
+
+@pytest.fixture
+def school(app):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    students = [User(username=f's{i}', email=f's{i}@example.com', role_id=role.id, password_hash='x')
+                for i in range(3)]
+    db.session.add_all(students)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=students[0].id)
+    db.session.add(course)
+    db.session.flush()
+    module = Module(title='M', course_id=course.id)
+    db.session.add(module)
+    db.session.flush()
+    lessons = [Lesson(title=f'L{i}', content_type='text', content_data='x', module_id=module.id) for i in range(2)]
+    db.session.add_all(lessons)
+    db.session.flush()
+
+    linked = application(course.id, 'other@example.com', '+250700000001', '+250700000002')
+    db.session.add_all([linked, application(course.id, 's1@example.com', '+250700000003'),
+                        application(course.id, 's1@example.com', '+250700000004', '+250700000005')])
+    db.session.flush()
+
+    first = Enrollment(student_id=students[0].id, course_id=course.id, status='active', progress=0.5,
+                       application_id=linked.id)
+    second = Enrollment(student_id=students[1].id, course_id=course.id, status='completed', progress=1.0)
+    db.session.add_all([first, second])
+    db.session.flush()
+    db.session.add_all([
+        ModuleProgress(student_id=students[0].id, module_id=module.id, enrollment_id=first.id, cumulative_score=90.0),
+        ModuleProgress(student_id=students[1].id, module_id=module.id, enrollment_id=second.id, cumulative_score=55.0),
+        LessonCompletion(student_id=students[0].id, lesson_id=lessons[0].id, completed=True),
+        LessonCompletion(student_id=students[0].id, lesson_id=lessons[1].id, completed=False),
+        Submission(student_id=students[0].id),
+        Certificate(student_id=students[1].id, course_id=course.id, enrollment_id=second.id,
+                    certificate_number='CERT-1', overall_score=55.0, verification_hash='h'),
+    ])
+    db.session.commit()
+    return {'students': [s.id for s in students], 'lessons': [l.id for l in lessons], 'enrollments': [first.id, second.id]}
+
+
+def summaries():
+    db.session.expire_all()
+    return {row.student_id: row for row in StudentSummary.query}
+
+
+def stale():
+    return {sid for sid, row in summaries().items() if row.is_stale}
+
+
+def test_builds_missing_rows_from_grouped_queries(school):
+    s0, s1, s2 = school['students']
+    assert StudentSummaryService.ensure_current() == 3
+    assert StudentSummaryService.ensure_current() == 0
+
+    rows = summaries()
+    assert rows[s0].enrollment_summary() == {'total': 1, 'active': 1, 'completed': 0, 'terminated': 0}
+    assert rows[s0].progress_summary() == {'avg_progress': 50.0, 'avg_score': 90.0, 'lessons_completed': 1,
+                                           'quiz_submissions': 1, 'certificates': 0}
+    assert rows[s0].performance_level == 'high'
+    # Linked application wins; otherwise the latest application with the same email
+    assert (rows[s0].application_phone, rows[s0].application_whatsapp) == ('+250700000001', '+250700000002')
+    assert (rows[s1].application_phone, rows[s1].application_whatsapp) == ('+250700000004', '+250700000005')
+    assert rows[s1].performance_level == 'medium' and rows[s1].certificates == 1
+    assert rows[s2].performance_level == 'low' and rows[s2].total_enrollments == 0
+    assert rows[s2].application_phone is None
+
+
+def test_writes_mark_rows_stale_until_next_read(school):
+    s0, s1, s2 = school['students']
+    StudentSummaryService.ensure_current()
+    assert stale() == set()
+
+    completion = LessonCompletion.query.filter_by(student_id=s0, lesson_id=school['lessons'][1]).one()
+    completion.completed = True
+    db.session.commit()
+    assert stale() == {s0}
+    assert summaries()[s0].lessons_completed == 1
+
+    # Writes that do not change a summarised column leave the rows alone
+    Enrollment.query.get(school['enrollments'][1]).payment_status = 'paid'
+    db.session.commit()
+    assert stale() == {s0}
+
+    ModuleProgress.query.filter_by(student_id=s1).one().cumulative_score = 85.0
+    db.session.add(application(1, 's2@example.com', '+250700000009'))
+    db.session.commit()
+    assert stale() == {s0, s1, s2}
+
+    # Rolled back writes keep the row current
+    StudentSummaryService.ensure_current()
+    Enrollment.query.get(school['enrollments'][0]).status = 'terminated'
+    db.session.flush()
+    db.session.rollback()
+    assert stale() == set()
+
+    rows = summaries()
+    assert rows[s0].lessons_completed == 2
+    assert rows[s1].avg_score == 85.0 and rows[s1].performance_level == 'high'
+    assert rows[s2].application_phone == '+250700000009'
+
+
+def test_refresh_from_an_older_snapshot_does_not_clear_a_newer_invalidation(school, monkeypatch):
+    s0, s1, s2 = school['students']
+    StudentSummaryService.ensure_current()
+    ModuleProgress.query.filter_by(student_id=s0).one().cumulative_score = 40.0
+    db.session.commit()
+
+    compute = StudentSummaryService.compute
+
+    def compute_then_write(student_ids):
+        rows = compute(student_ids)
+        # A writer lands between the reader's snapshot and its write
+        ModuleProgress.query.filter_by(student_id=s0).one().cumulative_score = 20.0
+        db.session.flush()
+        return rows
+
+    monkeypatch.setattr(StudentSummaryService, 'compute', staticmethod(compute_then_write))
+    assert StudentSummaryService.ensure_current() == 0
+    assert stale() == {s0}
+    monkeypatch.undo()
+
+    assert StudentSummaryService.ensure_current() == 1
+    assert stale() == set() and summaries()[s0].avg_score == 20.0
+
+
+def test_rebuild_recomputes_rows_and_drops_non_students(school):
+    s0, s1, s2 = school['students']
+    StudentSummaryService.ensure_current()
+    # A write that bypassed the ORM hook leaves the row out of date
+    db.session.execute(db.text('UPDATE enrollments SET progress = 0.9 WHERE id = :id'),
+                       {'id': school['enrollments'][0]})
+    instructor = Role(name='instructor')
+    db.session.add(instructor)
+    db.session.flush()
+    User.query.get(s2).role_id = instructor.id
+    db.session.commit()
+    assert summaries()[s0].avg_progress == 50.0
+
+    assert StudentSummaryService.rebuild() == 2
+    rows = summaries()
+    assert set(rows) == {s0, s1}
+    assert rows[s0].avg_progress == 90.0
@@ -0,0 +1,114 @@
+"""
+Tests for streaming submission ZIP downloads.
+
+A fake Drive exposes only the metadata/download calls the archive service
+uses, so the tests cover ZIP contents, the blob cache and missing-file
+reporting without Google credentials.
+"""
+
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from collections import Counter
+from types import SimpleNamespace
+
+from src.services.submission_archive_service import (
+    ArchiveEntry,
+    DriveBlobCache,
+    SubmissionArchiveService,
+)
+
+
+class FakeDrive:
+    is_configured = True
+
+    def __init__(self, blobs, latency=0.0):
+        self.blobs = blobs
+        self.modified = {file_id: '2026-01-01T00:00:00.000Z' for file_id in blobs}
+        self.latency = latency
+        self.downloads = Counter()
+        self.lock = threading.Lock()
+
+    def get_file_metadata(self, file_id, fields=None):
+        if file_id not in self.blobs:
+            raise FileNotFoundError(file_id)
+        return {'id': file_id, 'modifiedTime': self.modified[file_id]}
+
+    def download_to_file(self, file_id, fh, chunk_size=None):
+        time.sleep(self.latency)
+        with self.lock:
+            self.downloads[file_id] += 1
+        fh.write(self.blobs[file_id])
+        return len(self.blobs[file_id])
+
+
+def build_zip(entries, drive, cache):
+    data = b''.join(SubmissionArchiveService.stream_zip(entries, drive=drive, cache=cache, max_workers=3))
+    return zipfile.ZipFile(io.BytesIO(data))
+
+
+def test_submission_entries_read_assignment_and_project_files():
+    files = [
+        {'filename': 'report.xlsx', 'file_id': 'a1'},
+        {'filename': 'report.xlsx', 'url': 'https://drive.google.com/file/d/b2/view'},
+    ]
+    assignment_submission = SimpleNamespace(file_url=json.dumps(files))
+    project_submission = SimpleNamespace(file_url=None, file_path=json.dumps(files[:1]))
+
+    entries = SubmissionArchiveService.submission_entries(assignment_submission)
+    assert [e.file_id for e in entries] == ['a1', 'b2']
+    assert [e.file_id for e in SubmissionArchiveService.submission_entries(project_submission)] == ['a1']
+
+
+def test_zip_contains_every_file_and_reports_missing(tmp_path):
+    drive = FakeDrive({'a': b'alpha' * 1000, 'b': os.urandom(300 * 1024)}, latency=0.01)
+    entries = [
+        ArchiveEntry('s1/notes.txt', 'a'),
+        ArchiveEntry('s1/data.xlsx', 'b'),
+        ArchiveEntry('s1/data.xlsx', 'a'),
+        ArchiveEntry('s2/gone.pdf', 'missing'),
+        ArchiveEntry('s2/link.txt', None, 'https://example.com/link'),
+    ]
+
+    archive = build_zip(entries, drive, DriveBlobCache(str(tmp_path)))
+
+    assert archive.testzip() is None
+    assert archive.read('s1/notes.txt') == drive.blobs['a']
+    assert archive.read('s1/data.xlsx') == drive.blobs['b']
+    assert archive.read('s1/data (2).xlsx') == drive.blobs['a']
+    assert archive.getinfo('s1/data.xlsx').compress_type == zipfile.ZIP_STORED
+    missing = archive.read('MISSING_FILES.txt').decode()
+    assert 's2/gone.pdf' in missing and 's2/link.txt' in missing
+
+
+def test_blobs_are_cached_until_the_drive_file_changes(tmp_path):
+    drive = FakeDrive({'a': b'first'})
+    cache = DriveBlobCache(str(tmp_path))
+    entries = [ArchiveEntry('a.txt', 'a')]
+
+    build_zip(entries, drive, cache)
+    build_zip(entries, drive, cache)
+    assert drive.downloads['a'] == 1
+
+    drive.blobs['a'] = b'second'
+    drive.modified['a'] = '2026-02-01T00:00:00.000Z'
+    assert build_zip(entries, drive, cache).read('a.txt') == b'second'
+    assert drive.downloads['a'] == 2
+    assert len([n for n in os.listdir(tmp_path) if n.endswith('.blob')]) == 1
+
+
+def test_cache_evicts_least_recently_used_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr('src.services.submission_archive_service.EVICTION_GRACE_SECONDS', 0)
+    drive = FakeDrive({'a': b'x' * 100, 'b': b'y' * 100, 'c': b'z' * 100})
+    cache = DriveBlobCache(str(tmp_path), max_bytes=250)
+
+    for age, file_id in enumerate('abc'):
+        path, _ = cache.fetch(drive, file_id, drive.modified[file_id])
+        os.utime(path, (time.time() - 100 + age, time.time() - 100 + age))
+    cache.evict()
+
+    remaining = sorted(n.split('-')[0] for n in os.listdir(tmp_path) if n.endswith('.blob'))
+    assert remaining == ['b', 'c']
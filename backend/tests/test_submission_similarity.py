@@ -0,0 +1,107 @@
+"""
+Tests for the sparse similar-submission index and its per-assignment cache.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Assignment, AssignmentSubmission, Course
+from src.services.submission_similarity_service import SubmissionSimilarityService
+from src.utils.ai_grading_helper import AIGradingHelper
+from src.utils.submission_similarity import SubmissionSimilarityIndex
+
+
+WORDS = 'the model data result error value sample test analysis method system graph input output loss'.split()
+
+
+def random_submissions(count, seed=3):
+    rng = random.Random(seed)
+    submissions = []
+    for i in range(count):
+        length = rng.choice([0, 3, 8, 20])
+        text = ' '.join(rng.choice(WORDS).upper() if rng.random() < 0.2 else rng.choice(WORDS) for _ in range(length))
+        submissions.append({'id': i, 'submission_text': text, 'grade': rng.randint(50, 100)})
+    return submissions
+
+
+def pairwise_similar(target, submissions, threshold):
+    scored = []
+    for s in submissions:
+        if s['id'] == target['id']:
+            continue
+        score = AIGradingHelper.calculate_similarity_score(target['submission_text'], s['submission_text'])
+        if score >= threshold:
+            scored.append((s['id'], score))
+    return sorted(scored, key=lambda pair: pair[1], reverse=True)[:5]
+
+
+def test_matches_pairwise_jaccard():
+    submissions = random_submissions(120)
+    index = SubmissionSimilarityIndex()
+    index.add_many((s['id'], s['submission_text']) for s in submissions)
+    batch = index.similar_to([s['id'] for s in submissions], threshold=0.3, k=5)
+
+    for target in submissions:
+        expected = pairwise_similar(target, submissions, 0.3) if target['submission_text'] else []
+        single = AIGradingHelper.find_similar_submissions(target, submissions, threshold=0.3)
+        assert [(s['id'], s['similarity_score']) for s in single] == expected
+        assert batch[target['id']] == expected
+
+
+def test_replaced_and_removed_entries_drop_out():
+    index = SubmissionSimilarityIndex()
+    index.add_many([(1, 'alpha beta gamma'), (2, 'alpha beta gamma'), (3, 'delta')])
+    assert index.query('alpha beta gamma', exclude=1) == [(2, 1.0)]
+
+    index.add(2, 'delta epsilon')
+    index.remove(3)
+    assert index.query('alpha beta gamma', exclude=1) == []
+    assert index.similar_to([2], threshold=0.1) == {2: []}
+    assert len(index) == 2
+
+
+@pytest.fixture
+def app(app):
+    SubmissionSimilarityService.invalidate()
+    return app
+
+
+def test_service_index_follows_new_and_resubmitted_work(app):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    users = [User(username=f'u{i}', email=f'u{i}@example.com', role_id=role.id, password_hash='x') for i in range(4)]
+    db.session.add_all(users)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=users[0].id)
+    db.session.add(course)
+    db.session.flush()
+    assignment = Assignment(title='A', description='d', course_id=course.id, instructor_id=users[0].id)
+    db.session.add(assignment)
+    db.session.flush()
+
+    start = datetime(2026, 10, 1)
+    first = AssignmentSubmission(assignment_id=assignment.id, student_id=users[1].id,
+                                 content='loss curve of the model', submitted_at=start)
+    second = AssignmentSubmission(assignment_id=assignment.id, student_id=users[2].id,
+                                  content='loss curve of the model', submitted_at=start, grade=90.0)
+    db.session.add_all([first, second])
+    db.session.commit()
+
+    similar = SubmissionSimilarityService.similar_submissions(first)
+    assert similar == [{'submission_id': second.id, 'student_id': users[2].id, 'grade': 90.0, 'similarity_score': 1.0}]
+
+    # A resubmission with new text and a brand-new submission are both picked up
+    second.content = 'an unrelated essay'
+    second.submitted_at = start + timedelta(days=1)
+    third = AssignmentSubmission(assignment_id=assignment.id, student_id=users[3].id,
+                                 content='loss curve of the model', submitted_at=start)
+    db.session.add(third)
+    db.session.commit()
+
+    batch = SubmissionSimilarityService.similar_for_assignment(assignment.id)
+    assert [s['submission_id'] for s in batch[first.id]] == [third.id]
+    assert batch[second.id] == []
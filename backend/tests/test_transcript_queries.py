@@ -0,0 +1,99 @@
+"""
+Tests that a transcript build issues a fixed number of queries, however
+many courses, modules and lessons the student has, and scores modules
+the same way ModuleProgress.to_dict does.
+"""
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import Assignment, AssignmentSubmission, Course, Enrollment, Lesson, Module, Quiz
+from src.models.quiz_progress_models import QuizAttempt
+from src.models.student_models import LessonCompletion, ModuleProgress
+from src.services.certificate_service import CertificateService
+
+
+def build_student(courses, modules, lessons):
+    role = Role(name='student')
+    db.session.add(role)
+    db.session.flush()
+    instructor = User(username='teacher', email='teacher@example.com', role_id=role.id, password_hash='x')
+    student = User(username='student', email='student@example.com', role_id=role.id, password_hash='x',
+                   first_name='Ada', last_name='Mwale')
+    db.session.add_all([instructor, student])
+    db.session.flush()
+
+    for c in range(courses):
+        course = Course(title=f'Course {c}', description='d', instructor_id=instructor.id)
+        db.session.add(course)
+        db.session.flush()
+        enrollment = Enrollment(student_id=student.id, course_id=course.id)
+        db.session.add(enrollment)
+        db.session.flush()
+        for m in range(modules):
+            module = Module(title=f'Module {c}.{m}', course_id=course.id, order=m)
+            db.session.add(module)
+            db.session.flush()
+            db.session.add(ModuleProgress(student_id=student.id, module_id=module.id, enrollment_id=enrollment.id,
+                                          quiz_score=70.0, assignment_score=50.0, status='in_progress'))
+            if m % 2:
+                db.session.add(Quiz(title='Final', module_id=module.id, is_published=True))
+            for n in range(lessons):
+                lesson = Lesson(title=f'Lesson {n}', content_type='text', content_data='x',
+                                module_id=module.id, order=n)
+                db.session.add(lesson)
+                db.session.flush()
+                if n == lessons - 1:
+                    continue  # Not started
+                db.session.add(LessonCompletion(student_id=student.id, lesson_id=lesson.id,
+                                                reading_progress=40.0 + 10 * n, engagement_score=30.0 + 15 * n))
+                if n % 3 == 0:
+                    quiz = Quiz(title='Check', module_id=module.id, lesson_id=lesson.id, is_published=True,
+                                passing_score=60)
+                    db.session.add(quiz)
+                    db.session.flush()
+                    for number, score in enumerate((40.0, 85.0 - n), start=1):
+                        db.session.add(QuizAttempt(user_id=student.id, quiz_id=quiz.id, attempt_number=number,
+                                                   score_percentage=score))
+                if n % 3 == 1:
+                    assignment = Assignment(title='Task', description='d', lesson_id=lesson.id,
+                                            instructor_id=instructor.id, points_possible=50)
+                    db.session.add(assignment)
+                    db.session.flush()
+                    db.session.add(AssignmentSubmission(assignment_id=assignment.id, student_id=student.id,
+                                                        grade=20.0 + 5 * n if n != 4 else None))
+    db.session.commit()
+    return student.id
+
+
+def transcript_queries(student_id, count_queries):
+    db.session.expire_all()
+    with count_queries() as statements:
+        transcript = CertificateService._build_transcript(student_id)
+    return transcript, len(statements)
+
+
+def test_query_count_is_independent_of_course_size(app, count_queries):
+    small, small_count = transcript_queries(build_student(1, 1, 3), count_queries)
+    db.session.rollback()
+    db.drop_all()
+    db.create_all()
+    large, large_count = transcript_queries(build_student(3, 4, 6), count_queries)
+
+    assert len(small['course_history']) == 1 and len(large['course_history']) == 3
+    assert large_count == small_count
+
+
+def test_module_scores_match_module_progress(app):
+    student_id = build_student(2, 2, 7)
+    transcript = CertificateService._build_transcript(student_id)
+
+    expected = {mp.id: mp.to_dict() for mp in ModuleProgress.query.filter_by(student_id=student_id)}
+    modules = [module for course in transcript['course_history'] for module in course['modules']]
+    assert len(modules) == 4
+    for module in modules:
+        for key, value in expected[module['id']].items():
+            assert module[key] == pytest.approx(value) if isinstance(value, float) else module[key] == value
+    for course in transcript['course_history']:
+        scores = [module['module_score'] for module in course['modules']]
+        assert course['enrollment']['course_score'] == pytest.approx(sum(scores) / len(scores))
@@ -0,0 +1,116 @@
+"""
+Tests for set-based waitlist migration between cohorts.
+"""
+
+
+import pytest
+
+from src.models.user_models import db, User, Role
+from src.models.course_models import ApplicationWindow, Course, Enrollment
+from src.models.course_application import ApplicationMigrationLog, CourseApplication
+from src.services.waitlist_service import WaitlistService
+
+
+@pytest.fixture
+def cohorts(app):
+    role = Role(name='admin')
+    db.session.add(role)
+    db.session.flush()
+    admin = User(username='admin', email='admin@example.com', role_id=role.id, password_hash='x')
+    db.session.add(admin)
+    db.session.flush()
+    course = Course(title='C', description='d', instructor_id=admin.id)
+    db.session.add(course)
+    db.session.flush()
+    source = ApplicationWindow(course_id=course.id, cohort_label='Jan')
+    target = ApplicationWindow(course_id=course.id, cohort_label='Mar', max_students=5)
+    db.session.add_all([source, target])
+    db.session.flush()
+
+    # Two seats taken by an enrollment and an earlier migrated-in application
+    db.session.add(Enrollment(student_id=admin.id, course_id=course.id, application_window_id=target.id, status='active'))
+    db.session.add(CourseApplication(course_id=course.id, full_name='Earlier', email='earlier@example.com',
+                                     phone='1', motivation='m', status='pending', migrated_to_window_id=target.id))
+    applications = [CourseApplication(course_id=course.id, full_name=f'A{i}', email=f'a{i}@example.com', phone='1',
+                                      motivation='m', status='waitlisted', application_window_id=source.id,
+                                      final_rank_score=float(i), admin_notes='Strong' if i == 4 else None)
+                    for i in range(6)]
+    db.session.add_all(applications)
+    db.session.commit()
+    return {'admin': admin.id, 'course': course.id, 'source': source.id, 'target': target.id,
+            'applications': [a.id for a in applications]}
+
+
+def test_moves_the_top_ranked_applications_into_the_free_seats(cohorts, count_queries):
+    with count_queries() as statements:
+        success, message, result = WaitlistService.bulk_migrate_waitlist_to_next_cohort(
+            course_id=cohorts['course'], source_window_id=cohorts['source'], target_window_id=cohorts['target'],
+            admin_id=cohorts['admin'], notes='Seats freed')
+
+    assert success and message == 'Migrated 3 of 3 applications'
+    ids = cohorts['applications']
+    assert [m['application_id'] for m in result['migrated']] == [ids[5], ids[4], ids[3]]
+    assert result['available_spots'] == 3
+    assert len([s for s in statements if s.lstrip().upper().startswith('UPDATE')]) == 1
+    assert len(statements) < 10
+
+    db.session.expire_all()
+    moved = CourseApplication.query.get(ids[4])
+    assert (moved.status, moved.application_window_id, moved.original_window_id) == ('pending', cohorts['target'], cohorts['source'])
+    assert moved.cohort_label == 'Mar' and moved.migration_notes == 'Seats freed'
+    assert moved.admin_notes.startswith('Strong\n[') and moved.admin_notes.endswith(
+        f"Migrated from cohort {cohorts['source']} to {cohorts['target']}: Seats freed")
+    assert CourseApplication.query.get(ids[3]).admin_notes.endswith(f"to {cohorts['target']}: Seats freed")
+    assert CourseApplication.query.get(ids[2]).status == 'waitlisted'
+
+    logs = ApplicationMigrationLog.query.all()
+    assert sorted(log.application_id for log in logs) == sorted(ids[3:])
+    assert len({log.batch_id for log in logs}) == 1 and logs[0].from_window_id == cohorts['source']
+
+    # The cohort is now full
+    success, message, result = WaitlistService.bulk_migrate_waitlist_to_next_cohort(
+        course_id=cohorts['course'], source_window_id=cohorts['source'], target_window_id=cohorts['target'],
+        admin_id=cohorts['admin'])
+    assert not success and message == 'Target cohort is at full capacity'
+    success, message, _ = WaitlistService.migrate_application_to_cohort(ids[0], cohorts['target'], cohorts['admin'])
+    assert not success and message == 'Target cohort is at capacity'
+
+
+def test_max_count_and_single_migration_share_the_engine(cohorts):
+    ids = cohorts['applications']
+    success, _, result = WaitlistService.bulk_migrate_waitlist_to_next_cohort(
+        course_id=cohorts['course'], source_window_id=cohorts['source'], target_window_id=cohorts['target'],
+        admin_id=cohorts['admin'], max_count=1)
+    assert success and [m['application_id'] for m in result['migrated']] == [ids[5]]
+
+    success, message, data = WaitlistService.migrate_application_to_cohort(ids[0], cohorts['target'], cohorts['admin'])
+    assert success and data['original_window_id'] == cohorts['source'] and data['new_status'] == 'pending'
+    assert CourseApplication.query.get(ids[0]).status == 'pending'
+    assert ApplicationMigrationLog.query.count() == 2
+
+    success, message, _ = WaitlistService.migrate_application_to_cohort(ids[0], cohorts['target'], cohorts['admin'])
+    assert not success and message == 'Application is not waitlisted (current status: pending)'
+
+
+def test_status_change_before_the_lock_is_reported_without_an_audit_row(cohorts, monkeypatch):
+    ids = cohorts['applications']
+    lock_window = WaitlistService._lock_window
+
+    def review_then_lock(window_id):
+        # Another admin rejects the application after it was read as waitlisted
+        db.session.execute(db.text("UPDATE course_applications SET status = 'rejected' WHERE id = :id"), {'id': ids[0]})
+        return lock_window(window_id)
+
+    monkeypatch.setattr(WaitlistService, '_lock_window', staticmethod(review_then_lock))
+    success, message, data = WaitlistService.migrate_application_to_cohort(ids[0], cohorts['target'], cohorts['admin'])
+    assert not success and message == 'Application is not waitlisted (current status: rejected)' and data == {}
+    assert ApplicationMigrationLog.query.count() == 0
+
+    # The UPDATE itself refuses rows that are no longer waitlisted
+    CourseApplication.query.get(ids[0]).status = 'rejected'
+    db.session.commit()
+    target = ApplicationWindow.query.get(cohorts['target'])
+    with pytest.raises(ValueError):
+        WaitlistService._apply_migration([(ids[0], cohorts['source']), (ids[1], cohorts['source'])], target, cohorts['admin'])
+    db.session.rollback()
+    assert ApplicationMigrationLog.query.count() == 0
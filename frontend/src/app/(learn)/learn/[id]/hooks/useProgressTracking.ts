@@ -577,7 +577,7 @@ export const useProgressTracking = ({
         if (!token) return;
 
         const apiBaseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:5001/api/v1';
-        const url = `${apiBaseUrl}/student/lessons/${currentLesson.id}/progress`;
+        const url = `${apiBaseUrl}/student/lessons/${currentLesson.id}/progress/heartbeat`;
         const payload = JSON.stringify({
           reading_progress: reading,
           engagement_score: engagement,
@@ -325,7 +325,7 @@ const GradingPage = () => {
       const allFilters: SubmissionFilters = {
         status: 'all',
         page: 1,
-        per_page: 200,
+        per_page: 100,
         search_query: searchQuery || undefined,
         sort_by: 'priority',
         sort_order: 'desc',
@@ -343,7 +343,13 @@ const GradingPage = () => {
         try {
           const assignmentData = await GradingService.getAssignmentSubmissions(allFilters);
           if (assignmentData.analytics) setAnalytics(assignmentData.analytics);
-          allItems.push(...assignmentData.submissions.map(sub => ({
+          // The queue caps per_page, so follow the remaining pages
+          const assignmentSubmissions = [...assignmentData.submissions];
+          for (let page = 2; page <= (assignmentData.pagination?.pages ?? 1); page++) {
+            const nextPage = await GradingService.getAssignmentSubmissions({ ...allFilters, page });
+            assignmentSubmissions.push(...nextPage.submissions);
+          }
+          allItems.push(...assignmentSubmissions.map(sub => ({
             id: sub.id,
             type: 'assignment' as const,
             title: sub.assignment_title,
@@ -377,7 +383,12 @@ const GradingPage = () => {
       if (selectedType === 'all' || selectedType === 'project') {
         try {
           const projectData = await GradingService.getProjectSubmissions(allFilters);
-          allItems.push(...projectData.submissions.map(sub => ({
+          const projectSubmissions = [...projectData.submissions];
+          for (let page = 2; page <= (projectData.pagination?.pages ?? 1); page++) {
+            const nextPage = await GradingService.getProjectSubmissions({ ...allFilters, page });
+            projectSubmissions.push(...nextPage.submissions);
+          }
+          allItems.push(...projectSubmissions.map(sub => ({
             id: sub.id,
             type: 'project' as const,
             title: sub.project_title,
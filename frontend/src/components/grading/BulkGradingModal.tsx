@@ -16,6 +16,7 @@ import EnhancedGradingService, {
   BulkGradeRequest,
   FeedbackTemplate 
 } from '@/services/enhanced-grading.service';
+import GradingService from '@/services/grading.service';
 
 interface BulkGradingModalProps {
   isOpen: boolean;
@@ -48,6 +49,7 @@ export const BulkGradingModal: React.FC<BulkGradingModalProps> = ({
     grace_period_days: 1
   });
   const [processing, setProcessing] = useState(false);
+  const [taskProgress, setTaskProgress] = useState<number | null>(null);
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
@@ -177,13 +179,19 @@ export const BulkGradingModal: React.FC<BulkGradingModalProps> = ({
         };
       }
 
-      await EnhancedGradingService.bulkGradeSubmissions(bulkRequest);
+      const response: any = await EnhancedGradingService.bulkGradeSubmissions(bulkRequest);
+      // Large batches are graded in the background (HTTP 202 with a task_id)
+      if (response && 'task_id' in response) {
+        setTaskProgress(0);
+        await GradingService.waitForBulkGrade(response.task_id, setTaskProgress);
+      }
       onSuccess();
       onClose();
     } catch (err: any) {
       setError(err.message || 'Failed to submit grades');
     } finally {
       setProcessing(false);
+      setTaskProgress(null);
     }
   };
 
@@ -473,7 +481,7 @@ export const BulkGradingModal: React.FC<BulkGradingModalProps> = ({
               {processing ? (
                 <>
                   <div className="animate-spin rounded-full h-4 w-4 border-t-2 border-white mr-2"></div>
-                  Processing...
+                  {taskProgress !== null ? `Grading... ${Math.round(taskProgress)}%` : 'Processing...'}
                 </>
               ) : (
                 <>
@@ -229,6 +229,28 @@ export interface BulkGradeRequest {
   }>;
 }
 
+/**
+ * Response when a bulk grading request is too large to grade inline and
+ * runs as a background task instead (HTTP 202)
+ */
+export interface BulkGradeTask {
+  task_id: string;
+  status: string;
+  poll_url: string;
+  message?: string;
+}
+
+export interface BulkGradeTaskStatus {
+  status: 'pending' | 'running' | 'completed' | 'failed';
+  progress: number;
+  result?: {
+    graded_count: number;
+    error_count: number;
+    errors: string[];
+  };
+  error?: string;
+}
+
 /**
  * Response from grading endpoints - includes auto-modification info 
  * when score is below passing threshold
@@ -413,7 +435,7 @@ export class GradingService {
    */
   static async bulkGradeAssignments(
     bulkData: BulkGradeRequest
-  ): Promise<{ message: string; graded_count: number; errors?: string[] }> {
+  ): Promise<{ message: string; graded_count: number; errors?: string[] } | BulkGradeTask> {
     try {
       const response = await apiClient.post(
         `${this.BASE_PATH}/assignments/submissions/bulk-grade`,
@@ -425,6 +447,46 @@ export class GradingService {
     }
   }
 
+  /**
+   * Get progress of a background bulk grading task
+   */
+  static async getBulkGradeStatus(taskId: string): Promise<BulkGradeTaskStatus> {
+    try {
+      const response = await apiClient.get(
+        `${this.BASE_PATH}/assignments/submissions/bulk-grade/${taskId}`,
+        // A failed task is reported with HTTP 500
+        { validateStatus: (status) => status < 400 || status === 500 }
+      );
+      if (response.status === 500 && response.data?.status !== 'failed') {
+        throw new Error(response.data?.message || 'Failed to get bulk grading status');
+      }
+      return response.data;
+    } catch (error) {
+      throw ApiErrorHandler.handleError(error);
+    }
+  }
+
+  /**
+   * Poll a background bulk grading task until it completes; rejects if it fails
+   */
+  static async waitForBulkGrade(
+    taskId: string,
+    onProgress?: (progress: number) => void,
+    pollIntervalMs: number = 2000
+  ): Promise<NonNullable<BulkGradeTaskStatus['result']>> {
+    for (;;) {
+      const status = await this.getBulkGradeStatus(taskId);
+      onProgress?.(status.progress ?? 0);
+      if (status.status === 'completed') {
+        return status.result ?? { graded_count: 0, error_count: 0, errors: [] };
+      }
+      if (status.status === 'failed') {
+        throw new Error(status.error || 'Bulk grading failed');
+      }
+      await new Promise(resolve => setTimeout(resolve, pollIntervalMs));
+    }
+  }
+
   // =====================
   // PROJECT GRADING
   // =====================
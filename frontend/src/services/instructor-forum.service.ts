@@ -31,6 +31,17 @@ export interface ForumPost {
     can_pin: boolean;
     can_lock: boolean;
   };
+  replies?: ForumPost[];
+  replies_pagination?: RepliesPagination;
+}
+
+export interface RepliesPagination {
+  current_page: number;
+  per_page: number;
+  total_pages: number;
+  total_items: number;
+  has_next: boolean;
+  has_prev: boolean;
 }
 
 export interface Forum {
@@ -97,6 +108,8 @@ export interface CreateReplyData {
 
 export class InstructorForumService {
   private static readonly BASE_PATH = '/forums';
+  // Largest page the thread details endpoint serves
+  private static readonly REPLIES_PER_PAGE = 200;
 
   // Get all forums (instructor perspective)
   static async getAllForums(): Promise<{
@@ -182,9 +195,25 @@ export class InstructorForumService {
   // Get thread details
   static async getThreadDetails(threadId: number): Promise<ForumPost> {
     try {
-      const response = await apiClient.get(`${this.BASE_PATH}/threads/${threadId}`);
+      const response = await apiClient.get(`${this.BASE_PATH}/threads/${threadId}`, {
+        params: { page: 1, per_page: this.REPLIES_PER_PAGE }
+      });
       if (response.data.success && response.data.data) {
-        return response.data.data;
+        const thread: ForumPost = response.data.data;
+        const replies = [...(thread.replies || [])];
+        let pagination = thread.replies_pagination;
+        // Replies are paginated; follow the remaining pages so long threads are shown in full
+        while (pagination?.has_next) {
+          const next = await apiClient.get(`${this.BASE_PATH}/threads/${threadId}`, {
+            params: { page: pagination.current_page + 1, per_page: this.REPLIES_PER_PAGE }
+          });
+          if (!next.data.success || !next.data.data) {
+            break;
+          }
+          replies.push(...(next.data.data.replies || []));
+          pagination = next.data.data.replies_pagination;
+        }
+        return { ...thread, replies, replies_pagination: pagination };
       }
       throw new Error('Thread not found');
     } catch (error) {
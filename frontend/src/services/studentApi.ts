@@ -477,7 +477,12 @@ export class StudentApiService {
     time_spent?: number;
     auto_saved?: boolean;
   }): Promise<any> {
-    const response = await api.post(`/student/lessons/${lessonId}/progress`, progressData);
+    // Periodic auto-saves are heartbeats: the backend coalesces them and only
+    // runs the full update (auto-completion, unlocks) when a threshold is crossed
+    const endpoint = progressData.auto_saved
+      ? `/student/lessons/${lessonId}/progress/heartbeat`
+      : `/student/lessons/${lessonId}/progress`;
+    const response = await api.post(endpoint, progressData);
     return response.data;
   }
 